@@ -0,0 +1,36 @@
+"""add confirmed member counter to clubs
+
+Revision ID: 0a1b2c3d4e5f
+Revises: f0a1b2c3d4e5
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a1b2c3d4e5f'
+down_revision: Union[str, None] = 'f0a1b2c3d4e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('clubs', sa.Column('confirmed_members', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE clubs SET confirmed_members = (
+            SELECT COUNT(*) FROM club_memberships
+            WHERE club_memberships.club_id = clubs.id
+              AND club_memberships.status = 'active'
+              AND club_memberships.payment_confirmed = true
+        )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('clubs', 'confirmed_members')
@@ -0,0 +1,69 @@
+"""index audit for the hot query paths
+
+Revision ID: 1b2c3d4e5f6a
+Revises: 0a1b2c3d4e5f
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b2c3d4e5f6a'
+down_revision: Union[str, None] = '0a1b2c3d4e5f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PENDING = "status = 'PENDING'"
+UNPAID = "paid = false"
+PENDING_HOLD = "status = 'active' AND payment_confirmed = false"
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('ix_payments_status', 'payments', ['status'], None),
+    ('ix_payments_payer_id_date_created', 'payments', ['payer_id', 'date_created'], None),
+    ('ix_payments_pending', 'payments', ['date_created'], PENDING),
+    ('ix_exam_payments_payment_reference', 'exam_payments', ['payment_reference'], None),
+    ('ix_exam_payments_student_exam_fee_id_status', 'exam_payments', ['student_exam_fee_id', 'status'], None),
+    ('ix_exam_payments_pending', 'exam_payments', ['date_created'], PENDING),
+    ('ix_student_exam_fee_student_exam', 'student_exam_fee', ['student_id', 'exam_fee_id'], None),
+    ('ix_student_exam_fee_unpaid', 'student_exam_fee', ['exam_fee_id'], UNPAID),
+    ('ix_student_fee_unpaid', 'student_fee', ['student_id'], UNPAID),
+    ('ix_club_memberships_student_club', 'club_memberships', ['student_id', 'club_id'], None),
+    ('ix_club_memberships_club_confirmed', 'club_memberships', ['club_id', 'payment_confirmed'], None),
+    ('ix_club_memberships_pending_holds', 'club_memberships', ['hold_expires_at'], PENDING_HOLD),
+    ('ix_club_waitlist_student_status', 'club_waitlist', ['student_id', 'status'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and building
+    # without it would lock payments against writes for the whole build
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            predicate = sa.text(where) if where else None
+            op.create_index(
+                name, table, columns, unique=False, if_not_exists=True,
+                postgresql_concurrently=True, postgresql_where=predicate, sqlite_where=predicate,
+            )
+        # Superseded by the pending-holds partial index
+        op.drop_index(
+            'ix_club_memberships_hold_expires_at', table_name='club_memberships',
+            if_exists=True, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_club_memberships_hold_expires_at', 'club_memberships', ['hold_expires_at'], unique=False,
+            if_not_exists=True, postgresql_concurrently=True,
+        )
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,69 @@
+"""native uuid ids for the high-volume payment and fee tables
+
+Revision ID: 2c3d4e5f6a7b
+Revises: 1b2c3d4e5f6a
+Create Date: 2026-10-20 09:00:00.000000
+
+Converts payments, exam_payments, payment_items and student_fee ids (and the
+foreign keys to them) from varchar to native uuid. Existing ids are uuid text
+already, so the values do not change. ALTER COLUMN ... TYPE rewrites each
+table under an exclusive lock, so run it in a maintenance window.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c3d4e5f6a7b'
+down_revision: Union[str, None] = '1b2c3d4e5f6a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column) pairs converted, referenced keys before the columns referencing them
+ID_COLUMNS = [
+    ('payments', 'id'),
+    ('exam_payments', 'id'),
+    ('payment_items', 'id'),
+    ('student_fee', 'id'),
+    ('payment_items', 'payment_id'),
+    ('payment_students', 'payment_id'),
+]
+# (name, table, column, referenced table, ondelete)
+FOREIGN_KEYS = [
+    ('payment_items_payment_id_fkey', 'payment_items', 'payment_id', 'payments', None),
+    ('payment_students_payment_id_fkey', 'payment_students', 'payment_id', 'payments', 'CASCADE'),
+]
+UUID_PATTERN = '^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}$'
+
+
+def _swap_column_types(type_, using) -> None:
+    for name, table, _, _, _ in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+    for table, column in ID_COLUMNS:
+        op.alter_column(table, column, type_=type_, postgresql_using=f'{column}::{using}')
+    for name, table, column, referenced, ondelete in FOREIGN_KEYS:
+        op.create_foreign_key(name, table, referenced, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    # Fail with the offending table instead of a bare cast error halfway through
+    checks = '\n'.join(
+        f"IF EXISTS (SELECT 1 FROM {table} WHERE {column} !~* '{UUID_PATTERN}') THEN "
+        f"RAISE EXCEPTION '{table}.{column} holds ids that are not UUIDs'; END IF;"
+        for table, column in ID_COLUMNS
+    )
+    op.execute(f"DO $$ BEGIN\n{checks}\nEND $$")
+    _swap_column_types(sa.Uuid(), 'uuid')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    _swap_column_types(sa.String(), 'text')
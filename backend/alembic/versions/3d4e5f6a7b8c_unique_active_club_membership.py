@@ -0,0 +1,68 @@
+"""one active club membership per student and club
+
+Revision ID: 3d4e5f6a7b8c
+Revises: 2c3d4e5f6a7b
+Create Date: 2026-10-21 09:00:00.000000
+
+Concurrent checkouts for the same student could each take a seat and insert
+an active membership. Duplicates left behind are made inactive (a confirmed
+one is kept, else the latest hold) and the club counters recomputed before
+the partial unique index is built.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d4e5f6a7b8c'
+down_revision: Union[str, None] = '2c3d4e5f6a7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ACTIVE = "status = 'active'"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(f"""
+        UPDATE club_memberships SET status = 'inactive', hold_expires_at = NULL
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY student_id, club_id
+                    ORDER BY coalesce(payment_confirmed, false) DESC, hold_expires_at DESC NULLS LAST, id
+                ) AS n
+                FROM club_memberships WHERE {ACTIVE}
+            ) duplicates
+            WHERE n > 1
+        )
+    """)
+    op.execute(f"""
+        UPDATE clubs SET
+            seats_taken = (
+                SELECT count(*) FROM club_memberships m WHERE m.club_id = clubs.id AND m.{ACTIVE}
+            ),
+            confirmed_members = (
+                SELECT count(*) FROM club_memberships m
+                WHERE m.club_id = clubs.id AND m.{ACTIVE} AND m.payment_confirmed = true
+            )
+    """)
+    # Built without blocking checkouts, like the other hot-path indexes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_club_memberships_active', 'club_memberships', ['student_id', 'club_id'], unique=True,
+            if_not_exists=True, postgresql_concurrently=True,
+            postgresql_where=sa.text(ACTIVE), sqlite_where=sa.text(ACTIVE),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'uq_club_memberships_active', table_name='club_memberships',
+            if_exists=True, postgresql_concurrently=True,
+        )
@@ -0,0 +1,59 @@
+"""add billing_runs table and student_fee.term
+
+Revision ID: a5b6c7d8e9f0
+Revises: f4a5b6c7d8e9
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5b6c7d8e9f0'
+down_revision: Union[str, None] = 'f4a5b6c7d8e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+billing_run_status = sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='billingrunstatus')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'billing_runs',
+        sa.Column('term', sa.String(), nullable=False),
+        sa.Column('year_groups', sa.JSON(), nullable=False),
+        sa.Column('fee_codes', sa.JSON(), nullable=False),
+        sa.Column('due_date', sa.String(), nullable=True),
+        sa.Column('status', billing_run_status, nullable=False),
+        sa.Column('completed_year_groups', sa.JSON(), nullable=False),
+        sa.Column('rows_created', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_billing_runs_id'), 'billing_runs', ['id'], unique=False)
+    op.create_index(op.f('ix_billing_runs_term'), 'billing_runs', ['term'], unique=False)
+
+    # Existing rows keep a NULL term, which never conflicts with billed terms
+    op.add_column('student_fee', sa.Column('term', sa.String(), nullable=True))
+    op.create_index(op.f('ix_student_fee_term'), 'student_fee', ['term'], unique=False)
+    op.create_unique_constraint('uq_student_fee_student_fee_term', 'student_fee', ['student_id', 'fee_id', 'term'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_student_fee_student_fee_term', 'student_fee', type_='unique')
+    op.drop_index(op.f('ix_student_fee_term'), table_name='student_fee')
+    op.drop_column('student_fee', 'term')
+    op.drop_index(op.f('ix_billing_runs_term'), table_name='billing_runs')
+    op.drop_index(op.f('ix_billing_runs_id'), table_name='billing_runs')
+    op.drop_table('billing_runs')
+    billing_run_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,59 @@
+"""add exam_applicable_grades index table
+
+Revision ID: b6c7d8e9f0a1
+Revises: a5b6c7d8e9f0
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6c7d8e9f0a1'
+down_revision: Union[str, None] = 'a5b6c7d8e9f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+YEAR_GROUPS = ('YEAR_6', 'YEAR_7', 'YEAR_8', 'YEAR_9', 'YEAR_10', 'YEAR_11', 'YEAR_12')
+
+# The yeargroup type already exists for students.year_group
+year_group = sa.Enum(*YEAR_GROUPS, name='yeargroup').with_variant(
+    postgresql.ENUM(*YEAR_GROUPS, name='yeargroup', create_type=False), 'postgresql'
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    exam_applicable_grades = op.create_table(
+        'exam_applicable_grades',
+        sa.Column('exam_id', sa.String(), nullable=False),
+        sa.Column('year_group', year_group, nullable=False),
+        sa.ForeignKeyConstraint(['exam_id'], ['exam_fees.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('exam_id', 'year_group'),
+    )
+    op.create_index(
+        'ix_exam_applicable_grades_year_group', 'exam_applicable_grades', ['year_group', 'exam_id'], unique=False
+    )
+
+    # Backfill from the JSON lists on exam_fees
+    rows = []
+    for exam_id, grades in op.get_bind().execute(sa.text('SELECT id, applicable_grades FROM exam_fees')):
+        if isinstance(grades, str):
+            grades = json.loads(grades)
+        for grade in set(grades or []):
+            if grade in YEAR_GROUPS:
+                rows.append({'exam_id': exam_id, 'year_group': grade})
+    if rows:
+        op.bulk_insert(exam_applicable_grades, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_exam_applicable_grades_year_group', table_name='exam_applicable_grades')
+    op.drop_table('exam_applicable_grades')
@@ -0,0 +1,39 @@
+"""add analytics_snapshots table
+
+Revision ID: c1d2e3f4a5b6
+Revises: b5a757fc31a9
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c1d2e3f4a5b6'
+down_revision: Union[str, None] = 'b5a757fc31a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'analytics_snapshots',
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('taken_at', sa.DateTime(), nullable=False),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_analytics_snapshots_id'), 'analytics_snapshots', ['id'], unique=False)
+    op.create_index('ix_analytics_snapshots_kind_taken_at', 'analytics_snapshots', ['kind', 'taken_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_analytics_snapshots_kind_taken_at', table_name='analytics_snapshots')
+    op.drop_index(op.f('ix_analytics_snapshots_id'), table_name='analytics_snapshots')
+    op.drop_table('analytics_snapshots')
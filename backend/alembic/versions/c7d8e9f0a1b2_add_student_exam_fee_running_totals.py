@@ -0,0 +1,66 @@
+"""add running paid totals to student_exam_fee
+
+Revision ID: c7d8e9f0a1b2
+Revises: b6c7d8e9f0a1
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d8e9f0a1b2'
+down_revision: Union[str, None] = 'b6c7d8e9f0a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+exam_fee_status = sa.Enum('UNPAID', 'PARTIAL', 'PAID', name='examfeestatus')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    exam_fee_status.create(op.get_bind(), checkfirst=True)
+    op.add_column('student_exam_fee', sa.Column('amount_paid', sa.Float(), server_default='0', nullable=False))
+    op.add_column('student_exam_fee', sa.Column('installments_paid', sa.Integer(), server_default='0', nullable=False))
+    op.add_column(
+        'student_exam_fee',
+        sa.Column('payment_status', exam_fee_status, server_default='UNPAID', nullable=False),
+    )
+    op.create_index(
+        'ix_student_exam_fee_exam_status', 'student_exam_fee', ['exam_fee_id', 'payment_status'], unique=False
+    )
+
+    # Backfill the totals from completed exam payments
+    op.execute("""
+        UPDATE student_exam_fee SET
+            amount_paid = COALESCE((
+                SELECT SUM(ep.amount_paid) FROM exam_payments ep
+                WHERE ep.student_exam_fee_id = student_exam_fee.id AND ep.status = 'COMPLETED'
+            ), 0),
+            installments_paid = (
+                SELECT COUNT(*) FROM exam_payments ep
+                WHERE ep.student_exam_fee_id = student_exam_fee.id AND ep.status = 'COMPLETED'
+            )
+    """)
+    status = """CASE
+            WHEN paid OR amount_paid >= amount * (1 - COALESCE(discount_percentage, 0) / 100) - 0.01 THEN 'PAID'
+            WHEN amount_paid > 0 THEN 'PARTIAL'
+            ELSE 'UNPAID'
+        END"""
+    if op.get_bind().dialect.name == 'postgresql':
+        status = f"CAST({status} AS examfeestatus)"
+    op.execute(f"UPDATE student_exam_fee SET payment_status = {status}")
+    op.execute("UPDATE student_exam_fee SET paid = (payment_status = 'PAID')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_student_exam_fee_exam_status', table_name='student_exam_fee')
+    op.drop_column('student_exam_fee', 'payment_status')
+    op.drop_column('student_exam_fee', 'installments_paid')
+    op.drop_column('student_exam_fee', 'amount_paid')
+    exam_fee_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,74 @@
+"""add ledger_entries and student_balance_snapshots tables
+
+Revision ID: d2e3f4a5b6c7
+Revises: c1d2e3f4a5b6
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2e3f4a5b6c7'
+down_revision: Union[str, None] = 'c1d2e3f4a5b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ledger_entry_type = sa.Enum('CHARGE', 'DISCOUNT', 'PAYMENT', 'REVERSAL', name='ledgerentrytype')
+ledger_account = sa.Enum('RECEIVABLE', 'REVENUE', 'DISCOUNTS', 'CASH', name='ledgeraccount')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'ledger_entries',
+        sa.Column('student_id', sa.String(), nullable=False),
+        sa.Column('entry_type', ledger_entry_type, nullable=False),
+        sa.Column('debit_account', ledger_account, nullable=False),
+        sa.Column('credit_account', ledger_account, nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('source_type', sa.String(), nullable=False),
+        sa.Column('source_id', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('batch_id', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('source_type', 'source_id', 'entry_type', name='uq_ledger_entries_source'),
+    )
+    op.create_index(op.f('ix_ledger_entries_id'), 'ledger_entries', ['id'], unique=False)
+    op.create_index(op.f('ix_ledger_entries_batch_id'), 'ledger_entries', ['batch_id'], unique=False)
+    op.create_index('ix_ledger_entries_student_id_created_at', 'ledger_entries', ['student_id', 'created_at'], unique=False)
+
+    op.create_table(
+        'student_balance_snapshots',
+        sa.Column('student_id', sa.String(), nullable=False),
+        sa.Column('balance', sa.Float(), nullable=False),
+        sa.Column('as_of', sa.DateTime(), nullable=False),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_student_balance_snapshots_id'), 'student_balance_snapshots', ['id'], unique=False)
+    op.create_index(
+        'ix_student_balance_snapshots_student_id_as_of', 'student_balance_snapshots',
+        ['student_id', 'as_of'], unique=False,
+    )
+    # Existing balances are recomputed by scripts/backfill_ledger.py
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_student_balance_snapshots_student_id_as_of', table_name='student_balance_snapshots')
+    op.drop_index(op.f('ix_student_balance_snapshots_id'), table_name='student_balance_snapshots')
+    op.drop_table('student_balance_snapshots')
+    op.drop_index('ix_ledger_entries_student_id_created_at', table_name='ledger_entries')
+    op.drop_index(op.f('ix_ledger_entries_batch_id'), table_name='ledger_entries')
+    op.drop_index(op.f('ix_ledger_entries_id'), table_name='ledger_entries')
+    op.drop_table('ledger_entries')
+    ledger_account.drop(op.get_bind(), checkfirst=True)
+    ledger_entry_type.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,44 @@
+"""add year-end promotion and student leavers
+
+Revision ID: d8e9f0a1b2c3
+Revises: c7d8e9f0a1b2
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e9f0a1b2c3'
+down_revision: Union[str, None] = 'c7d8e9f0a1b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('students', sa.Column('left_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_students_left_at'), 'students', ['left_at'], unique=False)
+    op.create_table(
+        'year_end_promotions',
+        sa.Column('academic_year', sa.String(), nullable=False),
+        sa.Column('promoted', sa.Integer(), nullable=False),
+        sa.Column('leavers', sa.Integer(), nullable=False),
+        sa.Column('summary', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('academic_year'),
+    )
+    op.create_index(op.f('ix_year_end_promotions_id'), 'year_end_promotions', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_year_end_promotions_id'), table_name='year_end_promotions')
+    op.drop_table('year_end_promotions')
+    op.drop_index(op.f('ix_students_left_at'), table_name='students')
+    op.drop_column('students', 'left_at')
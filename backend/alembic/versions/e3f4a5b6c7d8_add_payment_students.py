@@ -0,0 +1,57 @@
+"""add payment_students link table
+
+Revision ID: e3f4a5b6c7d8
+Revises: d2e3f4a5b6c7
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f4a5b6c7d8'
+down_revision: Union[str, None] = 'd2e3f4a5b6c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'payment_students',
+        sa.Column('payment_id', sa.String(), nullable=False),
+        sa.Column('student_id', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['payment_id'], ['payments.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('payment_id', 'student_id'),
+    )
+    op.create_index('ix_payment_students_student_id', 'payment_students', ['student_id'], unique=False)
+
+    # Backfill from the JSON student_ids array, skipping ids that no longer exist.
+    # JSON array expansion is dialect-specific: Postgres in production, SQLite in dev
+    dialect = op.get_context().dialect.name
+    if dialect == 'postgresql':
+        op.execute("""
+            INSERT INTO payment_students (payment_id, student_id)
+            SELECT DISTINCT p.id, s.id
+            FROM payments p
+            CROSS JOIN LATERAL json_array_elements_text(p.student_ids) AS ids(student_id)
+            JOIN students s ON s.id = ids.student_id
+            ON CONFLICT DO NOTHING
+        """)
+    elif dialect == 'sqlite':
+        op.execute("""
+            INSERT OR IGNORE INTO payment_students (payment_id, student_id)
+            SELECT DISTINCT p.id, s.id
+            FROM payments p, json_each(p.student_ids) AS ids
+            JOIN students s ON s.id = ids.value
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_payment_students_student_id', table_name='payment_students')
+    op.drop_table('payment_students')
@@ -0,0 +1,44 @@
+"""add club seat counter and membership holds
+
+Revision ID: e9f0a1b2c3d4
+Revises: d8e9f0a1b2c3
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9f0a1b2c3d4'
+down_revision: Union[str, None] = 'd8e9f0a1b2c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('clubs', sa.Column('seats_taken', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('club_memberships', sa.Column('hold_expires_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_club_memberships_hold_expires_at'), 'club_memberships', ['hold_expires_at'], unique=False)
+
+    # Unpaid memberships from earlier checkouts become holds that the first sweep releases
+    op.execute("""
+        UPDATE club_memberships SET hold_expires_at = CURRENT_TIMESTAMP
+        WHERE status = 'active' AND (payment_confirmed IS NULL OR payment_confirmed = false)
+    """)
+    op.execute("""
+        UPDATE clubs SET seats_taken = (
+            SELECT COUNT(*) FROM club_memberships
+            WHERE club_memberships.club_id = clubs.id AND club_memberships.status = 'active'
+        )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_club_memberships_hold_expires_at'), table_name='club_memberships')
+    op.drop_column('club_memberships', 'hold_expires_at')
+    op.drop_column('clubs', 'seats_taken')
@@ -0,0 +1,54 @@
+"""add club waitlist
+
+Revision ID: f0a1b2c3d4e5
+Revises: e9f0a1b2c3d4
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f0a1b2c3d4e5'
+down_revision: Union[str, None] = 'e9f0a1b2c3d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'club_waitlist',
+        sa.Column('club_id', sa.String(), nullable=False),
+        sa.Column('student_id', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('queued_at', sa.DateTime(), nullable=False),
+        sa.Column('membership_id', sa.String(), nullable=True),
+        sa.Column('offered_at', sa.DateTime(), nullable=True),
+        sa.Column('offer_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['club_id'], ['clubs.id'], ),
+        sa.ForeignKeyConstraint(['membership_id'], ['club_memberships.id'], ),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_club_waitlist_id'), 'club_waitlist', ['id'], unique=False)
+    op.create_index(op.f('ix_club_waitlist_membership_id'), 'club_waitlist', ['membership_id'], unique=False)
+    op.create_index('ix_club_waitlist_queue', 'club_waitlist', ['club_id', 'status', 'queued_at'], unique=False)
+    op.create_index(
+        'uq_club_waitlist_open', 'club_waitlist', ['club_id', 'student_id'], unique=True,
+        postgresql_where=sa.text("status IN ('waiting', 'offered')"),
+        sqlite_where=sa.text("status IN ('waiting', 'offered')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_club_waitlist_open', table_name='club_waitlist')
+    op.drop_index('ix_club_waitlist_queue', table_name='club_waitlist')
+    op.drop_index(op.f('ix_club_waitlist_membership_id'), table_name='club_waitlist')
+    op.drop_index(op.f('ix_club_waitlist_id'), table_name='club_waitlist')
+    op.drop_table('club_waitlist')
@@ -0,0 +1,45 @@
+"""add reference_data_versions table
+
+Revision ID: f4a5b6c7d8e9
+Revises: e3f4a5b6c7d8
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+from uuid import uuid4
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a5b6c7d8e9'
+down_revision: Union[str, None] = 'e3f4a5b6c7d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    versions = op.create_table(
+        'reference_data_versions',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    op.create_index(op.f('ix_reference_data_versions_id'), 'reference_data_versions', ['id'], unique=False)
+    # Seed one row per cached table so bumps are always plain UPDATEs
+    op.bulk_insert(versions, [
+        {'id': str(uuid4()), 'name': name, 'version': 0, 'updated_at': datetime.now()}
+        for name in ('fees', 'exams', 'clubs')
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_reference_data_versions_id'), table_name='reference_data_versions')
+    op.drop_table('reference_data_versions')
@@ -0,0 +1,5 @@
+"""BSC School Payment Portal backend."""
+from dotenv import load_dotenv
+
+# Read .env once, before any app module reads its settings at import time
+load_dotenv()
@@ -1,17 +1,18 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import logging
+from pathlib import Path
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from app.models.base import Base
-import importlib
-import pkgutil
-import app.models
+import app.models  # noqa: F401  registers every model on Base.metadata
 import os
 
 # Configure logging
 logger = logging.getLogger(__name__)
-from dotenv import load_dotenv
-load_dotenv()
 # Create database URL for SQLAlchemy
 # Add default values and type conversion for port
 db_port = int(os.getenv('db_port', '5432'))  # Default to 5432 if not set
@@ -32,10 +33,23 @@ engine = create_engine(
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Dynamically load all model modules
-for _, module_name, _ in pkgutil.walk_packages(app.models.__path__, app.models.__name__ + "."):
-    importlib.import_module(module_name)
-    
+# Async engine for the routers that run on the event loop. Defaults to the same
+# database through asyncpg; `async_database_url` overrides it (e.g. sqlite+aiosqlite).
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv(
+    'async_database_url',
+    SQLALCHEMY_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1),
+)
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=int(os.getenv('async_db_pool_size', '20')),
+    max_overflow=int(os.getenv('async_db_max_overflow', '20')),
+)
+# Objects stay loaded after commit: lazy refreshes cannot run outside run_sync
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # Database dependency
 def get_db():
     db = SessionLocal()
@@ -44,9 +58,47 @@ def get_db():
     finally:
         db.close()
 
-def init_db():
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully")
+# Async database dependency. Sync services run on it through `await db.run_sync(...)`
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent
+
+def get_schema_check_mode() -> str:
+    """What a schema version mismatch does at startup, from `schema_check`: error (default), warn or off."""
+    mode = os.getenv('schema_check', 'error').lower()
+    if mode not in ('error', 'warn', 'off'):
+        logger.warning(f"Invalid schema_check {mode!r}; using error")
+        return 'error'
+    return mode
+
+def check_schema_version(bind=None, mode=None) -> bool:
+    """
+    Compare the database's Alembic revision with the migration heads. Schema
+    changes only ever go through `alembic upgrade head`; startup never creates
+    tables. A mismatch raises in `error` mode and is logged in `warn` mode.
+    Returns whether the schema is current.
+    """
+    mode = mode or get_schema_check_mode()
+    if mode == 'off':
+        return True
+    config = Config(str(ALEMBIC_DIR / 'alembic.ini'))
+    config.set_main_option('script_location', str(ALEMBIC_DIR / 'alembic'))
+    expected = set(ScriptDirectory.from_config(config).get_heads())
+    with (bind or engine).connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current == expected:
+        logger.info(f"Database schema is at {', '.join(sorted(current))}")
+        return True
+    message = (
+        f"Database schema is at {', '.join(sorted(current)) or 'no revision'} but the code expects "
+        f"{', '.join(sorted(expected))}; run `alembic upgrade head`"
+    )
+    if mode == 'error':
+        raise RuntimeError(message)
+    logger.warning(message)
+    return False
 
 def drop_all_tables():
     Base.metadata.drop_all(bind=engine)
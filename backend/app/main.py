@@ -1,32 +1,89 @@
+import time
+_import_started = time.perf_counter()
+
 from contextlib import asynccontextmanager
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base, get_db, init_db, drop_all_tables
+from .database import async_engine, get_db, check_schema_version
 from .routers import parent, student, club, payment, fees, exams, admin_analytics
+from .services.event_broker import configure_event_fanout, shutdown_event_fanout
+from .services.analytics_snapshot_service import get_snapshot_interval_seconds, run_scheduled_snapshot
+from .services.ledger_service import get_ledger_interval_seconds, snapshot_balances
+from .services.club_seat_service import (
+    get_counter_repair_interval_seconds,
+    get_hold_sweep_interval_seconds,
+    recount_club_members,
+    release_expired_holds,
+)
+from .services.club_waitlist_service import get_waitlist_interval_seconds, promote_waitlists
+from .utils.scheduler import run_with_session, start_periodic_job, stop_periodic_jobs
+from .utils.startup import StartupTimer
 import logging
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from fastapi import Depends
-from dotenv import load_dotenv
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-load_dotenv()
-# Create database tables
+startup = StartupTimer(_import_started)
+startup.record("imports", time.perf_counter() - _import_started)
+
+def start_periodic_jobs():
+    # Materialize the admin overviews on a schedule
+    start_periodic_job(
+        "analytics_snapshots",
+        get_snapshot_interval_seconds(),
+        run_with_session(run_scheduled_snapshot),
+    )
+    # Student balance snapshots for point-in-time balance queries
+    start_periodic_job(
+        "ledger_balance_snapshots",
+        get_ledger_interval_seconds(),
+        run_with_session(snapshot_balances),
+    )
+    # Hand club seats held by abandoned checkouts back
+    start_periodic_job(
+        "club_seat_holds",
+        get_hold_sweep_interval_seconds(),
+        run_with_session(release_expired_holds),
+    )
+    # Offer freed club seats to waitlisted students
+    start_periodic_job(
+        "club_waitlist",
+        get_waitlist_interval_seconds(),
+        run_with_session(promote_waitlists),
+    )
+    # Recompute the club member counters in case anything drifted
+    start_periodic_job(
+        "club_counter_repair",
+        get_counter_repair_interval_seconds(),
+        run_with_session(recount_club_members),
+    )
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Set up logging first
     logger.info("Starting application...")
     
-    # Initialize database
-    init_db()
-    # drop_all_tables()
-    logger.info("Database initialized")
+    # Tables come from Alembic migrations; only check the database is on the latest one
+    with startup.phase("schema_check"):
+        check_schema_version()
+
+    # Live dashboard events, optionally fanned out across nodes
+    with startup.phase("event_fanout"):
+        configure_event_fanout()
+
+    with startup.phase("periodic_jobs"):
+        start_periodic_jobs()
+    app.state.startup_report = startup.log()
     
     yield
     
     logger.info("Shutting down application...")
+    await stop_periodic_jobs()
+    shutdown_event_fanout()
+    await async_engine.dispose()
 
 app = FastAPI(title="BSC School Payment Portal API", lifespan=lifespan)
 
@@ -45,19 +102,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
-app.include_router(parent.router, prefix="/api/parents", tags=["parents"])
-app.include_router(student.router, prefix="/api/students", tags=["students"])
-app.include_router(club.router, prefix="/api/clubs", tags=["clubs"])
-app.include_router(payment.router, prefix="/api/payments", tags=["payments"])
-app.include_router(fees.router, prefix="/api/fees", tags=["fees"])
-app.include_router(exams.router, prefix="/api/exams", tags=["exams"])
-app.include_router(admin_analytics.router, prefix="/api/admin", tags=["admin-analytics"])
+# Routers, mounted from a fixed list: (module, prefix, tag)
+ROUTERS = [
+    (parent, "/api/parents", "parents"),
+    (student, "/api/students", "students"),
+    (club, "/api/clubs", "clubs"),
+    (payment, "/api/payments", "payments"),
+    (fees, "/api/fees", "fees"),
+    (exams, "/api/exams", "exams"),
+    (admin_analytics, "/api/admin", "admin-analytics"),
+]
+with startup.phase("routers"):
+    for module, prefix, tag in ROUTERS:
+        app.include_router(module.router, prefix=prefix, tags=[tag])
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to BSC School Payment Portal API"}
 
+@app.get("/startup")
+async def startup_report():
+    """Per-phase timings of this worker's startup."""
+    return getattr(app.state, "startup_report", None) or startup.report()
+
 @app.get("/test-db")
 async def test_db(db: Session = Depends(get_db)):
     try:
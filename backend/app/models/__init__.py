@@ -0,0 +1,22 @@
+"""
+Every model module, imported from a fixed list so that importing `app.models`
+registers all tables on `Base.metadata` (for Alembic and the startup schema
+check) without scanning the package.
+"""
+from . import (
+    base,
+    classes,
+    parent,
+    student,
+    fee,
+    fees,
+    student_fee,
+    student_exam_fee,
+    payment,
+    club,
+    ledger,
+    analytics_snapshot,
+    billing_run,
+    promotion,
+    reference_data,
+)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime, JSON, Index
+from datetime import datetime
+
+from app.models.base import BaseModel
+
+
+class AnalyticsSnapshot(BaseModel):
+    __tablename__ = "analytics_snapshots"
+
+    kind = Column(String, nullable=False)  # school_fees, exam_fees, clubs
+    payload = Column(JSON, nullable=False)  # Serialized overview response
+    taken_at = Column(DateTime, default=datetime.now, nullable=False)
+
+    __table_args__ = (
+        # Serves "latest" and "as of <timestamp>" lookups per kind
+        Index("ix_analytics_snapshots_kind_taken_at", "kind", "taken_at"),
+    )
@@ -1,11 +1,36 @@
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import Column, String, DateTime
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
-from uuid import uuid4
+from app.utils.ids import new_id
 
 Base = declarative_base()
 
+
+class UUIDString(TypeDecorator):
+    """
+    A UUID id that Python code sees as its canonical string. Stored as a native
+    16-byte `uuid` on Postgres (smaller indexes and foreign keys than varchar)
+    and as text elsewhere.
+    """
+    impl = String
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(String())
+
+
 class BaseModel(Base):
     __abstract__ = True
 
-    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid4()))
\ No newline at end of file
+    id = Column(String, primary_key=True, index=True, default=new_id)
+
+
+class NativeUUIDModel(BaseModel):
+    """Base for high-volume tables whose ids (and the foreign keys to them) are native UUIDs."""
+    __abstract__ = True
+
+    id = Column(UUIDString, primary_key=True, index=True, default=new_id)
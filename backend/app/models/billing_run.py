@@ -0,0 +1,32 @@
+from sqlalchemy import Column, String, Integer, DateTime, JSON, Enum
+import enum
+from datetime import datetime
+
+from app.models.base import BaseModel
+
+
+class BillingRunStatus(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class BillingRun(BaseModel):
+    """One term's StudentFee generation, processed (and resumable) one year group at a time."""
+    __tablename__ = "billing_runs"
+
+    term = Column(String, nullable=False, index=True)  # e.g. "2026-T1"
+    year_groups = Column(JSON, nullable=False)  # YearGroup names in scope
+    fee_codes = Column(JSON, nullable=False)  # Fee codes in scope
+    due_date = Column(String, nullable=True)
+    status = Column(Enum(BillingRunStatus), default=BillingRunStatus.PENDING, nullable=False)
+
+    # Progress: year groups already billed and the StudentFee rows created so far
+    completed_year_groups = Column(JSON, default=list, nullable=False)
+    rows_created = Column(Integer, default=0, nullable=False)
+    error = Column(String, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -1,4 +1,7 @@
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Boolean
+from datetime import datetime
+
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Boolean, DateTime, Index, text
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
@@ -9,18 +12,89 @@ class Club(BaseModel):
     description = Column(String)
     price = Column(Float, nullable=False)
     capacity = Column(Integer)
+    # Member counters over active memberships, maintained by club_seat_service:
+    # held plus confirmed seats, and the confirmed (paid) ones
+    seats_taken = Column(Integer, nullable=False, default=0, server_default="0")
+    confirmed_members = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     memberships = relationship("ClubMembership", back_populates="club")
 
+    @hybrid_property
+    def pending_members(self):
+        """Unpaid seat holds."""
+        return self.seats_taken - self.confirmed_members
+
+    @property
+    def seats_left(self):
+        """Free seats, or None for clubs without a capacity."""
+        if self.capacity is None:
+            return None
+        return max(self.capacity - self.seats_taken, 0)
+
+# Unpaid seat holds, the only rows the hold sweeper looks at. Queries use this
+# same text so the partial index matches on SQLite and in generic Postgres plans
+PENDING_HOLD = text("status = 'active' AND payment_confirmed = false")
+_active = text("status = 'active'")
+
+
 class ClubMembership(BaseModel):
     __tablename__ = "club_memberships"
+    __table_args__ = (
+        Index("ix_club_memberships_student_club", "student_id", "club_id"),
+        # A student holds at most one seat per club, however many checkouts race for it
+        Index(
+            "uq_club_memberships_active", "student_id", "club_id", unique=True,
+            postgresql_where=_active, sqlite_where=_active,
+        ),
+        Index("ix_club_memberships_club_confirmed", "club_id", "payment_confirmed"),
+        Index(
+            "ix_club_memberships_pending_holds", "hold_expires_at",
+            postgresql_where=PENDING_HOLD, sqlite_where=PENDING_HOLD,
+        ),
+    )
 
     student_id = Column(String, ForeignKey("students.id"))
     club_id = Column(String, ForeignKey("clubs.id"))
     payment_confirmed = Column(Boolean, default=False)
-    status = Column(String, default="active")  # active, inactive
+    status = Column(String, default="active")  # active, inactive, expired
+    # While unpaid, the seat is held until this time and then released by the sweeper
+    hold_expires_at = Column(DateTime, nullable=True)
     
     # Relationships
     student = relationship("Student", back_populates="club_memberships")
-    club = relationship("Club", back_populates="memberships") 
\ No newline at end of file
+    club = relationship("Club", back_populates="memberships")
+
+
+# Waitlist entry statuses; waiting and offered entries are still open
+WAITLIST_WAITING = "waiting"
+WAITLIST_OFFERED = "offered"
+WAITLIST_ACCEPTED = "accepted"
+WAITLIST_EXPIRED = "expired"
+WAITLIST_CANCELLED = "cancelled"
+_open_entry = text("status IN ('waiting', 'offered')")
+
+
+class ClubWaitlistEntry(BaseModel):
+    """A student queued for a full club, first come first served."""
+    __tablename__ = "club_waitlist"
+    __table_args__ = (
+        # The promotion worker reads the head of one club's queue
+        Index("ix_club_waitlist_queue", "club_id", "status", "queued_at"),
+        # A family's own entries, for the portal and for settling them on payment
+        Index("ix_club_waitlist_student_status", "student_id", "status"),
+        # One open entry per student and club
+        Index(
+            "uq_club_waitlist_open", "club_id", "student_id", unique=True,
+            postgresql_where=_open_entry, sqlite_where=_open_entry,
+        ),
+    )
+
+    club_id = Column(String, ForeignKey("clubs.id"), nullable=False)
+    student_id = Column(String, ForeignKey("students.id"), nullable=False)
+    status = Column(String, nullable=False, default="waiting")  # waiting, offered, accepted, expired, cancelled
+    queued_at = Column(DateTime, nullable=False, default=datetime.now)
+    # An offer is a seat hold on membership_id, paid for through the normal school fees checkout
+    membership_id = Column(String, ForeignKey("club_memberships.id"), nullable=True, index=True)
+    offered_at = Column(DateTime, nullable=True)
+    offer_expires_at = Column(DateTime, nullable=True)
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Float, String, Boolean, JSON
+from sqlalchemy import Column, Float, String, Boolean, JSON, Enum, ForeignKey, Index, Table
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 
-from app.models.base import BaseModel
+from app.models.base import BaseModel, Base
+from app.models.classes import YearGroup
 
 class Fees(BaseModel):
     __tablename__ = "fees"
@@ -35,6 +36,14 @@ class ExamFees(BaseModel):
     applicable_grades = Column(JSON, nullable=True)  # Stores list of YearGroup names, e.g. ["YEAR_10", "YEAR_11", "YEAR_12"]
 
     student_exam_fees = relationship("StudentExamFee", back_populates="exam_fee", cascade="all, delete-orphan")
- 
 
 
+# Normalized copy of ExamFees.applicable_grades for set-based "exams for a year group"
+# and "students eligible for an exam" queries; see services/exam_applicability.py
+exam_applicable_grades = Table(
+    "exam_applicable_grades",
+    Base.metadata,
+    Column("exam_id", String, ForeignKey("exam_fees.id", ondelete="CASCADE"), primary_key=True),
+    Column("year_group", Enum(YearGroup), primary_key=True),
+    Index("ix_exam_applicable_grades_year_group", "year_group", "exam_id"),
+)
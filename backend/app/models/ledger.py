@@ -0,0 +1,63 @@
+from sqlalchemy import Column, String, Float, ForeignKey, Enum, DateTime, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+import enum
+from .base import BaseModel
+from datetime import datetime
+
+
+class LedgerEntryType(enum.Enum):
+    CHARGE = "charge"
+    DISCOUNT = "discount"
+    PAYMENT = "payment"
+    REVERSAL = "reversal"
+
+
+class LedgerAccount(enum.Enum):
+    RECEIVABLE = "receivable"  # What the student owes the school
+    REVENUE = "revenue"
+    DISCOUNTS = "discounts"
+    CASH = "cash"
+
+
+class LedgerEntry(BaseModel):
+    """One double-entry posting. Rows are append-only; corrections are new entries.
+
+    A debit to RECEIVABLE increases what the student owes, a credit decreases it.
+    """
+    __tablename__ = "ledger_entries"
+
+    student_id = Column(String, ForeignKey("students.id"), nullable=False)
+    entry_type = Column(Enum(LedgerEntryType), nullable=False)
+    debit_account = Column(Enum(LedgerAccount), nullable=False)
+    credit_account = Column(Enum(LedgerAccount), nullable=False)
+    amount = Column(Float, nullable=False)  # Always positive; direction comes from the accounts
+
+    # What the entry is for, e.g. ("student_fee", <id>) or ("exam_payment", <id>)
+    source_type = Column(String, nullable=False)
+    source_id = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+    # Set on rows posted together by a set-based statement
+    batch_id = Column(String, nullable=True, index=True)
+
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
+
+    student = relationship("Student", back_populates="ledger_entries")
+
+    __table_args__ = (
+        # Each source is posted at most once per entry type, so replays are no-ops
+        UniqueConstraint("source_type", "source_id", "entry_type", name="uq_ledger_entries_source"),
+        Index("ix_ledger_entries_student_id_created_at", "student_id", "created_at"),
+    )
+
+
+class StudentBalanceSnapshot(BaseModel):
+    """Periodic copy of every student's running balance for point-in-time queries."""
+    __tablename__ = "student_balance_snapshots"
+
+    student_id = Column(String, ForeignKey("students.id"), nullable=False)
+    balance = Column(Float, nullable=False)
+    as_of = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_student_balance_snapshots_student_id_as_of", "student_id", "as_of"),
+    )
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Enum, JSON, Boolean, DateTime
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Enum, JSON, Boolean, DateTime, Table, Index, text
 from sqlalchemy.orm import relationship
 import enum
-from .base import BaseModel
+from .base import Base, NativeUUIDModel, UUIDString
 from datetime import datetime
 
 class PaymentStatus(enum.Enum):
@@ -17,18 +17,38 @@ class PaymentType(enum.Enum):
     EXAM_FEES = "exam_fees"
 
 
-class PaymentItem(BaseModel):
+# Normalized copy of Payment.student_ids, so "which children are paid for" is an indexed lookup
+payment_students = Table(
+    'payment_students',
+    Base.metadata,
+    Column('payment_id', UUIDString, ForeignKey('payments.id', ondelete='CASCADE'), primary_key=True),
+    Column('student_id', String, ForeignKey('students.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_payment_students_student_id', 'student_id'),
+)
+
+
+class PaymentItem(NativeUUIDModel):
     __tablename__ = "payment_items"
 
-    payment_id = Column(String, ForeignKey("payments.id"), nullable=False, index=True)
+    payment_id = Column(UUIDString, ForeignKey("payments.id"), nullable=False, index=True)
     item_type = Column(Enum(PaymentType), nullable=False, index=True)
     amount = Column(Float, nullable=False)
 
     payment = relationship("Payment", back_populates="payment_items")
 
 
-class Payment(BaseModel):
+# Predicate of the pending-only partial indexes (enums are stored by name)
+_pending = text("status = 'PENDING'")
+
+
+class Payment(NativeUUIDModel):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_status", "status"),
+        Index("ix_payments_payer_id_date_created", "payer_id", "date_created"),
+        # Pending checkouts, oldest first, for reconciliation
+        Index("ix_payments_pending", "date_created", postgresql_where=_pending, sqlite_where=_pending),
+    )
 
     student_ids = Column(JSON, nullable=False)
     amount = Column(Float, nullable=False)
@@ -53,8 +73,13 @@ class Payment(BaseModel):
     )
 
 
-class ExamPayment(BaseModel):
+class ExamPayment(NativeUUIDModel):
     __tablename__ = "exam_payments"
+    __table_args__ = (
+        Index("ix_exam_payments_payment_reference", "payment_reference"),
+        Index("ix_exam_payments_student_exam_fee_id_status", "student_exam_fee_id", "status"),
+        Index("ix_exam_payments_pending", "date_created", postgresql_where=_pending, sqlite_where=_pending),
+    )
 
     student_exam_fee_id = Column(String, ForeignKey("student_exam_fee.id"), nullable=False)
     student_exam_fee = relationship("StudentExamFee", back_populates="exam_payments")
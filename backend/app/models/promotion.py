@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Integer, DateTime, JSON
+from datetime import datetime
+
+from app.models.base import BaseModel
+
+
+class YearEndPromotion(BaseModel):
+    """One applied year-end promotion. The unique academic year keeps it from running twice."""
+    __tablename__ = "year_end_promotions"
+
+    academic_year = Column(String, nullable=False, unique=True)  # The year being closed, e.g. "2025/2026"
+    promoted = Column(Integer, nullable=False)
+    leavers = Column(Integer, nullable=False)
+    summary = Column(JSON, nullable=False)  # The applied plan, as returned by the endpoint
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Integer, DateTime
+from .base import BaseModel
+from datetime import datetime
+
+
+class ReferenceDataVersion(BaseModel):
+    """Change counter per cached reference table ("fees", "exams", "clubs").
+
+    Every write to a cached table bumps its row in the same transaction, so each
+    worker can tell its in-memory copy is stale with one cheap query.
+    """
+    __tablename__ = "reference_data_versions"
+
+    name = Column(String, nullable=False, unique=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.now, nullable=False)
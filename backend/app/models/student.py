@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, Float, Enum
+from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, Float, Enum, DateTime
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 from .parent import parent_student_association
@@ -14,7 +14,8 @@ class Student(BaseModel):
     year_group = Column(Enum(YearGroup), nullable=False)
     class_name = Column(Enum(ClassName), nullable=False)
     email = Column(String, nullable=True, unique=True, index=True)
-    outstanding_balance = Column(Float, nullable=True)
+    outstanding_balance = Column(Float, nullable=True)  # Running ledger balance, see services/ledger_service.py
+    left_at = Column(DateTime, nullable=True, index=True)  # Set when the student leaves after the final year
         
     # Relationships
     parents = relationship(
@@ -24,4 +25,6 @@ class Student(BaseModel):
     )
     club_memberships = relationship("ClubMembership", back_populates="student")
     student_fees = relationship("StudentFee", back_populates="student", cascade="all, delete-orphan")
-    student_exam_fees = relationship("StudentExamFee", back_populates="student", cascade="all, delete-orphan")
\ No newline at end of file
+    student_exam_fees = relationship("StudentExamFee", back_populates="student", cascade="all, delete-orphan")
+    ledger_entries = relationship("LedgerEntry", back_populates="student", cascade="all, delete-orphan")
+    balance_snapshots = relationship("StudentBalanceSnapshot", cascade="all, delete-orphan")
\ No newline at end of file
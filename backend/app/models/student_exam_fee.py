@@ -1,11 +1,29 @@
-from sqlalchemy import Column, Float, String, Boolean, ForeignKey
+import enum
+
+from sqlalchemy import Column, Float, String, Boolean, ForeignKey, Integer, Enum, Index, func, text
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 
 from app.models.base import BaseModel
 
 
+class ExamFeeStatus(enum.Enum):
+    UNPAID = "unpaid"
+    PARTIAL = "partial"
+    PAID = "paid"
+
+
 class StudentExamFee(BaseModel):
     __tablename__ = "student_exam_fee"
+    __table_args__ = (
+        Index("ix_student_exam_fee_exam_status", "exam_fee_id", "payment_status"),
+        Index("ix_student_exam_fee_student_exam", "student_id", "exam_fee_id"),
+        # Unpaid entries per exam, for withdrawals and reminders
+        Index(
+            "ix_student_exam_fee_unpaid", "exam_fee_id",
+            postgresql_where=text("paid = false"), sqlite_where=text("paid = false"),
+        ),
+    )
 
     student_id = Column(String, ForeignKey("students.id"), nullable=False)
     exam_fee_id = Column(String, ForeignKey("exam_fees.id"), nullable=False)
@@ -15,7 +33,28 @@ class StudentExamFee(BaseModel):
     payment_reference = Column(String, nullable=True)
     due_date = Column(String, nullable=True)
 
+    # Running totals of completed installments, maintained by update_exam_payment_records
+    amount_paid = Column(Float, default=0.0, server_default="0", nullable=False)
+    installments_paid = Column(Integer, default=0, server_default="0", nullable=False)
+    payment_status = Column(
+        Enum(ExamFeeStatus), default=ExamFeeStatus.UNPAID, server_default=ExamFeeStatus.UNPAID.name, nullable=False
+    )
+
     # Relationships
     student = relationship("Student", back_populates="student_exam_fees")
     exam_fee = relationship("ExamFees", back_populates="student_exam_fees")
     exam_payments = relationship("ExamPayment", back_populates="student_exam_fee", cascade="all, delete-orphan")
+
+    @hybrid_property
+    def net_amount(self) -> float:
+        """Exam fee after the student's discount"""
+        return self.amount * (1 - (self.discount_percentage or 0) / 100)
+
+    @net_amount.expression
+    def net_amount(cls):
+        return cls.amount * (1 - func.coalesce(cls.discount_percentage, 0) / 100)
+
+    @hybrid_property
+    def balance_due(self) -> float:
+        """What is still owed after completed installments"""
+        return self.net_amount - self.amount_paid
@@ -1,10 +1,10 @@
-from sqlalchemy import Column, Float, String, Boolean, ForeignKey
+from sqlalchemy import Column, Float, String, Boolean, ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 
-from app.models.base import BaseModel
+from app.models.base import NativeUUIDModel
 
 
-class StudentFee(BaseModel):
+class StudentFee(NativeUUIDModel):
     __tablename__ = "student_fee"
 
     student_id = Column(String, ForeignKey("students.id"), nullable=False)
@@ -14,7 +14,18 @@ class StudentFee(BaseModel):
     paid = Column(Boolean, default=False, nullable=False)
     payment_reference = Column(String, nullable=True)
     due_date = Column(String, nullable=True)
+    term = Column(String, nullable=True, index=True)  # Set by billing runs, e.g. "2026-T1"
 
     # Relationships
     fee = relationship("Fee", back_populates="student_fees")
     student = relationship("Student", back_populates="student_fees")
+
+    __table_args__ = (
+        # A student is billed each fee at most once per term (see services/billing_run_service.py)
+        UniqueConstraint("student_id", "fee_id", "term", name="uq_student_fee_student_fee_term"),
+        # A student's outstanding fees (the unique constraint already covers all fees by student)
+        Index(
+            "ix_student_fee_unpaid", "student_id",
+            postgresql_where=text("paid = false"), sqlite_where=text("paid = false"),
+        ),
+    )
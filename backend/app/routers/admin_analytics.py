@@ -1,257 +1,81 @@
 """
 Admin Analytics Router - Provides analytics endpoints for the admin dashboard.
 """
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, case, or_
+from sqlalchemy import func, or_
 from typing import List, Optional
-from pydantic import BaseModel
 from ..database import get_db
 from ..models.student import Student
-from ..models.payment import Payment, PaymentItem, PaymentStatus, PaymentType, ExamPayment
-from ..models.student_exam_fee import StudentExamFee
+from ..models.payment import Payment, PaymentItem, PaymentStatus, PaymentType
+from ..models.student_exam_fee import ExamFeeStatus, StudentExamFee
 from ..models.club import Club, ClubMembership
 from ..models.fees import ExamFees
 from ..models.classes import YearGroup, ClassName
+from ..schemas.analytics import (
+    StudentPaymentInfo,
+    PaginatedStudentPaymentInfo,
+    SchoolFeesOverview,
+    StudentExamInfo,
+    PaginatedStudentExamInfo,
+    ExamAnalyticsResponse,
+    ClubMemberInfo,
+    PaginatedClubMemberInfo,
+    ClubAnalyticsResponse,
+    DashboardOverview,
+    AnalyticsSnapshotInfo,
+)
+from ..schemas.billing import SchoolBillingQuote
+from ..services.analytics_service import (
+    build_school_fees_overview,
+    build_exam_fees_overview,
+    build_clubs_overview,
+)
+from ..services.analytics_snapshot_service import (
+    SNAPSHOT_BUILDERS,
+    get_snapshot,
+    list_snapshots,
+    take_analytics_snapshots,
+)
+from ..services.event_broker import ADMIN_DASHBOARD_CHANNEL, broker
+import json
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-# ============ Response Models ============
-
-class ClassPaymentSummary(BaseModel):
-    class_name: str
-    total_students: int
-    paid_count: int
-    unpaid_count: int
-    payment_rate: float
-    total_collected: float
-
-
-class YearGroupPaymentSummary(BaseModel):
-    year_group: str
-    total_students: int
-    paid_count: int
-    unpaid_count: int
-    payment_rate: float
-    total_collected: float
-    classes: List[ClassPaymentSummary]
-
-
-class StudentPaymentInfo(BaseModel):
-    id: str
-    reg_number: str
-    first_name: str
-    last_name: str
-    year_group: str
-    class_name: str
-    school_fees_paid: bool
-    outstanding_balance: float | None
-
-
-class PaginatedStudentPaymentInfo(BaseModel):
-    items: List[StudentPaymentInfo]
-    total: int
-    limit: int
-    offset: int
-
-
-class SchoolFeesOverview(BaseModel):
-    total_students: int
-    total_paid: int
-    total_unpaid: int
-    overall_payment_rate: float
-    total_amount_collected: float
-    by_year_group: List[YearGroupPaymentSummary]
-
-
-class ExamPaymentSummary(BaseModel):
-    exam_id: str
-    exam_name: str
-    applicable_grades: List[str] | None
-    total_applicable_students: int
-    total_registered: int
-    fully_paid_count: int
-    partially_paid_count: int
-    unpaid_count: int
-    total_amount_expected: float
-    total_amount_collected: float
-    collection_rate: float
-
-
-class StudentExamInfo(BaseModel):
-    student_id: str
-    reg_number: str
-    first_name: str
-    last_name: str
-    year_group: str
-    class_name: str
-    amount_due: float
-    amount_paid: float
-    is_fully_paid: bool
-
-
-class PaginatedStudentExamInfo(BaseModel):
-    items: List[StudentExamInfo]
-    total: int
-    limit: int
-    offset: int
-
-
-class ExamAnalyticsResponse(BaseModel):
-    total_exams: int
-    exams: List[ExamPaymentSummary]
-
-
-class ClubMembershipSummary(BaseModel):
-    club_id: str
-    club_name: str
-    price: float
-    capacity: int | None
-    total_members: int
-    confirmed_members: int
-    pending_members: int
-    capacity_utilization: float | None
-    total_revenue: float
-
-
-class ClubMemberInfo(BaseModel):
-    student_id: str
-    reg_number: str
-    first_name: str
-    last_name: str
-    year_group: str
-    class_name: str
-    payment_confirmed: bool
-    status: str
-
-
-class PaginatedClubMemberInfo(BaseModel):
-    items: List[ClubMemberInfo]
-    total: int
-    limit: int
-    offset: int
-
-
-class ClubAnalyticsResponse(BaseModel):
-    total_clubs: int
-    total_memberships: int
-    total_revenue: float
-    clubs: List[ClubMembershipSummary]
-
-
-class DashboardOverview(BaseModel):
-    total_students: int
-    school_fees_paid_count: int
-    school_fees_unpaid_count: int
-    school_fees_collection_rate: float
-    total_school_fees_collected: float
-    total_exam_registrations: int
-    total_exam_fees_collected: float
-    total_club_memberships: int
-    total_club_revenue: float
-    recent_payments_count: int
+def _serve_snapshot(response: Response, db: Session, kind: str, snapshot: str) -> dict:
+    """Return a stored overview payload instead of recomputing it."""
+    row = get_snapshot(db, kind, snapshot)
+    response.headers["X-Snapshot-Taken-At"] = row.taken_at.isoformat()
+    # A stored snapshot never changes, so it can be cached for longer
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return row.payload
 
 
 # ============ School Fees Endpoints ============
 
 @router.get("/school-fees/overview", response_model=SchoolFeesOverview)
-def get_school_fees_overview(response: Response, db: Session = Depends(get_db)):
+def get_school_fees_overview(
+    response: Response,
+    snapshot: Optional[str] = None,  # "latest" or an ISO timestamp
+    db: Session = Depends(get_db)
+):
     """Get comprehensive school fees payment analytics by year group and class."""
     try:
-        # Get all students with year group and class
-        students = db.query(
-            Student.id,
-            Student.year_group,
-            Student.class_name
-        ).all()
+        if snapshot:
+            return _serve_snapshot(response, db, "school_fees", snapshot)
 
-        # Get count of paid students from completed payments
-        completed_payments = db.query(Payment.student_ids).filter(
-            Payment.status == PaymentStatus.COMPLETED
-        ).all()
-        paid_set = set()
-        for payment in completed_payments:
-            if payment.student_ids:
-                # student_ids is stored as JSON, so it's already a list
-                if isinstance(payment.student_ids, list):
-                    paid_set.update(payment.student_ids)
-                else:
-                    # Handle case where it might be a single ID
-                    paid_set.add(payment.student_ids)
-
-        # Get total collected
-        total_collected = db.query(func.coalesce(func.sum(Payment.amount), 0)).filter(
-            Payment.status == PaymentStatus.COMPLETED
-        ).scalar() or 0.0
-
-        # Organize by year group and class
-        year_group_data = {}
-        for student_id, year_group, class_name in students:
-            yg = year_group.value if year_group else "Unknown"
-            cn = class_name.value if class_name else "Unknown"
-
-            if yg not in year_group_data:
-                year_group_data[yg] = {"classes": {}, "total": 0, "paid": 0}
-
-            if cn not in year_group_data[yg]["classes"]:
-                year_group_data[yg]["classes"][cn] = {"total": 0, "paid": 0}
-
-            year_group_data[yg]["total"] += 1
-            year_group_data[yg]["classes"][cn]["total"] += 1
-
-            if student_id in paid_set:
-                year_group_data[yg]["paid"] += 1
-                year_group_data[yg]["classes"][cn]["paid"] += 1
-
-        # Build response
-        by_year_group = []
-        for yg, data in sorted(year_group_data.items()):
-            classes = []
-            for cn, class_data in sorted(data["classes"].items()):
-                paid = class_data["paid"]
-                total = class_data["total"]
-                rate = (paid / total * 100) if total > 0 else 0
-                classes.append(ClassPaymentSummary(
-                    class_name=cn,
-                    total_students=total,
-                    paid_count=paid,
-                    unpaid_count=total - paid,
-                    payment_rate=round(rate, 1),
-                    total_collected=0
-                ))
-
-            yg_paid = data["paid"]
-            yg_total = data["total"]
-            yg_rate = (yg_paid / yg_total * 100) if yg_total > 0 else 0
-
-            by_year_group.append(YearGroupPaymentSummary(
-                year_group=yg,
-                total_students=yg_total,
-                paid_count=yg_paid,
-                unpaid_count=yg_total - yg_paid,
-                payment_rate=round(yg_rate, 1),
-                total_collected=0,
-                classes=classes
-            ))
-
-        total_students = len(students)
-        total_paid = len(paid_set)
-        overall_rate = (total_paid / total_students * 100) if total_students > 0 else 0
+        overview = build_school_fees_overview(db)
 
         # Cache for 5 minutes on client side
         response.headers["Cache-Control"] = "public, max-age=300"
 
-        return SchoolFeesOverview(
-            total_students=total_students,
-            total_paid=total_paid,
-            total_unpaid=total_students - total_paid,
-            overall_payment_rate=round(overall_rate, 1),
-            total_amount_collected=total_collected,
-            by_year_group=by_year_group
-        )
+        return overview
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting school fees overview: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -282,8 +106,8 @@ def get_school_fees_students(
                 else:
                     paid_student_ids.add(payment.student_ids)
 
-        # Build base query
-        query = db.query(Student)
+        # Build base query over current students
+        query = db.query(Student).filter(Student.left_at.is_(None))
 
         # Apply year group filter at SQL level
         if year_group:
@@ -354,88 +178,24 @@ def get_school_fees_students(
 # ============ Exam Fees Endpoints ============
 
 @router.get("/exam-fees/overview", response_model=ExamAnalyticsResponse)
-def get_exam_fees_overview(response: Response, db: Session = Depends(get_db)):
+def get_exam_fees_overview(
+    response: Response,
+    snapshot: Optional[str] = None,  # "latest" or an ISO timestamp
+    db: Session = Depends(get_db)
+):
     """Get comprehensive exam fees analytics."""
     try:
-        exams = db.query(ExamFees).all()
-
-        # Get student counts by year group in one query
-        students_by_year_group = {}
-        year_group_counts = db.query(
-            Student.year_group,
-            func.count(Student.id).label('count')
-        ).group_by(Student.year_group).all()
-
-        for yg, count in year_group_counts:
-            if yg:
-                students_by_year_group[yg.name] = count
-
-        total_students = db.query(func.count(Student.id)).scalar() or 0
-        # Subquery that aggregates completed ExamPayment amounts per StudentExamFee
-        payments_subq = db.query(
-            ExamPayment.student_exam_fee_id.label('sef_id'),
-            func.coalesce(func.sum(ExamPayment.amount), 0).label('paid')
-        ).filter(ExamPayment.status == PaymentStatus.COMPLETED).group_by(ExamPayment.student_exam_fee_id).subquery()
-
-        exam_summaries = []
-        for exam in exams:
-            # Calculate applicable students
-            applicable_grades = exam.applicable_grades or []
-            if applicable_grades:
-                applicable_count = sum(students_by_year_group.get(grade, 0) for grade in applicable_grades)
-            else:
-                applicable_count = total_students
-
-            # Get payment statistics accounting for partial payments by aggregating ExamPayment amounts
-            payment_stats = db.query(
-                func.count(StudentExamFee.id).label('total'),
-                func.sum(case(
-                    (payments_subq.c.paid >= (StudentExamFee.amount * (1 - StudentExamFee.discount_percentage / 100)), 1),
-                    else_=0
-                )).label('fully_paid'),
-                func.sum(case(
-                    (and_(payments_subq.c.paid > 0, payments_subq.c.paid < (StudentExamFee.amount * (1 - StudentExamFee.discount_percentage / 100))), 1),
-                    else_=0
-                )).label('partial'),
-                func.coalesce(func.sum(payments_subq.c.paid), 0).label('collected')
-            ).outerjoin(payments_subq, payments_subq.c.sef_id == StudentExamFee.id).filter(
-                StudentExamFee.exam_fee_id == exam.id
-            ).first()
-
-            total_registered = payment_stats.total or 0
-            fully_paid = int(payment_stats.fully_paid or 0)
-            partially_paid = int(payment_stats.partial or 0)
-            unpaid = total_registered - fully_paid - partially_paid
-            total_collected = payment_stats.collected or 0.0
-
-            # Compute expected amount as sum of discounted amounts (accounts for per-student discounts)
-            total_expected = db.query(
-                func.coalesce(func.sum(StudentExamFee.amount * (1 - StudentExamFee.discount_percentage / 100)), 0)
-            ).filter(StudentExamFee.exam_fee_id == exam.id).scalar() or 0.0
-
-            collection_rate = (total_collected / total_expected * 100) if total_expected > 0 else 0
-
-            exam_summaries.append(ExamPaymentSummary(
-                exam_id=exam.id,
-                exam_name=exam.exam_name,
-                applicable_grades=applicable_grades,
-                total_applicable_students=applicable_count,
-                total_registered=total_registered,
-                fully_paid_count=fully_paid,
-                partially_paid_count=partially_paid,
-                unpaid_count=unpaid,
-                total_amount_expected=total_expected,
-                total_amount_collected=total_collected,
-                collection_rate=round(collection_rate, 1)
-            ))
+        if snapshot:
+            return _serve_snapshot(response, db, "exam_fees", snapshot)
+
+        overview = build_exam_fees_overview(db)
 
         # Cache for 5 minutes on client side
         response.headers["Cache-Control"] = "public, max-age=300"
 
-        return ExamAnalyticsResponse(
-            total_exams=len(exams),
-            exams=exam_summaries
-        )
+        return overview
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting exam fees overview: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -452,30 +212,14 @@ def get_exam_students(
     db: Session = Depends(get_db)
 ):
     try:
-        # Aggregate completed payments per StudentExamFee
-        payments_subq = db.query(
-            ExamPayment.student_exam_fee_id.label("sef_id"),
-            func.coalesce(func.sum(ExamPayment.amount), 0).label("paid"),
-        ).filter(
-            ExamPayment.status == PaymentStatus.COMPLETED
-        ).group_by(
-            ExamPayment.student_exam_fee_id
-        ).subquery()
-
-        discount_pct = func.coalesce(StudentExamFee.discount_percentage, 0)
-        amount_due_expr = StudentExamFee.amount * (1 - (discount_pct / 100))
-        amount_paid_expr = func.coalesce(payments_subq.c.paid, 0)
-
-        # Base query (join Student + StudentExamFee + aggregated payments)
+        # Paid amounts are running totals on StudentExamFee, so no per-request aggregation
         query = db.query(
             StudentExamFee,
             Student,
-            amount_due_expr.label("amount_due"),
-            amount_paid_expr.label("amount_paid"),
+            StudentExamFee.net_amount.label("amount_due"),
+            StudentExamFee.amount_paid.label("amount_paid"),
         ).join(
             Student, Student.id == StudentExamFee.student_id
-        ).outerjoin(
-            payments_subq, payments_subq.c.sef_id == StudentExamFee.id
         ).filter(
             StudentExamFee.exam_fee_id == exam_id
         )
@@ -493,13 +237,10 @@ def get_exam_students(
                 )
             )
 
-        # Payment status filter using the same due/paid logic as overview
-        if payment_status == "paid":
-            query = query.filter(amount_paid_expr >= amount_due_expr)
-        elif payment_status == "partial":
-            query = query.filter(and_(amount_paid_expr > 0, amount_paid_expr < amount_due_expr))
-        elif payment_status == "unpaid":
-            query = query.filter(amount_paid_expr <= 0)
+        # Payment status filter on the indexed (exam_fee_id, payment_status) column pair
+        status_filters = {"paid": ExamFeeStatus.PAID, "partial": ExamFeeStatus.PARTIAL, "unpaid": ExamFeeStatus.UNPAID}
+        if payment_status in status_filters:
+            query = query.filter(StudentExamFee.payment_status == status_filters[payment_status])
 
         total = query.count()
         rows = query.offset(offset).limit(limit).all()
@@ -515,7 +256,7 @@ def get_exam_students(
                 class_name=student.class_name.value if student.class_name else "Unknown",
                 amount_due=float(amount_due or 0.0),
                 amount_paid=float(amount_paid or 0.0),
-                is_fully_paid=(float(amount_paid or 0.0) >= float(amount_due or 0.0)),
+                is_fully_paid=sef.payment_status == ExamFeeStatus.PAID,
             ))
 
         return PaginatedStudentExamInfo(items=items, total=total, limit=limit, offset=offset)
@@ -528,60 +269,24 @@ def get_exam_students(
 # ============ Club Analytics Endpoints ============
 
 @router.get("/clubs/overview", response_model=ClubAnalyticsResponse)
-def get_clubs_overview(response: Response, db: Session = Depends(get_db)):
+def get_clubs_overview(
+    response: Response,
+    snapshot: Optional[str] = None,  # "latest" or an ISO timestamp
+    db: Session = Depends(get_db)
+):
     """Get comprehensive club membership analytics."""
     try:
-        clubs = db.query(Club).all()
-
-        # Get all membership stats in one query
-        club_stats = db.query(
-            ClubMembership.club_id,
-            func.count(ClubMembership.id).label('total_members'),
-            func.sum(case((ClubMembership.payment_confirmed == True, 1), else_=0)).label('confirmed')
-        ).group_by(ClubMembership.club_id).all()
-
-        stats_map = {stat[0]: {'total': stat[1], 'confirmed': stat[2] or 0} for stat in club_stats}
-
-        club_summaries = []
-        total_memberships = 0
-        total_revenue = 0.0
-
-        for club in clubs:
-            stats = stats_map.get(club.id, {'total': 0, 'confirmed': 0})
-            total_members = stats['total']
-            confirmed = stats['confirmed']
-            pending = total_members - confirmed
-
-            capacity_util = None
-            if club.capacity and club.capacity > 0:
-                capacity_util = round(total_members / club.capacity * 100, 1)
-
-            revenue = confirmed * club.price
-
-            club_summaries.append(ClubMembershipSummary(
-                club_id=club.id,
-                club_name=club.name,
-                price=club.price,
-                capacity=club.capacity,
-                total_members=total_members,
-                confirmed_members=confirmed,
-                pending_members=pending,
-                capacity_utilization=capacity_util,
-                total_revenue=revenue
-            ))
+        if snapshot:
+            return _serve_snapshot(response, db, "clubs", snapshot)
 
-            total_memberships += total_members
-            total_revenue += revenue
+        overview = build_clubs_overview(db)
 
         # Cache for 5 minutes on client side
         response.headers["Cache-Control"] = "public, max-age=300"
 
-        return ClubAnalyticsResponse(
-            total_clubs=len(clubs),
-            total_memberships=total_memberships,
-            total_revenue=total_revenue,
-            clubs=club_summaries
-        )
+        return overview
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting clubs overview: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -673,7 +378,7 @@ def get_dashboard_overview(response: Response, db: Session = Depends(get_db)):
     """Get high-level dashboard overview metrics."""
     try:
         # Get all counts in efficient queries
-        total_students = db.query(func.count(Student.id)).scalar() or 0
+        total_students = db.query(func.count(Student.id)).filter(Student.left_at.is_(None)).scalar() or 0
 
         # School fees - count payments and sum SCHOOL_FEES payment items (avoids counting club share)
         school_fees_stats = db.query(
@@ -710,7 +415,7 @@ def get_dashboard_overview(response: Response, db: Session = Depends(get_db)):
         # Exam fees - query StudentExamFee for registrations and payments
         exam_stats = db.query(
             func.count(func.distinct(StudentExamFee.student_id)).label('registrations'),
-            func.coalesce(func.sum(case((StudentExamFee.paid == True, StudentExamFee.amount * (1 - StudentExamFee.discount_percentage / 100)), else_=0)), 0).label('total_collected')
+            func.coalesce(func.sum(StudentExamFee.amount_paid), 0).label('total_collected')
         ).first()
 
         total_exam_registrations = exam_stats.registrations or 0
@@ -750,3 +455,92 @@ def get_dashboard_overview(response: Response, db: Session = Depends(get_db)):
     except Exception as e:
         logger.error(f"Error getting dashboard overview: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============ Snapshot Endpoints ============
+
+@router.get("/snapshots", response_model=List[AnalyticsSnapshotInfo])
+def get_analytics_snapshots(
+    kind: Optional[str] = None,  # "school_fees", "exam_fees" or "clubs"
+    limit: int = 50,
+    db: Session = Depends(get_db)
+):
+    """List stored analytics snapshots, newest first, for historical comparison."""
+    if kind and kind not in SNAPSHOT_BUILDERS:
+        raise HTTPException(status_code=400, detail=f"Unknown snapshot kind: {kind}")
+    try:
+        return [
+            AnalyticsSnapshotInfo(id=row.id, kind=row.kind, taken_at=row.taken_at)
+            for row in list_snapshots(db, kind=kind, limit=limit)
+        ]
+    except Exception as e:
+        logger.error(f"Error listing analytics snapshots: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/snapshots", response_model=List[AnalyticsSnapshotInfo])
+def create_analytics_snapshots(db: Session = Depends(get_db)):
+    """Take a snapshot of every overview now, outside the regular schedule."""
+    try:
+        snapshots = take_analytics_snapshots(db)
+        return [
+            AnalyticsSnapshotInfo(id=s.id, kind=s.kind, taken_at=s.taken_at)
+            for s in snapshots
+        ]
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error taking analytics snapshots: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============ Billing Quote ============
+
+@router.get("/billing/quote", response_model=SchoolBillingQuote)
+def get_billing_quote(detail: bool = False, db: Session = Depends(get_db)):
+    """Expected billing for every student and family; per-row lines only with ?detail=true."""
+    # Imported here so numpy stays off the startup path
+    from ..services.billing_quote_service import quote_whole_school
+
+    try:
+        quote = quote_whole_school(db)
+        result = quote.summary()
+        if detail:
+            result["students"] = quote.student_lines()
+            result["families"] = quote.family_lines()
+        return result
+    except Exception as e:
+        logger.error(f"Error quoting school billing: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============ Live Events ============
+
+SSE_KEEPALIVE_SECONDS = 15
+
+
+@router.get("/events")
+async def stream_admin_events(request: Request):
+    """Server-Sent Events stream of payment deltas for the admin dashboards."""
+    subscription = broker.subscribe(ADMIN_DASHBOARD_CHANNEL)
+
+    async def event_stream():
+        try:
+            # Tell EventSource how long to wait before reconnecting
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=SSE_KEEPALIVE_SECONDS)
+                if event is None:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
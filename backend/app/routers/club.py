@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timedelta
 from ..database import get_db
 from ..models.club import Club, ClubMembership
+from ..services.club_seat_service import ACTIVE, memberships_by_pair, reserve_club_seats
+from ..services.club_waitlist_service import get_offer_hours, get_waitlist_entries, join_waitlist, leave_waitlist
+from ..services.reference_cache import CLUBS, bump_reference_version, reference_cache
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -18,10 +22,21 @@ class ClubCreate(ClubBase):
 
 class ClubResponse(ClubBase):
     id: str
+    seats_left: int | None = None  # None when the club has no capacity limit
 
     class Config:
         from_attributes = True
 
+def club_responses(db: Session, clubs) -> List[ClubResponse]:
+    """Club list entries with live seat availability (one query over the clubs table)."""
+    seats_taken = dict(db.query(Club.id, Club.seats_taken).all())
+    return [
+        ClubResponse.model_validate(c).model_copy(update={
+            "seats_left": max(c.capacity - seats_taken.get(c.id, 0), 0) if c.capacity is not None else None,
+        })
+        for c in clubs
+    ]
+
 class ClubMembershipBase(BaseModel):
     student_id: str
     club_id: str
@@ -36,18 +51,35 @@ class ClubMembershipResponse(ClubMembershipBase):
     class Config:
         from_attributes = True
 
+class WaitlistJoinRequest(BaseModel):
+    student_id: str
+
+class WaitlistEntryResponse(BaseModel):
+    id: str
+    club_id: str
+    student_id: str
+    status: str  # waiting or offered
+    position: int | None = None  # Place in the queue while waiting
+    queued_at: datetime
+    offer_expires_at: datetime | None = None
+
 @router.post("/", response_model=ClubResponse)
 def create_club(club: ClubCreate, db: Session = Depends(get_db)):
     db_club = Club(**club.model_dump())
     db.add(db_club)
+    bump_reference_version(db, CLUBS)
     db.commit()
     db.refresh(db_club)
     return db_club
 
 @router.get("/", response_model=List[ClubResponse])
 def get_clubs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    clubs = db.query(Club).offset(skip).limit(limit).all()
-    return clubs
+    return club_responses(db, reference_cache.clubs(db).items[skip:skip + limit])
+
+@router.get("/waitlist", response_model=List[WaitlistEntryResponse])
+def get_waitlist(student_ids: List[str] = Query(...), db: Session = Depends(get_db)):
+    """Open waitlist entries and queue positions for the given students."""
+    return get_waitlist_entries(db, student_ids)
 
 @router.get("/{club_id}", response_model=ClubResponse)
 def get_club(club_id: str, db: Session = Depends(get_db)):
@@ -65,6 +97,7 @@ def update_club(club_id: str, club: ClubCreate, db: Session = Depends(get_db)):
     for key, value in club.model_dump().items():
         setattr(db_club, key, value)
 
+    bump_reference_version(db, CLUBS)
     db.commit()
     db.refresh(db_club)
     return db_club
@@ -76,18 +109,49 @@ def delete_club(club_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Club not found")
 
     db.delete(club)
+    bump_reference_version(db, CLUBS)
     db.commit()
     return {"message": "Club deleted successfully"}
 
 @router.post("/memberships", response_model=ClubMembershipResponse)
 def create_club_membership(membership: ClubMembershipCreate, db: Session = Depends(get_db)):
-    db_membership = ClubMembership(**membership.model_dump())
-    db.add(db_membership)
+    """
+    Add a student to a club. An active membership is an unpaid seat hold, open
+    as long as a waitlist offer, that the family's school fees checkout pays
+    for; the sweeper hands the seat back if it is not paid in time.
+    """
+    if membership.status != ACTIVE:
+        db_membership = ClubMembership(**membership.model_dump())
+        db.add(db_membership)
+        db.commit()
+        db.refresh(db_membership)
+        return db_membership
+
+    if db.get(Club, membership.club_id) is None:
+        raise HTTPException(status_code=404, detail="Club not found")
+    try:
+        reserve_club_seats(
+            db, {membership.student_id: [membership.club_id]},
+            hold_until=datetime.now() + timedelta(hours=get_offer_hours()),
+        )
+    except HTTPException:
+        db.rollback()
+        raise
     db.commit()
-    db.refresh(db_membership)
-    return db_membership
+    return memberships_by_pair(db, [membership.student_id], [membership.club_id])[(membership.student_id, membership.club_id)]
 
 @router.get("/memberships", response_model=List[ClubMembershipResponse])
 def get_club_memberships(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     memberships = db.query(ClubMembership).offset(skip).limit(limit).all()
-    return memberships 
\ No newline at end of file
+    return memberships 
+
+@router.post("/{club_id}/waitlist", response_model=WaitlistEntryResponse)
+def join_club_waitlist(club_id: str, request: WaitlistJoinRequest, db: Session = Depends(get_db)):
+    """Queue a student for a full club; freed seats are offered in joining order."""
+    entry = join_waitlist(db, club_id, request.student_id)
+    return next(e for e in get_waitlist_entries(db, [request.student_id]) if e["id"] == entry.id)
+
+@router.delete("/{club_id}/waitlist/{student_id}")
+def leave_club_waitlist(club_id: str, student_id: str, db: Session = Depends(get_db)):
+    leave_waitlist(db, club_id, student_id)
+    return {"message": "Left the waitlist"}
@@ -2,21 +2,19 @@ import logging
 import os
 import asyncio
 import time
-from tkinter import N
 
 import requests
+from dataclasses import asdict
 from ..models.payment import ExamPayment, PaymentStatus
-from ..models.student_exam_fee import StudentExamFee
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 from ..routers.payment import PAYSTACK_INITIALIZE_URL, verify_payment
-from ..database import get_db
-from dotenv import load_dotenv
+from ..database import get_async_db
 from ..models.fees import ExamFees
 from datetime import datetime
-from ..models.student import Student
 from ..models.classes import YearGroup
 
 # Import the centralized payment service and schemas
@@ -28,8 +26,12 @@ from ..services.payment_service import (
 from ..schemas.payment import (
     ExamPaymentDetails
 )
+from ..schemas.exams import StudentExamPaymentStatusResponse
+from ..services.reference_cache import EXAMS, bump_reference_version, reference_cache
+from ..services.exam_applicability import set_exam_grades
+from ..services.exam_enrollment_service import reprice_exam_entries, sync_exam_enrollment, withdraw_all_students
+from ..utils.exams import get_exam_lists_for_parent, get_exam_lists_for_students
 
-load_dotenv()
 
 router = APIRouter()
 
@@ -59,27 +61,16 @@ class ExamResponse(BaseModel):
     allows_installments: bool = False
     applicable_grades: list[str] | None = None  # List of YearGroup enum names
 
+class ExamEnrollmentResponse(BaseModel):
+    exam_id: str
+    enrolled: int
+    withdrawn: int
+
 class StudentExamFeeCreate(BaseModel):
     student_id: str
     exam_id: str
     discount_percentage: Optional[float] = 0.0
 
-class ExamPaymentStatusResponse(BaseModel):
-    exam_id: str
-    exam_name: str
-    exam_price: float
-    extra_fees: float | None = None
-    amount_paid: float
-    amount_due: float
-    is_fully_paid: bool
-
-class StudentExamPaymentStatusResponse(BaseModel):
-    id: str | None = None
-    year_group: str | None = None
-    class_name: str | None = None
-    student_id: str
-    exam_list: List[ExamPaymentStatusResponse] | None = None
-
 class ExamPaymentCreate(BaseModel):
     exam_payments: List[ExamPaymentDetails]
     student_id: str
@@ -95,7 +86,7 @@ class ExamPaymentResponse(BaseModel):
 
 
 @router.post("/create-exam", response_model=ExamResponse)
-def create_exam(exam: ExamCreate, db: Session = Depends(get_db)):
+async def create_exam(exam: ExamCreate, db: AsyncSession = Depends(get_async_db)):
     try:
         new_exam = ExamFees(
             exam_name=exam.exam_name,
@@ -105,45 +96,91 @@ def create_exam(exam: ExamCreate, db: Session = Depends(get_db)):
             applicable_grades=exam.applicable_grades,
         )
         db.add(new_exam)
-        db.commit()
-        db.refresh(new_exam)
+        await db.flush()
+        # Enter every student in the applicable grades
+        await db.run_sync(sync_exam_enrollment, new_exam)
+        await db.run_sync(bump_reference_version, EXAMS)
+        await db.commit()
+        await db.refresh(new_exam)
         return new_exam
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating exam: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.put("/update-exam", response_model=ExamResponse)
-def update_exam(exam_data: ExamUpdate, db: Session = Depends(get_db)):
+async def update_exam(exam_data: ExamUpdate, db: AsyncSession = Depends(get_async_db)):
     try:
-        exam = db.query(ExamFees).filter(ExamFees.id == exam_data.id).first()
+        exam = await db.scalar(select(ExamFees).where(ExamFees.id == exam_data.id))
         if not exam:
             raise HTTPException(status_code=404, detail="Exam not found")
+        previous_grades = list(exam.applicable_grades or [])
+        previous_amount = exam.amount
         exam.exam_name = exam_data.exam_name
         exam.amount = exam_data.amount
         exam.extra_fees = exam_data.extra_fees
         exam.allows_installments = exam_data.allows_installments
         exam.applicable_grades = exam_data.applicable_grades
-        db.commit()
-        db.refresh(exam)
+        if set(previous_grades) != set(exam_data.applicable_grades or []):
+            await db.run_sync(sync_exam_enrollment, exam, previous_grades)
+        # Unpaid entries follow a price change; paid ones keep what they were paid at
+        if exam.amount != previous_amount:
+            await db.run_sync(reprice_exam_entries, exam)
+        await db.run_sync(bump_reference_version, EXAMS)
+        await db.commit()
+        await db.refresh(exam)
         return exam
+    except HTTPException:
+        raise
     except Exception as e:
+        await db.rollback()
         logger.error(f"Error updating exam: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     
+@router.post("/enroll/{exam_id}", response_model=ExamEnrollmentResponse)
+async def enroll_exam(exam_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Enter applicable students who have no entry yet, e.g. for exams created before enrollment existed"""
+    try:
+        exam = await db.scalar(select(ExamFees).where(ExamFees.id == exam_id))
+        if not exam:
+            raise HTTPException(status_code=404, detail="Exam not found")
+        counts = await db.run_sync(sync_exam_enrollment, exam)
+        await db.commit()
+        return ExamEnrollmentResponse(exam_id=exam_id, **counts)
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error enrolling students in exam {exam_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/get-all-exams", response_model=List[ExamResponse])
-def get_all_exams(db: Session = Depends(get_db)):
+async def get_all_exams(db: AsyncSession = Depends(get_async_db)):
     try:
-        exams = db.query(ExamFees).all()
-        return exams
+        exams = await db.run_sync(reference_cache.exams)
+        return [ExamResponse(**asdict(exam)) for exam in exams.items]
     except Exception as e:
         logger.error(f"Error getting all exams: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     
+@router.get("/get-exams-for-year-group", response_model=List[ExamResponse])
+async def get_exams_for_year_group(year_group: str, db: AsyncSession = Depends(get_async_db)):
+    """Exams that apply to a year group (enum name, e.g. YEAR_10), from the cached applicability map"""
+    try:
+        if year_group not in YearGroup.__members__:
+            raise HTTPException(status_code=400, detail=f"Unknown year group: {year_group}")
+        exams = await db.run_sync(reference_cache.exams)
+        return [ExamResponse(**asdict(exam)) for exam in exams.by_grade.get(year_group, ())]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting exams for year group {year_group}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/get-exam-by-id", response_model=ExamResponse)
-def get_exam_by_id(exam_id: str, db: Session = Depends(get_db)):
+async def get_exam_by_id(exam_id: str, db: AsyncSession = Depends(get_async_db)):
     try:
-        exam = db.query(ExamFees).filter(ExamFees.id == exam_id).first()
+        exam = await db.scalar(select(ExamFees).where(ExamFees.id == exam_id))
         if not exam:
             raise HTTPException(status_code=404, detail="Exam not found")
         return exam
@@ -152,21 +189,28 @@ def get_exam_by_id(exam_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/delete-exam/{exam_id}")
-def delete_exam(exam_id: str, db: Session = Depends(get_db)):
+async def delete_exam(exam_id: str, db: AsyncSession = Depends(get_async_db)):
     try:
-        exam = db.query(ExamFees).filter(ExamFees.id == exam_id).first()
+        exam = await db.scalar(select(ExamFees).where(ExamFees.id == exam_id))
         if not exam:
             raise HTTPException(status_code=404, detail="Exam not found")
-        db.delete(exam)
-        db.commit()
+        # Entries go with the exam, their charges reversed; exams with payments stay (409)
+        await db.run_sync(withdraw_all_students, exam)
+        await db.run_sync(set_exam_grades, exam.id, None)
+        await db.delete(exam)
+        await db.run_sync(bump_reference_version, EXAMS)
+        await db.commit()
         return {"message": "Exam deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
+        await db.rollback()
         logger.error(f"Error deleting exam: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     
 
 @router.post("/pay-for-exam", response_model=dict)
-def pay_for_exam(exam_payment_obj: ExamPaymentCreate, db: Session = Depends(get_db)):
+async def pay_for_exam(exam_payment_obj: ExamPaymentCreate, db: AsyncSession = Depends(get_async_db)):
     logger.info(f"Initializing payment for exams: {exam_payment_obj.exam_payments} for student: {exam_payment_obj.student_id}")
 
     try:
@@ -179,12 +223,12 @@ def pay_for_exam(exam_payment_obj: ExamPaymentCreate, db: Session = Depends(get_
             parent_id=exam_payment_obj.parent_id
         )
         
-        # Use the centralized payment service
-        result = initialize_payment(
+        # Use the centralized payment service (Paystack calls are offloaded to the threadpool)
+        result = await db.run_sync(lambda session: initialize_payment(
             payment_type=PaymentType.EXAM_FEES,
             payment_data=payment_data,
-            db=db
-        )
+            db=session
+        ))
         
         if result.status:
             return result.data
@@ -199,11 +243,13 @@ def pay_for_exam(exam_payment_obj: ExamPaymentCreate, db: Session = Depends(get_
     
 
 @router.post("/verify/{payment_reference}")
-async def verify_payment_status(payment_reference: str, db: Session = Depends(get_db)):
+async def verify_payment_status(payment_reference: str, db: AsyncSession = Depends(get_async_db)):
     logger.info(f"Verifying payment status for payment reference: {payment_reference}")
     
     try:
-        exam_payments = db.query(ExamPayment).filter(ExamPayment.payment_reference == payment_reference).all()
+        exam_payments = (await db.scalars(
+            select(ExamPayment).where(ExamPayment.payment_reference == payment_reference)
+        )).all()
         if not exam_payments:
             raise HTTPException(status_code=404, detail="No exam payment found")
         
@@ -219,54 +265,14 @@ async def verify_payment_status(payment_reference: str, db: Session = Depends(ge
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/get-student-exam-list", response_model=StudentExamPaymentStatusResponse)
-def get_student_exam_list(student_id: str, db: Session = Depends(get_db)):
+async def get_student_exam_list(student_id: str, db: AsyncSession = Depends(get_async_db)):
     logger.info(f"Getting student exam list for student: {student_id}")
-    student_exam_fees = db.query(StudentExamFee).filter(StudentExamFee.student_id == student_id).all()
-    if len(student_exam_fees) == 0:
-        logger.info(f"Student exam list is empty")
-        return StudentExamPaymentStatusResponse(
-        id=None,
-        year_group=None,
-        class_name=None,
-        student_id=student_id,
-        exam_list=[]
-    ) 
-    
-    logger.info(f"Student exam fees: {student_exam_fees}")
-    student = db.query(Student).filter(Student.id == student_id).first()
-    logger.info(f"Student: {student}")
-
-    exam_list = []
-    for student_exam_fee in student_exam_fees:
-        exam_fees = db.query(ExamFees).filter(ExamFees.id == student_exam_fee.exam_fee_id).first()
-        if exam_fees is None:
-            raise HTTPException(status_code=404, detail="Exam fees not found")
-        logger.info(f"Exam fees: {exam_fees}")
-        
-        # Calculate amount paid and amount due
-        discounted_amount = exam_fees.amount * (1 - student_exam_fee.discount_percentage / 100)
-        amount_paid = discounted_amount if student_exam_fee.paid else 0
-        amount_due = 0 if student_exam_fee.paid else discounted_amount
-        
-        exam_list.append(ExamPaymentStatusResponse(
-            exam_id=student_exam_fee.exam_fee_id,
-            exam_name=exam_fees.exam_name,
-            exam_price=exam_fees.amount,
-            extra_fees=exam_fees.extra_fees,
-            amount_paid=amount_paid,
-            amount_due=amount_due,
-            is_fully_paid=student_exam_fee.paid))
-        logger.info(f"Exam list: {exam_list}")
-        
-    return StudentExamPaymentStatusResponse(
-        id=student_exam_fees[0].id,
-        year_group=student.year_group.value if student.year_group else None,
-        class_name=student.class_name.value if student.class_name else None,
-        student_id=student_exam_fees[0].student_id,
-        exam_list=exam_list
-    )
+    exam_lists = await db.run_sync(get_exam_lists_for_students, [student_id])
+    return exam_lists.get(student_id) or StudentExamPaymentStatusResponse(student_id=student_id, exam_list=[])
 
 
-        
-        
-        
\ No newline at end of file
+@router.get("/get-parent-exam-lists", response_model=Dict[str, StudentExamPaymentStatusResponse])
+async def get_parent_exam_lists(parent_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Exam lists for every child of a parent, keyed by student id, in one call"""
+    logger.info(f"Getting exam lists for children of parent: {parent_id}")
+    return await db.run_sync(get_exam_lists_for_parent, parent_id)
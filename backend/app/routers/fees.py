@@ -1,17 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List, Dict
-from ..database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Optional
+from ..database import get_async_db
 from ..models.fee import Fee
 from pydantic import BaseModel
 import logging
-from uuid import uuid4
-from dotenv import load_dotenv
+from ..utils.ids import new_id
 
 from ..services.fees_service import calculate_fees as calculate_fees_service
+from ..utils.bulk import upsert_insert
+from ..services.reference_cache import FEES, bump_reference_version, reference_cache
 from ..schemas.fees import DetailedFeeCalculationResponse
+from ..schemas.billing import BillingRunCreate, BillingRunResponse
+from ..models.billing_run import BillingRun
+from ..services.billing_run_service import create_billing_run, execute_billing_run, execute_billing_run_by_id
 
-load_dotenv()
 
 router = APIRouter()
 
@@ -27,12 +32,23 @@ class FeesResponse(BaseModel):
     fees: Dict[str, float]
     total: float
 
+
+class FeeChange(BaseModel):
+    code: str
+    previous_amount: Optional[float]  # None for a newly added fee
+    amount: float
+
+
+class FeesUpdateResponse(FeesResponse):
+    # Only the fees the update actually created or changed
+    changes: List[FeeChange]
+
 @router.get("/", response_model=FeesResponse)
-async def get_fees(db: Session = Depends(get_db)):
+async def get_fees(db: AsyncSession = Depends(get_async_db)):
     logger.info("Fetching current fees")
     try:
         # Return canonical set of fee rows as a mapping code -> amount
-        fee_rows = db.query(Fee).all()
+        fee_rows = (await db.run_sync(reference_cache.fees)).items
         if not fee_rows:
             raise HTTPException(status_code=404, detail="Fees not found")
 
@@ -44,36 +60,49 @@ async def get_fees(db: Session = Depends(get_db)):
         logger.error(f"Error fetching fees: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@router.put("/update", response_model=FeesResponse)
-def update_fees(fee_updates: Dict[str, float], db: Session = Depends(get_db)):
-    # Upsert fee components provided as a mapping code->amount in request body
+def _update_fees(db: Session, fee_updates: Dict[str, float]) -> FeesUpdateResponse:
+    # Upsert fee components provided as a mapping code->amount in request body.
+    # Derive a friendly name from the code since the body has none.
+    rows = {
+        code.upper(): {
+            "id": new_id(),
+            "code": code.upper(),
+            "name": code.upper().replace("_", " ").title(),
+            "amount": amount,
+        }
+        for code, amount in fee_updates.items()
+    }
+
+    # Catalog before the change, locked so a concurrent edit can't interleave with the diff
+    previous = dict(db.execute(select(Fee.code, Fee.amount).with_for_update()).all())
+
+    written = []
+    if rows:
+        stmt = upsert_insert(db, Fee.__table__).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["code"],
+            set_={"name": stmt.excluded.name, "amount": stmt.excluded.amount},
+            # Rows that would not change are neither rewritten nor returned
+            where=(Fee.amount != stmt.excluded.amount) | (Fee.name != stmt.excluded.name),
+        ).returning(Fee.code, Fee.amount)
+        written = db.execute(stmt).all()
+
+    changes = [
+        FeeChange(code=code, previous_amount=previous.get(code), amount=amount)
+        for code, amount in written
+    ]
+    if changes:
+        bump_reference_version(db, FEES)
+    db.commit()
+
+    mapping = {code.upper(): amount for code, amount in previous.items()}
+    mapping.update({change.code: change.amount for change in changes})
+    return FeesUpdateResponse(fees=mapping, total=sum(mapping.values()), changes=changes)
+
+@router.put("/update", response_model=FeesUpdateResponse)
+async def update_fees(fee_updates: Dict[str, float], db: AsyncSession = Depends(get_async_db)):
     try:
-        created_or_updated = []
-        for code, amount in fee_updates.items():
-            code_up = code.upper()
-            # Derive a friendly name from the code if name isn't provided
-            friendly_name = code_up.replace("_", " ").title()
-            fee_row = db.query(Fee).filter(Fee.code == code_up).first()
-            if fee_row:
-                fee_row.amount = amount
-                fee_row.name = friendly_name
-            else:
-                fee_row = Fee(
-                    id=str(uuid4()),
-                    code=code_up,
-                    name=friendly_name,
-                    amount=amount,
-                )
-                db.add(fee_row)
-            created_or_updated.append(fee_row)
-
-        db.commit()
-
-        # Return the current mapping after update
-        fee_rows = db.query(Fee).all()
-        mapping = {f.code.upper(): f.amount for f in fee_rows}
-        total = sum(mapping.values())
-        return FeesResponse(fees=mapping, total=total)
+        return await db.run_sync(_update_fees, fee_updates)
     except Exception as e:
         logger.error(f"Error updating fees: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error while updating fees")
@@ -82,14 +111,14 @@ def update_fees(fee_updates: Dict[str, float], db: Session = Depends(get_db)):
 async def calculate_fees_endpoint(
     student_ids: List[str],
     student_club_ids: Dict[str, List[str]],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        return await calculate_fees_service(
+        return await db.run_sync(lambda session: calculate_fees_service(
             student_ids=student_ids,
             student_club_ids=student_club_ids,
-            db=db,
-        )
+            db=session,
+        ))
 
     except HTTPException:
         raise
@@ -100,3 +129,40 @@ async def calculate_fees_endpoint(
             detail="Internal server error while calculating fees"
         )
 
+# ============ Term Billing Runs ============
+
+@router.post("/billing-runs", response_model=BillingRunResponse)
+async def start_billing_run(run_data: BillingRunCreate, db: AsyncSession = Depends(get_async_db)):
+    """Generate a term's StudentFee rows. A failed run is recorded and can be resumed."""
+    run = await db.run_sync(lambda session: create_billing_run(
+        session,
+        term=run_data.term,
+        year_groups=run_data.year_groups,
+        fee_codes=run_data.fee_codes,
+        due_date=run_data.due_date,
+    ))
+    try:
+        return await db.run_sync(execute_billing_run, run)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error executing billing run {run.id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Billing run {run.id} failed: {str(e)}")
+
+@router.get("/billing-runs/{run_id}", response_model=BillingRunResponse)
+async def get_billing_run(run_id: str, db: AsyncSession = Depends(get_async_db)):
+    run = await db.get(BillingRun, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Billing run not found")
+    return run
+
+@router.post("/billing-runs/{run_id}/resume", response_model=BillingRunResponse)
+async def resume_billing_run(run_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Continue a failed or interrupted run from the first year group it has not finished."""
+    try:
+        return await db.run_sync(execute_billing_run_by_id, run_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error resuming billing run {run_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Billing run {run_id} failed: {str(e)}")
@@ -1,18 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import cast
-from sqlalchemy.dialects.postgresql import JSONB
-from typing import List, Optional
-from ..database import get_db
-from ..models.parent import Parent
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+from ..database import get_async_db
+from ..models.parent import Parent, parent_student_association
 from ..models.student import Student
 from ..models.club import ClubMembership, Club
-from ..models.payment import Payment, PaymentStatus
+from ..models.payment import Payment, PaymentStatus, payment_students
+from ..services.club_seat_service import ACTIVE
+from ..services.ledger_service import get_family_balances
+from ..services.fees_service import build_fee_quote
+from ..services.reference_cache import reference_cache
+from ..schemas.fees import DetailedFeeCalculationResponse
+from ..schemas.exams import StudentExamPaymentStatusResponse
+from ..utils.exams import get_student_exam_lists
+from .club import ClubResponse
+from .fees import FeesResponse
 from pydantic import BaseModel
 from datetime import datetime
+import logging
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 class ParentBase(BaseModel):
     auth_id: str
     first_name: str
@@ -30,54 +42,54 @@ class ParentResponse(ParentBase):
         from_attributes = True
 
 @router.post("/", response_model=ParentResponse)
-def create_parent(parent: ParentCreate, db: Session = Depends(get_db)):
+async def create_parent(parent: ParentCreate, db: AsyncSession = Depends(get_async_db)):
     db_parent = Parent(**parent.model_dump())
     db.add(db_parent)
-    db.commit()
-    db.refresh(db_parent)
+    await db.commit()
+    await db.refresh(db_parent)
     return db_parent
 
 @router.get("/", response_model=List[ParentResponse])
-def get_parents(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    parents = db.query(Parent).offset(skip).limit(limit).all()
-    return parents
+async def get_parents(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    parents = await db.scalars(select(Parent).offset(skip).limit(limit))
+    return parents.all()
 
 @router.get("/{parent_id}", response_model=ParentResponse)
-def get_parent(parent_id: str, db: Session = Depends(get_db)):
-    parent = db.query(Parent).filter(Parent.id == parent_id).first()
+async def get_parent(parent_id: str, db: AsyncSession = Depends(get_async_db)):
+    parent = await db.scalar(select(Parent).where(Parent.id == parent_id))
     if parent is None:
         raise HTTPException(status_code=404, detail="Parent not found")
     return parent
 
 @router.get("/email/{email}", response_model=ParentResponse)
-def get_parent_by_email(email: str, db: Session = Depends(get_db)):
+async def get_parent_by_email(email: str, db: AsyncSession = Depends(get_async_db)):
     print(f"Searching for parent with email: {email}")
-    parent = db.query(Parent).filter(Parent.email == email).first()
+    parent = await db.scalar(select(Parent).where(Parent.email == email))
     if parent is None:
         raise HTTPException(status_code=404, detail="Parent not found")
     return parent
 
 @router.put("/{parent_id}", response_model=ParentResponse)
-def update_parent(parent_id: str, parent: ParentCreate, db: Session = Depends(get_db)):
-    db_parent = db.query(Parent).filter(Parent.id == parent_id).first()
+async def update_parent(parent_id: str, parent: ParentCreate, db: AsyncSession = Depends(get_async_db)):
+    db_parent = await db.scalar(select(Parent).where(Parent.id == parent_id))
     if db_parent is None:
         raise HTTPException(status_code=404, detail="Parent not found")
 
     for key, value in parent.model_dump().items():
         setattr(db_parent, key, value)
 
-    db.commit()
-    db.refresh(db_parent)
+    await db.commit()
+    await db.refresh(db_parent)
     return db_parent
 
 @router.delete("/{parent_id}")
-def delete_parent(parent_id: str, db: Session = Depends(get_db)):
-    parent = db.query(Parent).filter(Parent.id == parent_id).first()
+async def delete_parent(parent_id: str, db: AsyncSession = Depends(get_async_db)):
+    parent = await db.scalar(select(Parent).where(Parent.id == parent_id))
     if parent is None:
         raise HTTPException(status_code=404, detail="Parent not found")
 
-    db.delete(parent)
-    db.commit()
+    await db.delete(parent)
+    await db.commit()
     return {"message": "Parent deleted successfully"}
 
 
@@ -118,11 +130,11 @@ class ParentStudentsResponse(BaseModel):
     students: List[StudentWithStatus]
 
 
-@router.get("/{parent_id}/students", response_model=ParentStudentsResponse)
-def get_parent_students(parent_id: str, db: Session = Depends(get_db)):
+def _load_parent_students(db: Session, parent_id: str):
     """
-    Get all students associated with a parent, including their school fees payment status
-    and club memberships.
+    Load a parent and their children with club memberships and school fees status.
+    Three queries regardless of the number of children. Returns the parent, the
+    Student rows and their StudentWithStatus views.
     """
     parent = db.query(Parent).filter(Parent.id == parent_id).first()
     if parent is None:
@@ -137,16 +149,19 @@ def get_parent_students(parent_id: str, db: Session = Depends(get_db)):
         joinedload(Student.club_memberships).joinedload(ClubMembership.club)
     ).all()
 
-    # Check school fees payment status for each student
-    students_with_status = []
-    for student in students:
-        # UPDATED QUERY: Use cast to ensure PostgreSQL uses the JSONB contains operator (@>)
-        payment = db.query(Payment).filter(
+    # Resolve school fees payment status for all children in one query
+    paid_student_ids = set(db.scalars(
+        select(payment_students.c.student_id).join(
+            Payment, Payment.id == payment_students.c.payment_id
+        ).where(
+            payment_students.c.student_id.in_([s.id for s in students]),
             Payment.status == PaymentStatus.COMPLETED,
-            cast(Payment.student_ids, JSONB).contains([str(student.id)])
-        ).first()
+        ).distinct()
+    ))
 
-        school_fees_paid = payment is not None
+    students_with_status = []
+    for student in students:
+        school_fees_paid = student.id in paid_student_ids
 
         # Build club membership info
         club_memberships = []
@@ -175,14 +190,94 @@ def get_parent_students(parent_id: str, db: Session = Depends(get_db)):
             club_memberships=club_memberships
         ))
 
+    return parent, students, students_with_status
+
+
+@router.get("/{parent_id}/students", response_model=ParentStudentsResponse)
+async def get_parent_students(parent_id: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get all students associated with a parent, including their school fees payment status
+    and club memberships.
+    """
+    parent, _, students_with_status = await db.run_sync(_load_parent_students, parent_id)
+
     return ParentStudentsResponse(
-        parent=ParentResponse(
-            id=str(parent.id),
-            auth_id=parent.auth_id,
-            first_name=parent.first_name,
-            last_name=parent.last_name,
-            email=parent.email,
-            phone=parent.phone
-        ),
+        parent=ParentResponse.model_validate(parent),
         students=students_with_status
-    ) 
\ No newline at end of file
+    )
+
+
+class ParentBootstrapResponse(BaseModel):
+    parent: ParentResponse
+    students: List[StudentWithStatus]
+    fees: FeesResponse
+    clubs: List[ClubResponse]
+    # Quote for the unpaid children with the clubs they are already in
+    fee_quote: Optional[DetailedFeeCalculationResponse] = None
+    exam_lists: Dict[str, StudentExamPaymentStatusResponse]
+
+
+def _build_bootstrap(db: Session, parent_id: str) -> ParentBootstrapResponse:
+    parent, students, students_with_status = _load_parent_students(db, parent_id)
+
+    fee_rows = reference_cache.fees(db).items
+    clubs = reference_cache.clubs(db).items
+    exam_lists = get_student_exam_lists(db, students)
+
+    fee_mapping = {f.code.upper(): f.amount for f in fee_rows}
+    fee_quote = None
+    unpaid = [s for s, view in zip(students, students_with_status) if not view.school_fees_paid]
+    if fee_rows and unpaid:
+        fee_quote = build_fee_quote(
+            students=unpaid,
+            # Only current memberships; expired holds and old memberships are not charged
+            student_club_ids={s.id: [m.club_id for m in s.club_memberships if m.status == ACTIVE] for s in unpaid},
+            fee_rows=fee_rows,
+            clubs_by_id={c.id: c for c in clubs},
+        )
+
+    return ParentBootstrapResponse(
+        parent=ParentResponse.model_validate(parent),
+        students=students_with_status,
+        fees=FeesResponse(fees=fee_mapping, total=sum(fee_mapping.values())),
+        clubs=[ClubResponse.model_validate(c) for c in clubs],
+        fee_quote=fee_quote,
+        exam_lists=exam_lists,
+    )
+
+
+@router.get("/{parent_id}/bootstrap", response_model=ParentBootstrapResponse)
+async def get_parent_bootstrap(parent_id: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Everything the parent portal needs for first paint in one round trip:
+    the parent, children with club memberships and paid status, the fee catalog,
+    the club list, a fee quote for unpaid children and each child's exam list.
+    Four queries regardless of the number of children, plus catalog reloads
+    when the reference cache is cold or stale.
+    """
+    try:
+        return await db.run_sync(_build_bootstrap, parent_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error building bootstrap for parent {parent_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class FamilyBalanceResponse(BaseModel):
+    parent_id: str
+    balances: Dict[str, float]
+    total: float
+
+
+@router.get("/{parent_id}/balance", response_model=FamilyBalanceResponse)
+async def get_parent_balance(parent_id: str, db: AsyncSession = Depends(get_async_db)):
+    """What each of a parent's children owes, read from the running balances."""
+    parent = await db.scalar(select(Parent).where(Parent.id == parent_id))
+    if parent is None:
+        raise HTTPException(status_code=404, detail="Parent not found")
+    student_ids = (await db.scalars(
+        select(parent_student_association.c.student_id).where(parent_student_association.c.parent_id == parent_id)
+    )).all()
+    balances = await db.run_sync(get_family_balances, list(student_ids))
+    return FamilyBalanceResponse(parent_id=parent.id, balances=balances, total=round(sum(balances.values()), 2))
@@ -1,18 +1,21 @@
 from ..services.fees_service import calculate_fees
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 import hmac
 import hashlib
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from typing import List, Dict
-from ..database import get_db
+from ..database import get_async_db
 from ..models.payment import Payment, PaymentStatus, ExamPayment
 from ..models.student import Student
 from ..models.parent import Parent
 from ..models.club import Club, ClubMembership
 from ..utils.exams import update_payment_records, update_exam_payment_records
+from ..services.payment_status_service import wait_for_payment_statuses
+from ..services.quote_token import catalog_version, verify_quote_token
 import requests
 import os
-from dotenv import load_dotenv
 import logging
 
 # Import the centralized payment service and schemas
@@ -28,7 +31,6 @@ from ..schemas.payment import (
     PaystackResponse
 )
 
-load_dotenv()
 
 router = APIRouter()
 PAYSTACK_INITIALIZE_URL = "https://api.paystack.co/transaction/initialize"
@@ -37,27 +39,39 @@ PAYSTACK_SPLIT_URL = "https://api.paystack.co/split"
 
 PAYSTACK_SECRET_KEY = os.getenv("PAYSTACK_SECRET_KEY")
 
+# Longest a status request is held, kept under common proxy idle timeouts
+STATUS_LONG_POLL_SECONDS = 25
+MAX_STATUS_REFERENCES = 20
+
 # Setup logger
 logger = logging.getLogger(__name__)
 
 @router.post("/initialize", response_model=dict)
-async def initialize_payment_endpoint(payment: PaymentCreate, db: Session = Depends(get_db)):
+async def initialize_payment_endpoint(payment: PaymentCreate, db: AsyncSession = Depends(get_async_db)):
     logger.info(f"Initializing payment for students: {payment.student_ids}")
     
     try:    
-        # Calculate and validate the amount
-        fee_calculation = await calculate_fees(
-            student_ids=payment.student_ids,
-            student_club_ids=payment.student_club_ids,
-            db=db
+        # A valid quote token already proves the amount; otherwise recalculate and validate it
+        quote_accepted = payment.quote_token is not None and verify_quote_token(
+            payment.quote_token,
+            payment.student_ids,
+            payment.student_club_ids,
+            payment.amount,
+            await db.run_sync(catalog_version),
         )
-        
-        # Validate that the submitted amount matches the calculated amount
-        if abs(payment.amount - fee_calculation.total_amount) > 0.01:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid amount. Expected: {fee_calculation.total_amount}, Got: {payment.amount}"
-            )
+        if not quote_accepted:
+            fee_calculation = await db.run_sync(lambda session: calculate_fees(
+                student_ids=payment.student_ids,
+                student_club_ids=payment.student_club_ids,
+                db=session
+            ))
+
+            # Validate that the submitted amount matches the calculated amount
+            if abs(payment.amount - fee_calculation.total_amount) > 0.01:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid amount. Expected: {fee_calculation.total_amount}, Got: {payment.amount}"
+                )
         
         # Prepare payment data for the centralized service
         payment_data = SchoolFeesPaymentData(
@@ -71,12 +85,12 @@ async def initialize_payment_endpoint(payment: PaymentCreate, db: Session = Depe
             description=payment.description
         )
         
-        # Use the centralized payment service
-        result = initialize_payment(
+        # Use the centralized payment service (Paystack calls are offloaded to the threadpool)
+        result = await db.run_sync(lambda session: initialize_payment(
             payment_type=PaymentType.SCHOOL_FEES,
             payment_data=payment_data,
-            db=db
-        )
+            db=session
+        ))
         
         if result.status:
             return result.data
@@ -90,31 +104,53 @@ async def initialize_payment_endpoint(payment: PaymentCreate, db: Session = Depe
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/", response_model=List[PaymentResponse])
-def get_payments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    payments = db.query(Payment).offset(skip).limit(limit).all()
-    return payments
+async def get_payments(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    payments = await db.scalars(select(Payment).offset(skip).limit(limit))
+    return payments.all()
+
+@router.get("/status", response_model=Dict[str, str])
+async def get_payment_statuses_endpoint(
+    references: List[str] = Query(...),
+    timeout: float = STATUS_LONG_POLL_SECONDS,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Status of several payment references (school or exam fees) in one call.
+    While any is pending the request is held until one of them changes or
+    `timeout` seconds pass, so clients long-poll instead of polling verify.
+    """
+    if len(references) > MAX_STATUS_REFERENCES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_STATUS_REFERENCES} references per request")
+    try:
+        timeout = min(max(timeout, 0), STATUS_LONG_POLL_SECONDS)
+        return await wait_for_payment_statuses(db, list(dict.fromkeys(references)), timeout)
+    except Exception as e:
+        logger.error(f"Error getting payment statuses: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{payment_id}", response_model=PaymentResponse)
-def get_payment(payment_id: str, db: Session = Depends(get_db)):
-    payment = db.query(Payment).filter(Payment.id == payment_id).first()
+async def get_payment(payment_id: str, db: AsyncSession = Depends(get_async_db)):
+    payment = await db.scalar(select(Payment).where(Payment.id == payment_id))
     if payment is None:
         raise HTTPException(status_code=404, detail="Payment not found")
     return payment
 
 @router.post("/verify/{payment_reference}")
-async def verify_payment_status(payment_reference: str, db: Session = Depends(get_db)):
+async def verify_payment_status(payment_reference: str, db: AsyncSession = Depends(get_async_db)):
     # First check our local database
-    payment = db.query(Payment).filter(Payment.payment_reference == payment_reference).first()
+    payment = await db.scalar(select(Payment).where(Payment.payment_reference == payment_reference))
     if payment is None:
         raise HTTPException(status_code=404, detail="Payment not found")
+    # Read now: after a failed update the instance is expired and cannot lazy-load here
+    local_status = payment.status.value
     
     # Also verify with Paystack
     try:
-        paystack_response = verify_payment(payment_reference)
+        paystack_response = await run_in_threadpool(verify_payment, payment_reference)
         if paystack_response["status"] and paystack_response["data"]["status"] == "success":
             # Update local status + related records + create payment items
-            await update_payment_records(
-                db,
+            await db.run_sync(
+                update_payment_records,
                 payment,
                 payment.student_ids,
                 logger,
@@ -128,10 +164,10 @@ async def verify_payment_status(payment_reference: str, db: Session = Depends(ge
     except Exception as e:
         logger.error(f"Error verifying payment with Paystack: {str(e)}")
         # Fall back to local status if Paystack verification fails
-        return {"status": payment.status.value}
+        return {"status": local_status}
 
 @router.post("/webhook")
-async def paystack_webhook(request: Request, db: Session = Depends(get_db)) -> Dict:
+async def paystack_webhook(request: Request, db: AsyncSession = Depends(get_async_db)) -> Dict:
     try:
         logger.info("=============== NEW WEBHOOK REQUEST ===============")
         logger.info(f"Headers: {request.headers}")
@@ -170,18 +206,18 @@ async def paystack_webhook(request: Request, db: Session = Depends(get_db)) -> D
             reference = event['data']['reference']
             logger.info(f"Transaction reference: {reference}")
 
-            response = verify_payment(reference)
+            response = await run_in_threadpool(verify_payment, reference)
             logger.info(f"Verification response: {response}")
 
             if response["data"]["status"] == "success":
                 logger.info(f"Payment status is success")
                 if event['data']['metadata']['payment_type'] == 'school_fees':
                     logger.info(f"Payment type is school fees")
-                    payment = db.query(Payment).filter(Payment.payment_reference == reference).first()
+                    payment = await db.scalar(select(Payment).where(Payment.payment_reference == reference))
                     if payment:
                         logger.info(f"Payment found")
-                        await update_payment_records(
-                            db,
+                        await db.run_sync(
+                            update_payment_records,
                             payment,
                             payment.student_ids,
                             logger,
@@ -191,10 +227,12 @@ async def paystack_webhook(request: Request, db: Session = Depends(get_db)) -> D
 
                 elif event['data']['metadata']['payment_type'] == 'exam_fees':
                     logger.info(f"Payment type is exam fees")
-                    exam_payments = db.query(ExamPayment).filter(ExamPayment.payment_reference == reference)
+                    exam_payments = (await db.scalars(
+                        select(ExamPayment).where(ExamPayment.payment_reference == reference)
+                    )).all()
                     if exam_payments:
                         logger.info(f"Exam payment found")
-                        await update_exam_payment_records(db, exam_payments, logger)
+                        await db.run_sync(update_exam_payment_records, exam_payments, logger)
                         return {"status": "success"}
         return {"status": "failed"}
     except HTTPException:
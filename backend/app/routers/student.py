@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 from ..database import get_db
 from ..models.student import Student
+from ..models.ledger import LedgerEntry
+from ..services.ledger_service import get_balance_at
+from ..services.roster_import_service import RosterFormatError, import_roster
+from ..schemas.roster import RosterImportResult
+from ..services.promotion_service import promote_students
+from ..schemas.promotion import PromotionRequest, PromotionResult
 from ..models.classes import YearGroup, ClassName
 from pydantic import BaseModel
 import logging
@@ -31,6 +38,26 @@ class StudentResponse(StudentBase):
         from_attributes = True
         use_enum_values = True
 
+class LedgerEntryResponse(BaseModel):
+    id: str
+    entry_type: str
+    debit_account: str
+    credit_account: str
+    amount: float
+    source_type: str
+    source_id: str
+    description: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+        use_enum_values = True
+
+class StudentBalanceResponse(BaseModel):
+    student_id: str
+    balance: float
+    as_of: Optional[datetime] = None
+
 class StudentIDRequest(BaseModel):
     student_last_name: str
     student_ids: List[str]  # List of student IDs (e.g., ["2023-0001", "2023-0002"])
@@ -75,12 +102,42 @@ def get_students_by_last_name_and_id(request: StudentIDRequest, db: Session = De
 
 @router.post("/", response_model=StudentResponse)
 def create_student(student: StudentCreate, db: Session = Depends(get_db)):
-    db_student = Student(**student.model_dump())
+    # The balance is owned by the ledger and never set directly
+    db_student = Student(**student.model_dump(exclude={"outstanding_balance"}))
     db.add(db_student)
     db.commit()
     db.refresh(db_student)
     return db_student
 
+@router.post("/import", response_model=RosterImportResult)
+def import_students(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """
+    Bulk import students, their parents and the parent links from a CSV, XLS or XLSX roster.
+    Students are matched by reg_number and parents by email or phone; bad rows are reported, not fatal.
+    """
+    try:
+        return import_roster(db, file.file, file.filename or "")
+    except RosterFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error importing roster {file.filename}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/promote", response_model=PromotionResult)
+def promote_year_end(request: PromotionRequest, db: Session = Depends(get_db)):
+    """
+    Year-end promotion: every current student moves up one year group and Year 12 leaves.
+    Defaults to a dry run that returns the diff; send dry_run=false to apply it once per academic year.
+    """
+    try:
+        return promote_students(db, request.academic_year, dry_run=request.dry_run)
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error promoting students for {request.academic_year}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/", response_model=List[StudentResponse])
 def get_students(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     students = db.query(Student).offset(skip).limit(limit).all()
@@ -93,13 +150,32 @@ def get_student(student_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Student not found")
     return student
 
+@router.get("/{student_id}/ledger", response_model=List[LedgerEntryResponse])
+def get_student_ledger(student_id: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    """Ledger entries for a student, newest first."""
+    if db.query(Student.id).filter(Student.id == student_id).first() is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return db.query(LedgerEntry).filter(
+        LedgerEntry.student_id == student_id
+    ).order_by(LedgerEntry.created_at.desc()).offset(skip).limit(limit).all()
+
+@router.get("/{student_id}/balance", response_model=StudentBalanceResponse)
+def get_student_balance(student_id: str, at: Optional[datetime] = None, db: Session = Depends(get_db)):
+    """Current running balance, or the balance as of `at` when given."""
+    student = db.query(Student).filter(Student.id == student_id).first()
+    if student is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    if at is None:
+        return StudentBalanceResponse(student_id=student.id, balance=student.outstanding_balance or 0)
+    return StudentBalanceResponse(student_id=student.id, balance=get_balance_at(db, student.id, at), as_of=at)
+
 @router.put("/{student_id}", response_model=StudentResponse)
 def update_student(student_id: str, student: StudentCreate, db: Session = Depends(get_db)):
     db_student = db.query(Student).filter(Student.id == student_id).first()
     if db_student is None:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    for key, value in student.model_dump().items():
+    for key, value in student.model_dump(exclude={"outstanding_balance"}).items():
         setattr(db_student, key, value)
 
     db.commit()
@@ -0,0 +1,143 @@
+from datetime import datetime
+from typing import List
+from pydantic import BaseModel
+
+
+class ClassPaymentSummary(BaseModel):
+    class_name: str
+    total_students: int
+    paid_count: int
+    unpaid_count: int
+    payment_rate: float
+    total_collected: float
+
+
+class YearGroupPaymentSummary(BaseModel):
+    year_group: str
+    total_students: int
+    paid_count: int
+    unpaid_count: int
+    payment_rate: float
+    total_collected: float
+    classes: List[ClassPaymentSummary]
+
+
+class StudentPaymentInfo(BaseModel):
+    id: str
+    reg_number: str
+    first_name: str
+    last_name: str
+    year_group: str
+    class_name: str
+    school_fees_paid: bool
+    outstanding_balance: float | None
+
+
+class PaginatedStudentPaymentInfo(BaseModel):
+    items: List[StudentPaymentInfo]
+    total: int
+    limit: int
+    offset: int
+
+
+class SchoolFeesOverview(BaseModel):
+    total_students: int
+    total_paid: int
+    total_unpaid: int
+    overall_payment_rate: float
+    total_amount_collected: float
+    by_year_group: List[YearGroupPaymentSummary]
+
+
+class ExamPaymentSummary(BaseModel):
+    exam_id: str
+    exam_name: str
+    applicable_grades: List[str] | None
+    total_applicable_students: int
+    total_registered: int
+    fully_paid_count: int
+    partially_paid_count: int
+    unpaid_count: int
+    total_amount_expected: float
+    total_amount_collected: float
+    collection_rate: float
+
+
+class StudentExamInfo(BaseModel):
+    student_id: str
+    reg_number: str
+    first_name: str
+    last_name: str
+    year_group: str
+    class_name: str
+    amount_due: float
+    amount_paid: float
+    is_fully_paid: bool
+
+
+class PaginatedStudentExamInfo(BaseModel):
+    items: List[StudentExamInfo]
+    total: int
+    limit: int
+    offset: int
+
+
+class ExamAnalyticsResponse(BaseModel):
+    total_exams: int
+    exams: List[ExamPaymentSummary]
+
+
+class ClubMembershipSummary(BaseModel):
+    club_id: str
+    club_name: str
+    price: float
+    capacity: int | None
+    total_members: int
+    confirmed_members: int
+    pending_members: int
+    capacity_utilization: float | None
+    total_revenue: float
+
+
+class ClubMemberInfo(BaseModel):
+    student_id: str
+    reg_number: str
+    first_name: str
+    last_name: str
+    year_group: str
+    class_name: str
+    payment_confirmed: bool
+    status: str
+
+
+class PaginatedClubMemberInfo(BaseModel):
+    items: List[ClubMemberInfo]
+    total: int
+    limit: int
+    offset: int
+
+
+class ClubAnalyticsResponse(BaseModel):
+    total_clubs: int
+    total_memberships: int
+    total_revenue: float
+    clubs: List[ClubMembershipSummary]
+
+
+class DashboardOverview(BaseModel):
+    total_students: int
+    school_fees_paid_count: int
+    school_fees_unpaid_count: int
+    school_fees_collection_rate: float
+    total_school_fees_collected: float
+    total_exam_registrations: int
+    total_exam_fees_collected: float
+    total_club_memberships: int
+    total_club_revenue: float
+    recent_payments_count: int
+
+
+class AnalyticsSnapshotInfo(BaseModel):
+    id: str
+    kind: str
+    taken_at: datetime
@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+from ..models.billing_run import BillingRunStatus
+
+
+class YearGroupQuote(BaseModel):
+    year_group: str
+    students: int
+    total_amount: float
+
+
+class StudentQuoteLine(BaseModel):
+    student_id: str
+    student_name: str
+    year_group: str
+    base_fees: float
+    club_fees: float
+    exam_fees: float
+    exam_discounts: float
+    total_amount: float
+
+
+class FamilyQuoteLine(BaseModel):
+    parent_id: str
+    students: int
+    total_amount: float
+
+
+class SchoolBillingQuote(BaseModel):
+    generated_at: datetime
+    elapsed_ms: float
+    base_fees: Dict[str, float]
+    student_count: int
+    family_count: int
+    club_fees_total: float
+    exam_fees_total: float
+    exam_discounts_total: float
+    total_amount: float
+    year_groups: List[YearGroupQuote]
+    # Only with ?detail=true
+    students: Optional[List[StudentQuoteLine]] = None
+    families: Optional[List[FamilyQuoteLine]] = None
+
+
+class BillingRunCreate(BaseModel):
+    term: str
+    # YearGroup names (e.g. "YEAR_10") and fee codes; omitted means all
+    year_groups: Optional[List[str]] = None
+    fee_codes: Optional[List[str]] = None
+    due_date: Optional[str] = None
+
+
+class BillingRunResponse(BaseModel):
+    id: str
+    term: str
+    year_groups: List[str]
+    fee_codes: List[str]
+    due_date: Optional[str] = None
+    status: BillingRunStatus
+    completed_year_groups: List[str]
+    rows_created: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
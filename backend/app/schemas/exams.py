@@ -0,0 +1,20 @@
+from typing import List
+from pydantic import BaseModel
+
+
+class ExamPaymentStatusResponse(BaseModel):
+    exam_id: str
+    exam_name: str
+    exam_price: float
+    extra_fees: float | None = None
+    amount_paid: float
+    amount_due: float
+    is_fully_paid: bool
+
+
+class StudentExamPaymentStatusResponse(BaseModel):
+    id: str | None = None
+    year_group: str | None = None
+    class_name: str | None = None
+    student_id: str
+    exam_list: List[ExamPaymentStatusResponse] | None = None
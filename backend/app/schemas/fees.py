@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 
 class ClubInfo(BaseModel):
@@ -24,3 +24,5 @@ class StudentFeeDetail(BaseModel):
 class DetailedFeeCalculationResponse(BaseModel):
     total_amount: float
     student_fees: List[StudentFeeDetail]
+    # Signed proof of this quote, accepted by /payments/initialize (see services/quote_token.py)
+    quote_token: Optional[str] = None
@@ -40,6 +40,8 @@ class PaymentCreate(PaymentBase):
     parent_id: str
     student_club_ids: dict[str, List[str]]
     student_fee_ids: List[str] = []
+    # From /fees/calculate-fees; lets initialize skip recomputing the quote
+    quote_token: str | None = None
 
 
 class PaymentResponse(PaymentBase):
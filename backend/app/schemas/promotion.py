@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class PromotionRequest(BaseModel):
+    academic_year: str  # The year being closed, e.g. "2025/2026"
+    dry_run: bool = True
+
+
+class YearGroupMove(BaseModel):
+    from_year_group: str
+    to_year_group: Optional[str] = None  # None for leavers
+    students: int
+
+
+class ExamEligibilityChange(BaseModel):
+    exam_id: str
+    exam_name: str
+    enrolled: int
+    withdrawn: int
+
+
+class PromotionResult(BaseModel):
+    academic_year: str
+    dry_run: bool
+    promoted: int
+    leavers: int
+    moves: List[YearGroupMove]
+    exam_changes: List[ExamEligibilityChange]
+    applied_at: Optional[datetime] = None
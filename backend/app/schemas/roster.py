@@ -0,0 +1,19 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class RosterRowError(BaseModel):
+    row: int  # 1-based spreadsheet row, counting the header
+    reg_number: Optional[str] = None
+    message: str
+
+
+class RosterImportResult(BaseModel):
+    rows: int
+    students_created: int
+    students_updated: int
+    parents_created: int
+    parents_updated: int
+    links_created: int
+    elapsed_ms: float
+    errors: List[RosterRowError]
@@ -0,0 +1,224 @@
+"""
+Analytics Service - Builds the admin dashboard overviews.
+
+The builders are shared by the live admin endpoints and by the snapshot job,
+so a materialized snapshot always has exactly the shape the endpoint returns.
+"""
+from sqlalchemy import func, case
+from sqlalchemy.orm import Session
+
+from ..models.student import Student
+from ..models.payment import Payment, PaymentStatus
+from ..models.student_exam_fee import ExamFeeStatus, StudentExamFee
+from ..models.club import Club
+from ..models.fees import ExamFees
+from ..schemas.analytics import (
+    ClassPaymentSummary,
+    YearGroupPaymentSummary,
+    SchoolFeesOverview,
+    ExamPaymentSummary,
+    ExamAnalyticsResponse,
+    ClubMembershipSummary,
+    ClubAnalyticsResponse,
+)
+from .exam_applicability import applicable_student_counts
+
+
+def build_school_fees_overview(db: Session) -> SchoolFeesOverview:
+    """School fees payment analytics by year group and class."""
+    # Get all students with year group and class
+    students = db.query(
+        Student.id,
+        Student.year_group,
+        Student.class_name
+    ).filter(Student.left_at.is_(None)).all()
+
+    # Get count of paid students from completed payments
+    completed_payments = db.query(Payment.student_ids).filter(
+        Payment.status == PaymentStatus.COMPLETED
+    ).all()
+    paid_set = set()
+    for payment in completed_payments:
+        if payment.student_ids:
+            # student_ids is stored as JSON, so it's already a list
+            if isinstance(payment.student_ids, list):
+                paid_set.update(payment.student_ids)
+            else:
+                # Handle case where it might be a single ID
+                paid_set.add(payment.student_ids)
+    # Leavers (and deleted students) may still be on old payments; only current students count
+    paid_set &= {student_id for student_id, _, _ in students}
+
+    # Get total collected
+    total_collected = db.query(func.coalesce(func.sum(Payment.amount), 0)).filter(
+        Payment.status == PaymentStatus.COMPLETED
+    ).scalar() or 0.0
+
+    # Organize by year group and class
+    year_group_data = {}
+    for student_id, year_group, class_name in students:
+        yg = year_group.value if year_group else "Unknown"
+        cn = class_name.value if class_name else "Unknown"
+
+        if yg not in year_group_data:
+            year_group_data[yg] = {"classes": {}, "total": 0, "paid": 0}
+
+        if cn not in year_group_data[yg]["classes"]:
+            year_group_data[yg]["classes"][cn] = {"total": 0, "paid": 0}
+
+        year_group_data[yg]["total"] += 1
+        year_group_data[yg]["classes"][cn]["total"] += 1
+
+        if student_id in paid_set:
+            year_group_data[yg]["paid"] += 1
+            year_group_data[yg]["classes"][cn]["paid"] += 1
+
+    # Build response
+    by_year_group = []
+    for yg, data in sorted(year_group_data.items()):
+        classes = []
+        for cn, class_data in sorted(data["classes"].items()):
+            paid = class_data["paid"]
+            total = class_data["total"]
+            rate = (paid / total * 100) if total > 0 else 0
+            classes.append(ClassPaymentSummary(
+                class_name=cn,
+                total_students=total,
+                paid_count=paid,
+                unpaid_count=total - paid,
+                payment_rate=round(rate, 1),
+                total_collected=0
+            ))
+
+        yg_paid = data["paid"]
+        yg_total = data["total"]
+        yg_rate = (yg_paid / yg_total * 100) if yg_total > 0 else 0
+
+        by_year_group.append(YearGroupPaymentSummary(
+            year_group=yg,
+            total_students=yg_total,
+            paid_count=yg_paid,
+            unpaid_count=yg_total - yg_paid,
+            payment_rate=round(yg_rate, 1),
+            total_collected=0,
+            classes=classes
+        ))
+
+    total_students = len(students)
+    total_paid = len(paid_set)
+    overall_rate = (total_paid / total_students * 100) if total_students > 0 else 0
+
+    return SchoolFeesOverview(
+        total_students=total_students,
+        total_paid=total_paid,
+        total_unpaid=total_students - total_paid,
+        overall_payment_rate=round(overall_rate, 1),
+        total_amount_collected=total_collected,
+        by_year_group=by_year_group
+    )
+
+
+def build_exam_fees_overview(db: Session) -> ExamAnalyticsResponse:
+    """Exam fees analytics: registrations, payment progress and collection per exam."""
+    exams = db.query(ExamFees).all()
+
+    # Eligible students per exam from the applicability index, in one query
+    applicable_counts = applicable_student_counts(db)
+
+    total_students = db.query(func.count(Student.id)).filter(Student.left_at.is_(None)).scalar() or 0
+
+    # Registrations, payment progress and amounts per exam from the running totals, in one query
+    stats_by_exam = {
+        row.exam_fee_id: row
+        for row in db.query(
+            StudentExamFee.exam_fee_id,
+            func.count(StudentExamFee.id).label('total'),
+            func.sum(case((StudentExamFee.payment_status == ExamFeeStatus.PAID, 1), else_=0)).label('fully_paid'),
+            func.sum(case((StudentExamFee.payment_status == ExamFeeStatus.PARTIAL, 1), else_=0)).label('partial'),
+            func.coalesce(func.sum(StudentExamFee.amount_paid), 0).label('collected'),
+            func.coalesce(func.sum(StudentExamFee.net_amount), 0).label('expected'),
+        ).group_by(StudentExamFee.exam_fee_id).all()
+    }
+
+    exam_summaries = []
+    for exam in exams:
+        # Calculate applicable students
+        applicable_grades = exam.applicable_grades or []
+        if applicable_grades:
+            applicable_count = applicable_counts.get(exam.id, 0)
+        else:
+            applicable_count = total_students
+
+        payment_stats = stats_by_exam.get(exam.id)
+        total_registered = payment_stats.total if payment_stats else 0
+        fully_paid = int(payment_stats.fully_paid or 0) if payment_stats else 0
+        partially_paid = int(payment_stats.partial or 0) if payment_stats else 0
+        unpaid = total_registered - fully_paid - partially_paid
+        total_collected = float(payment_stats.collected) if payment_stats else 0.0
+        total_expected = float(payment_stats.expected) if payment_stats else 0.0
+
+        collection_rate = (total_collected / total_expected * 100) if total_expected > 0 else 0
+
+        exam_summaries.append(ExamPaymentSummary(
+            exam_id=exam.id,
+            exam_name=exam.exam_name,
+            applicable_grades=applicable_grades,
+            total_applicable_students=applicable_count,
+            total_registered=total_registered,
+            fully_paid_count=fully_paid,
+            partially_paid_count=partially_paid,
+            unpaid_count=unpaid,
+            total_amount_expected=total_expected,
+            total_amount_collected=total_collected,
+            collection_rate=round(collection_rate, 1)
+        ))
+
+    return ExamAnalyticsResponse(
+        total_exams=len(exams),
+        exams=exam_summaries
+    )
+
+
+def build_clubs_overview(db: Session) -> ClubAnalyticsResponse:
+    """Club membership analytics: members, confirmations, utilization and revenue per club.
+
+    Reads the member counters kept on each club, so the cost is one query over the clubs.
+    """
+    clubs = db.query(Club).all()
+
+    club_summaries = []
+    total_memberships = 0
+    total_revenue = 0.0
+
+    for club in clubs:
+        total_members = club.seats_taken
+        confirmed = club.confirmed_members
+        pending = club.pending_members
+
+        capacity_util = None
+        if club.capacity and club.capacity > 0:
+            capacity_util = round(total_members / club.capacity * 100, 1)
+
+        revenue = confirmed * club.price
+
+        club_summaries.append(ClubMembershipSummary(
+            club_id=club.id,
+            club_name=club.name,
+            price=club.price,
+            capacity=club.capacity,
+            total_members=total_members,
+            confirmed_members=confirmed,
+            pending_members=pending,
+            capacity_utilization=capacity_util,
+            total_revenue=revenue
+        ))
+
+        total_memberships += total_members
+        total_revenue += revenue
+
+    return ClubAnalyticsResponse(
+        total_clubs=len(clubs),
+        total_memberships=total_memberships,
+        total_revenue=total_revenue,
+        clubs=club_summaries
+    )
@@ -0,0 +1,109 @@
+"""
+Analytics Snapshot Service - Materializes the admin overviews into snapshot rows.
+
+Each run stores the exact response of the school fees, exam fees and clubs
+overviews, so the endpoints can serve `snapshot=latest` (or a point in time)
+with a single indexed lookup and the history doubles as a trend record.
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from ..models.analytics_snapshot import AnalyticsSnapshot
+from .analytics_service import (
+    build_school_fees_overview,
+    build_exam_fees_overview,
+    build_clubs_overview,
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_BUILDERS: Dict[str, Callable[[Session], BaseModel]] = {
+    "school_fees": build_school_fees_overview,
+    "exam_fees": build_exam_fees_overview,
+    "clubs": build_clubs_overview,
+}
+
+
+def get_snapshot_interval_seconds() -> float:
+    """Snapshot interval from `analytics_snapshot_interval_minutes` (0 disables the job)."""
+    try:
+        return float(os.getenv("analytics_snapshot_interval_minutes", "60")) * 60
+    except ValueError:
+        logger.warning("Invalid analytics_snapshot_interval_minutes; snapshots disabled")
+        return 0
+
+
+def take_analytics_snapshots(db: Session, kinds: Optional[List[str]] = None) -> List[AnalyticsSnapshot]:
+    """Compute the requested overviews (all by default) and store one snapshot row per kind."""
+    taken_at = datetime.now()
+    snapshots = []
+    for kind in kinds or SNAPSHOT_BUILDERS.keys():
+        builder = SNAPSHOT_BUILDERS.get(kind)
+        if builder is None:
+            raise HTTPException(status_code=400, detail=f"Unknown snapshot kind: {kind}")
+        overview = builder(db)
+        snapshots.append(AnalyticsSnapshot(
+            kind=kind,
+            payload=overview.model_dump(mode="json"),
+            taken_at=taken_at,
+        ))
+    db.add_all(snapshots)
+    db.commit()
+    logger.info(f"Stored analytics snapshots {[s.kind for s in snapshots]} at {taken_at.isoformat()}")
+    return snapshots
+
+
+def run_scheduled_snapshot(db: Session) -> None:
+    """Periodic job entry point.
+
+    Every worker runs the scheduler, so a run is skipped when another worker
+    already stored a snapshot within the last half interval.
+    """
+    interval = get_snapshot_interval_seconds()
+    latest = db.query(AnalyticsSnapshot.taken_at).order_by(AnalyticsSnapshot.taken_at.desc()).first()
+    if latest and latest.taken_at > datetime.now() - timedelta(seconds=interval / 2):
+        logger.info("Recent analytics snapshot found, skipping scheduled run")
+        return
+    take_analytics_snapshots(db)
+
+
+def parse_snapshot_selector(snapshot: str) -> Optional[datetime]:
+    """`latest` selects the newest snapshot; anything else must be an ISO timestamp."""
+    if snapshot == "latest":
+        return None
+    try:
+        return datetime.fromisoformat(snapshot)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail="snapshot must be 'latest' or an ISO 8601 timestamp"
+        )
+
+
+def get_snapshot(db: Session, kind: str, snapshot: str) -> AnalyticsSnapshot:
+    """Newest snapshot of `kind` taken at or before the selected point in time."""
+    as_of = parse_snapshot_selector(snapshot)
+    query = db.query(AnalyticsSnapshot).filter(AnalyticsSnapshot.kind == kind)
+    if as_of is not None:
+        if as_of.tzinfo is not None:
+            # Snapshots are stored as naive local time, like the rest of the schema
+            as_of = as_of.astimezone().replace(tzinfo=None)
+        query = query.filter(AnalyticsSnapshot.taken_at <= as_of)
+    row = query.order_by(AnalyticsSnapshot.taken_at.desc()).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"No {kind} snapshot found")
+    return row
+
+
+def list_snapshots(db: Session, kind: Optional[str] = None, limit: int = 50) -> list:
+    """Snapshot history (id, kind, taken_at), newest first. Payloads are not loaded."""
+    query = db.query(AnalyticsSnapshot.id, AnalyticsSnapshot.kind, AnalyticsSnapshot.taken_at)
+    if kind:
+        query = query.filter(AnalyticsSnapshot.kind == kind)
+    return query.order_by(AnalyticsSnapshot.taken_at.desc()).limit(limit).all()
@@ -0,0 +1,211 @@
+"""
+Billing Quote Service - Expected term billing for the whole school in one pass.
+
+`calculate_fees` prices one checkout cart and builds a Pydantic object per
+student. At term start the bursar needs the same numbers for every student and
+family at once. This loads the fee catalog, students, active club memberships,
+unpaid exam fees and parent links with one query each into numpy arrays. The
+totals are then computed with array lookups and `bincount` instead of Python
+loops.
+
+A student's school fees match what `calculate_fees` quotes for their active
+clubs. Unpaid exam fees are added after each student's exam discount.
+"""
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models.classes import YearGroup
+from ..models.club import ClubMembership
+from ..models.parent import parent_student_association
+from ..models.student import Student
+from ..models.student_exam_fee import StudentExamFee
+from .reference_cache import reference_cache
+
+YEAR_GROUPS = list(YearGroup)
+_YEAR_GROUP_INDEX = {year_group: i for i, year_group in enumerate(YEAR_GROUPS)}
+
+
+@dataclass
+class SchoolQuote:
+    """Array-backed quote: entry i of every per-student array is student_ids[i]."""
+    generated_at: datetime
+    elapsed_ms: float
+    base_fees: Dict[str, float]
+    base_fees_total: float
+
+    student_ids: np.ndarray
+    student_names: np.ndarray
+    year_group_codes: np.ndarray  # Index into YEAR_GROUPS
+    club_fees: np.ndarray
+    exam_fees: np.ndarray  # After discount
+    exam_discounts: np.ndarray
+    totals: np.ndarray
+
+    family_ids: np.ndarray  # Parent ids
+    family_sizes: np.ndarray
+    family_totals: np.ndarray
+
+    def year_group_lines(self) -> List[dict]:
+        counts = np.bincount(self.year_group_codes, minlength=len(YEAR_GROUPS))
+        totals = np.bincount(self.year_group_codes, weights=self.totals, minlength=len(YEAR_GROUPS))
+        return [
+            {"year_group": year_group.value, "students": int(counts[i]), "total_amount": round(float(totals[i]), 2)}
+            for i, year_group in enumerate(YEAR_GROUPS)
+            if counts[i]
+        ]
+
+    def student_lines(self) -> List[dict]:
+        columns = zip(
+            self.student_ids.tolist(),
+            self.student_names.tolist(),
+            self.year_group_codes.tolist(),
+            self.club_fees.round(2).tolist(),
+            self.exam_fees.round(2).tolist(),
+            self.exam_discounts.round(2).tolist(),
+            self.totals.round(2).tolist(),
+        )
+        return [
+            {
+                "student_id": student_id,
+                "student_name": name,
+                "year_group": YEAR_GROUPS[code].value,
+                "base_fees": self.base_fees_total,
+                "club_fees": club_fees,
+                "exam_fees": exam_fees,
+                "exam_discounts": exam_discounts,
+                "total_amount": total,
+            }
+            for student_id, name, code, club_fees, exam_fees, exam_discounts, total in columns
+        ]
+
+    def family_lines(self) -> List[dict]:
+        return [
+            {"parent_id": parent_id, "students": size, "total_amount": total}
+            for parent_id, size, total in zip(
+                self.family_ids.tolist(), self.family_sizes.tolist(), self.family_totals.round(2).tolist()
+            )
+        ]
+
+    def summary(self) -> dict:
+        return {
+            "generated_at": self.generated_at,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+            "base_fees": self.base_fees,
+            "student_count": int(self.student_ids.size),
+            "family_count": int(self.family_ids.size),
+            "club_fees_total": round(float(self.club_fees.sum()), 2),
+            "exam_fees_total": round(float(self.exam_fees.sum()), 2),
+            "exam_discounts_total": round(float(self.exam_discounts.sum()), 2),
+            "total_amount": round(float(self.totals.sum()), 2),
+            "year_groups": self.year_group_lines(),
+        }
+
+
+def _positions(keys: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Index of each of `values` in the sorted array `keys`, or -1 where it is absent."""
+    if keys.size == 0 or values.size == 0:
+        return np.full(values.shape, -1, dtype=np.intp)
+    idx = np.minimum(np.searchsorted(keys, values), keys.size - 1)
+    return np.where(keys[idx] == values, idx, -1)
+
+
+def _columns(rows, count: int) -> List[np.ndarray]:
+    """Split result rows into one numpy array per column."""
+    if not rows:
+        return [np.array([], dtype=object) for _ in range(count)]
+    return [np.array(column) for column in zip(*rows)]
+
+
+def quote_whole_school(db: Session) -> SchoolQuote:
+    started = time.perf_counter()
+
+    fee_rows = reference_cache.fees(db).items
+    base_fees = {fee.code.upper(): float(fee.amount) for fee in fee_rows}
+    base_fees_total = float(sum(base_fees.values()))
+    clubs = reference_cache.clubs(db).items
+
+    # Students, sorted by id so other tables' student ids can be located with searchsorted
+    students = db.execute(
+        select(Student.id, Student.first_name, Student.last_name, Student.year_group).where(Student.left_at.is_(None))
+    ).all()
+    student_ids, first_names, last_names, year_groups = _columns(students, 4)
+    order = np.argsort(student_ids.astype(str), kind="stable")
+    student_ids = student_ids.astype(str)[order]
+    student_names = np.char.add(np.char.add(first_names.astype(str), " "), last_names.astype(str))[order]
+    year_group_codes = np.array([_YEAR_GROUP_INDEX[yg] for yg in year_groups], dtype=np.intp)[order]
+    n = student_ids.size
+
+    # Club fees: price of every active membership, summed per student. Memberships
+    # of clubs that no longer exist are skipped, as in calculate_fees.
+    club_ids = np.array(sorted(club.id for club in clubs), dtype=str)
+    prices_by_id = {club.id: float(club.price) for club in clubs}
+    club_prices = np.array([prices_by_id[club_id] for club_id in club_ids], dtype=float)
+    membership_students, membership_clubs = _columns(
+        db.execute(
+            select(ClubMembership.student_id, ClubMembership.club_id).where(ClubMembership.status == "active")
+        ).all(),
+        2,
+    )
+    m_student = _positions(student_ids, membership_students.astype(str))
+    m_club = _positions(club_ids, membership_clubs.astype(str))
+    known = (m_student >= 0) & (m_club >= 0)
+    club_fees = np.bincount(m_student[known], weights=club_prices[m_club[known]], minlength=n)
+
+    # Unpaid exam fees, net of each student's exam discount and of installments already paid
+    exam_students, exam_amounts, exam_discount_pcts, exam_paid = _columns(
+        db.execute(
+            select(
+                StudentExamFee.student_id,
+                StudentExamFee.amount,
+                func.coalesce(StudentExamFee.discount_percentage, 0),
+                StudentExamFee.amount_paid,
+            ).where(StudentExamFee.paid == False)
+        ).all(),
+        4,
+    )
+    e_student = _positions(student_ids, exam_students.astype(str))
+    e_known = e_student >= 0
+    gross = exam_amounts.astype(float)[e_known]
+    discounts = gross * exam_discount_pcts.astype(float)[e_known] / 100
+    exam_discounts = np.bincount(e_student[e_known], weights=discounts, minlength=n)
+    exam_fees = np.bincount(
+        e_student[e_known], weights=gross - discounts - exam_paid.astype(float)[e_known], minlength=n
+    )
+
+    totals = base_fees_total + club_fees + exam_fees
+
+    # Families: one per parent account, totalling every linked child
+    link_parents, link_students = _columns(
+        db.execute(
+            select(parent_student_association.c.parent_id, parent_student_association.c.student_id)
+        ).all(),
+        2,
+    )
+    l_student = _positions(student_ids, link_students.astype(str))
+    l_known = l_student >= 0
+    family_ids, family_index = np.unique(link_parents.astype(str)[l_known], return_inverse=True)
+    family_sizes = np.bincount(family_index, minlength=family_ids.size)
+    family_totals = np.bincount(family_index, weights=totals[l_student[l_known]], minlength=family_ids.size)
+
+    return SchoolQuote(
+        generated_at=datetime.now(),
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+        base_fees=base_fees,
+        base_fees_total=base_fees_total,
+        student_ids=student_ids,
+        student_names=student_names,
+        year_group_codes=year_group_codes,
+        club_fees=club_fees,
+        exam_fees=exam_fees,
+        exam_discounts=exam_discounts,
+        totals=totals,
+        family_ids=family_ids,
+        family_sizes=family_sizes,
+        family_totals=family_totals,
+    )
@@ -0,0 +1,151 @@
+"""
+Billing Run Service - Generates a term's StudentFee rows in bulk.
+
+A run bills every student in its year groups for every fee in its fee codes.
+Each year group is one `INSERT ... SELECT` over students x fees, which skips
+(student, fee, term) rows that already exist. The matching ledger charges are
+posted with `post_entries_from_select`. The run records each year group it has
+finished and commits after every group. A failed or interrupted run can
+therefore be resumed: finished groups are skipped, and the NOT EXISTS guard
+makes re-billing a group a no-op for rows it already has.
+"""
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import exists, false, insert, literal, select, true, String
+from sqlalchemy.orm import Session
+
+from ..models.billing_run import BillingRun, BillingRunStatus
+from ..models.classes import YearGroup
+from ..models.fee import Fee
+from ..models.ledger import LedgerEntryType
+from ..models.student import Student
+from ..models.student_fee import StudentFee
+from ..utils.bulk import sql_new_id
+from .ledger_service import post_entries_from_select
+
+logger = logging.getLogger(__name__)
+
+
+def create_billing_run(
+    db: Session,
+    term: str,
+    year_groups: Optional[List[str]] = None,
+    fee_codes: Optional[List[str]] = None,
+    due_date: Optional[str] = None,
+) -> BillingRun:
+    """Validate the scope and record a pending run. Defaults to every year group and fee."""
+    if year_groups:
+        unknown = [yg for yg in year_groups if yg not in YearGroup.__members__]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown year groups: {', '.join(unknown)}")
+    else:
+        year_groups = list(YearGroup.__members__)
+
+    known_codes = set(db.scalars(select(Fee.code)).all())
+    if fee_codes:
+        fee_codes = [code.upper() for code in fee_codes]
+        unknown = [code for code in fee_codes if code not in known_codes]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fee codes: {', '.join(unknown)}")
+    else:
+        fee_codes = sorted(known_codes)
+    if not fee_codes:
+        raise HTTPException(status_code=404, detail="Base fees not found")
+
+    run = BillingRun(term=term, year_groups=year_groups, fee_codes=fee_codes, due_date=due_date)
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    logger.info(f"Created billing run {run.id} for term {term}: {len(year_groups)} year groups, {len(fee_codes)} fees")
+    return run
+
+
+def _bill_year_group(db: Session, run: BillingRun, year_group: YearGroup) -> int:
+    """INSERT ... SELECT one year group's StudentFee rows and post their charges. Does not commit."""
+    already_billed = exists().where(
+        StudentFee.student_id == Student.id,
+        StudentFee.fee_id == Fee.id,
+        StudentFee.term == run.term,
+    )
+    rows = (
+        select(
+            sql_new_id(db, StudentFee.id.type),
+            Student.id,
+            Fee.id,
+            Fee.amount,
+            literal(0.0),
+            false(),
+            literal(run.due_date, String),
+            literal(run.term, String),
+        )
+        .select_from(Student)
+        .join(Fee, true())
+        .where(Student.year_group == year_group, Student.left_at.is_(None), Fee.code.in_(run.fee_codes), ~already_billed)
+    )
+    result = db.execute(
+        insert(StudentFee).from_select(
+            [
+                StudentFee.id, StudentFee.student_id, StudentFee.fee_id, StudentFee.amount,
+                StudentFee.discount_percentage, StudentFee.paid, StudentFee.due_date, StudentFee.term,
+            ],
+            rows,
+        )
+    )
+    created = result.rowcount or 0
+
+    # Charges for this group's rows of the term; rows charged by an earlier attempt are skipped
+    post_entries_from_select(
+        db, LedgerEntryType.CHARGE, "student_fee",
+        select(StudentFee.student_id, StudentFee.id.label("source_id"), StudentFee.amount.label("amount"))
+        .join(Student, Student.id == StudentFee.student_id)
+        .join(Fee, Fee.id == StudentFee.fee_id)
+        .where(StudentFee.term == run.term, Student.year_group == year_group, Fee.code.in_(run.fee_codes)),
+        f"School fee ({run.term})",
+    )
+    return created
+
+
+def execute_billing_run(db: Session, run: BillingRun) -> BillingRun:
+    """Bill every year group the run has not finished yet. Safe to call again after a failure."""
+    if run.status == BillingRunStatus.COMPLETED:
+        return run
+
+    run.status = BillingRunStatus.RUNNING
+    run.started_at = run.started_at or datetime.now()
+    run.error = None
+    db.commit()
+
+    try:
+        for name in run.year_groups:
+            if name in run.completed_year_groups:
+                continue
+            created = _bill_year_group(db, run, YearGroup[name])
+            # Reassign so the JSON column is flagged as changed
+            run.completed_year_groups = [*run.completed_year_groups, name]
+            run.rows_created += created
+            db.commit()
+            logger.info(f"Billing run {run.id}: {name} billed, {created} StudentFee rows")
+
+        run.status = BillingRunStatus.COMPLETED
+        run.finished_at = datetime.now()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        run.status = BillingRunStatus.FAILED
+        run.error = str(e)
+        db.commit()
+        logger.error(f"Billing run {run.id} failed: {e}")
+        raise
+
+    logger.info(f"Billing run {run.id} completed: {run.rows_created} StudentFee rows for term {run.term}")
+    return run
+
+
+def execute_billing_run_by_id(db: Session, run_id: str) -> BillingRun:
+    run = db.get(BillingRun, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Billing run not found")
+    return execute_billing_run(db, run)
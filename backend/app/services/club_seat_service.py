@@ -0,0 +1,351 @@
+"""
+Club Seat Service - Capacity-checked club seats with expiring holds.
+
+`Club.seats_taken` counts held and confirmed seats, `Club.confirmed_members`
+the confirmed ones. Both only change through single UPDATEs on the club row,
+so concurrent checkouts cannot oversubscribe a club: `UPDATE clubs SET
+seats_taken = seats_taken + n WHERE id = ? AND seats_taken + n <= capacity`
+either takes all n seats or none (clubs without a capacity always succeed). Checkout holds a seat per selected club until
+`hold_expires_at`; payment confirmation turns the hold into a confirmed
+membership, and `release_expired_holds` hands abandoned seats back. Waitlist
+offers (club_waitlist_service) are ordinary holds, so they follow the same path;
+a club with students waiting takes no other new holds, so its queue stays first come first served.
+`recount_club_members` recomputes both counters from scratch as a repair job.
+"""
+import logging
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, case, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from ..models.club import (
+    PENDING_HOLD,
+    WAITLIST_ACCEPTED,
+    WAITLIST_CANCELLED,
+    WAITLIST_EXPIRED,
+    WAITLIST_OFFERED,
+    WAITLIST_WAITING,
+    Club,
+    ClubMembership,
+    ClubWaitlistEntry,
+)
+from ..models.student import Student
+from ..utils.ids import new_id
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = "active"
+INACTIVE = "inactive"
+EXPIRED = "expired"
+
+_clubs = Club.__table__
+
+
+def get_hold_minutes() -> float:
+    """How long an unpaid checkout keeps its club seats, from `club_seat_hold_minutes`."""
+    try:
+        return float(os.getenv("club_seat_hold_minutes", "30"))
+    except ValueError:
+        logger.warning("Invalid club_seat_hold_minutes; using 30")
+        return 30
+
+
+def get_hold_sweep_interval_seconds() -> float:
+    """Sweeper interval from `club_seat_sweep_interval_minutes` (0 disables the job)."""
+    try:
+        return float(os.getenv("club_seat_sweep_interval_minutes", "1")) * 60
+    except ValueError:
+        logger.warning("Invalid club_seat_sweep_interval_minutes; seat sweeper disabled")
+        return 0
+
+
+def take_club_seats(db: Session, club_id: str, seats: int = 1) -> bool:
+    """Atomically take `seats` unpaid seats in a club if they fit its capacity. Returns False when full."""
+    result = db.execute(
+        _clubs.update()
+        .where(
+            _clubs.c.id == club_id,
+            (_clubs.c.capacity == None) | (_clubs.c.seats_taken + seats <= _clubs.c.capacity),
+        )
+        .values(seats_taken=_clubs.c.seats_taken + seats)
+    )
+    return result.rowcount == 1
+
+
+def _adjust_counters(db: Session, seats: Dict[str, int], confirmed: Optional[Dict[str, int]] = None) -> None:
+    """Shift the seat and confirmed-member counters by per-club deltas, without a capacity check, in one executemany UPDATE."""
+    confirmed = confirmed or {}
+    club_ids = seats.keys() | confirmed.keys()
+    if club_ids:
+        db.execute(
+            _clubs.update()
+            .where(_clubs.c.id == bindparam("club"))
+            .values(
+                seats_taken=_clubs.c.seats_taken + bindparam("seats"),
+                confirmed_members=_clubs.c.confirmed_members + bindparam("confirmed"),
+            ),
+            [
+                {"club": club_id, "seats": seats.get(club_id, 0), "confirmed": confirmed.get(club_id, 0)}
+                for club_id in sorted(club_ids)
+            ],
+        )
+
+
+def memberships_by_pair(db: Session, student_ids: Iterable[str], club_ids: Iterable[str]) -> Dict[Tuple[str, str], ClubMembership]:
+    """Each student's membership row per club; the active one where the student has older rows too."""
+    return {
+        (m.student_id, m.club_id): m
+        for m in db.query(ClubMembership)
+        .filter(ClubMembership.student_id.in_(list(student_ids)), ClubMembership.club_id.in_(list(club_ids)))
+        .order_by(ClubMembership.status == ACTIVE)
+    }
+
+
+def hold_memberships(
+    db: Session,
+    pairs: Iterable[Tuple[str, str]],
+    existing: Dict[Tuple[str, str], ClubMembership],
+    hold_until: datetime,
+) -> Dict[Tuple[str, str], str]:
+    """
+    Write unpaid holds for (student_id, club_id) pairs whose seats are already
+    taken, reopening the student's old membership row in the club if there is
+    one. Returns the membership id per pair. Does not commit.
+    """
+    pairs = list(pairs)
+    membership_ids = {pair: existing[pair].id for pair in pairs if pair in existing}
+    if membership_ids:
+        db.execute(
+            update(ClubMembership)
+            .where(ClubMembership.id.in_(membership_ids.values()))
+            .values(status=ACTIVE, payment_confirmed=False, hold_expires_at=hold_until)
+            .execution_options(synchronize_session=False)
+        )
+    new_holds = [
+        {
+            "id": new_id(),
+            "student_id": student_id,
+            "club_id": club_id,
+            "payment_confirmed": False,
+            "status": ACTIVE,
+            "hold_expires_at": hold_until,
+        }
+        for student_id, club_id in pairs
+        if (student_id, club_id) not in existing
+    ]
+    if new_holds:
+        db.execute(insert(ClubMembership), new_holds)
+        membership_ids.update({(hold["student_id"], hold["club_id"]): hold["id"] for hold in new_holds})
+    return membership_ids
+
+
+def reserve_club_seats(
+    db: Session,
+    student_club_ids: Dict[str, Iterable[str]],
+    now: Optional[datetime] = None,
+    hold_until: Optional[datetime] = None,
+) -> int:
+    """
+    Hold a seat in every requested club for each student until `hold_until`
+    (by default the checkout hold time from now).
+
+    The students' rows are locked first, so concurrent checkouts for the same
+    student run one after the other. Students who are already confirmed
+    members are skipped and live holds are extended; everyone else needs a
+    seat, taken per club in id order so concurrent checkouts lock clubs in the
+    same order. New seats are refused in clubs with students waiting, so
+    freed seats reach the queue first. Raises 409 naming the first full or
+    queued club, leaving the rollback to the caller. Does not commit.
+    Returns the number of seats newly taken.
+    """
+    now = now or datetime.now()
+    hold_until = hold_until or now + timedelta(minutes=get_hold_minutes())
+    requested = {
+        (str(student_id), club_id)
+        for student_id, club_ids in student_club_ids.items()
+        for club_id in club_ids or []
+    }
+    if not requested:
+        return 0
+
+    club_names = dict(db.query(Club.id, Club.name).filter(Club.id.in_({club_id for _, club_id in requested})).all())
+    unknown = {club_id for _, club_id in requested} - club_names.keys()
+    if unknown:
+        logger.warning(f"Skipping unknown clubs: {', '.join(sorted(unknown))}")
+        requested = {pair for pair in requested if pair[1] in club_names}
+
+    # Checkouts for the same student (a double click, two tabs) queue here, so the
+    # second one sees the first one's hold instead of taking a second seat
+    student_ids = sorted({student_id for student_id, _ in requested})
+    db.execute(select(Student.id).where(Student.id.in_(student_ids)).order_by(Student.id).with_for_update()).all()
+    existing = memberships_by_pair(db, student_ids, club_names.keys())
+
+    # Extend live holds, never shortening one (a waitlist offer runs for days);
+    # a hold the sweeper released in the meantime needs a seat again
+    held_ids = [
+        m.id for pair, m in existing.items()
+        if pair in requested and m.status == ACTIVE and not m.payment_confirmed
+    ]
+    extended = set()
+    if held_ids:
+        extended = set(db.scalars(
+            update(ClubMembership)
+            .where(ClubMembership.id.in_(held_ids), ClubMembership.status == ACTIVE, ClubMembership.payment_confirmed == False)
+            .values(hold_expires_at=case(
+                (ClubMembership.hold_expires_at > hold_until, ClubMembership.hold_expires_at),
+                else_=hold_until,
+            ))
+            .returning(ClubMembership.id)
+            .execution_options(synchronize_session=False)
+        ))
+
+    needs_seat = [
+        pair for pair in sorted(requested, key=lambda pair: (pair[1], pair[0]))
+        if pair not in existing
+        or not (existing[pair].status == ACTIVE and (existing[pair].payment_confirmed or existing[pair].id in extended))
+    ]
+    # Seats freed in a club with a queue go to the queue, in order, through waitlist offers
+    queued = sorted(db.scalars(
+        select(ClubWaitlistEntry.club_id).distinct()
+        .where(ClubWaitlistEntry.club_id.in_({club_id for _, club_id in needs_seat}), ClubWaitlistEntry.status == WAITLIST_WAITING)
+    )) if needs_seat else []
+    if queued:
+        raise HTTPException(status_code=409, detail=f"{club_names[queued[0]]} has a waiting list; join it to be offered the next free seat")
+    for club_id, seats in sorted(Counter(club_id for _, club_id in needs_seat).items()):
+        if not take_club_seats(db, club_id, seats):
+            raise HTTPException(status_code=409, detail=f"{club_names[club_id]} is full")
+
+    hold_memberships(db, needs_seat, existing, hold_until)
+    logger.info(f"Held {len(needs_seat)} club seats until {hold_until.isoformat()}, extended {len(extended)} holds")
+    return len(needs_seat)
+
+
+def confirm_club_memberships(db: Session, membership_ids: List[str]) -> None:
+    """
+    Turn paid memberships into confirmed ones. Live holds keep their seat; a
+    membership whose hold already expired takes its seat back regardless of
+    capacity, since the payment has gone through. Does not commit.
+    """
+    if not membership_ids:
+        return
+    held = Counter(db.scalars(
+        update(ClubMembership)
+        .where(ClubMembership.id.in_(membership_ids), ClubMembership.status == ACTIVE, ClubMembership.payment_confirmed == False)
+        .values(payment_confirmed=True, hold_expires_at=None)
+        .returning(ClubMembership.club_id)
+        .execution_options(synchronize_session=False)
+    ))
+    retaken = Counter(db.scalars(
+        update(ClubMembership)
+        .where(ClubMembership.id.in_(membership_ids), ClubMembership.status != ACTIVE)
+        .values(status=ACTIVE, payment_confirmed=True, hold_expires_at=None)
+        .returning(ClubMembership.club_id)
+        .execution_options(synchronize_session=False)
+    ))
+    if retaken:
+        logger.warning(f"Confirmed {sum(retaken.values())} club memberships after their holds expired")
+    _adjust_counters(db, seats=retaken, confirmed=held + retaken)
+
+    # Paying for a club settles the student's place in its queue, offered or not
+    confirmed = select(ClubMembership.student_id, ClubMembership.club_id).where(ClubMembership.id.in_(membership_ids))
+    db.execute(
+        update(ClubWaitlistEntry)
+        .where(
+            ClubWaitlistEntry.status.in_((WAITLIST_WAITING, WAITLIST_OFFERED)),
+            tuple_(ClubWaitlistEntry.student_id, ClubWaitlistEntry.club_id).in_(confirmed),
+        )
+        .values(status=WAITLIST_ACCEPTED)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def release_holds(db: Session, *conditions, status: str = EXPIRED) -> List[str]:
+    """
+    Release the unpaid holds matching `conditions`, return their seats and close
+    any waitlist offers made on them. Returns the released membership ids. Does not commit.
+    """
+    rows = db.execute(
+        update(ClubMembership)
+        .where(PENDING_HOLD, *conditions)
+        .values(status=status, hold_expires_at=None)
+        .returning(ClubMembership.id, ClubMembership.club_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    released = Counter(club_id for _, club_id in rows)
+    _adjust_counters(db, seats={club_id: -count for club_id, count in released.items()})
+    membership_ids = [membership_id for membership_id, _ in rows]
+    if membership_ids:
+        db.execute(
+            update(ClubWaitlistEntry)
+            .where(ClubWaitlistEntry.membership_id.in_(membership_ids), ClubWaitlistEntry.status == WAITLIST_OFFERED)
+            .values(status=WAITLIST_EXPIRED)
+            .execution_options(synchronize_session=False)
+        )
+    return membership_ids
+
+
+def release_student_seats(db: Session, student_ids) -> int:
+    """
+    Give up every club seat of `student_ids` (ids or a SELECT of them), e.g. for
+    leavers: holds are released, confirmed memberships made inactive and open
+    waitlist entries cancelled. Does not commit; returns the seats freed.
+    """
+    released = release_holds(db, ClubMembership.student_id.in_(student_ids), status=INACTIVE)
+    left = Counter(db.scalars(
+        update(ClubMembership)
+        .where(ClubMembership.student_id.in_(student_ids), ClubMembership.status == ACTIVE, ClubMembership.payment_confirmed == True)
+        .values(status=INACTIVE)
+        .returning(ClubMembership.club_id)
+        .execution_options(synchronize_session=False)
+    ))
+    freed = {club_id: -count for club_id, count in left.items()}
+    _adjust_counters(db, seats=freed, confirmed=freed)
+    db.execute(
+        update(ClubWaitlistEntry)
+        .where(ClubWaitlistEntry.student_id.in_(student_ids), ClubWaitlistEntry.status.in_((WAITLIST_WAITING, WAITLIST_OFFERED)))
+        .values(status=WAITLIST_CANCELLED)
+        .execution_options(synchronize_session=False)
+    )
+    return len(released) + sum(left.values())
+
+
+def release_expired_holds(db: Session, now: Optional[datetime] = None) -> int:
+    """Expire unpaid holds past `hold_expires_at` and return their seats. Commits."""
+    released = release_holds(db, ClubMembership.hold_expires_at < (now or datetime.now()))
+    db.commit()
+    if released:
+        logger.info(f"Released {len(released)} expired club seat holds")
+    return len(released)
+
+
+def get_counter_repair_interval_seconds() -> float:
+    """Counter repair interval from `club_counter_repair_interval_minutes` (0 disables the job)."""
+    try:
+        return float(os.getenv("club_counter_repair_interval_minutes", "1440")) * 60
+    except ValueError:
+        logger.warning("Invalid club_counter_repair_interval_minutes; counter repair disabled")
+        return 0
+
+
+def recount_club_members(db: Session) -> int:
+    """
+    Repair job: recompute every club's counters from its memberships in one
+    UPDATE, touching only clubs that drifted. Commits; returns the clubs fixed.
+    """
+    active = (ClubMembership.club_id == _clubs.c.id) & (ClubMembership.status == ACTIVE)
+    seats = select(func.count(ClubMembership.id)).where(active).scalar_subquery()
+    confirmed = select(func.count(ClubMembership.id)).where(active, ClubMembership.payment_confirmed == True).scalar_subquery()
+    repaired = db.execute(
+        _clubs.update()
+        .where((_clubs.c.seats_taken != seats) | (_clubs.c.confirmed_members != confirmed))
+        .values(seats_taken=seats, confirmed_members=confirmed)
+        .returning(_clubs.c.id)
+    ).scalars().all()
+    db.commit()
+    if repaired:
+        logger.warning(f"Repaired drifted member counters for clubs {', '.join(sorted(repaired))}")
+    return len(repaired)
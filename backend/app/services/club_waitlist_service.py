@@ -0,0 +1,243 @@
+"""
+Club Waitlist Service - First-come-first-served queues for full clubs.
+
+Students join a club's queue when it has no seats left. `promote_waitlists`
+offers freed seats to the head of each queue in batches: an offer is an
+ordinary unpaid seat hold (see club_seat_service) that expires after
+`club_waitlist_offer_hours`, is paid through the normal school fees checkout,
+and on expiry hands the seat to the next student.
+
+Workers lock a club's row and the queue head with SKIP LOCKED, so several
+workers (or app instances) can promote at once without offering the same seat
+twice or waiting on each other. Every read goes through the queue index on
+(club_id, status, queued_at); nothing scans the whole waitlist.
+"""
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from ..models.club import (
+    WAITLIST_CANCELLED,
+    WAITLIST_OFFERED,
+    WAITLIST_WAITING,
+    Club,
+    ClubMembership,
+    ClubWaitlistEntry,
+)
+from ..models.student import Student
+from .club_seat_service import (
+    ACTIVE,
+    hold_memberships,
+    memberships_by_pair,
+    release_expired_holds,
+    release_holds,
+    take_club_seats,
+)
+from .event_broker import ADMIN_DASHBOARD_CHANNEL, publish_event
+
+logger = logging.getLogger(__name__)
+
+# Offers made per club per run
+WAITLIST_BATCH_SIZE = 50
+
+OPEN_STATUSES = (WAITLIST_WAITING, WAITLIST_OFFERED)
+
+
+def get_offer_hours() -> float:
+    """How long a waitlist offer stays open, from `club_waitlist_offer_hours`."""
+    try:
+        return float(os.getenv("club_waitlist_offer_hours", "48"))
+    except ValueError:
+        logger.warning("Invalid club_waitlist_offer_hours; using 48")
+        return 48
+
+
+def get_waitlist_interval_seconds() -> float:
+    """Promotion interval from `club_waitlist_interval_minutes` (0 disables the job)."""
+    try:
+        return float(os.getenv("club_waitlist_interval_minutes", "1")) * 60
+    except ValueError:
+        logger.warning("Invalid club_waitlist_interval_minutes; waitlist promotion disabled")
+        return 0
+
+
+def _open_entry(db: Session, club_id: str, student_id: str) -> Optional[ClubWaitlistEntry]:
+    return db.query(ClubWaitlistEntry).filter(
+        ClubWaitlistEntry.club_id == club_id,
+        ClubWaitlistEntry.student_id == student_id,
+        ClubWaitlistEntry.status.in_(OPEN_STATUSES),
+    ).first()
+
+
+def join_waitlist(db: Session, club_id: str, student_id: str) -> ClubWaitlistEntry:
+    """
+    Queue a student for a club. Joining twice returns the open entry; members
+    get 409, and so does a club with free seats and nobody queued, since those
+    seats are taken through checkout.
+    """
+    club = db.get(Club, club_id)
+    if club is None:
+        raise HTTPException(status_code=404, detail="Club not found")
+    if db.query(Student.id).filter(Student.id == student_id).first() is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    if db.query(ClubMembership.id).filter(
+        ClubMembership.club_id == club_id,
+        ClubMembership.student_id == student_id,
+        ClubMembership.status == ACTIVE,
+    ).first():
+        raise HTTPException(status_code=409, detail="Student already has a place in this club")
+    # Freed seats in a club with a queue are kept for offers, so only then may a non-full club be joined
+    if club.seats_left != 0 and not db.query(
+        exists().where(ClubWaitlistEntry.club_id == club_id, ClubWaitlistEntry.status == WAITLIST_WAITING)
+    ).scalar():
+        raise HTTPException(status_code=409, detail=f"{club.name} has free seats; select it at checkout instead")
+
+    entry = _open_entry(db, club_id, student_id)
+    if entry:
+        return entry
+    entry = ClubWaitlistEntry(club_id=club_id, student_id=student_id, status=WAITLIST_WAITING)
+    db.add(entry)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent join won the open-entry unique index
+        db.rollback()
+        return _open_entry(db, club_id, student_id)
+    db.refresh(entry)
+    return entry
+
+
+def leave_waitlist(db: Session, club_id: str, student_id: str) -> None:
+    """Drop a student's open entry; an outstanding offer gives its seat back."""
+    entry = _open_entry(db, club_id, student_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Student is not on this club's waitlist")
+    entry.status = WAITLIST_CANCELLED
+    db.flush()
+    if entry.membership_id:
+        release_holds(db, ClubMembership.id == entry.membership_id, status="inactive")
+    db.commit()
+
+
+def get_waitlist_entries(db: Session, student_ids: List[str]) -> List[Dict]:
+    """Open entries for the given students, with 1-based queue positions for waiting ones."""
+    if not student_ids:
+        return []
+    ahead = aliased(ClubWaitlistEntry)
+    position = (
+        select(func.count(ahead.id) + 1)
+        .where(
+            ahead.club_id == ClubWaitlistEntry.club_id,
+            ahead.status == WAITLIST_WAITING,
+            ahead.queued_at < ClubWaitlistEntry.queued_at,
+        )
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        select(ClubWaitlistEntry, position)
+        .where(ClubWaitlistEntry.student_id.in_(student_ids), ClubWaitlistEntry.status.in_(OPEN_STATUSES))
+        .order_by(ClubWaitlistEntry.queued_at)
+    ).all()
+    return [
+        {
+            "id": entry.id,
+            "club_id": entry.club_id,
+            "student_id": entry.student_id,
+            "status": entry.status,
+            "position": position if entry.status == WAITLIST_WAITING else None,
+            "queued_at": entry.queued_at,
+            "offer_expires_at": entry.offer_expires_at,
+        }
+        for entry, position in rows
+    ]
+
+
+def _offer_seats(db: Session, club_id: str, batch_size: int, now: datetime) -> int:
+    """Offer one club's free seats to the head of its queue. Commits; returns offers made."""
+    # Another worker holding this club is already promoting it
+    club = db.execute(
+        select(Club.capacity, Club.seats_taken).where(Club.id == club_id).with_for_update(skip_locked=True)
+    ).first()
+    if club is None or club.capacity is None or club.seats_taken >= club.capacity:
+        db.rollback()
+        return 0
+
+    entries = db.execute(
+        select(ClubWaitlistEntry.id, ClubWaitlistEntry.student_id)
+        .where(ClubWaitlistEntry.club_id == club_id, ClubWaitlistEntry.status == WAITLIST_WAITING)
+        .order_by(ClubWaitlistEntry.queued_at)
+        .limit(min(club.capacity - club.seats_taken, batch_size))
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not entries:
+        db.rollback()
+        return 0
+
+    existing = memberships_by_pair(db, [entry.student_id for entry in entries], [club_id])
+    # Students who got in some other way leave the queue without using a seat
+    members = {
+        entry.id for entry in entries
+        if (entry.student_id, club_id) in existing and existing[(entry.student_id, club_id)].status == ACTIVE
+    }
+    if members:
+        db.execute(
+            update(ClubWaitlistEntry)
+            .where(ClubWaitlistEntry.id.in_(members))
+            .values(status=WAITLIST_CANCELLED)
+            .execution_options(synchronize_session=False)
+        )
+    offered = [entry for entry in entries if entry.id not in members]
+    if offered and not take_club_seats(db, club_id, len(offered)):
+        db.rollback()
+        return 0
+
+    offer_expires_at = now + timedelta(hours=get_offer_hours())
+    membership_ids = hold_memberships(db, [(entry.student_id, club_id) for entry in offered], existing, offer_expires_at)
+    if offered:
+        db.execute(update(ClubWaitlistEntry), [
+            {
+                "id": entry.id,
+                "status": WAITLIST_OFFERED,
+                "membership_id": membership_ids[(entry.student_id, club_id)],
+                "offered_at": now,
+                "offer_expires_at": offer_expires_at,
+            }
+            for entry in offered
+        ])
+    db.commit()
+    if offered:
+        logger.info(f"Offered {len(offered)} seats in club {club_id} until {offer_expires_at.isoformat()}")
+        publish_event(ADMIN_DASHBOARD_CHANNEL, "clubs.waitlist_offered", {
+            "club_id": club_id,
+            "student_ids": [entry.student_id for entry in offered],
+        })
+    return len(offered)
+
+
+def promote_waitlists(db: Session, now: Optional[datetime] = None, batch_size: int = WAITLIST_BATCH_SIZE) -> int:
+    """
+    Periodic job: release expired holds and offers, then offer each club's free
+    seats to the next students in its queue. Returns the number of offers made.
+    """
+    now = now or datetime.now()
+    release_expired_holds(db, now)
+
+    club_ids = db.scalars(
+        select(Club.id).where(
+            Club.capacity != None,
+            Club.seats_taken < Club.capacity,
+            exists().where(ClubWaitlistEntry.club_id == Club.id, ClubWaitlistEntry.status == WAITLIST_WAITING),
+        ).order_by(Club.id)
+    ).all()
+    db.rollback()
+
+    offers = 0
+    for club_id in club_ids:
+        offers += _offer_seats(db, club_id, batch_size, now)
+    return offers
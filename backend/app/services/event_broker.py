@@ -0,0 +1,262 @@
+"""
+Event Broker - Publishes small payment events to in-process subscribers.
+
+The confirmation path publishes from synchronous code (worker threads), while
+subscribers are async consumers such as the admin SSE stream. The broker
+always fans out locally; a cross-node fan-out can be plugged in so that every
+worker behind the load balancer sees events published by any other worker.
+Payment confirmations are also published on a per-reference channel, which
+the payment status long-poll waits on.
+"""
+import asyncio
+import json
+import logging
+import os
+import queue
+import select
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Protocol, Set, Tuple
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+ADMIN_DASHBOARD_CHANNEL = "admin.dashboard"
+PAYMENT_STATUS_EVENT = "payment.status_changed"
+
+# Slow consumers drop events instead of growing without bound
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def payment_channel(reference: str) -> str:
+    """Per-reference channel that payment status waiters subscribe to."""
+    return f"payment.{reference}"
+
+
+class Subscription:
+    """A subscriber's queue for one or more channels, bound to the event loop it was created on."""
+
+    def __init__(self, channels: Tuple[str, ...]):
+        self.channels = channels
+        self.channel = ", ".join(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def _put(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning(f"Dropping event for slow subscriber on {self.channel}")
+
+    def deliver(self, event: dict) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The subscriber's loop has already been closed
+            pass
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """Next event, or None when nothing arrives within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Fanout(Protocol):
+    """Cross-node transport. Implementations deliver remote events via `deliver`."""
+
+    def start(self, deliver: Callable[[str, dict], None]) -> None: ...
+
+    def publish(self, channel: str, event: dict) -> None: ...
+
+    def stop(self) -> None: ...
+
+
+class EventBroker:
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._fanout: Optional[Fanout] = None
+
+    def subscribe(self, *channels: str) -> Subscription:
+        """Subscribe the running event loop to one or more channels, sharing one queue."""
+        subscription = Subscription(channels)
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def publish(self, channel: str, event: dict) -> None:
+        """Deliver to local subscribers and hand the event to the cross-node fan-out."""
+        self.deliver_local(channel, event)
+        if self._fanout is not None:
+            try:
+                self._fanout.publish(channel, event)
+            except Exception as e:
+                logger.error(f"Cross-node publish failed for {channel}: {e}")
+
+    def deliver_local(self, channel: str, event: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def set_fanout(self, fanout: Optional[Fanout]) -> None:
+        if self._fanout is not None:
+            self._fanout.stop()
+        self._fanout = fanout
+        if fanout is not None:
+            fanout.start(self.deliver_local)
+
+
+class PostgresNotifyFanout:
+    """Cross-node fan-out over Postgres LISTEN/NOTIFY on a single channel.
+
+    Every node listens on a dedicated connection; messages carry the origin
+    node id so a node never re-delivers its own events. Publishing only queues
+    the message: a sender thread owns the NOTIFY connection, so callers (which
+    may be running on the event loop) never wait on the database.
+    """
+
+    PG_CHANNEL = "bsc_events"
+    # Seconds between listener reconnect attempts, the last one repeating
+    RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+    # Messages waiting for the sender thread; beyond this they are dropped
+    OUTBOX_SIZE = 1000
+
+    def __init__(self, dsn: str):
+        self._dsn = dsn
+        self._node_id = uuid4().hex
+        self._outbox: queue.Queue = queue.Queue(maxsize=self.OUTBOX_SIZE)
+        self._sender: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._failures = 0
+
+    def _connect(self):
+        import psycopg2
+
+        conn = psycopg2.connect(self._dsn)
+        conn.autocommit = True
+        return conn
+
+    def _listen_once(self, deliver: Callable[[str, dict], None]) -> None:
+        """LISTEN on a fresh connection until stopped. Connection errors propagate."""
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {self.PG_CHANNEL}")
+            self._failures = 0
+            while not self._stop.is_set():
+                if select.select([conn], [], [], 1.0) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        message = json.loads(notify.payload)
+                    except ValueError:
+                        continue
+                    if message.get("node") != self._node_id:
+                        deliver(message["channel"], message["event"])
+        finally:
+            conn.close()
+
+    def start(self, deliver: Callable[[str, dict], None]) -> None:
+        def _listen():
+            # Reconnect with backoff, so a database restart or failover only pauses delivery
+            while not self._stop.is_set():
+                try:
+                    self._listen_once(deliver)
+                except Exception as e:
+                    delay = self.RECONNECT_DELAYS[min(self._failures, len(self.RECONNECT_DELAYS) - 1)]
+                    self._failures += 1
+                    logger.error(f"Postgres event listener failed: {e}; reconnecting in {delay}s")
+                    self._stop.wait(delay)
+
+        self._thread = threading.Thread(target=_listen, name="event-fanout", daemon=True)
+        self._thread.start()
+        self._sender = threading.Thread(target=self._send_loop, name="event-fanout-sender", daemon=True)
+        self._sender.start()
+
+    def _notify(self, conn, payload: str) -> None:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_notify(%s, %s)", (self.PG_CHANNEL, payload))
+
+    def _send_loop(self) -> None:
+        """Drain the outbox over one NOTIFY connection, reconnecting once per failed message."""
+        conn = None
+        try:
+            while not self._stop.is_set():
+                try:
+                    payload = self._outbox.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                for attempt in range(2):
+                    try:
+                        if conn is None or conn.closed:
+                            conn = self._connect()
+                        self._notify(conn, payload)
+                        break
+                    except Exception as e:
+                        if conn is not None:
+                            conn.close()
+                        conn = None
+                        if attempt:
+                            logger.error(f"Dropping cross-node event after NOTIFY failed twice: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def publish(self, channel: str, event: dict) -> None:
+        payload = json.dumps({"node": self._node_id, "channel": channel, "event": event}, default=str)
+        try:
+            self._outbox.put_nowait(payload)
+        except queue.Full:
+            logger.warning(f"Cross-node outbox full; dropping event for {channel}")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+broker = EventBroker()
+
+
+def publish_event(channel: str, event_type: str, data: Dict[str, Any]) -> None:
+    """Publish a typed event. Failures are logged; publishing never breaks the caller."""
+    event = {"type": event_type, "at": datetime.now().isoformat(), "data": data}
+    try:
+        broker.publish(channel, event)
+    except Exception as e:
+        logger.error(f"Failed to publish {event_type} on {channel}: {e}")
+
+
+def publish_payment_status(reference: str, status: str) -> None:
+    """Wake anyone long-polling on a payment reference."""
+    publish_event(payment_channel(reference), PAYMENT_STATUS_EVENT, {"reference": reference, "status": status})
+
+
+def configure_event_fanout() -> None:
+    """Select the cross-node fan-out from `event_fanout` ("local" or "postgres")."""
+    mode = os.getenv("event_fanout", "local").lower()
+    if mode == "postgres":
+        from ..database import SQLALCHEMY_DATABASE_URL
+
+        broker.set_fanout(PostgresNotifyFanout(SQLALCHEMY_DATABASE_URL))
+        logger.info("Event fan-out: Postgres LISTEN/NOTIFY")
+    else:
+        logger.info("Event fan-out: local (single node)")
+
+
+def shutdown_event_fanout() -> None:
+    broker.set_fanout(None)
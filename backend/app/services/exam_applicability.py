@@ -0,0 +1,55 @@
+"""
+Exam Applicability - Which exams apply to which year groups.
+
+ExamFees.applicable_grades stays the JSON list the API reads and writes. The
+exam_applicable_grades table mirrors it, one indexed row per (exam, year
+group), so SQL can answer "exams for Year 10" and "students eligible for exam
+X" with a join instead of scanning the JSON per student. Writers call
+`set_exam_grades` whenever an exam's grades change. In-process lookups use the
+reference cache's exam snapshot, whose `by_grade` map is rebuilt on every exam
+change.
+"""
+import logging
+from typing import Dict, Iterable, List
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from ..models.classes import YearGroup
+from ..models.fees import exam_applicable_grades
+from ..models.student import Student
+
+logger = logging.getLogger(__name__)
+
+
+def set_exam_grades(db: Session, exam_id: str, grades: Iterable[str] | None) -> None:
+    """Replace an exam's rows in the applicability index. Unknown grade names are ignored. Does not commit."""
+    year_groups = {YearGroup[grade] for grade in grades or [] if grade in YearGroup.__members__}
+    db.execute(delete(exam_applicable_grades).where(exam_applicable_grades.c.exam_id == exam_id))
+    if year_groups:
+        db.execute(
+            insert(exam_applicable_grades),
+            [{"exam_id": exam_id, "year_group": year_group} for year_group in year_groups],
+        )
+
+
+def exam_ids_for_year_group(year_group: YearGroup):
+    """SELECT of the ids of exams that apply to `year_group`"""
+    return select(exam_applicable_grades.c.exam_id).where(exam_applicable_grades.c.year_group == year_group)
+
+
+def eligible_student_ids(exam_id: str):
+    """SELECT of the ids of current students whose year group an exam applies to"""
+    return select(Student.id).join(
+        exam_applicable_grades, exam_applicable_grades.c.year_group == Student.year_group
+    ).where(exam_applicable_grades.c.exam_id == exam_id, Student.left_at.is_(None))
+
+
+def applicable_student_counts(db: Session, exam_ids: List[str] | None = None) -> Dict[str, int]:
+    """Eligible student count per exam, in one grouped query. Exams without grades are absent."""
+    query = select(exam_applicable_grades.c.exam_id, func.count(Student.id)).join(
+        Student, Student.year_group == exam_applicable_grades.c.year_group
+    ).where(Student.left_at.is_(None)).group_by(exam_applicable_grades.c.exam_id)
+    if exam_ids is not None:
+        query = query.where(exam_applicable_grades.c.exam_id.in_(exam_ids))
+    return dict(db.execute(query).all())
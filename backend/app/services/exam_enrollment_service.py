@@ -0,0 +1,194 @@
+"""
+Exam Enrollment Service - Keeps StudentExamFee rows in line with an exam's applicable grades.
+
+When an exam is created or its grades change, the applicability index is
+refreshed and every student in an applicable year group gets a StudentExamFee row from one `INSERT ... SELECT`, with the
+matching ledger charges posted set-based. Students in grades that were
+dropped lose their entry, unless it is paid or has a payment recorded
+against it. Any charge already posted for a removed entry is reversed on
+the ledger first. The same withdrawal reprices entries when the exam's amount
+changes and clears an exam before it is deleted.
+"""
+import logging
+from typing import Dict, Iterable, List
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, delete, exists, false, func, insert, literal, or_, select, String
+from sqlalchemy.orm import Session
+
+from ..models.classes import YearGroup
+from ..models.fees import ExamFees
+from ..models.ledger import LedgerEntry, LedgerEntryType
+from ..models.payment import ExamPayment
+from ..models.student import Student
+from ..models.student_exam_fee import StudentExamFee
+from ..utils.bulk import sql_new_id
+from .exam_applicability import eligible_student_ids, set_exam_grades
+from .ledger_service import post_entries_from_select, signed_amount
+
+logger = logging.getLogger(__name__)
+
+
+def _year_groups(grades: Iterable[str] | None) -> List[YearGroup]:
+    return [YearGroup[grade] for grade in grades or [] if grade in YearGroup.__members__]
+
+
+def enroll_exam_students(db: Session, exam: ExamFees) -> int:
+    """Create entries for eligible students who have none and charge them. Does not commit.
+
+    Eligibility comes from the applicability index, see `sync_exam_enrollment`.
+    """
+    already_entered = exists().where(
+        StudentExamFee.student_id == Student.id,
+        StudentExamFee.exam_fee_id == exam.id,
+    )
+    result = db.execute(
+        insert(StudentExamFee).from_select(
+            [
+                StudentExamFee.id, StudentExamFee.student_id, StudentExamFee.exam_fee_id,
+                StudentExamFee.amount, StudentExamFee.discount_percentage, StudentExamFee.paid,
+            ],
+            select(
+                sql_new_id(db),
+                Student.id,
+                literal(exam.id, String),
+                literal(float(exam.amount)),
+                literal(0.0),
+                false(),
+            ).where(Student.id.in_(eligible_student_ids(exam.id)), ~already_entered),
+        )
+    )
+    enrolled = result.rowcount or 0
+
+    # Charges for this exam's entries that are not on the ledger yet
+    post_entries_from_select(
+        db, LedgerEntryType.CHARGE, "student_exam_fee",
+        select(StudentExamFee.student_id, StudentExamFee.id.label("source_id"), StudentExamFee.amount.label("amount"))
+        .where(StudentExamFee.exam_fee_id == exam.id),
+        "Exam fee",
+    )
+    logger.info(f"Enrolled {enrolled} students in exam {exam.id}")
+    return enrolled
+
+
+def withdraw_exam_students(db: Session, exam: ExamFees, dropped_grades: Iterable[str]) -> int:
+    """Remove unpaid entries of students in `dropped_grades`, reversing their charges. Does not commit."""
+    year_groups = _year_groups(dropped_grades)
+    if not year_groups:
+        return 0
+    return _withdraw(db, exam, Student.year_group.in_(year_groups))
+
+
+def withdraw_ineligible_students(db: Session, exam: ExamFees) -> int:
+    """Remove unpaid entries of students the exam no longer applies to, e.g. after promotion. Does not commit."""
+    return _withdraw(db, exam, Student.id.not_in(eligible_student_ids(exam.id)))
+
+
+def withdraw_all_students(db: Session, exam: ExamFees) -> int:
+    """
+    Clear an exam before it is deleted: every entry is removed and its charges
+    reversed. Raises 409 if any entry is paid or has a payment recorded. Does not commit.
+    """
+    paid = db.scalar(select(exists().where(
+        StudentExamFee.exam_fee_id == exam.id,
+        or_(
+            StudentExamFee.paid == True,
+            StudentExamFee.amount_paid > 0,
+            exists().where(ExamPayment.student_exam_fee_id == StudentExamFee.id),
+        ),
+    )))
+    if paid:
+        raise HTTPException(status_code=409, detail="Exam has payments recorded against it and cannot be deleted")
+    return _withdraw(db, exam)
+
+
+def reprice_exam_entries(db: Session, exam: ExamFees) -> int:
+    """
+    Move eligible students' unpaid entries to the exam's current amount: the
+    old charges are reversed and the students re-entered at the new price,
+    keeping any discount. Entries with payments keep the price they were
+    paid at. Does not commit; returns the entries repriced.
+    """
+    conditions = (StudentExamFee.amount != exam.amount, Student.id.in_(eligible_student_ids(exam.id)))
+    discounts = {
+        student_id: discount
+        for student_id, discount in db.execute(
+            select(StudentExamFee.student_id, StudentExamFee.discount_percentage)
+            .where(StudentExamFee.id.in_(_removable_entries(exam, *conditions)))
+        ).all()
+        if discount
+    }
+    repriced = _withdraw(db, exam, *conditions)
+    if not repriced:
+        return 0
+    enroll_exam_students(db, exam)
+
+    if discounts:
+        entries = StudentExamFee.__table__
+        db.execute(
+            entries.update()
+            .where(entries.c.exam_fee_id == exam.id, entries.c.student_id == bindparam("student"))
+            .values(discount_percentage=bindparam("discount")),
+            [{"student": student_id, "discount": discount} for student_id, discount in discounts.items()],
+        )
+        post_entries_from_select(
+            db, LedgerEntryType.DISCOUNT, "student_exam_fee",
+            select(
+                StudentExamFee.student_id, StudentExamFee.id.label("source_id"),
+                (StudentExamFee.amount - StudentExamFee.net_amount).label("amount"),
+            ).where(StudentExamFee.exam_fee_id == exam.id, StudentExamFee.student_id.in_(discounts.keys())),
+            "Exam fee discount",
+        )
+    logger.info(f"Repriced {repriced} unpaid entries of exam {exam.id} to {exam.amount}")
+    return repriced
+
+
+def _removable_entries(exam: ExamFees, *conditions):
+    """Ids of the exam's entries that can be withdrawn: unpaid, with no payment recorded."""
+    return (
+        select(StudentExamFee.id)
+        .join(Student, Student.id == StudentExamFee.student_id)
+        .where(
+            StudentExamFee.exam_fee_id == exam.id,
+            StudentExamFee.paid == False,
+            ~exists().where(ExamPayment.student_exam_fee_id == StudentExamFee.id),
+            *conditions,
+        )
+    )
+
+
+def _withdraw(db: Session, exam: ExamFees, *conditions) -> int:
+    removable_ids = db.scalars(_removable_entries(exam, *conditions)).all()
+    if not removable_ids:
+        return 0
+
+    # Whatever the ledger still holds against these entries (charge net of discount) is reversed
+    post_entries_from_select(
+        db, LedgerEntryType.REVERSAL, "student_exam_fee",
+        select(
+            LedgerEntry.student_id,
+            LedgerEntry.source_id.label("source_id"),
+            func.sum(signed_amount).label("amount"),
+        ).where(
+            LedgerEntry.source_type == "student_exam_fee",
+            LedgerEntry.source_id.in_(removable_ids),
+        ).group_by(LedgerEntry.student_id, LedgerEntry.source_id),
+        "Exam entry withdrawn",
+    )
+    db.execute(
+        delete(StudentExamFee)
+        .where(StudentExamFee.id.in_(removable_ids))
+        .execution_options(synchronize_session=False)
+    )
+    logger.info(f"Withdrew {len(removable_ids)} unpaid entries from exam {exam.id}")
+    return len(removable_ids)
+
+
+def sync_exam_enrollment(db: Session, exam: ExamFees, previous_grades: Iterable[str] | None = None) -> Dict[str, int]:
+    """Apply a create or grade change of `exam` to the applicability index and its entries. Does not commit."""
+    set_exam_grades(db, exam.id, exam.applicable_grades)
+    dropped = set(previous_grades or []) - set(exam.applicable_grades or [])
+    return {
+        "withdrawn": withdraw_exam_students(db, exam, dropped),
+        "enrolled": enroll_exam_students(db, exam),
+    }
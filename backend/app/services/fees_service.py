@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Mapping, Sequence
 
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
@@ -6,6 +6,8 @@ from sqlalchemy.orm import Session
 from ..models.club import Club
 from ..models.fee import Fee
 from ..models.student import Student
+from .quote_token import catalog_version, issue_quote_token
+from .reference_cache import ClubRef, FeeRef, reference_cache
 from ..schemas.fees import (
     ClubInfo,
     FeeBreakdown,
@@ -14,19 +16,17 @@ from ..schemas.fees import (
 )
 
 
-async def calculate_fees(
+def calculate_fees(
     *,
     student_ids: List[str],
     student_club_ids: Dict[str, List[str]],
     db: Session,
 ) -> DetailedFeeCalculationResponse:
-    fee_rows = db.query(Fee).all()
+    # Catalog data (fees, club prices) comes from the reference cache
+    fee_rows = reference_cache.fees(db).items
     if not fee_rows:
         raise HTTPException(status_code=404, detail="Base fees not found")
 
-    fees_mapping = {f.code.upper(): float(f.amount) for f in fee_rows}
-    base_fees_total = sum(fees_mapping.values())
-
     students = db.query(Student).filter(Student.id.in_(student_ids)).all()
     students_by_id = {s.id: s for s in students}
 
@@ -34,25 +34,34 @@ async def calculate_fees(
         if sid not in students_by_id:
             raise HTTPException(status_code=404, detail=f"Student with id {sid} not found")
 
-    all_club_ids: List[str] = []
-    for sid in student_ids:
-        all_club_ids.extend(student_club_ids.get(str(sid), []) or [])
-    unique_club_ids = list(set(all_club_ids))
+    quote = build_fee_quote(
+        students=[students_by_id[sid] for sid in student_ids],
+        student_club_ids=student_club_ids,
+        fee_rows=fee_rows,
+        clubs_by_id=reference_cache.clubs(db).by_id,
+    )
+    quote.quote_token = issue_quote_token(student_ids, student_club_ids, quote.total_amount, catalog_version(db))
+    return quote
 
-    clubs_by_id: Dict[str, Club] = {}
-    if unique_club_ids:
-        clubs = db.query(Club).filter(Club.id.in_(unique_club_ids)).all()
-        clubs_by_id = {c.id: c for c in clubs}
+
+def build_fee_quote(
+    *,
+    students: List[Student],
+    student_club_ids: Dict[str, List[str]],
+    fee_rows: Sequence[Fee | FeeRef],
+    clubs_by_id: Mapping[str, Club | ClubRef],
+) -> DetailedFeeCalculationResponse:
+    """Price already-loaded students, fees and clubs without touching the database."""
+    fees_mapping = {f.code.upper(): float(f.amount) for f in fee_rows}
+    base_fees_total = sum(fees_mapping.values())
 
     total_amount = 0.0
     student_fees: List[StudentFeeDetail] = []
 
-    for student_id in student_ids:
-        student = students_by_id[student_id]
-
+    for student in students:
         club_list: List[ClubInfo] = []
         club_fees_total = 0.0
-        for club_id in student_club_ids.get(str(student_id), []) or []:
+        for club_id in student_club_ids.get(str(student.id), []) or []:
             club = clubs_by_id.get(club_id)
             if club:
                 club_price = float(club.price)
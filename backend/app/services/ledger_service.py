@@ -0,0 +1,357 @@
+"""
+Ledger Service - Append-only double-entry ledger behind Student.outstanding_balance.
+
+Every charge, discount, payment and reversal for a student is posted as a
+LedgerEntry, and the student's running balance is moved by the same amount
+in the same transaction with an atomic `UPDATE ... SET balance = balance + x`.
+Reading what a student (or a family) owes is therefore a column read.
+Periodic balance snapshots allow point-in-time queries without replaying the
+whole ledger.
+"""
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import case, cast, exists, func, insert, literal, select, update, DateTime, Numeric, String
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+from ..models.ledger import LedgerEntry, LedgerEntryType, LedgerAccount, StudentBalanceSnapshot
+from ..models.student import Student
+from ..models.student_fee import StudentFee
+from ..models.student_exam_fee import StudentExamFee
+from ..models.club import Club, ClubMembership
+from ..models.payment import ExamPayment, PaymentStatus
+from ..utils.bulk import sql_new_id
+from ..utils.ids import new_id
+
+logger = logging.getLogger(__name__)
+
+# (debit, credit) legs for each entry type
+ENTRY_ACCOUNTS = {
+    LedgerEntryType.CHARGE: (LedgerAccount.RECEIVABLE, LedgerAccount.REVENUE),
+    LedgerEntryType.DISCOUNT: (LedgerAccount.DISCOUNTS, LedgerAccount.RECEIVABLE),
+    LedgerEntryType.PAYMENT: (LedgerAccount.CASH, LedgerAccount.RECEIVABLE),
+    LedgerEntryType.REVERSAL: (LedgerAccount.REVENUE, LedgerAccount.RECEIVABLE),
+}
+
+# Effect of each entry on the amount receivable
+signed_amount = case(
+    (LedgerEntry.debit_account == LedgerAccount.RECEIVABLE, LedgerEntry.amount),
+    else_=-LedgerEntry.amount,
+)
+
+
+def _balance_delta(entry_type: LedgerEntryType, amount: float) -> float:
+    debit, _ = ENTRY_ACCOUNTS[entry_type]
+    return amount if debit == LedgerAccount.RECEIVABLE else -amount
+
+
+def _apply_balance_delta(db: Session, student_id: str, delta: float) -> None:
+    """Atomically move a student's running balance, so concurrent postings never lose updates."""
+    db.execute(
+        update(Student)
+        .where(Student.id == student_id)
+        .values(outstanding_balance=func.coalesce(Student.outstanding_balance, 0) + delta)
+        .execution_options(synchronize_session=False)
+    )
+    student = db.identity_map.get(identity_key(Student, student_id))
+    if student is not None:
+        db.expire(student, ["outstanding_balance"])
+
+
+def _expire_loaded_balances(db: Session) -> None:
+    """Make loaded students re-read their balance after a bulk UPDATE."""
+    for obj in list(db.identity_map.values()):
+        if isinstance(obj, Student):
+            db.expire(obj, ["outstanding_balance"])
+
+
+def post_entry(
+    db: Session,
+    student_id: str,
+    entry_type: LedgerEntryType,
+    amount: float,
+    source_type: str,
+    source_id: str,
+    description: str | None = None,
+) -> bool:
+    """Post one entry and move the balance. Does not commit.
+
+    Returns False (and posts nothing) when the amount is not positive or the
+    source has already been posted for this entry type.
+    """
+    amount = round(float(amount or 0), 2)
+    if amount <= 0:
+        return False
+
+    already_posted = db.query(LedgerEntry.id).filter(
+        LedgerEntry.source_type == source_type,
+        LedgerEntry.source_id == source_id,
+        LedgerEntry.entry_type == entry_type,
+    ).first()
+    if already_posted:
+        logger.debug(f"Ledger {entry_type.value} for {source_type}:{source_id} already posted")
+        return False
+
+    debit, credit = ENTRY_ACCOUNTS[entry_type]
+    db.add(LedgerEntry(
+        student_id=student_id,
+        entry_type=entry_type,
+        debit_account=debit,
+        credit_account=credit,
+        amount=amount,
+        source_type=source_type,
+        source_id=source_id,
+        description=description,
+    ))
+    # Flush so a second posting for the same source in this transaction is detected
+    db.flush()
+    _apply_balance_delta(db, student_id, _balance_delta(entry_type, amount))
+    return True
+
+
+def post_charge(
+    db: Session,
+    student_id: str,
+    amount: float,
+    discount_percentage: float | None,
+    source_type: str,
+    source_id: str,
+    description: str | None = None,
+) -> None:
+    """Charge the gross amount and, if any, the discount against it."""
+    post_entry(db, student_id, LedgerEntryType.CHARGE, amount, source_type, source_id, description)
+    discount = float(amount or 0) * (discount_percentage or 0) / 100
+    post_entry(db, student_id, LedgerEntryType.DISCOUNT, discount, source_type, source_id, description)
+
+
+def post_entries_from_select(
+    db: Session,
+    entry_type: LedgerEntryType,
+    source_type: str,
+    rows,
+    description: str | None = None,
+) -> int:
+    """Set-based posting: one INSERT ... SELECT plus one balance UPDATE. Does not commit.
+
+    `rows` is a SELECT yielding `student_id`, `source_id` and `amount` columns.
+    Sources already posted for this entry type are skipped. Returns the number
+    of entries posted.
+    """
+    src = rows.subquery()
+    # Native UUID source ids compare and store as text, like every other source
+    source_id = cast(src.c.source_id, String)
+    debit, credit = ENTRY_ACCOUNTS[entry_type]
+    batch_id = new_id()
+
+    already_posted = exists().where(
+        LedgerEntry.source_type == source_type,
+        LedgerEntry.source_id == source_id,
+        LedgerEntry.entry_type == entry_type,
+    )
+    result = db.execute(
+        insert(LedgerEntry).from_select(
+            [
+                LedgerEntry.id, LedgerEntry.student_id, LedgerEntry.entry_type,
+                LedgerEntry.debit_account, LedgerEntry.credit_account, LedgerEntry.amount,
+                LedgerEntry.source_type, LedgerEntry.source_id, LedgerEntry.description,
+                LedgerEntry.batch_id, LedgerEntry.created_at,
+            ],
+            select(
+                sql_new_id(db),
+                src.c.student_id,
+                literal(entry_type, LedgerEntry.entry_type.type),
+                literal(debit, LedgerEntry.debit_account.type),
+                literal(credit, LedgerEntry.credit_account.type),
+                func.round(cast(src.c.amount, Numeric), 2),
+                literal(source_type, String),
+                source_id,
+                literal(description, String),
+                literal(batch_id, String),
+                literal(datetime.now(), DateTime),
+            ).where(src.c.amount > 0, ~already_posted),
+        )
+    )
+    posted = result.rowcount or 0
+    if posted:
+        apply_batch_to_balances(db, batch_id)
+    logger.info(f"Posted {posted} ledger {entry_type.value} entries for {source_type}")
+    return posted
+
+
+def apply_batch_to_balances(db: Session, batch_id: str) -> None:
+    """Move every affected student's balance by the net of one posted batch."""
+    batch_total = select(func.sum(signed_amount)).where(
+        LedgerEntry.batch_id == batch_id,
+        LedgerEntry.student_id == Student.id,
+    ).scalar_subquery()
+    db.execute(
+        update(Student)
+        .where(Student.id.in_(select(LedgerEntry.student_id).where(LedgerEntry.batch_id == batch_id)))
+        .values(outstanding_balance=func.coalesce(Student.outstanding_balance, 0) + batch_total)
+        .execution_options(synchronize_session=False)
+    )
+    _expire_loaded_balances(db)
+
+
+def post_school_fee_payment(db: Session, student_fees: List[StudentFee], memberships: List[ClubMembership]) -> None:
+    """Ledger side of a confirmed school fees payment. Does not commit.
+
+    Each settled StudentFee is credited with its discounted amount (its charge
+    is posted first if it predates the ledger). A club is charged when its
+    membership is confirmed, and that charge is settled by the same payment.
+    """
+    for sf in student_fees:
+        post_charge(db, sf.student_id, sf.amount, sf.discount_percentage, "student_fee", sf.id, "School fee")
+        net = float(sf.amount) * (1 - (sf.discount_percentage or 0) / 100)
+        post_entry(db, sf.student_id, LedgerEntryType.PAYMENT, net, "student_fee", sf.id, "School fees payment")
+
+    if not memberships:
+        return
+    club_ids = {m.club_id for m in memberships}
+    prices = dict(db.query(Club.id, Club.price).filter(Club.id.in_(club_ids)).all())
+    for membership in memberships:
+        price = prices.get(membership.club_id)
+        if price is None:
+            continue
+        post_entry(db, membership.student_id, LedgerEntryType.CHARGE, price, "club_membership", membership.id, "Club fee")
+        post_entry(db, membership.student_id, LedgerEntryType.PAYMENT, price, "club_membership", membership.id, "Club fee payment")
+
+
+def post_exam_payment(db: Session, exam_payment: ExamPayment, student_id: str) -> None:
+    """Credit one confirmed exam payment (or installment). Does not commit."""
+    post_entry(
+        db, student_id, LedgerEntryType.PAYMENT, exam_payment.amount_paid,
+        "exam_payment", exam_payment.id, "Exam fees payment",
+    )
+
+
+def get_family_balances(db: Session, student_ids: List[str]) -> Dict[str, float]:
+    """Running balances for a set of students (e.g. one parent's children)."""
+    if not student_ids:
+        return {}
+    rows = db.query(Student.id, Student.outstanding_balance).filter(Student.id.in_(student_ids)).all()
+    return {sid: float(balance or 0) for sid, balance in rows}
+
+
+def get_balance_at(db: Session, student_id: str, at: datetime) -> float:
+    """Balance as of `at`: the latest snapshot before it plus the entries since."""
+    snapshot = db.query(StudentBalanceSnapshot).filter(
+        StudentBalanceSnapshot.student_id == student_id,
+        StudentBalanceSnapshot.as_of <= at,
+    ).order_by(StudentBalanceSnapshot.as_of.desc()).first()
+
+    query = db.query(func.coalesce(func.sum(signed_amount), 0)).filter(
+        LedgerEntry.student_id == student_id,
+        LedgerEntry.created_at <= at,
+    )
+    base = 0.0
+    if snapshot is not None:
+        base = snapshot.balance
+        query = query.filter(LedgerEntry.created_at > snapshot.as_of)
+    return round(base + float(query.scalar() or 0), 2)
+
+
+def get_ledger_interval_seconds() -> float:
+    """Balance snapshot interval from `ledger_snapshot_interval_hours` (0 disables the job)."""
+    try:
+        return float(os.getenv("ledger_snapshot_interval_hours", "24")) * 3600
+    except ValueError:
+        logger.warning("Invalid ledger_snapshot_interval_hours; balance snapshots disabled")
+        return 0
+
+
+def snapshot_balances(db: Session) -> int:
+    """Copy every student's running balance into a snapshot row in one statement."""
+    as_of = datetime.now()
+    result = db.execute(
+        insert(StudentBalanceSnapshot).from_select(
+            [
+                StudentBalanceSnapshot.id, StudentBalanceSnapshot.student_id,
+                StudentBalanceSnapshot.balance, StudentBalanceSnapshot.as_of,
+            ],
+            select(
+                sql_new_id(db),
+                Student.id,
+                func.coalesce(Student.outstanding_balance, 0),
+                literal(as_of, DateTime),
+            ),
+        )
+    )
+    db.commit()
+    logger.info(f"Stored {result.rowcount} student balance snapshots as of {as_of.isoformat()}")
+    return result.rowcount or 0
+
+
+def rebuild_balances(db: Session) -> None:
+    """Repair job: recompute every running balance from the ledger."""
+    ledger_total = select(func.coalesce(func.sum(signed_amount), 0)).where(
+        LedgerEntry.student_id == Student.id
+    ).scalar_subquery()
+    db.execute(
+        update(Student)
+        .values(outstanding_balance=ledger_total)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    _expire_loaded_balances(db)
+    logger.info("Rebuilt all student balances from the ledger")
+
+
+def backfill_ledger(db: Session) -> Dict[str, int]:
+    """Post ledger entries for records that predate the ledger. Safe to re-run."""
+    counts = {}
+    sf_net = StudentFee.amount * (1 - func.coalesce(StudentFee.discount_percentage, 0) / 100)
+    sef_net = StudentExamFee.amount * (1 - func.coalesce(StudentExamFee.discount_percentage, 0) / 100)
+
+    counts["student_fee_charges"] = post_entries_from_select(
+        db, LedgerEntryType.CHARGE, "student_fee",
+        select(StudentFee.student_id, StudentFee.id.label("source_id"), StudentFee.amount.label("amount")),
+        "School fee",
+    )
+    counts["student_fee_discounts"] = post_entries_from_select(
+        db, LedgerEntryType.DISCOUNT, "student_fee",
+        select(
+            StudentFee.student_id, StudentFee.id.label("source_id"),
+            (StudentFee.amount - sf_net).label("amount"),
+        ),
+        "School fee discount",
+    )
+    counts["student_fee_payments"] = post_entries_from_select(
+        db, LedgerEntryType.PAYMENT, "student_fee",
+        select(StudentFee.student_id, StudentFee.id.label("source_id"), sf_net.label("amount"))
+        .where(StudentFee.paid == True),
+        "School fees payment",
+    )
+    counts["exam_fee_charges"] = post_entries_from_select(
+        db, LedgerEntryType.CHARGE, "student_exam_fee",
+        select(StudentExamFee.student_id, StudentExamFee.id.label("source_id"), StudentExamFee.amount.label("amount")),
+        "Exam fee",
+    )
+    counts["exam_fee_discounts"] = post_entries_from_select(
+        db, LedgerEntryType.DISCOUNT, "student_exam_fee",
+        select(
+            StudentExamFee.student_id, StudentExamFee.id.label("source_id"),
+            (StudentExamFee.amount - sef_net).label("amount"),
+        ),
+        "Exam fee discount",
+    )
+    counts["exam_payments"] = post_entries_from_select(
+        db, LedgerEntryType.PAYMENT, "exam_payment",
+        select(
+            StudentExamFee.student_id, ExamPayment.id.label("source_id"), ExamPayment.amount_paid.label("amount"),
+        ).join(StudentExamFee, StudentExamFee.id == ExamPayment.student_exam_fee_id)
+        .where(ExamPayment.status == PaymentStatus.COMPLETED),
+        "Exam fees payment",
+    )
+    confirmed_clubs = select(
+        ClubMembership.student_id, ClubMembership.id.label("source_id"), Club.price.label("amount"),
+    ).join(Club, Club.id == ClubMembership.club_id).where(ClubMembership.payment_confirmed == True)
+    counts["club_charges"] = post_entries_from_select(db, LedgerEntryType.CHARGE, "club_membership", confirmed_clubs, "Club fee")
+    counts["club_payments"] = post_entries_from_select(db, LedgerEntryType.PAYMENT, "club_membership", confirmed_clubs, "Club fee payment")
+
+    db.commit()
+    logger.info(f"Ledger backfill complete: {counts}")
+    return counts
@@ -1,19 +1,21 @@
 import logging
 import os
-from uuid import uuid4
 import requests
 from typing import Any, List, Dict, Optional, Union
 from ..models.student_exam_fee import StudentExamFee
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
-from ..models.payment import Payment, PaymentStatus, ExamPayment
+from ..models.payment import Payment, PaymentStatus, ExamPayment, payment_students
 from ..models.student import Student
-from ..models.club import ClubMembership
 from ..models.fees import ExamFees
 from ..models.parent import Parent
 from ..models.fee import Fee
 from ..models.student_fee import StudentFee
+from .club_seat_service import reserve_club_seats
+from .reference_cache import reference_cache
+from ..utils.blocking import call_blocking
+from ..utils.ids import new_id
 from fastapi import HTTPException
-from dotenv import load_dotenv
 
 # Import schemas from centralized location
 from ..schemas.payment import (
@@ -24,7 +26,6 @@ from ..schemas.payment import (
     PaymentInitializationResult
 )
 
-load_dotenv()
 
 logger = logging.getLogger(__name__)
 
@@ -54,7 +55,7 @@ def _initialize_split_payment_kobo(split_config: List[Dict]) -> Dict:
     logger.debug(f"Split payload: {payload}")
     
     try:
-        response = requests.post(PAYSTACK_SPLIT_URL, headers=headers, json=payload)
+        response = call_blocking(requests.post, PAYSTACK_SPLIT_URL, headers=headers, json=payload)
         response_data = response.json()
         
         if response.ok and response_data.get("status", False):
@@ -180,12 +181,13 @@ def process_exam_fees_split(
     
     # Create splits based on the actual payment amounts (let Paystack handle fees)
     exam_shares = []
+    exams_by_id = reference_cache.exams(db).by_id
     
     for i, ep in enumerate(exam_data.exam_payments):
         logger.debug(f"Processing exam payment {i+1}/{len(exam_data.exam_payments)}: Exam ID {ep.exam_id}, Amount: {ep.amount_paid}")
         
-        # Fetch exam name from database
-        exam_fees = db.query(ExamFees).filter(ExamFees.id == ep.exam_id).first()
+        # Look up the exam name in the reference cache
+        exam_fees = exams_by_id.get(ep.exam_id)
         if not exam_fees:
             logger.error(f"Exam with ID {ep.exam_id} not found in database")
             raise HTTPException(status_code=404, detail=f"Exam with ID {ep.exam_id} not found")
@@ -362,7 +364,7 @@ def initialize_payment(
         logger.info("Sending payment initialization request to Paystack")
         logger.debug(f"Paystack payload (excluding sensitive data): email={payload['email']}, amount={payload['amount']}, has_split={bool(split_code)}")
         
-        response = requests.post(PAYSTACK_INITIALIZE_URL, headers=headers, json=payload)
+        response = call_blocking(requests.post, PAYSTACK_INITIALIZE_URL, headers=headers, json=payload)
         
         if not response.ok:
             logger.error(f"Paystack initialization failed. Status: {response.status_code}, Response: {response.text}")
@@ -410,12 +412,24 @@ def _create_school_fees_records(payment_data: SchoolFeesPaymentData, payment_ref
             linked_student_fee_ids = payment_data.student_fee_ids
         else:
             logger.debug("No student_fee_ids provided, fetching fee rows from DB dynamically")
-            # Link all StudentFee rows for the provided student_ids in a single query
+            # Link the students' unpaid StudentFee rows (every billed term) in a single query
             sf_ids_rows = db.query(StudentFee.id).filter(
-                StudentFee.student_id.in_(payment_data.student_ids)
+                StudentFee.student_id.in_(payment_data.student_ids),
+                StudentFee.paid == False,
             ).all()
             linked_student_fee_ids = [sf_id for (sf_id,) in sf_ids_rows]
 
+        # Hold the selected club seats first, so a full club fails the checkout before anything is written
+        students = db.query(Student.id).filter(Student.id.in_(payment_data.student_ids)).all()
+        existing_student_ids = {student_id for (student_id,) in students}
+        for student_id in set(payment_data.student_ids) - existing_student_ids:
+            logger.warning(f"Student with ID {student_id} not found in database")
+        total_club_memberships = reserve_club_seats(db, {
+            student_id: club_ids
+            for student_id, club_ids in payment_data.student_club_ids.items()
+            if student_id in existing_student_ids
+        })
+
         # Create payment record with the computed student_fee_ids
         logger.debug("Creating main payment record with linked student_fee_ids")
         db_payment = Payment(
@@ -429,38 +443,19 @@ def _create_school_fees_records(payment_data: SchoolFeesPaymentData, payment_ref
             status=PaymentStatus.PENDING
         )
         db.add(db_payment)
-        db.commit()
-        db.refresh(db_payment)
+        db.flush()
 
         logger.info(f"Payment record created with ID: {db_payment.id}, linked to parent: {payment_data.parent_id}")
 
-        # Update student club memberships
-        total_club_memberships = 0
-        logger.debug("Fetching all target students in a single query for club memberships")
-        students = db.query(Student).filter(Student.id.in_(payment_data.student_ids)).all()
-        existing_student_ids = {s.id for s in students}
-        new_memberships: List[ClubMembership] = []
-
-        for student_id in payment_data.student_ids:
-            logger.debug(f"Processing club memberships for student {student_id}")
-            if student_id in existing_student_ids:
-                club_ids = payment_data.student_club_ids.get(str(student_id), [])
-                logger.debug(f"Student {student_id} has {len(club_ids)} club memberships: {club_ids}")
-                for club_id in club_ids:
-                    new_memberships.append(ClubMembership(
-                        student_id=student_id,
-                        club_id=club_id,
-                        payment_confirmed=False
-                    ))
-                    total_club_memberships += 1
-            else:
-                logger.warning(f"Student with ID {student_id} not found in database")
-
-        if new_memberships:
-            db.add_all(new_memberships)
+        # Link the payment to each known student for indexed paid-status lookups
+        if existing_student_ids:
+            db.execute(payment_students.insert(), [
+                {"payment_id": db_payment.id, "student_id": student_id}
+                for student_id in existing_student_ids
+            ])
         
         db.commit()
-        logger.info(f"School fees payment record created successfully. Payment ID: {db_payment.id}, Total club memberships: {total_club_memberships}")
+        logger.info(f"School fees payment record created successfully. Payment ID: {db_payment.id}, Club seats held: {total_club_memberships}")
         
     except Exception as e:
         db.rollback()
@@ -471,65 +466,67 @@ def _create_exam_fees_records(payment_data: ExamFeesPaymentData, payment_referen
     """Create exam payment records for each exam in the payment data.
 
     This function expects a typed `ExamFeesPaymentData` object for type safety.
+    The round trips do not grow with the cart: one query validates the exam ids,
+    one fetches the student's existing entries, and the missing entries and all
+    ExamPayment rows are each written with a single bulk insert.
     """
     try:
-        # Use the typed schema directly
-        exam_payments = [
+        student_id = payment_data.student_id
+        payer_id = payment_data.parent_id
+        exam_ids = {ep.exam_id for ep in payment_data.exam_payments}
+
+        # Validate every exam id up front so a bad cart fails before anything is written
+        exam_amounts = dict(db.query(ExamFees.id, ExamFees.amount).filter(ExamFees.id.in_(exam_ids)).all())
+        unknown = sorted(exam_ids - exam_amounts.keys())
+        if unknown:
+            logger.error(f"Exam fee not found: {', '.join(unknown)}")
+            # Surface the error to the caller so the entire payment fails
+            # and the transaction rolls back, avoiding partial records.
+            raise HTTPException(status_code=404, detail=f"Exam fee not found: {', '.join(unknown)}")
+
+        entry_ids = dict(db.query(StudentExamFee.exam_fee_id, StudentExamFee.id).filter(
+            StudentExamFee.student_id == student_id,
+            StudentExamFee.exam_fee_id.in_(exam_ids),
+        ).all())
+
+        if entry_ids:
+            db.execute(
+                update(StudentExamFee)
+                .where(StudentExamFee.id.in_(entry_ids.values()))
+                .values(payment_reference=payment_reference)
+                .execution_options(synchronize_session=False)
+            )
+
+        # Entries for exams the student was not enrolled in yet, owing the full exam fee
+        new_entries = [
             {
-                "student_id": payment_data.student_id,
-                "exam_id": ep.exam_id,
-                "amount": ep.amount_paid
+                "id": new_id(),
+                "student_id": student_id,
+                "exam_fee_id": exam_id,
+                "amount": exam_amounts[exam_id],
+                "payment_reference": payment_reference,
+                "paid": False,
             }
-            for ep in payment_data.exam_payments
+            for exam_id in sorted(exam_ids - entry_ids.keys())
         ]
-        payer_id = payment_data.parent_id
-        
-        for exam_payment in exam_payments:
-            exam_id = exam_payment["exam_id"]
-            student_id = exam_payment["student_id"]
-            amount = exam_payment["amount"]
-            
-            # Get or create StudentExamFee record
-            student_exam_fee = db.query(StudentExamFee).filter_by(
-                student_id=student_id,
-                exam_fee_id=exam_id
-            ).first()
-            
-            if not student_exam_fee:
-                # Create StudentExamFee if it doesn't exist
-                exam_fee = db.query(ExamFees).filter_by(id=exam_id).first()
-                if not exam_fee:
-                        logger.error(f"Exam fee not found: {exam_id}")
-                        # Surface the error to the caller so the entire payment fails
-                        # and the transaction rolls back, avoiding partial records.
-                        raise HTTPException(status_code=404, detail=f"Exam fee not found: {exam_id}")
-                    
-                student_exam_fee = StudentExamFee(
-                    id=str(uuid4()),
-                    student_id=student_id,
-                    exam_fee_id=exam_id,
-                    amount=amount,
-                    payment_reference=payment_reference,
-                    paid=False
-                )
-                db.add(student_exam_fee)
-                db.flush()
-            else:
-                # Update existing StudentExamFee
-                student_exam_fee.payment_reference = payment_reference
-                db.flush()
-            
-            # Create ExamPayment record
-            db_exam_payment = ExamPayment(
-                id=str(uuid4()),
-                student_exam_fee_id=student_exam_fee.id,
-                amount_paid=amount,
-                status=PaymentStatus.PENDING,
-                payment_reference=payment_reference,
-                payer_id=payer_id
-            )
-            db.add(db_exam_payment)
-        
+        if new_entries:
+            db.execute(insert(StudentExamFee), new_entries)
+            # No ledger charge yet: a checkout can be abandoned. The charge is posted
+            # with the payment once it is confirmed (`update_exam_payment_records`).
+            entry_ids.update({entry["exam_fee_id"]: entry["id"] for entry in new_entries})
+
+        db.execute(insert(ExamPayment), [
+            {
+                "id": new_id(),
+                "student_exam_fee_id": entry_ids[ep.exam_id],
+                "amount_paid": ep.amount_paid,
+                "status": PaymentStatus.PENDING,
+                "payment_reference": payment_reference,
+                "payer_id": payer_id,
+            }
+            for ep in payment_data.exam_payments
+        ])
+
         db.commit()
         logger.info(f"Created exam fees records for payment {payment_reference}")
     except Exception as e:
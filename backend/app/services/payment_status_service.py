@@ -0,0 +1,68 @@
+"""
+Payment Status Service - Local status of several payment references at once.
+
+The payment success pages used to poll a verify endpoint every couple of
+seconds. `wait_for_payment_statuses` instead holds one request: it subscribes
+to each reference's broker channel, reads the statuses, and while any is still
+pending waits for the confirmation path to publish a change (or for the
+timeout) before answering. With the Postgres fan-out enabled the wake-up
+reaches whichever node holds the request.
+"""
+import asyncio
+import logging
+from typing import Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.payment import ExamPayment, Payment, PaymentStatus
+from .event_broker import broker, payment_channel
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND = "not_found"
+
+
+def get_payment_statuses(db: Session, references: List[str]) -> Dict[str, str]:
+    """Status per reference: a school fees payment's status, or for an exam checkout
+    "completed" once every exam in it is. Unknown references are "not_found"."""
+    statuses = {reference: NOT_FOUND for reference in references}
+    for reference, status in db.query(Payment.payment_reference, Payment.status).filter(
+        Payment.payment_reference.in_(references)
+    ):
+        statuses[reference] = (status or PaymentStatus.PENDING).value
+
+    exam_statuses: Dict[str, List[PaymentStatus]] = {}
+    for reference, status in db.query(ExamPayment.payment_reference, ExamPayment.status).filter(
+        ExamPayment.payment_reference.in_(references)
+    ):
+        exam_statuses.setdefault(reference, []).append(status or PaymentStatus.PENDING)
+    for reference, exam_payment_statuses in exam_statuses.items():
+        unfinished = [status for status in exam_payment_statuses if status != PaymentStatus.COMPLETED]
+        statuses[reference] = (unfinished[0] if unfinished else PaymentStatus.COMPLETED).value
+    return statuses
+
+
+async def wait_for_payment_statuses(db: AsyncSession, references: List[str], timeout: float) -> Dict[str, str]:
+    """
+    Statuses of `references`, answered as soon as none is pending or one of them
+    changes, and otherwise after `timeout` seconds.
+    """
+    # Subscribe before reading so a confirmation landing in between is not missed
+    subscription = broker.subscribe(*(payment_channel(reference) for reference in references))
+    try:
+        initial = statuses = await db.run_sync(get_payment_statuses, references)
+        # Give the connection back to the pool while the request is parked
+        await db.close()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while PaymentStatus.PENDING.value in statuses.values() and statuses == initial:
+            remaining = deadline - loop.time()
+            if remaining <= 0 or await subscription.get(timeout=remaining) is None:
+                break
+            statuses = await db.run_sync(get_payment_statuses, references)
+            await db.close()
+        return statuses
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,180 @@
+"""
+Promotion Service - Year-end promotion of every current student, set-based.
+
+`promote_students` moves each current student up one year group (YEAR_6 to
+YEAR_7 ... YEAR_11 to YEAR_12) with one UPDATE and marks the final year as
+leavers (`Student.left_at`) with another, in a single transaction. Leavers
+give up their club seats and waitlist places in the same transaction. Exam
+entries then follow eligibility: unpaid entries the new year group no longer
+qualifies for are withdrawn and newly eligible students are enrolled, a few
+statements per exam. A dry run computes the same diff without writing.
+
+Once applied, the analytics snapshots are retaken and the admin dashboards
+are told to refresh; the per-class and per-year-group figures in the
+overviews are computed from the students table, so they follow on their own.
+"""
+import logging
+from datetime import datetime
+from typing import Dict
+
+from fastapi import HTTPException
+from sqlalchemy import case, cast, exists, func, select, update
+from sqlalchemy.orm import Session
+
+from ..models.classes import YearGroup
+from ..models.fees import ExamFees, exam_applicable_grades
+from ..models.payment import ExamPayment
+from ..models.promotion import YearEndPromotion
+from ..models.student import Student
+from ..models.student_exam_fee import StudentExamFee
+from ..schemas.promotion import ExamEligibilityChange, PromotionResult, YearGroupMove
+from .analytics_snapshot_service import take_analytics_snapshots
+from .club_seat_service import release_student_seats
+from .event_broker import ADMIN_DASHBOARD_CHANNEL, publish_event
+from .exam_enrollment_service import enroll_exam_students, withdraw_ineligible_students
+from .reference_cache import reference_cache
+
+logger = logging.getLogger(__name__)
+
+YEAR_ORDER = list(YearGroup)
+NEXT_YEAR_GROUP: Dict[YearGroup, YearGroup] = dict(zip(YEAR_ORDER, YEAR_ORDER[1:]))
+FINAL_YEAR_GROUP = YEAR_ORDER[-1]
+
+is_current = Student.left_at.is_(None)
+
+
+def _next_year_group():
+    """A student's year group after promotion; NULL for the final year."""
+    return cast(
+        case(*[(Student.year_group == current, following.name) for current, following in NEXT_YEAR_GROUP.items()]),
+        Student.year_group.type,
+    )
+
+
+def plan_promotion(db: Session, academic_year: str) -> PromotionResult:
+    """What promoting now would change, from three grouped queries. Writes nothing."""
+    counts = dict(
+        db.query(Student.year_group, func.count(Student.id)).filter(is_current).group_by(Student.year_group).all()
+    )
+    moves = [
+        YearGroupMove(
+            from_year_group=year_group.name,
+            to_year_group=NEXT_YEAR_GROUP[year_group].name if year_group in NEXT_YEAR_GROUP else None,
+            students=counts[year_group],
+        )
+        for year_group in YEAR_ORDER
+        if counts.get(year_group)
+    ]
+    leavers = counts.get(FINAL_YEAR_GROUP, 0)
+
+    next_year_group = _next_year_group()
+    # Current students whose next year group an exam applies to, without an entry yet
+    enrolled = dict(db.execute(
+        select(exam_applicable_grades.c.exam_id, func.count(Student.id))
+        .select_from(Student)
+        .join(exam_applicable_grades, exam_applicable_grades.c.year_group == next_year_group)
+        .where(
+            is_current,
+            ~exists().where(
+                StudentExamFee.student_id == Student.id,
+                StudentExamFee.exam_fee_id == exam_applicable_grades.c.exam_id,
+            ),
+        )
+        .group_by(exam_applicable_grades.c.exam_id)
+    ).all())
+    # Unpaid entries in graded exams that the student's next year group (or leaving) falls outside of
+    withdrawn = dict(db.execute(
+        select(StudentExamFee.exam_fee_id, func.count(StudentExamFee.id))
+        .join(Student, Student.id == StudentExamFee.student_id)
+        .where(
+            is_current,
+            StudentExamFee.paid == False,
+            StudentExamFee.exam_fee_id.in_(select(exam_applicable_grades.c.exam_id)),
+            ~exists().where(ExamPayment.student_exam_fee_id == StudentExamFee.id),
+            ~exists().where(
+                exam_applicable_grades.c.exam_id == StudentExamFee.exam_fee_id,
+                exam_applicable_grades.c.year_group == next_year_group,
+            ),
+        )
+        .group_by(StudentExamFee.exam_fee_id)
+    ).all())
+
+    exams_by_id = reference_cache.exams(db).by_id
+    exam_changes = [
+        ExamEligibilityChange(
+            exam_id=exam_id,
+            exam_name=exams_by_id[exam_id].exam_name if exam_id in exams_by_id else exam_id,
+            enrolled=enrolled.get(exam_id, 0),
+            withdrawn=withdrawn.get(exam_id, 0),
+        )
+        for exam_id in sorted(enrolled.keys() | withdrawn.keys())
+    ]
+    return PromotionResult(
+        academic_year=academic_year,
+        dry_run=True,
+        promoted=sum(move.students for move in moves) - leavers,
+        leavers=leavers,
+        moves=moves,
+        exam_changes=exam_changes,
+    )
+
+
+def promote_students(db: Session, academic_year: str, dry_run: bool = True) -> PromotionResult:
+    """
+    Close `academic_year`: promote every current student and mark the final year as
+    leavers. Each academic year can be applied once; a dry run only returns the plan.
+    """
+    plan = plan_promotion(db, academic_year)
+    if dry_run:
+        return plan
+
+    if db.query(YearEndPromotion.id).filter(YearEndPromotion.academic_year == academic_year).first():
+        raise HTTPException(status_code=409, detail=f"Promotion for {academic_year} has already been applied")
+
+    applied_at = datetime.now()
+    result = plan.model_copy(update={"dry_run": False, "applied_at": applied_at})
+    # Claim the academic year first; a concurrent run fails on the unique key instead of promoting twice
+    db.add(YearEndPromotion(
+        academic_year=academic_year,
+        promoted=result.promoted,
+        leavers=result.leavers,
+        summary=result.model_dump(mode="json"),
+    ))
+    db.flush()
+
+    leaver_ids = db.scalars(
+        update(Student)
+        .where(is_current, Student.year_group == FINAL_YEAR_GROUP)
+        .values(left_at=applied_at)
+        .returning(Student.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    release_student_seats(db, leaver_ids)
+    db.execute(
+        update(Student)
+        .where(is_current, Student.year_group != FINAL_YEAR_GROUP)
+        .values(year_group=_next_year_group())
+        .execution_options(synchronize_session=False)
+    )
+
+    # Exam entries follow the new year groups
+    graded_exams = db.query(ExamFees).filter(ExamFees.id.in_(select(exam_applicable_grades.c.exam_id))).all()
+    for exam in graded_exams:
+        withdraw_ineligible_students(db, exam)
+        enroll_exam_students(db, exam)
+
+    db.commit()
+    db.expire_all()
+    logger.info(f"Promoted {result.promoted} students and marked {result.leavers} leavers for {academic_year}")
+
+    publish_event(ADMIN_DASHBOARD_CHANNEL, "students.promoted", {
+        "academic_year": academic_year,
+        "promoted": result.promoted,
+        "leavers": result.leavers,
+    })
+    try:
+        take_analytics_snapshots(db)
+    except Exception as e:
+        # The promotion itself is committed; the next scheduled snapshot catches up
+        logger.error(f"Snapshot after promotion failed: {e}")
+    return result
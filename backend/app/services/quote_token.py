@@ -0,0 +1,90 @@
+"""
+Quote Token - Short-lived signed proof of a fee calculation.
+
+`calculate_fees` returns a token that binds the students, their club
+selections, the fee/club catalog version and the total. The checkout page
+sends it back to /payments/initialize, which accepts the amount on the
+strength of the signature instead of recomputing the quote. Initialize
+recomputes only when the token is missing, expired, does not match the
+request, or was issued against an older catalog.
+
+Tokens are HMAC-SHA256 signed with `QUOTE_SIGNING_SECRET` (falling back to
+`PAYSTACK_SECRET_KEY`). Without a secret no tokens are issued, and initialize
+always recomputes.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .reference_cache import reference_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _secret() -> Optional[bytes]:
+    secret = os.getenv("QUOTE_SIGNING_SECRET") or os.getenv("PAYSTACK_SECRET_KEY")
+    return secret.encode("utf-8") if secret else None
+
+
+def get_quote_token_ttl_seconds() -> float:
+    return float(os.getenv("quote_token_ttl_seconds", "900"))
+
+
+def catalog_version(db: Session) -> str:
+    """Version of everything a school fees quote is priced from"""
+    return f"{reference_cache.fees(db).version}.{reference_cache.clubs(db).version}"
+
+
+def _claims(student_ids: List[str], student_club_ids: Dict[str, List[str]], amount: float, version: str) -> dict:
+    # Only clubs of quoted students affect the price, in any order
+    clubs = {sid: sorted(student_club_ids.get(sid) or []) for sid in sorted(student_ids)}
+    return {"s": sorted(student_ids), "c": clubs, "a": round(float(amount), 2), "v": version}
+
+
+def _sign(body: bytes, secret: bytes) -> str:
+    return hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+
+def issue_quote_token(
+    student_ids: List[str], student_club_ids: Dict[str, List[str]], amount: float, version: str
+) -> Optional[str]:
+    secret = _secret()
+    if not secret:
+        return None
+    claims = _claims(student_ids, student_club_ids, amount, version)
+    claims["exp"] = int(time.time() + get_quote_token_ttl_seconds())
+    body = base64.urlsafe_b64encode(json.dumps(claims, separators=(",", ":"), sort_keys=True).encode("utf-8"))
+    return f"{body.decode('ascii')}.{_sign(body, secret)}"
+
+
+def verify_quote_token(
+    token: str, student_ids: List[str], student_club_ids: Dict[str, List[str]], amount: float, version: str
+) -> bool:
+    """True if `token` was issued for exactly this cart and amount against catalog `version` and is unexpired."""
+    secret = _secret()
+    if not secret or not token:
+        return False
+    try:
+        body, signature = token.encode("ascii").split(b".", 1)
+        if not hmac.compare_digest(_sign(body, secret), signature.decode("ascii")):
+            logger.warning("Rejected quote token with a bad signature")
+            return False
+        claims = json.loads(base64.urlsafe_b64decode(body))
+    except (ValueError, UnicodeError):
+        logger.warning("Rejected malformed quote token")
+        return False
+
+    if claims.pop("exp", 0) < time.time():
+        logger.info("Quote token expired")
+        return False
+    if claims.get("v") != version:
+        logger.info("Quote token was issued against an older catalog")
+        return False
+    return claims == _claims(student_ids, student_club_ids, amount, version)
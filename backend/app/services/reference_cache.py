@@ -0,0 +1,209 @@
+"""
+Reference Cache - In-memory snapshots of the small, rarely changing catalog tables.
+
+Fee, ExamFees and Club rows are read on almost every request but change only
+when an admin edits them. Each table is loaded into an immutable snapshot and
+served from memory. Writers call `bump_reference_version` in the same
+transaction as their change. The version table is re-read at most every
+`reference_cache_check_seconds` (default 5), so every worker picks up an edit
+within that window. The worker that made the change drops its copy as soon as
+the transaction commits.
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from ..models.club import Club
+from ..models.fee import Fee
+from ..models.fees import ExamFees
+from ..models.reference_data import ReferenceDataVersion
+
+logger = logging.getLogger(__name__)
+
+FEES = "fees"
+EXAMS = "exams"
+CLUBS = "clubs"
+
+
+@dataclass(frozen=True)
+class FeeRef:
+    id: str
+    code: str
+    name: str
+    amount: float
+
+
+@dataclass(frozen=True)
+class ExamRef:
+    id: str
+    exam_name: str
+    amount: float
+    extra_fees: Optional[float]
+    allows_installments: bool
+    applicable_grades: Optional[Tuple[str, ...]]
+
+
+@dataclass(frozen=True)
+class ClubRef:
+    id: str
+    name: str
+    description: Optional[str]
+    price: float
+    capacity: Optional[int]
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    """One table's rows at a given version, with lookups by id, (for fees) code and (for exams) grade."""
+    version: int
+    items: Tuple
+    by_id: Mapping[str, object] = field(default_factory=lambda: MappingProxyType({}))
+    by_code: Mapping[str, object] = field(default_factory=lambda: MappingProxyType({}))
+    # YearGroup name -> exams that apply to it
+    by_grade: Mapping[str, Tuple] = field(default_factory=lambda: MappingProxyType({}))
+
+
+def _load_fees(db: Session) -> Tuple[FeeRef, ...]:
+    return tuple(
+        FeeRef(id=f.id, code=f.code.upper(), name=f.name, amount=float(f.amount))
+        for f in db.query(Fee).order_by(Fee.code).all()
+    )
+
+
+def _load_exams(db: Session) -> Tuple[ExamRef, ...]:
+    return tuple(
+        ExamRef(
+            id=e.id,
+            exam_name=e.exam_name,
+            amount=float(e.amount),
+            extra_fees=e.extra_fees,
+            allows_installments=bool(e.allows_installments),
+            applicable_grades=tuple(e.applicable_grades) if e.applicable_grades is not None else None,
+        )
+        for e in db.query(ExamFees).order_by(ExamFees.exam_name).all()
+    )
+
+
+def _load_clubs(db: Session) -> Tuple[ClubRef, ...]:
+    return tuple(
+        ClubRef(id=c.id, name=c.name, description=c.description, price=float(c.price), capacity=c.capacity)
+        for c in db.query(Club).order_by(Club.name).all()
+    )
+
+
+LOADERS: Dict[str, Callable[[Session], Tuple]] = {
+    FEES: _load_fees,
+    EXAMS: _load_exams,
+    CLUBS: _load_clubs,
+}
+
+
+def get_check_interval_seconds() -> float:
+    try:
+        return float(os.getenv("reference_cache_check_seconds", "5"))
+    except ValueError:
+        logger.warning("Invalid reference_cache_check_seconds; checking versions on every read")
+        return 0
+
+
+class ReferenceCache:
+    """Process-wide cache of reference snapshots. Snapshots are immutable and safe to share."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, ReferenceSnapshot] = {}
+        self._last_checked = 0.0
+
+    def get(self, db: Session, name: str) -> ReferenceSnapshot:
+        self._check_versions(db)
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            snapshot = self._load(db, name)
+        return snapshot
+
+    def fees(self, db: Session) -> ReferenceSnapshot:
+        return self.get(db, FEES)
+
+    def exams(self, db: Session) -> ReferenceSnapshot:
+        return self.get(db, EXAMS)
+
+    def clubs(self, db: Session) -> ReferenceSnapshot:
+        return self.get(db, CLUBS)
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            if name is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(name, None)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+            self._last_checked = 0.0
+
+    def _check_versions(self, db: Session) -> None:
+        if not self._snapshots or time.monotonic() - self._last_checked < get_check_interval_seconds():
+            return
+        versions = _read_versions(db)
+        with self._lock:
+            self._last_checked = time.monotonic()
+            for name, snapshot in list(self._snapshots.items()):
+                if versions.get(name, 0) != snapshot.version:
+                    logger.info(f"Reference data '{name}' changed (v{snapshot.version} -> v{versions.get(name, 0)})")
+                    del self._snapshots[name]
+
+    def _load(self, db: Session, name: str) -> ReferenceSnapshot:
+        # Read the version first: a change committed in between only causes one extra reload
+        version = _read_versions(db).get(name, 0)
+        items = LOADERS[name](db)
+        snapshot = ReferenceSnapshot(
+            version=version,
+            items=items,
+            by_id=MappingProxyType({item.id: item for item in items}),
+            by_code=MappingProxyType({item.code: item for item in items} if name == FEES else {}),
+            by_grade=MappingProxyType(_group_by_grade(items) if name == EXAMS else {}),
+        )
+        with self._lock:
+            self._snapshots[name] = snapshot
+            if not self._last_checked:
+                self._last_checked = time.monotonic()
+        logger.info(f"Loaded {len(items)} '{name}' reference rows at v{version}")
+        return snapshot
+
+
+def _group_by_grade(exams: Tuple[ExamRef, ...]) -> Dict[str, Tuple[ExamRef, ...]]:
+    by_grade: Dict[str, list] = {}
+    for exam in exams:
+        for grade in exam.applicable_grades or ():
+            by_grade.setdefault(grade, []).append(exam)
+    return {grade: tuple(grade_exams) for grade, grade_exams in by_grade.items()}
+
+
+def _read_versions(db: Session) -> Dict[str, int]:
+    return dict(db.query(ReferenceDataVersion.name, ReferenceDataVersion.version).all())
+
+
+def bump_reference_version(db: Session, name: str) -> None:
+    """Mark a reference table as changed. Call inside the transaction that changes it."""
+    result = db.execute(
+        update(ReferenceDataVersion)
+        .where(ReferenceDataVersion.name == name)
+        .values(version=ReferenceDataVersion.version + 1, updated_at=datetime.now())
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        db.add(ReferenceDataVersion(name=name, version=1))
+    # This worker sees its own change immediately, without waiting for the next check
+    event.listen(db, "after_commit", lambda session: reference_cache.invalidate(name), once=True)
+
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,309 @@
+"""
+Roster Import Service - Bulk load students, parents and their links from a spreadsheet.
+
+Rows stream from a CSV, XLS (xlrd) or XLSX (openpyxl, imported only when such
+a file arrives) file and are handled in chunks of CHUNK_SIZE. Each chunk is
+validated in Python and then written with a handful of set-based statements
+inside its own savepoint:
+
+- students are upserted by reg_number in one multi-row INSERT ... ON CONFLICT;
+- parents are matched by email, then phone, with one lookup query, and the
+  new and changed ones are written with one bulk INSERT and one bulk UPDATE;
+- parent_student links go in with one multi-row INSERT that skips existing pairs.
+
+Rows that fail validation, or a chunk the database rejects, end up in the
+per-row error report without stopping the rest of the file. Imported parents
+get a placeholder auth_id (IMPORTED_AUTH_PREFIX + id) until they sign in.
+"""
+import csv
+import io
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..models.classes import ClassName, YearGroup
+from ..models.parent import Parent, parent_student_association
+from ..models.student import Student
+from ..schemas.roster import RosterImportResult, RosterRowError
+from ..utils.bulk import upsert_insert
+from ..utils.ids import new_id
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+IMPORTED_AUTH_PREFIX = "roster-import:"
+
+REQUIRED_COLUMNS = {"reg_number", "first_name", "last_name", "year_group", "class_name"}
+# Up to two parents per student row, e.g. parent_email and parent2_email
+PARENT_PREFIXES = ("parent_", "parent2_")
+PARENT_FIELDS = ("first_name", "last_name", "email", "phone")
+
+
+class RosterFormatError(ValueError):
+    """The uploaded file cannot be read as a roster."""
+
+
+@dataclass
+class _RosterRow:
+    row: int
+    student: Dict[str, object]
+    parents: List[Dict[str, Optional[str]]] = field(default_factory=list)
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    # Spreadsheets hand back numeric reg numbers and phones as floats
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _column_name(header) -> str:
+    return _cell(header).lower().replace(" ", "_")
+
+
+def _read_rows(file: BinaryIO, filename: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """Yield (row number, {column: value}) for every non-blank data row."""
+    extension = os.path.splitext(filename.lower())[1]
+    text = None
+    if extension == ".csv":
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        rows = csv.reader(text)
+    elif extension == ".xlsx":
+        try:
+            import openpyxl
+        except ImportError:
+            raise RosterFormatError("Reading .xlsx rosters requires openpyxl")
+        rows = openpyxl.load_workbook(file, read_only=True, data_only=True).active.iter_rows(values_only=True)
+    elif extension == ".xls":
+        import xlrd
+
+        sheet = xlrd.open_workbook(file_contents=file.read(), on_demand=True).sheet_by_index(0)
+        rows = (sheet.row_values(index) for index in range(sheet.nrows))
+    else:
+        raise RosterFormatError(f"Unsupported roster file type: {filename}")
+
+    try:
+        header = next(iter(rows), None)
+        if header is None:
+            raise RosterFormatError("The roster file is empty")
+        columns = [_column_name(name) for name in header]
+        missing = REQUIRED_COLUMNS - set(columns)
+        if missing:
+            raise RosterFormatError(f"Missing roster columns: {', '.join(sorted(missing))}")
+
+        for row_number, values in enumerate(rows, start=2):
+            record = {column: _cell(value) for column, value in zip(columns, values) if column}
+            if any(record.values()):
+                yield row_number, record
+    finally:
+        # Leave the caller's file open; the text wrapper would close it when collected
+        if text is not None:
+            text.detach()
+
+
+def _enum_member(enum_cls, value: str):
+    """Accept either the member name (YEAR_10) or its label (Year 10)."""
+    return enum_cls.__members__.get(value.upper().replace(" ", "_"))
+
+
+def _parse_row(row_number: int, record: Dict[str, str]) -> _RosterRow:
+    """Validate one row. Raises ValueError with a message for the error report."""
+    missing = [column for column in sorted(REQUIRED_COLUMNS) if not record.get(column)]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+    year_group = _enum_member(YearGroup, record["year_group"])
+    if year_group is None:
+        raise ValueError(f"Unknown year_group '{record['year_group']}'")
+    class_name = _enum_member(ClassName, record["class_name"])
+    if class_name is None:
+        raise ValueError(f"Unknown class_name '{record['class_name']}'")
+
+    parsed = _RosterRow(row=row_number, student={
+        "reg_number": record["reg_number"],
+        "first_name": record["first_name"],
+        "middle_name": record.get("middle_name") or None,
+        "last_name": record["last_name"],
+        "year_group": year_group,
+        "class_name": class_name,
+        "email": (record.get("email") or "").lower() or None,
+    })
+    for prefix in PARENT_PREFIXES:
+        parent = {name: record.get(prefix + name) or None for name in PARENT_FIELDS}
+        if not any(parent.values()):
+            continue
+        if parent["email"]:
+            parent["email"] = parent["email"].lower()
+        if parent["phone"]:
+            parent["phone"] = parent["phone"].replace(" ", "")
+        if not parent["email"] and not parent["phone"]:
+            raise ValueError(f"{prefix.rstrip('_')} needs an email or phone")
+        if not parent["first_name"] or not parent["last_name"]:
+            raise ValueError(f"{prefix.rstrip('_')} needs a first and last name")
+        parsed.parents.append(parent)
+    return parsed
+
+
+class _ChunkCounts:
+    def __init__(self):
+        self.students_created = 0
+        self.students_updated = 0
+        self.parents_created = 0
+        self.parents_updated = 0
+        self.links_created = 0
+
+
+def _upsert_students(db: Session, rows: List[_RosterRow], counts: _ChunkCounts) -> Dict[str, str]:
+    """Insert or update the chunk's students by reg_number; returns reg_number -> id."""
+    reg_numbers = [row.student["reg_number"] for row in rows]
+    existing = set(db.scalars(select(Student.reg_number).where(Student.reg_number.in_(reg_numbers))))
+
+    table = Student.__table__
+    statement = upsert_insert(db, table).values([{"id": new_id(), **row.student} for row in rows])
+    statement = statement.on_conflict_do_update(
+        index_elements=["reg_number"],
+        set_={
+            "first_name": statement.excluded.first_name,
+            "last_name": statement.excluded.last_name,
+            "year_group": statement.excluded.year_group,
+            "class_name": statement.excluded.class_name,
+            # Blank optional cells keep what is already on file
+            "middle_name": func.coalesce(statement.excluded.middle_name, table.c.middle_name),
+            "email": func.coalesce(statement.excluded.email, table.c.email),
+        },
+    ).returning(table.c.reg_number, table.c.id)
+    student_ids = dict(db.execute(statement).all())
+
+    counts.students_updated += len(existing)
+    counts.students_created += len(student_ids) - len(existing)
+    return student_ids
+
+
+def _upsert_parents(db: Session, rows: List[_RosterRow], counts: _ChunkCounts) -> List[Tuple[int, Dict, str]]:
+    """Match the chunk's parents by email, then phone; insert the new ones and update the rest.
+
+    Returns (row, parent values, parent id) for every parent in the chunk.
+    """
+    emails = {p["email"] for row in rows for p in row.parents if p["email"]}
+    phones = {p["phone"] for row in rows for p in row.parents if p["phone"]}
+    on_file = db.execute(
+        select(Parent.id, Parent.email, Parent.phone).where(or_(Parent.email.in_(emails), Parent.phone.in_(phones)))
+    ).all()
+    by_email = {email: parent_id for parent_id, email, _ in on_file if email}
+    by_phone = {phone: parent_id for parent_id, _, phone in on_file if phone}
+    known = {parent_id: (email, phone) for parent_id, email, phone in on_file}
+
+    new_parents: Dict[str, Dict] = {}
+    changes: Dict[str, Dict] = {}
+    resolved = []
+    for row in rows:
+        for parent in row.parents:
+            parent_id = by_email.get(parent["email"]) or by_phone.get(parent["phone"])
+            if parent_id is None:
+                parent_id = new_id()
+                new_parents[parent_id] = {"id": parent_id, "auth_id": IMPORTED_AUTH_PREFIX + parent_id, **parent}
+            elif parent_id in known and parent_id not in changes:
+                change = {"id": parent_id, "first_name": parent["first_name"], "last_name": parent["last_name"]}
+                # Fill in missing contact details, never overwrite ones already on file
+                email_on_file, phone_on_file = known[parent_id]
+                if parent["email"] and not email_on_file:
+                    change["email"] = parent["email"]
+                if parent["phone"] and not phone_on_file:
+                    change["phone"] = parent["phone"]
+                changes[parent_id] = change
+            if parent["email"]:
+                by_email.setdefault(parent["email"], parent_id)
+            if parent["phone"]:
+                by_phone.setdefault(parent["phone"], parent_id)
+            resolved.append((row, parent, parent_id))
+
+    if new_parents:
+        db.execute(insert(Parent), list(new_parents.values()))
+    if changes:
+        db.execute(update(Parent), list(changes.values()))
+    counts.parents_created += len(new_parents)
+    counts.parents_updated += len(changes)
+    return resolved
+
+
+def _import_chunk(db: Session, rows: List[_RosterRow], counts: _ChunkCounts) -> None:
+    student_ids = _upsert_students(db, rows, counts)
+    links = {
+        (parent_id, student_ids[row.student["reg_number"]])
+        for row, _, parent_id in _upsert_parents(db, rows, counts)
+    }
+    if links:
+        result = db.execute(
+            upsert_insert(db, parent_student_association)
+            .values([{"parent_id": parent_id, "student_id": student_id} for parent_id, student_id in links])
+            .on_conflict_do_nothing()
+        )
+        counts.links_created += result.rowcount or 0
+
+
+def import_roster(db: Session, file: BinaryIO, filename: str, chunk_size: int = CHUNK_SIZE) -> RosterImportResult:
+    """
+    Import a roster file. Commits after each chunk, so a rejected chunk does not
+    undo the ones before it. Raises RosterFormatError if the file is unreadable.
+    """
+    started = time.perf_counter()
+    counts = _ChunkCounts()
+    errors: List[RosterRowError] = []
+    seen_reg_numbers: Dict[str, int] = {}
+    seen_emails: Dict[str, int] = {}
+    total_rows = 0
+
+    def flush(chunk: List[_RosterRow]) -> None:
+        if not chunk:
+            return
+        chunk_counts = _ChunkCounts()
+        try:
+            with db.begin_nested():
+                _import_chunk(db, chunk, chunk_counts)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Roster chunk starting at row {chunk[0].row} rejected: {e}")
+            message = f"Rows {chunk[0].row}-{chunk[-1].row} were rejected by the database: {e.__class__.__name__}"
+            errors.extend(RosterRowError(row=row.row, reg_number=row.student["reg_number"], message=message) for row in chunk)
+            return
+        for name, value in vars(chunk_counts).items():
+            setattr(counts, name, getattr(counts, name) + value)
+
+    chunk: List[_RosterRow] = []
+    for row_number, record in _read_rows(file, filename):
+        total_rows += 1
+        try:
+            row = _parse_row(row_number, record)
+            reg_number, email = row.student["reg_number"], row.student["email"]
+            if reg_number in seen_reg_numbers:
+                raise ValueError(f"Duplicate reg_number, first seen on row {seen_reg_numbers[reg_number]}")
+            if email and email in seen_emails:
+                raise ValueError(f"Duplicate student email, first seen on row {seen_emails[email]}")
+        except ValueError as e:
+            errors.append(RosterRowError(row=row_number, reg_number=record.get("reg_number") or None, message=str(e)))
+            continue
+        seen_reg_numbers[reg_number] = row_number
+        if email:
+            seen_emails[email] = row_number
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    flush(chunk)
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    logger.info(f"Imported roster {filename}: {total_rows} rows, {len(errors)} errors in {elapsed_ms:.0f} ms")
+    return RosterImportResult(
+        rows=total_rows,
+        elapsed_ms=round(elapsed_ms, 1),
+        errors=sorted(errors, key=lambda error: error.row),
+        **vars(counts),
+    )
@@ -0,0 +1,19 @@
+"""
+Offload blocking calls (e.g. Paystack HTTP requests) from the event loop.
+
+Sync service code runs on the event loop when an async router calls it through
+`AsyncSession.run_sync`. Blocking I/O made there goes through `call_blocking`,
+which hands it to the threadpool and waits without blocking the loop. Called
+from ordinary sync code (scripts, sync routers, tests) it just calls `fn`.
+"""
+from functools import partial
+from typing import Any, Callable
+
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+from starlette.concurrency import run_in_threadpool
+
+
+def call_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    if in_greenlet():
+        return await_only(run_in_threadpool(partial(fn, *args, **kwargs)))
+    return fn(*args, **kwargs)
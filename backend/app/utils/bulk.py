@@ -0,0 +1,44 @@
+"""
+Dialect helpers for set-based statements.
+
+Production runs on Postgres and the test suite on SQLite, so bulk SQL that
+needs dialect-specific syntax (id generation, upserts) goes through here.
+"""
+from sqlalchemy import cast, literal_column, String
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def dialect_name(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+# UUIDv7 in SQL (see utils/ids.py): the millisecond timestamp over the first
+# six bytes of a random UUID, with the version nibble turned from 4 into 7
+_PG_UUID7 = (
+    "encode(set_bit(set_bit(overlay(uuid_send(gen_random_uuid()) placing "
+    "substring(int8send(floor(extract(epoch from clock_timestamp()) * 1000)::bigint) from 3) "
+    "from 1 for 6), 52, 1), 53, 1), 'hex')::uuid"
+)
+_SQLITE_MS = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+_SQLITE_UUID7 = (
+    f"printf('%08x-%04x-7%03x-%04x-%012x', {_SQLITE_MS} >> 16, {_SQLITE_MS} & 65535, "
+    "random() & 4095, 32768 | (random() & 16383), random() & 281474976710655)"
+)
+
+
+def sql_new_id(db: Session, type_=String):
+    """
+    SQL expression producing a fresh time-ordered id per row, for INSERT ... SELECT.
+    Pass the id column's type when it is a native UUID column.
+    """
+    if dialect_name(db) == "postgresql":
+        return cast(literal_column(_PG_UUID7), type_)
+    return literal_column(_SQLITE_UUID7, String)
+
+
+def upsert_insert(db: Session, table):
+    """INSERT construct with on_conflict_do_update / on_conflict_do_nothing for the bound dialect."""
+    if dialect_name(db) == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
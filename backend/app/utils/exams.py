@@ -1,50 +1,201 @@
-from typing import List
+from typing import Dict, List, Mapping
 
 from fastapi import HTTPException
 from ..models.club import ClubMembership
 from ..models.student import Student
+from ..models.parent import parent_student_association
 from ..models.fees import ExamFees
 from ..models.payment import ExamPayment, Payment, PaymentItem, PaymentStatus, PaymentType
-from ..models.student_exam_fee import StudentExamFee
+from ..models.student_exam_fee import ExamFeeStatus, StudentExamFee
 from ..models.classes import YearGroup
+from ..schemas.exams import ExamPaymentStatusResponse, StudentExamPaymentStatusResponse
+from ..services.club_seat_service import ACTIVE, confirm_club_memberships
+from ..services.event_broker import ADMIN_DASHBOARD_CHANNEL, publish_event, publish_payment_status
+from ..services.ledger_service import post_charge, post_exam_payment, post_school_fee_payment
+from ..services.reference_cache import ExamRef, reference_cache
+from sqlalchemy import case, cast, true, update
 from sqlalchemy.orm import Session
 import logging
 
+logger = logging.getLogger(__name__)
+
+# Rounding slack when comparing installment totals against the amount due
+PAID_TOLERANCE = 0.01
+
 def should_include_exam(student: Student, exam: ExamFees, db: Session) -> bool:
     """
     Check if an exam should be included for a given student based on their year group
-    and the exam's applicable grades.
+    and the exam's applicable grades. Exams without applicable grades are excluded.
     """
     if not student.year_group:
         return False
+    grade_exams = reference_cache.exams(db).by_grade.get(student.year_group.name, ())
+    return any(grade_exam.id == exam.id for grade_exam in grade_exams)
 
-    # Get applicable grades for this exam from the JSON column
-    applicable_grades = exam.applicable_grades
 
-    # If no applicable grades are configured, exclude the exam
-    if not applicable_grades:
-        return False
+def _build_exam_list(
+    student: Student, student_exam_fees: List[StudentExamFee], exams_by_id: Mapping[str, ExamRef]
+) -> StudentExamPaymentStatusResponse:
+    """One student's /get-student-exam-list response from their rows and the cached exam catalog."""
+    exam_list = []
+    for student_exam_fee in student_exam_fees:
+        exam = exams_by_id.get(student_exam_fee.exam_fee_id)
+        if exam is None:
+            logger.warning(f"StudentExamFee {student_exam_fee.id} references unknown exam {student_exam_fee.exam_fee_id}")
+            continue
+        is_fully_paid = student_exam_fee.payment_status == ExamFeeStatus.PAID
+        exam_list.append(ExamPaymentStatusResponse(
+            exam_id=student_exam_fee.exam_fee_id,
+            exam_name=exam.exam_name,
+            exam_price=exam.amount,
+            extra_fees=exam.extra_fees,
+            amount_paid=student_exam_fee.amount_paid or 0,
+            amount_due=0 if is_fully_paid else max(student_exam_fee.balance_due, 0),
+            is_fully_paid=is_fully_paid,
+        ))
+    if not student_exam_fees:
+        return StudentExamPaymentStatusResponse(student_id=student.id, exam_list=[])
+    return StudentExamPaymentStatusResponse(
+        id=student_exam_fees[0].id,
+        year_group=student.year_group.value if student.year_group else None,
+        class_name=student.class_name.value if student.class_name else None,
+        student_id=student.id,
+        exam_list=exam_list,
+    )
+
+
+def _group_exam_lists(db: Session, rows) -> Dict[str, StudentExamPaymentStatusResponse]:
+    """Build exam lists from (Student, StudentExamFee | None) rows of an outer join."""
+    students: Dict[str, Student] = {}
+    fees_by_student: Dict[str, List[StudentExamFee]] = {}
+    for student, student_exam_fee in rows:
+        students[student.id] = student
+        student_fees = fees_by_student.setdefault(student.id, [])
+        if student_exam_fee is not None:
+            student_fees.append(student_exam_fee)
+
+    exams_by_id = reference_cache.exams(db).by_id
+    return {
+        student_id: _build_exam_list(student, fees_by_student[student_id], exams_by_id)
+        for student_id, student in students.items()
+    }
+
+
+def _exam_list_query(db: Session):
+    return db.query(Student, StudentExamFee).outerjoin(
+        StudentExamFee, StudentExamFee.student_id == Student.id
+    )
+
+
+def get_student_exam_lists(db: Session, students: List[Student]) -> Dict[str, StudentExamPaymentStatusResponse]:
+    """
+    Exam payment status for already-loaded students, keyed by student id.
+    One query for their StudentExamFee rows; exam details come from the reference cache.
+    """
+    rows = db.query(StudentExamFee).filter(
+        StudentExamFee.student_id.in_([s.id for s in students])
+    ).all()
+
+    fees_by_student: Dict[str, List[StudentExamFee]] = {}
+    for student_exam_fee in rows:
+        fees_by_student.setdefault(student_exam_fee.student_id, []).append(student_exam_fee)
+
+    exams_by_id = reference_cache.exams(db).by_id
+    return {
+        student.id: _build_exam_list(student, fees_by_student.get(student.id, []), exams_by_id)
+        for student in students
+    }
+
+
+def get_exam_lists_for_students(db: Session, student_ids: List[str]) -> Dict[str, StudentExamPaymentStatusResponse]:
+    """Exam lists for students by id, from one Student/StudentExamFee join. Unknown ids are omitted."""
+    return _group_exam_lists(db, _exam_list_query(db).filter(Student.id.in_(student_ids)).all())
+
 
-    # Check if student's year group is in the applicable grades
-    return student.year_group.name in applicable_grades
+def get_exam_lists_for_parent(db: Session, parent_id: str) -> Dict[str, StudentExamPaymentStatusResponse]:
+    """Exam lists for all of a parent's children, from one joined query."""
+    rows = _exam_list_query(db).join(
+        parent_student_association, parent_student_association.c.student_id == Student.id
+    ).filter(parent_student_association.c.parent_id == parent_id).all()
+    return _group_exam_lists(db, rows)
 
-async def update_exam_payment_records(db: Session, exam_payments: List[ExamPayment], logger: logging.Logger ) -> None:
+
+def record_exam_installment(db: Session, student_exam_fee: StudentExamFee, amount: float) -> None:
+    """
+    Add a confirmed installment to an entry's amount_paid, installment count and status.
+    One UPDATE computes the new totals from the stored ones, so concurrent confirmations
+    for the same entry cannot overwrite each other. Exams without installments are
+    settled by their single payment. Does not commit.
+    """
+    exam = reference_cache.exams(db).by_id.get(student_exam_fee.exam_fee_id)
+    new_total = StudentExamFee.amount_paid + amount
+    if exam is not None and not exam.allows_installments:
+        settled = true()
+    else:
+        settled = new_total >= StudentExamFee.net_amount - PAID_TOLERANCE
+    db.execute(
+        update(StudentExamFee)
+        .where(StudentExamFee.id == student_exam_fee.id)
+        .values(
+            amount_paid=new_total,
+            installments_paid=StudentExamFee.installments_paid + 1,
+            payment_status=cast(
+                case((settled, ExamFeeStatus.PAID.name), else_=ExamFeeStatus.PARTIAL.name),
+                StudentExamFee.payment_status.type,
+            ),
+            paid=settled,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.expire(student_exam_fee, ["amount_paid", "installments_paid", "payment_status", "paid"])
+
+
+def update_exam_payment_records(db: Session, exam_payments: List[ExamPayment], logger: logging.Logger ) -> None:
     try:
         logger.info(f"Updating exam payment records for exam payment: {exam_payments}")
+        confirmed = []
+        reference = None
         for exam_payment in exam_payments:
+            reference = exam_payment.payment_reference
+            newly_completed = exam_payment.status != PaymentStatus.COMPLETED
             exam_payment.status = PaymentStatus.COMPLETED
             
-            # Mark the corresponding StudentExamFee as paid
+            # Add the installment to the corresponding StudentExamFee's running totals
             student_exam_fee = db.query(StudentExamFee).filter(StudentExamFee.id == exam_payment.student_exam_fee_id).first()
             if student_exam_fee:
-                student_exam_fee.paid = True
                 student_exam_fee.payment_reference = exam_payment.payment_reference
-                logger.info(f"Marked StudentExamFee {student_exam_fee.id} as paid")
+                if newly_completed:
+                    record_exam_installment(db, student_exam_fee, exam_payment.amount_paid)
+                    logger.info(
+                        f"StudentExamFee {student_exam_fee.id} is {student_exam_fee.payment_status.value} "
+                        f"after {student_exam_fee.installments_paid} installment(s)"
+                    )
+
+                # Ledger: the charge (if it predates the ledger) and this payment
+                post_charge(
+                    db, student_exam_fee.student_id, student_exam_fee.amount,
+                    student_exam_fee.discount_percentage, "student_exam_fee", student_exam_fee.id, "Exam fee",
+                )
+                post_exam_payment(db, exam_payment, student_exam_fee.student_id)
+                if newly_completed:
+                    confirmed.append({
+                        "exam_id": student_exam_fee.exam_fee_id,
+                        "student_id": student_exam_fee.student_id,
+                        "amount_paid": exam_payment.amount_paid,
+                    })
             else:
                 logger.warning(f"StudentExamFee not found for exam payment {exam_payment.id}")
         
         db.commit()
         logger.info(f"Exam payment records updated successfully")
+
+        if confirmed:
+            publish_payment_status(reference, PaymentStatus.COMPLETED.value)
+            publish_event(ADMIN_DASHBOARD_CHANNEL, "exam_fees.payment_completed", {
+                "reference": reference,
+                "exam_payments": confirmed,
+                "amount": sum(c["amount_paid"] for c in confirmed),
+            })
     except Exception as e:
         logger.error(f"Error updating exam payment records: {e}")
         db.rollback()
@@ -113,7 +264,46 @@ def _ensure_payment_items_for_confirmed_payment(
         )
 
 
-async def update_payment_records(
+def _paid_club_holds(
+    db: Session,
+    student_id: str,
+    student_clubs_map: dict | None,
+    logger: logging.Logger,
+) -> List[ClubMembership]:
+    """
+    The memberships a school fees payment confirms: the student's live unpaid
+    holds in the clubs it paid for (all live holds for payments from before the
+    club selection was recorded in the metadata). Expired or inactive rows are
+    never revived by a payment.
+    """
+    club_ids = None
+    if student_clubs_map and isinstance(student_clubs_map, dict):
+        club_ids = student_clubs_map.get(str(student_id), []) or []
+        if not club_ids:
+            return []
+    query = db.query(ClubMembership).filter(
+        ClubMembership.student_id == student_id,
+        ClubMembership.status == ACTIVE,
+        ClubMembership.payment_confirmed == False,
+    )
+    if club_ids is not None:
+        query = query.filter(ClubMembership.club_id.in_(club_ids))
+    holds = query.all()
+    if club_ids is not None:
+        settled = {m.club_id for m in holds} | {
+            club_id for (club_id,) in db.query(ClubMembership.club_id).filter(
+                ClubMembership.student_id == student_id,
+                ClubMembership.club_id.in_(club_ids),
+                ClubMembership.status == ACTIVE,
+            )
+        }
+        missing = set(club_ids) - settled
+        if missing:
+            logger.warning(f"Paid clubs {', '.join(sorted(missing))} of student {student_id} have no live seat hold to confirm")
+    return holds
+
+
+def update_payment_records(
     db: Session,
     payment: Payment,
     student_ids: List[int],
@@ -123,6 +313,10 @@ async def update_payment_records(
     """Update payment status and related records in the database."""
     try:
         logger.info(f"Updating payment records for payment ID: {payment.id}")
+        newly_completed = payment.status != PaymentStatus.COMPLETED
+        updated_students: List[Student] = []
+        settled_fees = []
+        confirmed_memberships: List[ClubMembership] = []
         
         # Update payment status
         payment.status = PaymentStatus.COMPLETED
@@ -146,33 +340,22 @@ async def update_payment_records(
                     sf.paid = True
                     sf.payment_reference = payment.payment_reference
                     linked_student_ids.add(sf.student_id)
+                    settled_fees.append(sf)
             logger.info(f"Marked {len(payment.student_fee_ids)} StudentFee records as paid")
 
             # Update club memberships and student status for linked students
             for student_id in linked_student_ids:
                 logger.info(f"Processing updates for student ID: {student_id}")
 
-                if student_clubs_map and isinstance(student_clubs_map, dict):
-                    club_ids = student_clubs_map.get(str(student_id), []) or []
-                    if club_ids:
-                        club_memberships = db.query(ClubMembership).filter(
-                            ClubMembership.student_id == student_id,
-                            ClubMembership.club_id.in_(club_ids),
-                        ).all()
-                    else:
-                        club_memberships = []
-                else:
-                    club_memberships = db.query(ClubMembership).filter(
-                        ClubMembership.student_id == student_id
-                    ).all()
-
-                for club_membership in club_memberships:
-                    club_membership.payment_confirmed = True
-                    club_membership.status = "active"
+                club_memberships = _paid_club_holds(db, student_id, student_clubs_map, logger)
+
+                confirm_club_memberships(db, [m.id for m in club_memberships])
+                confirmed_memberships.extend(club_memberships)
                 logger.info(f"Updated {len(club_memberships)} club memberships for student")
                 student = db.query(Student).filter(Student.id == student_id).first()
                 if student:
                     student.school_fees_paid = True
+                    updated_students.append(student)
                     logger.info(f"Updated school fees status for student")
         else:
             # Update club memberships and student status (backwards-compatible)
@@ -180,32 +363,43 @@ async def update_payment_records(
                 logger.info(f"Processing updates for student ID: {student_id}")
                 
                 # Update club memberships
-                if student_clubs_map and isinstance(student_clubs_map, dict):
-                    club_ids = student_clubs_map.get(str(student_id), []) or []
-                    if club_ids:
-                        club_memberships = db.query(ClubMembership).filter(
-                            ClubMembership.student_id == student_id,
-                            ClubMembership.club_id.in_(club_ids),
-                        ).all()
-                    else:
-                        club_memberships = []
-                else:
-                    club_memberships = db.query(ClubMembership).filter(
-                        ClubMembership.student_id == student_id
-                    ).all()
-                for club_membership in club_memberships:
-                    club_membership.payment_confirmed = True
-                    club_membership.status = "active"
+                club_memberships = _paid_club_holds(db, student_id, student_clubs_map, logger)
+                confirm_club_memberships(db, [m.id for m in club_memberships])
+                confirmed_memberships.extend(club_memberships)
                 logger.info(f"Updated {len(club_memberships)} club memberships for student")
                 
                 # Update student payment status
                 student = db.query(Student).filter(Student.id == student_id).first()
                 if student:
                     student.school_fees_paid = True
+                    updated_students.append(student)
                     logger.info(f"Updated school fees status for student")
         
+        # Ledger: settle the linked fees and the confirmed club memberships
+        post_school_fee_payment(db, settled_fees, confirmed_memberships)
+
         db.commit()
         logger.info("Successfully committed all database updates")
+
+        if newly_completed:
+            publish_payment_status(payment.payment_reference, PaymentStatus.COMPLETED.value)
+            club_ids = []
+            if student_clubs_map and isinstance(student_clubs_map, dict):
+                for ids in student_clubs_map.values():
+                    club_ids.extend(ids or [])
+            publish_event(ADMIN_DASHBOARD_CHANNEL, "school_fees.payment_completed", {
+                "reference": payment.payment_reference,
+                "amount": payment.amount,
+                "students": [
+                    {
+                        "id": s.id,
+                        "year_group": s.year_group.value if s.year_group else None,
+                        "class_name": s.class_name.value if s.class_name else None,
+                    }
+                    for s in updated_students
+                ],
+                "club_ids": club_ids,
+            })
     except Exception as e:
         logger.error(f"Error updating payment records: {str(e)}")
         db.rollback()
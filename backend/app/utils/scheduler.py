@@ -0,0 +1,59 @@
+"""
+In-process periodic jobs.
+
+Jobs are plain synchronous callables; each run is executed in a worker thread
+so database work never blocks the event loop. Jobs are started from the
+application lifespan and cancelled on shutdown.
+"""
+import asyncio
+import logging
+from typing import Callable, Dict
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_jobs: Dict[str, asyncio.Task] = {}
+
+
+def run_with_session(job: Callable[[Session], None]) -> Callable[[], None]:
+    """Wrap a job that takes a Session so every run gets its own short-lived session."""
+    def _run() -> None:
+        from ..database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            job(db)
+        finally:
+            db.close()
+    return _run
+
+
+def start_periodic_job(name: str, interval_seconds: float, job: Callable[[], None]) -> None:
+    """Run `job` every `interval_seconds`. A non-positive interval disables the job."""
+    if interval_seconds <= 0:
+        logger.info(f"Periodic job '{name}' is disabled")
+        return
+    if name in _jobs:
+        logger.warning(f"Periodic job '{name}' is already running")
+        return
+
+    async def _runner():
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(job)
+            except Exception as e:
+                logger.error(f"Periodic job '{name}' failed: {e}")
+
+    _jobs[name] = asyncio.create_task(_runner(), name=f"periodic:{name}")
+    logger.info(f"Started periodic job '{name}' every {interval_seconds}s")
+
+
+async def stop_periodic_jobs() -> None:
+    """Cancel all running periodic jobs and wait for them to finish."""
+    tasks = list(_jobs.values())
+    _jobs.clear()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,46 @@
+"""
+Startup timing.
+
+`main` times each startup phase (imports, router registration, schema check,
+background services) and logs one report once the app is ready, so a slow cold
+start points at the phase responsible. The report is also kept on
+`app.state.startup_report` and served at GET /startup.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Wall-clock time per startup phase, in the order the phases ran."""
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases: List[Tuple[str, float]] = []
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def report(self) -> Dict:
+        """Milliseconds per phase and since the timer started."""
+        return {
+            "phases": {name: round(seconds * 1000, 1) for name, seconds in self.phases},
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+        }
+
+    def log(self) -> Dict:
+        report = self.report()
+        phases = ", ".join(f"{name} {ms}ms" for name, ms in report["phases"].items())
+        logger.info(f"Started in {report['total_ms']}ms ({phases})")
+        return report
@@ -0,0 +1,20 @@
+#!/bin/sh
+# Container entrypoint: bring the database schema to the latest migration, then
+# run the given command (the API by default). The API itself never creates
+# tables and refuses to start on an outdated schema (see `schema_check`).
+#
+# Set run_migrations=false when migrations run as a separate deploy step.
+#
+# Databases built by the old startup `create_all` have tables but no Alembic
+# revision. scripts/migrate.py stamps them at the revision create_all built
+# (b5a757fc31a9) before upgrading; by hand that is:
+#
+#   alembic stamp b5a757fc31a9
+#   alembic upgrade head
+set -e
+
+if [ "${run_migrations:-true}" != "false" ]; then
+    python scripts/migrate.py
+fi
+
+exec "$@"
@@ -0,0 +1,43 @@
+"""
+Ledger Backfill for School Payment System
+
+Posts ledger entries for fees, exam payments and club memberships recorded
+before the ledger existed, then recomputes every Student.outstanding_balance
+from the ledger. Safe to re-run: sources that are already posted are skipped.
+"""
+
+import sys
+import os
+
+# Add the parent directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.ledger_service import backfill_ledger, rebuild_balances, snapshot_balances
+
+
+def main():
+    """Main entry point."""
+    print("Ledger Backfill for School Payment System")
+    print("="*50)
+
+    db = SessionLocal()
+
+    try:
+        counts = backfill_ledger(db)
+        for name, count in counts.items():
+            print(f"  {name}: {count}")
+        rebuild_balances(db)
+        snapshot_balances(db)
+    except Exception as e:
+        print(f"\nError during backfill: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    print("\nDone!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Roster Import for School Payment System
+
+Loads students, parents and parent-student links from a CSV, XLS or XLSX
+roster (see app/services/roster_import_service.py for the columns) and prints
+the per-row error report.
+
+Usage:
+    python scripts/import_roster.py intake-2026.xlsx [--chunk-size 500]
+"""
+
+import argparse
+import sys
+import os
+
+# Add the parent directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.roster_import_service import CHUNK_SIZE, RosterFormatError, import_roster
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Import a student and parent roster")
+    parser.add_argument("path", help="CSV, XLS or XLSX roster file")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows written per transaction")
+    args = parser.parse_args()
+
+    print("Roster Import")
+    print("="*50)
+
+    db = SessionLocal()
+
+    try:
+        with open(args.path, "rb") as roster:
+            result = import_roster(db, roster, os.path.basename(args.path), chunk_size=args.chunk_size)
+    except RosterFormatError as e:
+        print(f"Cannot read roster: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"Rows:      {result.rows} in {result.elapsed_ms / 1000:.1f}s")
+    print(f"Students:  {result.students_created} created, {result.students_updated} updated")
+    print(f"Parents:   {result.parents_created} created, {result.parents_updated} updated")
+    print(f"Links:     {result.links_created} created")
+    if result.errors:
+        print(f"\n{len(result.errors)} rows not imported:")
+        for error in result.errors:
+            print(f"  row {error.row} ({error.reg_number or '-'}): {error.message}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Database Migrations for School Payment System
+
+Brings the database to the latest Alembic revision; run by the container
+entrypoint before the API starts.
+
+Databases built by the old startup `create_all` have tables but no Alembic
+revision, so upgrading them would replay the first migrations over existing
+tables. Those databases have the schema of revision b5a757fc31a9, the head
+when the last release that ran create_all shipped: they are stamped there once,
+and the later migrations then run as usual. A database without a revision
+that already has tables added after b5a757fc31a9 is refused, since no single
+revision describes it; compare it with the migrations, then
+`alembic stamp <revision>` by hand.
+"""
+
+import sys
+import os
+
+# Add the parent directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.database import ALEMBIC_DIR, engine
+
+# Schema built by create_all in the last release that ran it
+CREATE_ALL_REVISION = "b5a757fc31a9"
+# Tables created by the migrations after CREATE_ALL_REVISION
+LATER_TABLES = {
+    "analytics_snapshots", "ledger_entries", "student_balance_snapshots", "payment_students",
+    "reference_data_versions", "billing_runs", "exam_applicable_grades", "year_end_promotions",
+    "club_waitlist",
+}
+
+
+def unversioned_revision(tables):
+    """
+    Revision to stamp a database with tables but no Alembic revision at, or
+    None when it has none of its own tables (nothing to stamp). Raises when the
+    schema is not the create_all one.
+    """
+    if not tables or "alembic_version" in tables:
+        return None
+    later = sorted(tables & LATER_TABLES)
+    if later:
+        raise RuntimeError(
+            f"Database has no Alembic revision but has tables added after {CREATE_ALL_REVISION} "
+            f"({', '.join(later)}); stamp the revision it matches with `alembic stamp <revision>` "
+            f"and run `alembic upgrade head`"
+        )
+    return CREATE_ALL_REVISION
+
+
+def main():
+    """Main entry point."""
+    config = Config(str(ALEMBIC_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(ALEMBIC_DIR / "alembic"))
+
+    revision = unversioned_revision(set(inspect(engine).get_table_names()))
+    if revision:
+        print(f"Database was built by create_all; stamping it at {revision}")
+        command.stamp(config, revision)
+    command.upgrade(config, "head")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except RuntimeError as e:
+        sys.exit(str(e))
@@ -0,0 +1,53 @@
+"""
+Year-End Promotion for School Payment System
+
+Moves every current student up one year group and marks Year 12 as leavers.
+Prints the plan by default; pass --apply to commit it (once per academic year).
+
+Usage:
+    python scripts/promote_students.py 2025/2026 [--apply]
+"""
+
+import argparse
+import sys
+import os
+
+# Add the parent directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+
+from app.database import SessionLocal
+from app.services.promotion_service import promote_students
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Promote students at the end of an academic year")
+    parser.add_argument("academic_year", help="The year being closed, e.g. 2025/2026")
+    parser.add_argument("--apply", action="store_true", help="Apply the promotion instead of printing the plan")
+    args = parser.parse_args()
+
+    print("Year-End Promotion" + ("" if args.apply else " (dry run)"))
+    print("="*50)
+
+    db = SessionLocal()
+
+    try:
+        result = promote_students(db, args.academic_year, dry_run=not args.apply)
+    except HTTPException as e:
+        print(e.detail)
+        sys.exit(1)
+    finally:
+        db.close()
+
+    for move in result.moves:
+        print(f"  {move.from_year_group:<8} -> {move.to_year_group or 'left':<8} {move.students}")
+    print(f"Promoted:  {result.promoted}")
+    print(f"Leavers:   {result.leavers}")
+    for change in result.exam_changes:
+        print(f"  {change.exam_name}: +{change.enrolled} enrolled, -{change.withdrawn} withdrawn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Whole-School Billing Quote for School Payment System
+
+Prints the expected billing per year group and the school total, optionally
+writing per-student and per-family lines to CSV for the bursar.
+
+Usage:
+    python scripts/quote_school.py [--students students.csv] [--families families.csv]
+"""
+
+import argparse
+import csv
+import sys
+import os
+
+# Add the parent directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.billing_quote_service import quote_whole_school
+
+
+def write_csv(path, rows):
+    if not rows:
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"  Wrote {len(rows)} rows to {path}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Quote expected billing for the whole school")
+    parser.add_argument("--students", help="Write per-student lines to this CSV file")
+    parser.add_argument("--families", help="Write per-family lines to this CSV file")
+    args = parser.parse_args()
+
+    print("Whole-School Billing Quote")
+    print("="*50)
+
+    db = SessionLocal()
+
+    try:
+        quote = quote_whole_school(db)
+    finally:
+        db.close()
+
+    summary = quote.summary()
+    for line in summary["year_groups"]:
+        print(f"  {line['year_group']:<10} {line['students']:>5} students  {line['total_amount']:>16,.2f}")
+    print("-"*50)
+    print(f"  Students: {summary['student_count']}  Families: {summary['family_count']}")
+    print(f"  Club fees:      {summary['club_fees_total']:>16,.2f}")
+    print(f"  Exam fees:      {summary['exam_fees_total']:>16,.2f}  (after {summary['exam_discounts_total']:,.2f} discounts)")
+    print(f"  Total:          {summary['total_amount']:>16,.2f}")
+    print(f"  Computed in {summary['elapsed_ms']:.1f} ms")
+
+    if args.students:
+        write_csv(args.students, quote.student_lines())
+    if args.families:
+        write_csv(args.families, quote.family_lines())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Term Billing Run for School Payment System
+
+Generates the StudentFee rows (and ledger charges) for a term, one year group
+at a time. Re-run with --resume <run id> to continue a run that failed.
+
+Usage:
+    python scripts/run_billing.py --term 2026-T1 [--year-groups YEAR_10 YEAR_11] [--fees TUITION] [--due-date 2026-01-15]
+    python scripts/run_billing.py --resume <run id>
+"""
+
+import argparse
+import sys
+import os
+
+# Add the parent directory to the path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.billing_run_service import create_billing_run, execute_billing_run, execute_billing_run_by_id
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Generate a term's StudentFee rows")
+    parser.add_argument("--term", help="Term to bill, e.g. 2026-T1")
+    parser.add_argument("--year-groups", nargs="*", help="YearGroup names to bill (default: all)")
+    parser.add_argument("--fees", nargs="*", help="Fee codes to bill (default: all)")
+    parser.add_argument("--due-date", help="Due date stored on the generated rows")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Resume an existing billing run")
+    args = parser.parse_args()
+    if not args.term and not args.resume:
+        parser.error("one of --term or --resume is required")
+
+    print("Term Billing Run")
+    print("="*50)
+
+    db = SessionLocal()
+
+    try:
+        if args.resume:
+            run = execute_billing_run_by_id(db, args.resume)
+        else:
+            run = create_billing_run(
+                db, term=args.term, year_groups=args.year_groups, fee_codes=args.fees, due_date=args.due_date,
+            )
+            print(f"  Run id: {run.id}")
+            run = execute_billing_run(db, run)
+
+        print(f"  Term: {run.term}")
+        print(f"  Year groups billed: {', '.join(run.completed_year_groups)}")
+        print(f"  StudentFee rows created: {run.rows_created}")
+    except Exception as e:
+        print(f"\nError during billing run: {e}")
+        raise
+    finally:
+        db.close()
+
+    print("\nDone!")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
+import asyncio
+import aiosqlite
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 from app.models.base import Base
@@ -12,9 +15,18 @@ from app.models.fee import Fee
 from app.models.student_fee import StudentFee
 from app.models.student_exam_fee import StudentExamFee
 from app.models.classes import YearGroup
+from app.services.reference_cache import reference_cache
 import os
 
 
+@pytest.fixture(autouse=True)
+def reset_reference_cache():
+    """Each test gets a fresh database, so drop any cached reference data"""
+    reference_cache.reset()
+    yield
+    reference_cache.reset()
+
+
 @pytest.fixture(scope="function")
 def test_db():
     """Create a test database and return a session"""
@@ -38,6 +50,49 @@ def test_db():
         Base.metadata.drop_all(bind=engine)
 
 
+class _SharedConnection:
+    """The test database's sqlite3 connection, minus close(), for the async engine"""
+
+    def __init__(self, connection):
+        object.__setattr__(self, "_connection", connection)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._connection, name, value)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def async_test_db(test_db: Session):
+    """
+    Async dependency override backed by the same in-memory database as test_db.
+
+    Routers on get_async_db see the fixtures' rows and the tests see the routers'
+    writes, because both engines drive one sqlite3 connection.
+    """
+    raw_connection = test_db.get_bind().raw_connection().driver_connection
+
+    async def creator():
+        return await aiosqlite.Connection(lambda: _SharedConnection(raw_connection), 64)
+
+    engine = create_async_engine("sqlite+aiosqlite://", async_creator=creator, poolclass=StaticPool)
+    AsyncTestingSessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    try:
+        yield override_get_async_db
+    finally:
+        # Stops the aiosqlite worker thread; the shared connection itself stays open
+        asyncio.run(engine.dispose())
+
+
 @pytest.fixture
 def mock_parent(test_db: Session):
     """Create a mock parent for testing"""
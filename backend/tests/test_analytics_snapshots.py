@@ -0,0 +1,104 @@
+import pytest
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routers.admin_analytics import router
+from app.database import get_db
+from app.models.analytics_snapshot import AnalyticsSnapshot
+from app.models.payment import Payment, PaymentStatus
+from app.services.analytics_snapshot_service import take_analytics_snapshots, get_snapshot
+
+
+@pytest.fixture
+def client(test_db):
+    """Create a test client for the admin analytics router"""
+    app = FastAPI()
+    app.include_router(router, prefix="/admin")
+
+    def override_get_db():
+        try:
+            yield test_db
+        finally:
+            pass
+
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+
+class TestTakeAnalyticsSnapshots:
+    """Test suite for take_analytics_snapshots"""
+
+    def test_stores_one_snapshot_per_kind(self, test_db, mock_student, mock_club, mock_exam):
+        """Every overview is materialized with the endpoint's response shape"""
+        snapshots = take_analytics_snapshots(test_db)
+
+        assert {s.kind for s in snapshots} == {"school_fees", "exam_fees", "clubs"}
+        assert test_db.query(AnalyticsSnapshot).count() == 3
+
+        school_fees = next(s for s in snapshots if s.kind == "school_fees")
+        assert school_fees.payload["total_students"] == 1
+        assert school_fees.payload["total_paid"] == 0
+
+    def test_get_snapshot_as_of_timestamp(self, test_db):
+        """A timestamp selects the newest snapshot taken at or before it"""
+        now = datetime.now()
+        test_db.add_all([
+            AnalyticsSnapshot(kind="clubs", payload={"total_clubs": 1}, taken_at=now - timedelta(days=7)),
+            AnalyticsSnapshot(kind="clubs", payload={"total_clubs": 2}, taken_at=now),
+        ])
+        test_db.commit()
+
+        last_week = get_snapshot(test_db, "clubs", (now - timedelta(days=1)).isoformat())
+        latest = get_snapshot(test_db, "clubs", "latest")
+
+        assert last_week.payload["total_clubs"] == 1
+        assert latest.payload["total_clubs"] == 2
+
+
+class TestSnapshotEndpoints:
+    """Test suite for snapshot mode on the overview endpoints"""
+
+    def test_overview_serves_latest_snapshot(self, client, test_db, mock_student, mock_parent):
+        """snapshot=latest returns the stored payload, not a live recomputation"""
+        take_analytics_snapshots(test_db)
+
+        # A payment landing after the snapshot is only visible live
+        test_db.add(Payment(
+            student_ids=[mock_student.id],
+            amount=500.0,
+            status=PaymentStatus.COMPLETED,
+            payment_reference="ref_after_snapshot",
+            payer_id=mock_parent.id,
+            student_fee_ids=[],
+        ))
+        test_db.commit()
+
+        snapshot_response = client.get("/admin/school-fees/overview?snapshot=latest")
+        live_response = client.get("/admin/school-fees/overview")
+
+        assert snapshot_response.status_code == 200
+        assert "X-Snapshot-Taken-At" in snapshot_response.headers
+        assert snapshot_response.json()["total_paid"] == 0
+        assert live_response.json()["total_paid"] == 1
+
+    def test_overview_snapshot_not_found(self, client, test_db):
+        """Asking for a snapshot before any exist returns 404"""
+        response = client.get("/admin/clubs/overview?snapshot=latest")
+
+        assert response.status_code == 404
+
+    def test_overview_snapshot_invalid_timestamp(self, client, test_db):
+        """A selector that is neither 'latest' nor a timestamp is rejected"""
+        response = client.get("/admin/exam-fees/overview?snapshot=yesterday")
+
+        assert response.status_code == 400
+
+    def test_create_and_list_snapshots(self, client, test_db):
+        """Manual snapshots show up in the history listing"""
+        created = client.post("/admin/snapshots")
+        listed = client.get("/admin/snapshots?kind=clubs")
+
+        assert created.status_code == 200
+        assert len(created.json()) == 3
+        assert listed.status_code == 200
+        assert [s["kind"] for s in listed.json()] == ["clubs"]
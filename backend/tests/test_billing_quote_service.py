@@ -0,0 +1,98 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.database import get_db
+from app.models.club import ClubMembership
+from app.models.student_exam_fee import StudentExamFee
+from app.routers.admin_analytics import router
+from app.services.billing_quote_service import quote_whole_school
+from app.services.fees_service import calculate_fees
+
+
+@pytest.fixture
+def family(test_db, mock_parent, mock_student, mock_student_2):
+    """mock_parent linked to both mock students"""
+    mock_parent.students.extend([mock_student, mock_student_2])
+    test_db.commit()
+    return mock_parent
+
+
+class TestQuoteWholeSchool:
+    """Test suite for quote_whole_school"""
+
+    def test_school_fees_match_calculate_fees(self, test_db, family, mock_student, mock_student_2, mock_fees, mock_club):
+        """Per-student totals equal the single-cart quote for the same clubs"""
+        test_db.add(ClubMembership(student_id=mock_student.id, club_id=mock_club.id, status="active"))
+        test_db.add(ClubMembership(student_id=mock_student_2.id, club_id=mock_club.id, status="inactive"))
+        test_db.add(ClubMembership(student_id=mock_student_2.id, club_id="club-deleted", status="active"))
+        test_db.commit()
+
+        quote = quote_whole_school(test_db)
+        cart = calculate_fees(
+            student_ids=[mock_student.id, mock_student_2.id],
+            student_club_ids={mock_student.id: [mock_club.id]},
+            db=test_db,
+        )
+
+        lines = {line["student_id"]: line for line in quote.student_lines()}
+        for detail in cart.student_fees:
+            assert lines[detail.student_id]["total_amount"] == detail.fee_breakdown.final_amount
+        assert lines[mock_student.id]["club_fees"] == 50.0
+        assert lines[mock_student_2.id]["club_fees"] == 0.0
+        assert quote.summary()["total_amount"] == cart.total_amount
+
+    def test_unpaid_exam_fees_net_of_discount(self, test_db, mock_student, mock_exam, mock_fees):
+        """Unpaid exam fees count after discount; paid ones are not billed again"""
+        test_db.add(StudentExamFee(
+            student_id=mock_student.id, exam_fee_id=mock_exam.id, amount=150000.0, discount_percentage=10.0
+        ))
+        test_db.add(StudentExamFee(
+            student_id=mock_student.id, exam_fee_id=mock_exam.id, amount=80000.0, paid=True
+        ))
+        test_db.commit()
+
+        summary = quote_whole_school(test_db).summary()
+
+        assert summary["exam_fees_total"] == 135000.0
+        assert summary["exam_discounts_total"] == 15000.0
+        assert summary["total_amount"] == 780000.0 + 135000.0
+
+    def test_family_and_year_group_totals(self, test_db, family, mock_fees):
+        """Families total their children; year groups total their students"""
+        quote = quote_whole_school(test_db)
+
+        assert quote.family_lines() == [{"parent_id": "parent-123", "students": 2, "total_amount": 1560000.0}]
+        assert quote.year_group_lines() == [
+            {"year_group": "Year 10", "students": 1, "total_amount": 780000.0},
+            {"year_group": "Year 11", "students": 1, "total_amount": 780000.0},
+        ]
+
+    def test_empty_school(self, test_db):
+        """A school with no students or fees quotes zero"""
+        summary = quote_whole_school(test_db).summary()
+
+        assert summary["student_count"] == 0
+        assert summary["family_count"] == 0
+        assert summary["total_amount"] == 0.0
+        assert summary["year_groups"] == []
+
+
+class TestBillingQuoteEndpoint:
+    """Test suite for GET /admin/billing/quote"""
+
+    @pytest.fixture
+    def client(self, test_db):
+        app = FastAPI()
+        app.include_router(router, prefix="/admin")
+        app.dependency_overrides[get_db] = lambda: test_db
+        return TestClient(app)
+
+    def test_summary_and_detail(self, client, family, mock_fees):
+        """Row-level lines are only returned on request"""
+        summary = client.get("/admin/billing/quote").json()
+        detail = client.get("/admin/billing/quote", params={"detail": True}).json()
+
+        assert summary["student_count"] == 2
+        assert summary["students"] is None
+        assert len(detail["students"]) == 2
+        assert detail["families"][0]["total_amount"] == 1560000.0
@@ -0,0 +1,95 @@
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from app.database import get_async_db
+from app.models.billing_run import BillingRunStatus
+from app.models.ledger import LedgerEntry
+from app.models.student import Student
+from app.models.student_fee import StudentFee
+from app.routers import fees as fees_router
+from app.services import billing_run_service
+from app.services.billing_run_service import create_billing_run, execute_billing_run
+
+
+class TestBillingRun:
+    """Test suite for term billing runs"""
+
+    def test_bills_scope_and_posts_charges(self, test_db, mock_student, mock_student_2, mock_fees):
+        """Only the run's year groups and fee codes are billed, each with a ledger charge"""
+        run = create_billing_run(test_db, "2026-T1", year_groups=["YEAR_10"], fee_codes=["tuition", "boarding"])
+        execute_billing_run(test_db, run)
+
+        rows = test_db.query(StudentFee).filter_by(term="2026-T1").all()
+        assert run.status == BillingRunStatus.COMPLETED
+        assert run.rows_created == 2
+        assert run.completed_year_groups == ["YEAR_10"]
+        assert {(r.student_id, r.amount) for r in rows} == {(mock_student.id, 500000.0), (mock_student.id, 200000.0)}
+        assert test_db.query(LedgerEntry).filter(LedgerEntry.source_id.in_([r.id for r in rows])).count() == 2
+        assert test_db.get(Student, mock_student.id).outstanding_balance == 700000.0
+        assert test_db.get(Student, mock_student_2.id).outstanding_balance is None
+
+    def test_skips_rows_that_already_exist(self, test_db, mock_student, mock_fees):
+        """A second run for the same term creates nothing new"""
+        execute_billing_run(test_db, create_billing_run(test_db, "2026-T1"))
+        second = execute_billing_run(test_db, create_billing_run(test_db, "2026-T1"))
+
+        assert second.rows_created == 0
+        assert test_db.query(StudentFee).filter_by(term="2026-T1").count() == len(mock_fees)
+        assert test_db.get(Student, mock_student.id).outstanding_balance == 780000.0
+
+    def test_resume_after_failure(self, test_db, mock_student, mock_student_2, mock_fees):
+        """A failed run keeps its finished year groups and resumes from the next one"""
+        original = billing_run_service._bill_year_group
+        calls = []
+
+        def fail_on_year_11(db, run, year_group):
+            calls.append(year_group.name)
+            if year_group.name == "YEAR_11" and calls.count("YEAR_11") == 1:
+                raise RuntimeError("connection lost")
+            return original(db, run, year_group)
+
+        run = create_billing_run(test_db, "2026-T1", year_groups=["YEAR_10", "YEAR_11"])
+        with patch.object(billing_run_service, "_bill_year_group", side_effect=fail_on_year_11):
+            with pytest.raises(RuntimeError):
+                execute_billing_run(test_db, run)
+            assert run.status == BillingRunStatus.FAILED
+            assert run.completed_year_groups == ["YEAR_10"]
+
+            execute_billing_run(test_db, run)
+
+        assert calls == ["YEAR_10", "YEAR_11", "YEAR_11"]
+        assert run.status == BillingRunStatus.COMPLETED
+        assert run.rows_created == 2 * len(mock_fees)
+
+    def test_rejects_unknown_scope(self, test_db, mock_fees):
+        """Unknown year groups or fee codes are rejected before anything is recorded"""
+        with pytest.raises(HTTPException) as exc:
+            create_billing_run(test_db, "2026-T1", year_groups=["YEAR_99"])
+        assert exc.value.status_code == 400
+
+        with pytest.raises(HTTPException) as exc:
+            create_billing_run(test_db, "2026-T1", fee_codes=["NOPE"])
+        assert exc.value.status_code == 400
+
+
+class TestBillingRunEndpoints:
+    """Test suite for the /api/fees/billing-runs endpoints"""
+
+    @pytest.fixture
+    def client(self, async_test_db):
+        app = FastAPI()
+        app.include_router(fees_router.router, prefix="/api/fees")
+        app.dependency_overrides[get_async_db] = async_test_db
+        return TestClient(app)
+
+    def test_start_and_get(self, client, mock_student, mock_fees):
+        """Starting a run bills the term and the run can be read back"""
+        response = client.post("/api/fees/billing-runs", json={"term": "2026-T1", "due_date": "2026-01-15"})
+
+        assert response.status_code == 200
+        run = response.json()
+        assert run["status"] == "completed"
+        assert run["rows_created"] == len(mock_fees)
+        assert client.get(f"/api/fees/billing-runs/{run['id']}").json()["rows_created"] == len(mock_fees)
+        assert client.get("/api/fees/billing-runs/missing").status_code == 404
@@ -0,0 +1,220 @@
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+from app.database import get_db
+from app.models.club import Club, ClubMembership
+from app.models.payment import Payment
+from app.routers import club as club_router
+from app.schemas.payment import SchoolFeesPaymentData
+from app.services.analytics_service import build_clubs_overview
+from app.services.club_seat_service import (
+    confirm_club_memberships,
+    recount_club_members,
+    release_expired_holds,
+    reserve_club_seats,
+)
+from app.services.payment_service import _create_school_fees_records
+from app.utils.exams import update_payment_records
+
+
+@pytest.fixture
+def small_club(test_db, mock_club):
+    """The chess club with a single seat"""
+    mock_club.capacity = 1
+    test_db.commit()
+    return mock_club
+
+
+def _seats(test_db, club_id):
+    test_db.expire_all()
+    return test_db.get(Club, club_id).seats_taken
+
+
+def _checkout(test_db, reference, student_club_ids):
+    _create_school_fees_records(SchoolFeesPaymentData(
+        student_ids=list(student_club_ids),
+        amount=500.0,
+        club_amount=50.0,
+        payment_method="paystack",
+        parent_id="parent-123",
+        student_club_ids=student_club_ids,
+        description="School fees",
+    ), reference, test_db)
+
+
+class TestReserveClubSeats:
+    """Test suite for club seat holds at checkout"""
+
+    def test_full_club_fails_the_checkout(self, test_db, mock_parent, mock_student, mock_student_2, small_club):
+        """The last seat goes to the first checkout; the next one is refused and writes nothing"""
+        _checkout(test_db, "ref-1", {mock_student.id: [small_club.id]})
+
+        with pytest.raises(HTTPException) as exc:
+            _checkout(test_db, "ref-2", {mock_student_2.id: [small_club.id]})
+
+        assert exc.value.status_code == 409
+        assert "Chess Club" in exc.value.detail
+        assert _seats(test_db, small_club.id) == 1
+        assert test_db.query(Payment).filter_by(payment_reference="ref-2").count() == 0
+        hold = test_db.query(ClubMembership).one()
+        assert (hold.student_id, hold.payment_confirmed, hold.hold_expires_at is not None) == (mock_student.id, False, True)
+
+    def test_repeat_checkout_extends_the_hold(self, test_db, mock_student, small_club):
+        """Checking out again keeps the same seat and pushes the expiry out; unknown clubs are skipped"""
+        reserve_club_seats(test_db, {mock_student.id: [small_club.id]}, now=datetime(2026, 1, 1))
+
+        taken = reserve_club_seats(test_db, {mock_student.id: [small_club.id, "club-gone"]}, now=datetime(2026, 1, 2))
+        test_db.commit()
+
+        assert taken == 0
+        assert _seats(test_db, small_club.id) == 1
+        assert test_db.query(ClubMembership).one().hold_expires_at > datetime(2026, 1, 2)
+
+    def test_checkout_keeps_a_longer_hold(self, test_db, mock_student, small_club):
+        """Starting a checkout on an offered seat does not cut the offer down to a checkout hold"""
+        reserve_club_seats(test_db, {mock_student.id: [small_club.id]}, hold_until=datetime(2026, 1, 3))
+
+        reserve_club_seats(test_db, {mock_student.id: [small_club.id]}, now=datetime(2026, 1, 1))
+        test_db.commit()
+
+        assert _seats(test_db, small_club.id) == 1
+        assert test_db.query(ClubMembership).one().hold_expires_at == datetime(2026, 1, 3)
+
+    def test_checkout_uses_the_active_membership_over_old_ones(self, test_db, mock_student, small_club):
+        """A member with expired rows in the club as well is not given a second seat"""
+        test_db.add(ClubMembership(student_id=mock_student.id, club_id=small_club.id, status="expired"))
+        test_db.add(ClubMembership(student_id=mock_student.id, club_id=small_club.id, payment_confirmed=True))
+        small_club.seats_taken = 1
+        test_db.commit()
+
+        assert reserve_club_seats(test_db, {mock_student.id: [small_club.id]}) == 0
+        test_db.commit()
+        assert _seats(test_db, small_club.id) == 1
+
+    def test_one_active_membership_per_student_and_club(self, test_db, mock_student, mock_club):
+        """A racing second hold for the same student and club is refused by the database"""
+        test_db.add(ClubMembership(student_id=mock_student.id, club_id=mock_club.id, status="expired"))
+        test_db.add(ClubMembership(student_id=mock_student.id, club_id=mock_club.id))
+        test_db.commit()
+
+        test_db.add(ClubMembership(student_id=mock_student.id, club_id=mock_club.id))
+        with pytest.raises(IntegrityError):
+            test_db.commit()
+
+
+class TestHoldLifecycle:
+    """Test suite for hold expiry and confirmation"""
+
+    def test_sweeper_releases_expired_holds(self, test_db, mock_student, mock_student_2, small_club):
+        """An expired hold frees its seat for the next student"""
+        reserve_club_seats(test_db, {mock_student.id: [small_club.id]}, now=datetime.now() - timedelta(days=1))
+        test_db.commit()
+
+        assert release_expired_holds(test_db) == 1
+        assert release_expired_holds(test_db) == 0
+        assert _seats(test_db, small_club.id) == 0
+        assert test_db.query(ClubMembership).one().status == "expired"
+        assert reserve_club_seats(test_db, {mock_student_2.id: [small_club.id]}) == 1
+
+    def test_payment_confirms_only_the_live_hold(self, test_db, mock_parent, mock_student, small_club):
+        """Paying confirms the current hold and leaves the student's expired row in the club alone"""
+        _checkout(test_db, "ref-paid", {mock_student.id: [small_club.id]})
+        test_db.add(ClubMembership(student_id=mock_student.id, club_id=small_club.id, status="expired"))
+        test_db.add(ClubMembership(student_id=mock_student.id, club_id=small_club.id, status="inactive"))
+        test_db.commit()
+        payment = test_db.query(Payment).filter_by(payment_reference="ref-paid").one()
+
+        update_payment_records(
+            test_db, payment, payment.student_ids, logging.getLogger(__name__),
+            metadata={"student_clubs": {mock_student.id: [small_club.id]}},
+        )
+
+        test_db.expire_all()
+        rows = {(m.status, m.payment_confirmed) for m in test_db.query(ClubMembership).filter_by(student_id=mock_student.id)}
+        assert rows == {("expired", False), ("inactive", False), ("active", True)}
+        club = test_db.get(Club, small_club.id)
+        assert (club.seats_taken, club.confirmed_members) == (1, 1)
+
+    def test_confirmation_keeps_or_retakes_the_seat(self, test_db, mock_student, mock_student_2, mock_club):
+        """A live hold is confirmed in place; a payment landing after expiry takes its seat back"""
+        reserve_club_seats(test_db, {mock_student.id: [mock_club.id]})
+        reserve_club_seats(test_db, {mock_student_2.id: [mock_club.id]}, now=datetime.now() - timedelta(days=1))
+        test_db.commit()
+        release_expired_holds(test_db)
+        assert _seats(test_db, mock_club.id) == 1
+
+        confirm_club_memberships(test_db, [m.id for m in test_db.query(ClubMembership)])
+        test_db.commit()
+
+        assert _seats(test_db, mock_club.id) == 2
+        memberships = test_db.query(ClubMembership).all()
+        assert all((m.status, m.payment_confirmed, m.hold_expires_at) == ("active", True, None) for m in memberships)
+        assert release_expired_holds(test_db) == 0
+
+
+class TestAdminMemberships:
+    """Test suite for memberships added through POST /api/clubs/memberships"""
+
+    @pytest.fixture
+    def client(self, test_db):
+        app = FastAPI()
+        app.include_router(club_router.router, prefix="/api/clubs")
+        app.dependency_overrides[get_db] = lambda: test_db
+        return TestClient(app)
+
+    def test_added_member_holds_a_seat_until_paid(self, client, test_db, mock_student, small_club):
+        """The seat is held like a waitlist offer, so the sweeper frees it if nobody pays"""
+        response = client.post("/api/clubs/memberships", json={"student_id": mock_student.id, "club_id": small_club.id})
+
+        assert response.status_code == 200
+        hold = test_db.get(ClubMembership, response.json()["id"])
+        assert (hold.payment_confirmed, hold.hold_expires_at > datetime.now() + timedelta(days=1)) == (False, True)
+        assert client.post("/api/clubs/memberships", json={"student_id": mock_student.id, "club_id": small_club.id}).status_code == 200
+        assert _seats(test_db, small_club.id) == 1
+
+        release_expired_holds(test_db, now=datetime.now() + timedelta(days=3))
+        assert _seats(test_db, small_club.id) == 0
+
+    def test_full_club_is_refused(self, client, test_db, mock_student, mock_student_2, small_club):
+        """Adding a member to a full club fails without writing a membership"""
+        client.post("/api/clubs/memberships", json={"student_id": mock_student.id, "club_id": small_club.id})
+
+        response = client.post("/api/clubs/memberships", json={"student_id": mock_student_2.id, "club_id": small_club.id})
+
+        assert response.status_code == 409
+        assert test_db.query(ClubMembership).filter_by(student_id=mock_student_2.id).count() == 0
+
+
+class TestMemberCounters:
+    """Test suite for the per-club member counters"""
+
+    def test_counters_follow_holds_and_confirmations(self, test_db, mock_student, mock_student_2, mock_club):
+        """Holds count as pending, payment moves them to confirmed and expiry removes them"""
+        reserve_club_seats(test_db, {mock_student.id: [mock_club.id]})
+        reserve_club_seats(test_db, {mock_student_2.id: [mock_club.id]}, now=datetime.now() - timedelta(days=1))
+        test_db.commit()
+        confirm_club_memberships(test_db, [test_db.query(ClubMembership).filter_by(student_id=mock_student.id).one().id])
+        test_db.commit()
+        release_expired_holds(test_db)
+
+        overview = build_clubs_overview(test_db).clubs[0]
+
+        assert (overview.total_members, overview.confirmed_members, overview.pending_members) == (1, 1, 0)
+        assert overview.total_revenue == mock_club.price
+        assert recount_club_members(test_db) == 0
+
+    def test_repair_recomputes_drifted_counters(self, test_db, mock_student, mock_student_2, mock_club):
+        """The repair job rebuilds the counters from the memberships"""
+        test_db.add(ClubMembership(student_id=mock_student.id, club_id=mock_club.id, payment_confirmed=True))
+        test_db.add(ClubMembership(student_id=mock_student_2.id, club_id=mock_club.id, status="expired"))
+        mock_club.confirmed_members = 5
+        test_db.commit()
+
+        assert recount_club_members(test_db) == 1
+
+        club = test_db.get(Club, mock_club.id)
+        assert (club.seats_taken, club.confirmed_members, club.pending_members) == (1, 1, 0)
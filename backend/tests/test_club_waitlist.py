@@ -0,0 +1,158 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from app.database import get_db
+from app.models.classes import ClassName, YearGroup
+from app.models.club import Club, ClubMembership, ClubWaitlistEntry
+from app.models.student import Student
+from app.routers import club as club_router
+from app.services.club_seat_service import confirm_club_memberships, release_expired_holds, reserve_club_seats
+from app.services.club_waitlist_service import (
+    get_waitlist_entries,
+    join_waitlist,
+    leave_waitlist,
+    promote_waitlists,
+)
+
+
+@pytest.fixture
+def full_club(test_db, mock_student, mock_club):
+    """A one-seat club whose seat is held by mock_student until yesterday"""
+    mock_club.capacity = 1
+    test_db.commit()
+    reserve_club_seats(test_db, {mock_student.id: [mock_club.id]}, now=datetime.now() - timedelta(days=1))
+    test_db.commit()
+    return mock_club
+
+
+@pytest.fixture
+def queue(test_db, mock_student_2, full_club):
+    """mock_student_2 and a third student, queued in that order"""
+    test_db.add(Student(
+        id="student-789", reg_number="789", first_name="Kemi", last_name="Bello",
+        year_group=YearGroup.YEAR_9, class_name=ClassName.IVORY,
+    ))
+    test_db.commit()
+    join_waitlist(test_db, full_club.id, mock_student_2.id)
+    join_waitlist(test_db, full_club.id, "student-789")
+    return [mock_student_2.id, "student-789"]
+
+
+def _status(test_db, student_id):
+    test_db.expire_all()
+    return test_db.query(ClubWaitlistEntry).filter_by(student_id=student_id).one().status
+
+
+class TestPromoteWaitlists:
+    """Test suite for the waitlist promotion worker"""
+
+    def test_freed_seat_goes_to_the_head_of_the_queue(self, test_db, full_club, queue):
+        """The expired hold is released and its seat offered to the first student in line"""
+        first, second = queue
+
+        assert promote_waitlists(test_db) == 1
+
+        entries = {e["student_id"]: e for e in get_waitlist_entries(test_db, queue)}
+        assert (entries[first]["status"], entries[first]["offer_expires_at"] is not None) == ("offered", True)
+        assert (entries[second]["status"], entries[second]["position"]) == ("waiting", 1)
+        hold = test_db.query(ClubMembership).filter_by(student_id=first).one()
+        assert (hold.status, hold.payment_confirmed) == ("active", False)
+        assert test_db.get(Club, full_club.id).seats_taken == 1
+        assert promote_waitlists(test_db) == 0
+
+    def test_unpaid_offer_passes_to_the_next_student(self, test_db, full_club, queue):
+        """An offer that expires frees the seat for the next student in line"""
+        first, second = queue
+        promote_waitlists(test_db)
+
+        assert promote_waitlists(test_db, now=datetime.now() + timedelta(days=30)) == 1
+
+        assert (_status(test_db, first), _status(test_db, second)) == ("expired", "offered")
+        assert test_db.get(Club, full_club.id).seats_taken == 1
+
+    def test_freed_seat_does_not_skip_the_queue(self, test_db, mock_student, full_club, queue):
+        """A checkout cannot take a seat freed in a club with students waiting; the queue gets it"""
+        first, _ = queue
+        release_expired_holds(test_db)
+
+        with pytest.raises(HTTPException) as exc:
+            reserve_club_seats(test_db, {mock_student.id: [full_club.id]})
+        test_db.rollback()
+
+        assert exc.value.status_code == 409
+        assert "waiting list" in exc.value.detail
+        assert promote_waitlists(test_db) == 1
+        assert _status(test_db, first) == "offered"
+
+    def test_paying_for_the_offer_accepts_it(self, test_db, full_club, queue):
+        """Checking out the offered club keeps the held seat and closes the entry"""
+        first, _ = queue
+        promote_waitlists(test_db)
+
+        assert reserve_club_seats(test_db, {first: [full_club.id]}) == 0
+        confirm_club_memberships(test_db, [test_db.query(ClubMembership).filter_by(student_id=first).one().id])
+        test_db.commit()
+
+        assert _status(test_db, first) == "accepted"
+        assert test_db.get(Club, full_club.id).seats_taken == 1
+
+
+class TestJoinAndLeave:
+    """Test suite for joining and leaving a waitlist"""
+
+    def test_join_is_idempotent_and_members_are_refused(self, test_db, mock_student, mock_student_2, full_club):
+        """Joining twice keeps one entry; a student holding a seat cannot queue"""
+        entry = join_waitlist(test_db, full_club.id, mock_student_2.id)
+
+        assert join_waitlist(test_db, full_club.id, mock_student_2.id).id == entry.id
+        with pytest.raises(HTTPException) as exc:
+            join_waitlist(test_db, full_club.id, mock_student.id)
+        assert exc.value.status_code == 409
+
+    def test_club_with_free_seats_is_refused(self, test_db, mock_student, mock_student_2, mock_club):
+        """A club with seats left, or no capacity, cannot be queued for"""
+        mock_club.capacity = 2
+        test_db.commit()
+        reserve_club_seats(test_db, {mock_student.id: [mock_club.id]})
+        test_db.commit()
+
+        for capacity in (2, None):
+            mock_club.capacity = capacity
+            test_db.commit()
+            with pytest.raises(HTTPException) as exc:
+                join_waitlist(test_db, mock_club.id, mock_student_2.id)
+            assert exc.value.status_code == 409
+        assert test_db.query(ClubWaitlistEntry).count() == 0
+
+    def test_leaving_with_an_offer_returns_the_seat(self, test_db, full_club, queue):
+        """Declining an offer releases the hold so the next run offers it onwards"""
+        first, second = queue
+        promote_waitlists(test_db)
+
+        leave_waitlist(test_db, full_club.id, first)
+
+        assert test_db.get(Club, full_club.id).seats_taken == 0
+        assert test_db.query(ClubMembership).filter_by(student_id=first).one().status == "inactive"
+        assert promote_waitlists(test_db) == 1
+        assert (_status(test_db, first), _status(test_db, second)) == ("cancelled", "offered")
+
+
+class TestWaitlistEndpoints:
+    """Test suite for the club list and waitlist endpoints"""
+
+    def test_full_club_and_join(self, test_db, mock_student_2, full_club):
+        """The club list shows no seats left and joining returns the queue position"""
+        app = FastAPI()
+        app.include_router(club_router.router, prefix="/api/clubs")
+        app.dependency_overrides[get_db] = lambda: test_db
+        client = TestClient(app)
+
+        assert client.get("/api/clubs/").json()[0]["seats_left"] == 0
+        response = client.post(f"/api/clubs/{full_club.id}/waitlist", json={"student_id": mock_student_2.id})
+
+        assert response.status_code == 200
+        assert (response.json()["status"], response.json()["position"]) == ("waiting", 1)
+        listed = client.get("/api/clubs/waitlist", params={"student_ids": [mock_student_2.id]}).json()
+        assert [e["club_id"] for e in listed] == [full_club.id]
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import threading
+import pytest
+from app.services.event_broker import EventBroker, ADMIN_DASHBOARD_CHANNEL, PostgresNotifyFanout, broker, payment_channel
+from app.models.payment import Payment, PaymentStatus, ExamPayment
+from app.models.student_exam_fee import StudentExamFee
+from app.utils.exams import update_payment_records, update_exam_payment_records
+
+
+class TestEventBroker:
+    """Test suite for the in-process EventBroker"""
+
+    @pytest.mark.asyncio
+    async def test_publish_from_worker_thread(self):
+        """Events published from a sync worker thread reach async subscribers"""
+        event_broker = EventBroker()
+        subscription = event_broker.subscribe("test")
+
+        thread = threading.Thread(target=event_broker.publish, args=("test", {"type": "ping"}))
+        thread.start()
+        thread.join()
+
+        event = await subscription.get(timeout=1)
+        assert event == {"type": "ping"}
+
+    @pytest.mark.asyncio
+    async def test_unsubscribed_channel_receives_nothing(self):
+        """Unsubscribed consumers and other channels do not get events"""
+        event_broker = EventBroker()
+        subscription = event_broker.subscribe("test")
+        other = event_broker.subscribe("other")
+        event_broker.unsubscribe(subscription)
+
+        event_broker.publish("test", {"type": "ping"})
+
+        assert await subscription.get(timeout=0.05) is None
+        assert await other.get(timeout=0.05) is None
+
+    @pytest.mark.asyncio
+    async def test_one_queue_for_several_channels(self):
+        """A multi-channel subscription receives from each channel until unsubscribed"""
+        event_broker = EventBroker()
+        subscription = event_broker.subscribe("a", "b")
+
+        event_broker.publish("b", {"type": "from_b"})
+        event_broker.publish("a", {"type": "from_a"})
+        assert await subscription.get(timeout=1) == {"type": "from_b"}
+        assert await subscription.get(timeout=1) == {"type": "from_a"}
+
+        event_broker.unsubscribe(subscription)
+        event_broker.publish("a", {"type": "late"})
+        assert await subscription.get(timeout=0.05) is None
+
+    @pytest.mark.asyncio
+    async def test_fanout_receives_published_events(self):
+        """A plugged-in fan-out sees every published event"""
+        published = []
+
+        class RecordingFanout:
+            def start(self, deliver):
+                self.deliver = deliver
+
+            def publish(self, channel, event):
+                published.append((channel, event))
+
+            def stop(self):
+                pass
+
+        event_broker = EventBroker()
+        fanout = RecordingFanout()
+        event_broker.set_fanout(fanout)
+        subscription = event_broker.subscribe("test")
+
+        event_broker.publish("test", {"type": "local"})
+        fanout.deliver("test", {"type": "remote"})
+
+        assert published == [("test", {"type": "local"})]
+        assert await subscription.get(timeout=1) == {"type": "local"}
+        assert await subscription.get(timeout=1) == {"type": "remote"}
+
+
+class TestPostgresNotifyFanout:
+    """Test suite for the Postgres LISTEN/NOTIFY fan-out"""
+
+    def test_listener_reconnects_after_connection_errors(self):
+        """A dropped listener connection is retried with backoff instead of stopping for good"""
+        attempts = []
+        reconnected = threading.Event()
+
+        class FlakyFanout(PostgresNotifyFanout):
+            RECONNECT_DELAYS = (0.01,)
+
+            def _listen_once(self, deliver):
+                attempts.append(deliver)
+                if len(attempts) < 3:
+                    raise ConnectionError("server closed the connection unexpectedly")
+                reconnected.set()
+                self._stop.wait()
+
+        fanout = FlakyFanout("postgresql://unused")
+        fanout.start(lambda channel, event: None)
+        try:
+            assert reconnected.wait(timeout=2)
+        finally:
+            fanout.stop()
+        assert len(attempts) == 3
+
+    def test_publish_does_not_wait_on_the_database(self):
+        """NOTIFY runs on the sender thread; publish only queues, and a failed send reconnects"""
+        sent, release = [], threading.Event()
+        connections = []
+
+        class FakeConnection:
+            closed = False
+
+            def close(self):
+                self.closed = True
+
+        class SlowFanout(PostgresNotifyFanout):
+            def _connect(self):
+                connections.append(FakeConnection())
+                return connections[-1]
+
+            def _listen_once(self, deliver):
+                self._stop.wait()
+
+            def _notify(self, conn, payload):
+                release.wait()
+                if len(connections) == 1:
+                    raise ConnectionError("connection reset")
+                sent.append(payload)
+
+        fanout = SlowFanout("postgresql://unused")
+        fanout.start(lambda channel, event: None)
+        try:
+            fanout.publish("test", {"type": "first"})
+            assert sent == []
+            release.set()
+            for _ in range(200):
+                if sent:
+                    break
+                threading.Event().wait(0.01)
+        finally:
+            fanout.stop()
+        assert len(sent) == 1 and '"first"' in sent[0]
+        assert len(connections) == 2 and connections[0].closed
+
+class TestConfirmationEvents:
+    """Test suite for delta events published by the confirmation path"""
+
+    @pytest.mark.asyncio
+    async def test_school_fees_confirmation_publishes_once(self, test_db, mock_parent, mock_student):
+        """A payment confirmed twice (verify + webhook) publishes a single delta"""
+        subscription = broker.subscribe(ADMIN_DASHBOARD_CHANNEL)
+        payment = Payment(
+            student_ids=[mock_student.id],
+            amount=500.0,
+            status=PaymentStatus.PENDING,
+            payment_reference="ref_event",
+            payer_id=mock_parent.id,
+            student_fee_ids=[],
+        )
+        test_db.add(payment)
+        test_db.commit()
+
+        try:
+            logger = logging.getLogger(__name__)
+            update_payment_records(test_db, payment, payment.student_ids, logger)
+            update_payment_records(test_db, payment, payment.student_ids, logger)
+
+            event = await subscription.get(timeout=1)
+            assert event["type"] == "school_fees.payment_completed"
+            assert event["data"]["reference"] == "ref_event"
+            assert event["data"]["students"][0]["year_group"] == "Year 10"
+            assert await subscription.get(timeout=0.05) is None
+        finally:
+            broker.unsubscribe(subscription)
+
+    @pytest.mark.asyncio
+    async def test_exam_confirmation_publishes_delta(self, test_db, mock_parent, mock_student, mock_exam):
+        """Exam confirmations publish the exam, student and amount paid"""
+        subscription = broker.subscribe(ADMIN_DASHBOARD_CHANNEL)
+        student_exam_fee = StudentExamFee(
+            student_id=mock_student.id,
+            exam_fee_id=mock_exam.id,
+            amount=mock_exam.amount,
+        )
+        test_db.add(student_exam_fee)
+        test_db.flush()
+        exam_payment = ExamPayment(
+            student_exam_fee_id=student_exam_fee.id,
+            amount_paid=150000.0,
+            status=PaymentStatus.PENDING,
+            payment_reference="exam_ref_event",
+            payer_id=mock_parent.id,
+        )
+        test_db.add(exam_payment)
+        test_db.commit()
+
+        status_subscription = broker.subscribe(payment_channel("exam_ref_event"))
+        try:
+            update_exam_payment_records(test_db, [exam_payment], logging.getLogger(__name__))
+
+            status_event = await status_subscription.get(timeout=1)
+            assert status_event["data"] == {"reference": "exam_ref_event", "status": "completed"}
+            event = await subscription.get(timeout=1)
+            assert event["type"] == "exam_fees.payment_completed"
+            assert event["data"]["reference"] == "exam_ref_event"
+            assert event["data"]["exam_payments"] == [{
+                "exam_id": mock_exam.id,
+                "student_id": mock_student.id,
+                "amount_paid": 150000.0,
+            }]
+        finally:
+            broker.unsubscribe(subscription)
+            broker.unsubscribe(status_subscription)
@@ -0,0 +1,73 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.database import get_async_db
+from app.models.classes import YearGroup
+from app.routers import exams as exams_router
+from app.services.analytics_service import build_exam_fees_overview
+from app.services.exam_applicability import (
+    applicable_student_counts,
+    eligible_student_ids,
+    exam_ids_for_year_group,
+    set_exam_grades,
+)
+
+
+IGCSE, SAT = "exam-igcse-123", "exam-sat-456"
+
+
+@pytest.fixture
+def indexed_exams(test_db, mock_exam_fees):
+    """Applicability index rows for the mock exams"""
+    set_exam_grades(test_db, IGCSE, ["YEAR_10", "YEAR_11"])
+    set_exam_grades(test_db, SAT, ["YEAR_12"])
+    test_db.commit()
+
+
+class TestApplicabilityIndex:
+    """Test suite for the exam applicability index"""
+
+    def test_lookups_both_ways(self, test_db, mock_student, mock_student_2, indexed_exams):
+        """Exams per year group and eligible students per exam come from the index"""
+        assert set(test_db.scalars(exam_ids_for_year_group(YearGroup.YEAR_12))) == {SAT}
+        assert set(test_db.scalars(eligible_student_ids(IGCSE))) == {mock_student.id, mock_student_2.id}
+        assert applicable_student_counts(test_db) == {IGCSE: 2}
+
+    def test_set_exam_grades_replaces_rows(self, test_db, mock_student, mock_student_2, indexed_exams):
+        """Regrading replaces the exam's rows and ignores unknown grades"""
+        set_exam_grades(test_db, IGCSE, ["YEAR_11", "YEAR_99"])
+        test_db.commit()
+
+        assert set(test_db.scalars(eligible_student_ids(IGCSE))) == {mock_student_2.id}
+        assert applicable_student_counts(test_db, [IGCSE]) == {IGCSE: 1}
+
+    def test_analytics_uses_index(self, test_db, mock_student, mock_student_2, indexed_exams):
+        """Applicable student counts in the exam overview follow the index"""
+        overview = build_exam_fees_overview(test_db)
+
+        counts = {exam.exam_id: exam.total_applicable_students for exam in overview.exams}
+        assert counts == {IGCSE: 2, SAT: 0}
+
+
+class TestExamsForYearGroup:
+    """Test suite for GET /api/exams/get-exams-for-year-group"""
+
+    @pytest.fixture
+    def client(self, async_test_db):
+        app = FastAPI()
+        app.include_router(exams_router.router, prefix="/api/exams")
+        app.dependency_overrides[get_async_db] = async_test_db
+        return TestClient(app)
+
+    def test_exams_for_year_group(self, client, mock_exam_fees):
+        """Only exams that apply to the year group are listed"""
+        response = client.get("/api/exams/get-exams-for-year-group", params={"year_group": "YEAR_12"})
+
+        assert response.status_code == 200
+        assert [exam["id"] for exam in response.json()] == [SAT]
+        assert client.get("/api/exams/get-exams-for-year-group", params={"year_group": "Year 12"}).status_code == 400
+
+    def test_delete_clears_index(self, client, test_db, indexed_exams):
+        """Deleting an exam removes its index rows"""
+        assert client.delete(f"/api/exams/delete-exam/{SAT}").status_code == 200
+        assert list(test_db.scalars(exam_ids_for_year_group(YearGroup.YEAR_12))) == []
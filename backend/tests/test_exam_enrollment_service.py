@@ -0,0 +1,151 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.database import get_async_db
+from app.models.fees import ExamFees
+from app.models.ledger import LedgerEntry, LedgerEntryType
+from app.models.payment import ExamPayment, PaymentStatus
+from app.models.student import Student
+from app.models.student_exam_fee import StudentExamFee
+from app.routers import exams as exams_router
+from app.services.exam_enrollment_service import sync_exam_enrollment
+
+
+def _entries(db, exam_id):
+    return {sef.student_id: sef for sef in db.query(StudentExamFee).filter_by(exam_fee_id=exam_id).all()}
+
+
+class TestSyncExamEnrollment:
+    """Test suite for set-based exam enrollment"""
+
+    def test_enrolls_applicable_grades_and_charges(self, test_db, mock_student, mock_student_2):
+        """Only students in applicable grades get an entry, each charged once"""
+        exam = ExamFees(exam_name="IGCSE", amount=1000.0, applicable_grades=["YEAR_10"])
+        test_db.add(exam)
+        test_db.flush()
+
+        counts = sync_exam_enrollment(test_db, exam)
+        again = sync_exam_enrollment(test_db, exam)
+        test_db.commit()
+
+        assert counts == {"withdrawn": 0, "enrolled": 1}
+        assert again == {"withdrawn": 0, "enrolled": 0}
+        assert set(_entries(test_db, exam.id)) == {mock_student.id}
+        assert test_db.get(Student, mock_student.id).outstanding_balance == 1000.0
+
+    def test_dropped_grades_remove_unpaid_entries(self, test_db, mock_parent, mock_student, mock_student_2):
+        """Unpaid entries of dropped grades go, with their charge reversed; paid ones stay"""
+        exam = ExamFees(exam_name="IGCSE", amount=1000.0, applicable_grades=["YEAR_10", "YEAR_11"])
+        test_db.add(exam)
+        test_db.flush()
+        sync_exam_enrollment(test_db, exam)
+        test_db.commit()
+        entries = _entries(test_db, exam.id)
+        test_db.add(ExamPayment(
+            student_exam_fee_id=entries[mock_student_2.id].id, amount_paid=500.0,
+            status=PaymentStatus.PENDING, payment_reference="ref_partial", payer_id=mock_parent.id,
+        ))
+        test_db.commit()
+
+        exam.applicable_grades = []
+        counts = sync_exam_enrollment(test_db, exam, previous_grades=["YEAR_10", "YEAR_11"])
+        test_db.commit()
+
+        assert counts == {"withdrawn": 1, "enrolled": 0}
+        assert set(_entries(test_db, exam.id)) == {mock_student_2.id}
+        assert test_db.get(Student, mock_student.id).outstanding_balance == 0.0
+        assert test_db.query(LedgerEntry).filter_by(
+            student_id=mock_student.id, entry_type=LedgerEntryType.REVERSAL
+        ).one().amount == 1000.0
+
+
+class TestExamEnrollmentEndpoints:
+    """Test suite for enrollment through the exams endpoints"""
+
+    @pytest.fixture
+    def client(self, async_test_db):
+        app = FastAPI()
+        app.include_router(exams_router.router, prefix="/api/exams")
+        app.dependency_overrides[get_async_db] = async_test_db
+        return TestClient(app)
+
+    def test_create_and_regrade(self, client, test_db, mock_student, mock_student_2):
+        """Creating an exam enrolls its grades; changing grades moves the entries"""
+        exam = client.post("/api/exams/create-exam", json={
+            "exam_name": "Checkpoint", "amount": 2000.0, "applicable_grades": ["YEAR_10"],
+        }).json()
+        assert set(_entries(test_db, exam["id"])) == {mock_student.id}
+
+        response = client.put("/api/exams/update-exam", json={
+            "id": exam["id"], "exam_name": "Checkpoint", "amount": 2000.0, "applicable_grades": ["YEAR_11"],
+        })
+
+        assert response.status_code == 200
+        test_db.expire_all()
+        assert set(_entries(test_db, exam["id"])) == {mock_student_2.id}
+
+    def test_enroll_existing_exam(self, client, test_db, mock_student, mock_exam_fees):
+        """Exams created before enrollment can be enrolled on demand"""
+        mock_exam_fees.applicable_grades = ["YEAR_10"]
+        test_db.commit()
+
+        first = client.post(f"/api/exams/enroll/{mock_exam_fees.id}").json()
+        second = client.post(f"/api/exams/enroll/{mock_exam_fees.id}").json()
+
+        assert first["enrolled"] == 1
+        assert second["enrolled"] == 0
+        assert client.post("/api/exams/enroll/missing").status_code == 404
+
+    def test_price_change_reprices_unpaid_entries(self, client, test_db, mock_parent, mock_student, mock_student_2):
+        """A new amount reaches unpaid entries and their charges; entries with payments keep their price"""
+        exam = client.post("/api/exams/create-exam", json={
+            "exam_name": "Checkpoint", "amount": 100.0, "applicable_grades": ["YEAR_10", "YEAR_11"],
+        }).json()
+        test_db.add(ExamPayment(
+            student_exam_fee_id=_entries(test_db, exam["id"])[mock_student_2.id].id, amount_paid=50.0,
+            status=PaymentStatus.PENDING, payment_reference="ref_partial", payer_id=mock_parent.id,
+        ))
+        test_db.commit()
+
+        response = client.put("/api/exams/update-exam", json={
+            "id": exam["id"], "exam_name": "Checkpoint", "amount": 120.0, "applicable_grades": ["YEAR_10", "YEAR_11"],
+        })
+
+        assert response.status_code == 200
+        test_db.expire_all()
+        entries = _entries(test_db, exam["id"])
+        assert entries[mock_student.id].amount == 120.0
+        assert entries[mock_student_2.id].amount == 100.0
+        assert test_db.get(Student, mock_student.id).outstanding_balance == 120.0
+
+    def test_delete_reverses_entry_charges(self, client, test_db, mock_student):
+        """Deleting an exam removes its entries and reverses what they charged"""
+        exam = client.post("/api/exams/create-exam", json={
+            "exam_name": "Checkpoint", "amount": 100.0, "applicable_grades": ["YEAR_10"],
+        }).json()
+        test_db.expire_all()
+        assert test_db.get(Student, mock_student.id).outstanding_balance == 100.0
+
+        response = client.delete(f"/api/exams/delete-exam/{exam['id']}")
+
+        assert response.status_code == 200
+        test_db.expire_all()
+        assert _entries(test_db, exam["id"]) == {}
+        assert test_db.get(Student, mock_student.id).outstanding_balance == 0.0
+
+    def test_delete_refuses_exams_with_payments(self, client, test_db, mock_parent, mock_student):
+        """An exam with a payment recorded against an entry cannot be deleted"""
+        exam = client.post("/api/exams/create-exam", json={
+            "exam_name": "Checkpoint", "amount": 100.0, "applicable_grades": ["YEAR_10"],
+        }).json()
+        test_db.add(ExamPayment(
+            student_exam_fee_id=_entries(test_db, exam["id"])[mock_student.id].id, amount_paid=100.0,
+            status=PaymentStatus.COMPLETED, payment_reference="ref_paid", payer_id=mock_parent.id,
+        ))
+        test_db.commit()
+
+        response = client.delete(f"/api/exams/delete-exam/{exam['id']}")
+
+        assert response.status_code == 409
+        test_db.expire_all()
+        assert test_db.get(ExamFees, exam["id"]) is not None
@@ -0,0 +1,84 @@
+import logging
+import pytest
+from app.models.fees import ExamFees
+from app.models.payment import ExamPayment, PaymentStatus
+from app.models.student_exam_fee import ExamFeeStatus, StudentExamFee
+from app.routers.admin_analytics import get_exam_students
+from app.services.analytics_service import build_exam_fees_overview
+from app.utils.exams import update_exam_payment_records
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def installment_exam(test_db):
+    exam = ExamFees(id="exam-installments", exam_name="A-Level", amount=1000.0, allows_installments=True)
+    test_db.add(exam)
+    test_db.commit()
+    return exam
+
+
+def _enter(test_db, student, exam, discount=0.0):
+    student_exam_fee = StudentExamFee(
+        student_id=student.id, exam_fee_id=exam.id, amount=exam.amount, discount_percentage=discount
+    )
+    test_db.add(student_exam_fee)
+    test_db.commit()
+    return student_exam_fee
+
+
+def _confirm(test_db, parent, student_exam_fee, amount, reference):
+    exam_payment = ExamPayment(
+        student_exam_fee_id=student_exam_fee.id, amount_paid=amount, status=PaymentStatus.PENDING,
+        payment_reference=reference, payer_id=parent.id,
+    )
+    test_db.add(exam_payment)
+    test_db.commit()
+    update_exam_payment_records(test_db, [exam_payment], logger)
+    return exam_payment
+
+
+class TestExamInstallments:
+    """Test suite for running paid totals on StudentExamFee"""
+
+    def test_installments_accumulate(self, test_db, mock_parent, mock_student, installment_exam):
+        """Each confirmed installment adds to the total; the last one settles the entry"""
+        student_exam_fee = _enter(test_db, mock_student, installment_exam, discount=10.0)
+
+        first = _confirm(test_db, mock_parent, student_exam_fee, 400.0, "ref_1")
+        assert (student_exam_fee.amount_paid, student_exam_fee.installments_paid) == (400.0, 1)
+        assert student_exam_fee.payment_status == ExamFeeStatus.PARTIAL
+        assert student_exam_fee.balance_due == 500.0
+        assert not student_exam_fee.paid
+
+        # Confirming the same installment again (webhook after verify) changes nothing
+        update_exam_payment_records(test_db, [first], logger)
+        assert student_exam_fee.installments_paid == 1
+
+        _confirm(test_db, mock_parent, student_exam_fee, 500.0, "ref_2")
+        assert (student_exam_fee.amount_paid, student_exam_fee.installments_paid) == (900.0, 2)
+        assert student_exam_fee.payment_status == ExamFeeStatus.PAID
+        assert student_exam_fee.paid
+
+    def test_single_payment_exam_settles(self, test_db, mock_parent, mock_student, mock_exam):
+        """Exams without installments are settled by their one payment"""
+        student_exam_fee = _enter(test_db, mock_student, mock_exam)
+
+        _confirm(test_db, mock_parent, student_exam_fee, 100000.0, "ref_single")
+
+        assert student_exam_fee.payment_status == ExamFeeStatus.PAID
+        assert student_exam_fee.paid
+
+    def test_analytics_read_running_totals(self, test_db, mock_parent, mock_student, mock_student_2, installment_exam):
+        """Overview counts and the status filter come from the stored columns"""
+        partial = _enter(test_db, mock_student, installment_exam)
+        _enter(test_db, mock_student_2, installment_exam)
+        _confirm(test_db, mock_parent, partial, 250.0, "ref_partial")
+
+        summary = next(e for e in build_exam_fees_overview(test_db).exams if e.exam_id == installment_exam.id)
+        assert (summary.fully_paid_count, summary.partially_paid_count, summary.unpaid_count) == (0, 1, 1)
+        assert (summary.total_amount_collected, summary.total_amount_expected) == (250.0, 2000.0)
+
+        page = get_exam_students(installment_exam.id, payment_status="partial", db=test_db)
+        assert [(item.student_id, item.amount_paid) for item in page.items] == [(mock_student.id, 250.0)]
+        assert page.items[0].is_fully_paid is False
@@ -0,0 +1,88 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.database import get_async_db
+from app.models.student_exam_fee import StudentExamFee
+from app.routers import exams as exams_router
+from app.services.reference_cache import reference_cache
+
+
+@pytest.fixture
+def client(async_test_db):
+    app = FastAPI()
+    app.include_router(exams_router.router, prefix="/api/exams")
+    app.dependency_overrides[get_async_db] = async_test_db
+    return TestClient(app)
+
+
+@pytest.fixture
+def enrolled(test_db, mock_student, mock_exam):
+    """mock_student entered for mock_exam at a 10% discount"""
+    student_exam_fee = StudentExamFee(
+        student_id=mock_student.id, exam_fee_id=mock_exam.id, amount=mock_exam.amount, discount_percentage=10.0
+    )
+    test_db.add(student_exam_fee)
+    test_db.commit()
+    return student_exam_fee
+
+
+class TestStudentExamList:
+    """Test suite for GET /api/exams/get-student-exam-list"""
+
+    def test_exam_list(self, client, mock_student, mock_exam, enrolled):
+        """Amounts reflect the student's discount and paid state"""
+        response = client.get("/api/exams/get-student-exam-list", params={"student_id": mock_student.id})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["year_group"] == "Year 10"
+        assert data["exam_list"] == [{
+            "exam_id": mock_exam.id,
+            "exam_name": mock_exam.exam_name,
+            "exam_price": 150000.0,
+            "extra_fees": mock_exam.extra_fees,
+            "amount_paid": 0,
+            "amount_due": 135000.0,
+            "is_fully_paid": False,
+        }]
+
+    def test_single_query_with_warm_catalog(self, client, test_db, mock_student, enrolled):
+        """Exam details come from the cache, so only the joined query runs"""
+        reference_cache.exams(test_db)
+        student_id = mock_student.id
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            client.get("/api/exams/get-student-exam-list", params={"student_id": student_id})
+        finally:
+            event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+        assert len(statements) == 1
+
+    def test_unknown_student(self, client):
+        """Students without exam entries get an empty list"""
+        data = client.get("/api/exams/get-student-exam-list", params={"student_id": "nobody"}).json()
+
+        assert data == {"id": None, "year_group": None, "class_name": None, "student_id": "nobody", "exam_list": []}
+
+
+class TestParentExamLists:
+    """Test suite for GET /api/exams/get-parent-exam-lists"""
+
+    def test_all_children_in_one_call(self, client, test_db, mock_parent, mock_student, mock_student_2, enrolled):
+        """Every child is listed, including those without exam entries"""
+        mock_parent.students.extend([mock_student, mock_student_2])
+        test_db.commit()
+
+        data = client.get("/api/exams/get-parent-exam-lists", params={"parent_id": mock_parent.id}).json()
+
+        assert set(data) == {mock_student.id, mock_student_2.id}
+        assert len(data[mock_student.id]["exam_list"]) == 1
+        assert data[mock_student_2.id]["exam_list"] == []
@@ -0,0 +1,66 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.database import get_async_db
+from app.models.fee import Fee
+from app.models.reference_data import ReferenceDataVersion
+from app.routers import fees as fees_router
+from app.services.reference_cache import FEES
+
+
+@pytest.fixture
+def client(async_test_db):
+    app = FastAPI()
+    app.include_router(fees_router.router, prefix="/api/fees")
+    app.dependency_overrides[get_async_db] = async_test_db
+    return TestClient(app)
+
+
+def _fees_version(db):
+    row = db.query(ReferenceDataVersion).filter_by(name=FEES).one_or_none()
+    return row.version if row else 0
+
+
+class TestUpdateFees:
+    """Test suite for PUT /api/fees/update"""
+
+    def test_returns_diff_of_changed_fees(self, client, test_db, mock_fees):
+        """Changed and new fees are reported; unchanged ones are not"""
+        response = client.put("/api/fees/update", json={"tuition": 550000.0, "boarding": 200000.0, "lab": 10000.0})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert sorted(data["changes"], key=lambda c: c["code"]) == [
+            {"code": "LAB", "previous_amount": None, "amount": 10000.0},
+            {"code": "TUITION", "previous_amount": 500000.0, "amount": 550000.0},
+        ]
+        assert data["fees"]["TUITION"] == 550000.0
+        assert data["total"] == 780000.0 + 50000.0 + 10000.0
+        assert test_db.query(Fee).filter_by(code="LAB").one().name == "Lab"
+        assert _fees_version(test_db) == 1
+
+    def test_no_op_update_does_not_bump_version(self, client, test_db, mock_fees):
+        """Resubmitting the current catalog leaves the cache version alone"""
+        response = client.put("/api/fees/update", json={"TUITION": 500000.0})
+
+        assert response.json()["changes"] == []
+        assert _fees_version(test_db) == 0
+
+    def test_single_write_statement(self, client, test_db, mock_fees):
+        """All fee codes are written by one INSERT ... ON CONFLICT statement"""
+        inserts = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("INSERT INTO FEE"):
+                inserts.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            client.put("/api/fees/update", json={"TUITION": 1.0, "BOARDING": 2.0, "NEW_FEE": 3.0})
+        finally:
+            event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+        assert len(inserts) == 1
+        assert "ON CONFLICT" in inserts[0]
@@ -0,0 +1,85 @@
+import time
+from types import SimpleNamespace
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+
+from app.models.payment import Payment, payment_students
+from app.models.student_fee import StudentFee
+from app.utils.bulk import sql_new_id
+from app.utils.ids import new_id, uuid7
+
+
+class TestUUID7:
+    """Test suite for time-ordered ids"""
+
+    def test_version_variant_and_text_form(self):
+        """Ids are RFC 9562 version 7 UUIDs in canonical text form"""
+        value = new_id()
+
+        parsed = UUID(value)
+        assert str(parsed) == value
+        assert parsed.version == 7
+        assert parsed.variant == "specified in RFC 4122"
+
+    def test_embeds_the_current_millisecond(self):
+        """The first 48 bits are the Unix time in milliseconds"""
+        before = time.time_ns() // 1_000_000
+        value = uuid7()
+        after = time.time_ns() // 1_000_000
+
+        assert before <= value.int >> 80 <= after
+
+    def test_ids_sort_in_creation_order(self):
+        """Ids made in a burst are strictly increasing, as text too"""
+        ids = [new_id() for _ in range(5000)]
+
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+
+
+class TestNativeUUIDColumns:
+    """Test suite for the native UUID id columns"""
+
+    def test_hot_tables_use_native_uuid_on_postgres(self):
+        """Payment ids and the keys referencing them are uuid on Postgres and text elsewhere"""
+        pg = str(CreateTable(Payment.__table__).compile(dialect=postgresql.dialect()))
+        lite = str(CreateTable(Payment.__table__).compile(dialect=sqlite.dialect()))
+
+        assert "id UUID NOT NULL" in pg
+        assert "id VARCHAR NOT NULL" in lite
+        assert str(payment_students.c.payment_id.type.compile(dialect=postgresql.dialect())) == "UUID"
+
+    def test_rows_keep_string_ids(self, test_db, mock_student, mock_fees):
+        """ORM rows get a v7 id by default and read back as plain strings"""
+        fee = StudentFee(student_id=mock_student.id, fee_id=mock_fees[0].id, amount=100.0)
+        test_db.add(fee)
+        test_db.commit()
+
+        stored = test_db.scalar(select(StudentFee.id))
+        assert isinstance(stored, str)
+        assert UUID(stored).version == 7
+
+    def test_sql_new_id_makes_v7_ids_per_row(self, test_db):
+        """The INSERT ... SELECT id expression yields a distinct v7 id for every row"""
+        rows = test_db.execute(
+            select(sql_new_id(test_db)).select_from(
+                select(1).union_all(*[select(1) for _ in range(99)]).subquery()
+            )
+        ).scalars().all()
+
+        assert len(set(rows)) == 100
+        assert all(UUID(value).version == 7 and str(UUID(value)) == value for value in rows)
+        assert {UUID(value).int >> 80 for value in rows} == {UUID(rows[0]).int >> 80}
+
+    def test_sql_new_id_casts_to_the_column_type_on_postgres(self):
+        """On Postgres the id expression is cast to the target column's type"""
+        pg_session = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=postgresql.dialect()))
+
+        native = str(sql_new_id(pg_session, StudentFee.id.type).compile(dialect=postgresql.dialect()))
+        text = str(sql_new_id(pg_session).compile(dialect=postgresql.dialect()))
+
+        assert native.endswith("AS UUID)")
+        assert text.endswith("AS VARCHAR)")
@@ -0,0 +1,189 @@
+import logging
+from datetime import datetime, timedelta
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.database import get_db, get_async_db
+from app.models.ledger import LedgerEntry, LedgerEntryType, StudentBalanceSnapshot
+from app.models.payment import Payment, PaymentStatus, ExamPayment
+from app.models.student import Student
+from app.models.student_exam_fee import StudentExamFee
+from app.models.club import ClubMembership
+from app.routers import student as student_router, parent as parent_router
+from app.services.ledger_service import (
+    post_entry,
+    post_charge,
+    get_balance_at,
+    snapshot_balances,
+    rebuild_balances,
+    backfill_ledger,
+)
+from app.utils.exams import update_payment_records, update_exam_payment_records
+
+
+def _balance(db, student_id):
+    return db.query(Student.outstanding_balance).filter(Student.id == student_id).scalar()
+
+
+class TestLedgerPosting:
+    """Test suite for posting entries and the running balance"""
+
+    def test_charge_discount_and_payment_move_balance(self, test_db, mock_student):
+        """Charges increase the balance, discounts and payments reduce it"""
+        post_charge(test_db, mock_student.id, 1000.0, 10.0, "student_fee", "sf-1", "School fee")
+        post_entry(test_db, mock_student.id, LedgerEntryType.PAYMENT, 400.0, "payment", "p-1")
+        test_db.commit()
+
+        assert _balance(test_db, mock_student.id) == 500.0
+        assert test_db.query(LedgerEntry).count() == 3
+        # The loaded instance sees the atomic update
+        assert mock_student.outstanding_balance == 500.0
+
+    def test_posting_is_idempotent(self, test_db, mock_student):
+        """Posting the same source twice does not double the balance"""
+        assert post_entry(test_db, mock_student.id, LedgerEntryType.CHARGE, 250.0, "student_fee", "sf-1")
+        assert not post_entry(test_db, mock_student.id, LedgerEntryType.CHARGE, 250.0, "student_fee", "sf-1")
+        test_db.commit()
+
+        assert _balance(test_db, mock_student.id) == 250.0
+        assert test_db.query(LedgerEntry).count() == 1
+
+    def test_balance_at_uses_snapshot_and_later_entries(self, test_db, mock_student):
+        """Point-in-time balances combine the last snapshot with newer entries"""
+        post_entry(test_db, mock_student.id, LedgerEntryType.CHARGE, 300.0, "student_fee", "sf-1")
+        test_db.commit()
+        snapshot_balances(test_db)
+        post_entry(test_db, mock_student.id, LedgerEntryType.PAYMENT, 100.0, "payment", "p-1")
+        test_db.commit()
+
+        assert test_db.query(StudentBalanceSnapshot).count() == 1
+        assert get_balance_at(test_db, mock_student.id, datetime.now()) == 200.0
+        assert get_balance_at(test_db, mock_student.id, datetime.now() - timedelta(days=1)) == 0.0
+
+    def test_rebuild_repairs_drifted_balance(self, test_db, mock_student):
+        """The repair job recomputes balances from the ledger"""
+        post_entry(test_db, mock_student.id, LedgerEntryType.CHARGE, 300.0, "student_fee", "sf-1")
+        test_db.commit()
+        test_db.query(Student).filter(Student.id == mock_student.id).update({"outstanding_balance": 99.0})
+        test_db.commit()
+
+        rebuild_balances(test_db)
+
+        assert _balance(test_db, mock_student.id) == 300.0
+
+
+class TestLedgerConfirmation:
+    """Test suite for ledger postings on payment confirmation"""
+
+    @pytest.mark.asyncio
+    async def test_school_fees_confirmation_settles_fees(self, test_db, mock_parent, mock_student, mock_student_fees, mock_club):
+        """Confirming a payment posts charges and payments for fees and clubs once"""
+        test_db.add(ClubMembership(
+            student_id=mock_student.id, club_id=mock_club.id, status="active",
+            hold_expires_at=datetime.now() + timedelta(minutes=30),
+        ))
+        payment = Payment(
+            student_ids=[mock_student.id],
+            amount=780050.0,
+            status=PaymentStatus.PENDING,
+            payment_reference="ref_ledger",
+            payer_id=mock_parent.id,
+            student_fee_ids=[sf.id for sf in mock_student_fees],
+        )
+        test_db.add(payment)
+        test_db.commit()
+
+        logger = logging.getLogger(__name__)
+        update_payment_records(test_db, payment, payment.student_ids, logger)
+        update_payment_records(test_db, payment, payment.student_ids, logger)
+
+        # 6 fee charges + 6 fee payments + club charge + club payment
+        assert test_db.query(LedgerEntry).count() == 14
+        assert _balance(test_db, mock_student.id) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_exam_confirmation_credits_installment(self, test_db, mock_parent, mock_student, mock_exam):
+        """A partial exam payment leaves the remainder outstanding"""
+        student_exam_fee = StudentExamFee(student_id=mock_student.id, exam_fee_id=mock_exam.id, amount=150000.0)
+        test_db.add(student_exam_fee)
+        test_db.flush()
+        exam_payment = ExamPayment(
+            student_exam_fee_id=student_exam_fee.id,
+            amount_paid=50000.0,
+            status=PaymentStatus.PENDING,
+            payment_reference="exam_ref_ledger",
+            payer_id=mock_parent.id,
+        )
+        test_db.add(exam_payment)
+        test_db.commit()
+
+        update_exam_payment_records(test_db, [exam_payment], logging.getLogger(__name__))
+
+        assert _balance(test_db, mock_student.id) == 100000.0
+
+    def test_backfill_posts_existing_records_once(self, test_db, mock_student, mock_student_fees):
+        """The backfill posts historical fees and is safe to re-run"""
+        mock_student_fees[0].paid = True
+        mock_student_fees[1].discount_percentage = 50.0
+        test_db.commit()
+
+        counts = backfill_ledger(test_db)
+        again = backfill_ledger(test_db)
+
+        assert counts["student_fee_charges"] == 6
+        assert counts["student_fee_discounts"] == 1
+        assert counts["student_fee_payments"] == 1
+        assert sum(again.values()) == 0
+        # 780000 charged, 100000 discounted on boarding, 500000 tuition paid
+        assert _balance(test_db, mock_student.id) == 180000.0
+
+
+class TestLedgerEndpoints:
+    """Test suite for the ledger and balance endpoints"""
+
+    @pytest.fixture
+    def client(self, test_db, async_test_db):
+        app = FastAPI()
+        app.include_router(student_router.router, prefix="/api/students")
+        app.include_router(parent_router.router, prefix="/api/parents")
+        app.dependency_overrides[get_db] = lambda: test_db
+        app.dependency_overrides[get_async_db] = async_test_db
+        return TestClient(app)
+
+    def test_student_ledger_and_balance(self, client, test_db, mock_student):
+        """Students expose their entries and running balance"""
+        post_entry(test_db, mock_student.id, LedgerEntryType.CHARGE, 300.0, "student_fee", "sf-1", "School fee")
+        test_db.commit()
+
+        ledger = client.get(f"/api/students/{mock_student.id}/ledger").json()
+        balance = client.get(f"/api/students/{mock_student.id}/balance").json()
+
+        assert ledger[0]["entry_type"] == "charge"
+        assert ledger[0]["debit_account"] == "receivable"
+        assert balance["balance"] == 300.0
+
+    def test_parent_family_balance(self, client, test_db, mock_parent, mock_student, mock_student_2):
+        """A parent's balance sums each child's running balance"""
+        mock_parent.students.extend([mock_student, mock_student_2])
+        post_entry(test_db, mock_student.id, LedgerEntryType.CHARGE, 300.0, "student_fee", "sf-1")
+        post_entry(test_db, mock_student_2.id, LedgerEntryType.CHARGE, 200.0, "student_fee", "sf-2")
+        test_db.commit()
+
+        response = client.get(f"/api/parents/{mock_parent.id}/balance")
+
+        assert response.status_code == 200
+        assert response.json()["total"] == 500.0
+
+    def test_balance_not_writable_through_student_update(self, client, test_db, mock_student):
+        """The student update endpoint ignores outstanding_balance"""
+        response = client.put(f"/api/students/{mock_student.id}", json={
+            "reg_number": "123",
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "year_group": "Year 10",
+            "class_name": "Amber",
+            "outstanding_balance": 999.0,
+        })
+
+        assert response.status_code == 200
+        assert _balance(test_db, mock_student.id) is None
@@ -0,0 +1,163 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.database import get_db, get_async_db
+from app.routers import parent as parent_router
+from app.models.payment import Payment, PaymentStatus, payment_students
+from app.models.club import ClubMembership
+from app.models.student import Student
+from app.models.classes import YearGroup, ClassName
+
+
+@pytest.fixture
+def client(test_db, async_test_db):
+    app = FastAPI()
+    app.include_router(parent_router.router, prefix="/api/parents")
+    app.dependency_overrides[get_db] = lambda: test_db
+    app.dependency_overrides[get_async_db] = async_test_db
+    return TestClient(app)
+
+
+@pytest.fixture
+def count_queries(test_db):
+    """Count SELECT statements issued on the test database (sync and async sessions)"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _add_payment(db, reference, student_ids, status):
+    payment = Payment(
+        student_ids=student_ids,
+        amount=1000.0,
+        status=status,
+        payment_reference=reference,
+        payer_id="parent-123",
+        student_fee_ids=[],
+    )
+    db.add(payment)
+    db.flush()
+    db.execute(payment_students.insert(), [
+        {"payment_id": payment.id, "student_id": student_id} for student_id in student_ids
+    ])
+
+
+class TestGetParentStudents:
+    """Test suite for GET /api/parents/{parent_id}/students"""
+
+    def test_paid_status_per_child(self, client, test_db, mock_parent, mock_student, mock_student_2, mock_club):
+        """Only children on a completed payment are reported as paid"""
+        mock_parent.students.extend([mock_student, mock_student_2])
+        test_db.add(ClubMembership(student_id=mock_student.id, club_id=mock_club.id, status="active"))
+        _add_payment(test_db, "ref_paid", [mock_student.id], PaymentStatus.COMPLETED)
+        _add_payment(test_db, "ref_pending", [mock_student_2.id], PaymentStatus.PENDING)
+        test_db.commit()
+
+        response = client.get(f"/api/parents/{mock_parent.id}/students")
+
+        assert response.status_code == 200
+        students = {s["id"]: s for s in response.json()["students"]}
+        assert students[mock_student.id]["school_fees_paid"] is True
+        assert students[mock_student.id]["club_memberships"][0]["club"]["name"] == "Chess Club"
+        assert students[mock_student_2.id]["school_fees_paid"] is False
+
+    def test_query_count_does_not_grow_with_children(self, client, test_db, mock_parent, count_queries):
+        """Parent, children with clubs and paid status load in a fixed number of queries"""
+        children = [
+            Student(
+                id=f"child-{i}",
+                reg_number=f"R{i}",
+                first_name="Child",
+                last_name="Doe",
+                year_group=YearGroup.YEAR_7,
+                class_name=ClassName.IVORY,
+            )
+            for i in range(4)
+        ]
+        mock_parent.students.extend(children)
+        _add_payment(test_db, "ref_family", [c.id for c in children], PaymentStatus.COMPLETED)
+        test_db.commit()
+        parent_id = mock_parent.id
+        count_queries.clear()
+
+        response = client.get(f"/api/parents/{parent_id}/students")
+
+        assert response.status_code == 200
+        assert all(s["school_fees_paid"] for s in response.json()["students"])
+        assert len(count_queries) == 3
+
+    def test_parent_not_found(self, client, test_db):
+        """Unknown parents return 404"""
+        response = client.get("/api/parents/missing/students")
+
+        assert response.status_code == 404
+
+
+class TestGetParentBootstrap:
+    """Test suite for GET /api/parents/{parent_id}/bootstrap"""
+
+    def test_bootstrap_contents(
+        self, client, test_db, mock_parent, mock_student, mock_student_2, mock_club, mock_fees, mock_exam
+    ):
+        """The bootstrap bundles children, fees, clubs, a quote and exam lists"""
+        from app.models.student_exam_fee import StudentExamFee
+        mock_parent.students.extend([mock_student, mock_student_2])
+        test_db.add(ClubMembership(student_id=mock_student.id, club_id=mock_club.id, status="active"))
+        test_db.add(ClubMembership(student_id=mock_student.id, club_id=mock_club.id, status="expired"))
+        test_db.add(StudentExamFee(student_id=mock_student.id, exam_fee_id=mock_exam.id, amount=150000.0))
+        _add_payment(test_db, "ref_paid", [mock_student_2.id], PaymentStatus.COMPLETED)
+        test_db.commit()
+
+        response = client.get(f"/api/parents/{mock_parent.id}/bootstrap")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["parent"]["id"] == mock_parent.id
+        assert len(data["students"]) == 2
+        assert data["fees"]["total"] == 780000.0
+        assert [c["id"] for c in data["clubs"]] == [mock_club.id]
+        # Only the unpaid child is quoted, with the club they are in now (not the expired row)
+        assert [s["student_id"] for s in data["fee_quote"]["student_fees"]] == [mock_student.id]
+        assert data["fee_quote"]["total_amount"] == 780050.0
+        assert data["exam_lists"][mock_student.id]["exam_list"][0]["exam_id"] == mock_exam.id
+        assert data["exam_lists"][mock_student_2.id]["exam_list"] == []
+
+    def test_bootstrap_query_budget(self, client, test_db, mock_parent, mock_fees, mock_club, count_queries):
+        """The bootstrap stays within a fixed query budget"""
+        children = [
+            Student(
+                id=f"child-{i}",
+                reg_number=f"R{i}",
+                first_name="Child",
+                last_name="Doe",
+                year_group=YearGroup.YEAR_7,
+                class_name=ClassName.IVORY,
+            )
+            for i in range(5)
+        ]
+        mock_parent.students.extend(children)
+        test_db.commit()
+        parent_id = mock_parent.id
+        # Warm the reference cache so only per-family queries are counted
+        client.get(f"/api/parents/{parent_id}/bootstrap")
+        count_queries.clear()
+
+        response = client.get(f"/api/parents/{parent_id}/bootstrap")
+
+        assert response.status_code == 200
+        assert len(response.json()["fee_quote"]["student_fees"]) == 5
+        assert len(count_queries) == 4
+
+    def test_bootstrap_parent_not_found(self, client, test_db):
+        """Unknown parents return 404"""
+        response = client.get("/api/parents/missing/bootstrap")
+
+        assert response.status_code == 404
@@ -7,17 +7,18 @@ from app.routers.payment import router, verify_payment
 from app.schemas.payment import PaymentCreate, PaymentInitializationResult
 from app.models.payment import Payment, PaymentStatus, ExamPayment
 from app.routers.payment import router as payment_router
-from app.database import get_db
+from app.database import get_db, get_async_db
 import json
 import hmac
 import hashlib
 
 
 @pytest.fixture
-def app():
+def app(async_test_db):
     """Create a FastAPI test application"""
     app = FastAPI()
     app.include_router(router, prefix="/payments")
+    app.dependency_overrides[get_async_db] = async_test_db
     return app
 
 
@@ -505,7 +506,7 @@ class TestPaystackWebhook:
         payload = {
             "event": "charge.success",
             "data": {
-                "reference": "exam_webhook_ref",
+                "reference": "exam_ref_123",
                 "amount": 15000,
                 "metadata": {
                     "payment_type": "exam_fees",
@@ -533,6 +534,7 @@ class TestPaystackWebhook:
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "success"
+        mock_update_exam.assert_called_once()
 
     def test_webhook_missing_signature(self, client, test_db, mock_env_vars):
         """Test webhook with missing signature"""
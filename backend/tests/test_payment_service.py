@@ -19,7 +19,7 @@ from app.schemas.payment import (
     ExamFeesPaymentData,
     ExamPaymentDetails
 )
-from app.models.payment import PaymentStatus, Payment, ExamPayment
+from app.models.payment import PaymentStatus, Payment, ExamPayment, payment_students
 from app.models.club import ClubMembership
 from app.models.student_exam_fee import StudentExamFee
 
@@ -567,6 +567,12 @@ class TestCreateSchoolFeesRecords:
         assert len(memberships) == 2
         assert all(m.payment_confirmed is False for m in memberships)
 
+        # Verify the payment is linked to both students
+        linked = test_db.query(payment_students.c.student_id).filter(
+            payment_students.c.payment_id == payment.id
+        ).all()
+        assert {student_id for (student_id,) in linked} == {"student-123", "student-456"}
+
     def test_create_school_fees_records_student_not_found(self, test_db, mock_parent):
         """Test handling when student is not found"""
         payment_data = SchoolFeesPaymentData(
@@ -649,3 +655,94 @@ class TestCreateExamFeesRecords:
         ).first()
         assert exam_payment is not None
         assert exam_payment.student_exam_fee_id == student_exam_fee.id
+
+    def test_create_exam_fees_records_batched(
+        self, test_db, mock_student, mock_exam_fees
+    ):
+        """A multi-exam cart costs the same statements whatever its size"""
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        existing = StudentExamFee(student_id=mock_student.id, exam_fee_id="exam-igcse-123", amount=150000.0)
+        test_db.add(existing)
+        test_db.commit()
+        existing_id = existing.id
+        payment_data = ExamFeesPaymentData(
+            exam_payments=[
+                ExamPaymentDetails(exam_id="exam-igcse-123", amount_paid=150000.0),
+                ExamPaymentDetails(exam_id="exam-sat-456", amount_paid=100000.0),
+            ],
+            student_id=mock_student.id,
+            amount=250000.0,
+            payment_method="paystack",
+            parent_id="parent_123"
+        )
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            _create_exam_fees_records(payment_data, "exam_ref_batch", test_db)
+        finally:
+            event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+        # Exam lookup, entry lookup, reference update, entry insert, payment insert
+        assert len(statements) <= 5
+        entries = {sef.exam_fee_id: sef for sef in test_db.query(StudentExamFee).filter_by(student_id=mock_student.id)}
+        assert entries["exam-igcse-123"].id == existing_id
+        assert entries["exam-sat-456"].amount == 200000.0
+        payments = test_db.query(ExamPayment).filter_by(payment_reference="exam_ref_batch").all()
+        assert {p.student_exam_fee_id for p in payments} == {sef.id for sef in entries.values()}
+
+    def test_create_exam_fees_records_unknown_exam(
+        self, test_db, mock_student, mock_exam
+    ):
+        """An unknown exam fails the whole cart before anything is written"""
+        payment_data = ExamFeesPaymentData(
+            exam_payments=[
+                ExamPaymentDetails(exam_id=mock_exam.id, amount_paid=150000.0),
+                ExamPaymentDetails(exam_id="missing-exam", amount_paid=1.0),
+            ],
+            student_id=mock_student.id,
+            amount=150001.0,
+            payment_method="paystack",
+            parent_id="parent_123"
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            _create_exam_fees_records(payment_data, "exam_ref_bad", test_db)
+
+        assert exc_info.value.status_code == 404
+        assert test_db.query(StudentExamFee).count() == 0
+        assert test_db.query(ExamPayment).count() == 0
+
+    def test_create_exam_fees_records_charges_on_confirmation(
+        self, test_db, mock_parent, mock_student, mock_exam
+    ):
+        """A checkout entry is charged when its payment is confirmed, not when the checkout starts"""
+        import logging
+        from app.models.ledger import LedgerEntry, LedgerEntryType
+        from app.utils.exams import update_exam_payment_records
+        payment_data = ExamFeesPaymentData(
+            exam_payments=[ExamPaymentDetails(exam_id=mock_exam.id, amount_paid=150000.0)],
+            student_id=mock_student.id,
+            amount=150000.0,
+            payment_method="paystack",
+            parent_id=mock_parent.id
+        )
+
+        _create_exam_fees_records(payment_data, "exam_ref_abandoned", test_db)
+
+        test_db.refresh(mock_student)
+        assert not mock_student.outstanding_balance
+        assert test_db.query(LedgerEntry).filter_by(student_id=mock_student.id).count() == 0
+
+        payments = test_db.query(ExamPayment).filter_by(payment_reference="exam_ref_abandoned").all()
+        with patch("app.utils.exams.publish_event"), patch("app.utils.exams.publish_payment_status"):
+            update_exam_payment_records(test_db, payments, logging.getLogger(__name__))
+
+        entry_types = {e.entry_type for e in test_db.query(LedgerEntry).filter_by(student_id=mock_student.id)}
+        assert entry_types == {LedgerEntryType.CHARGE, LedgerEntryType.PAYMENT}
+        test_db.refresh(mock_student)
+        assert mock_student.outstanding_balance == 0.0
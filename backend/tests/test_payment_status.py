@@ -0,0 +1,86 @@
+import threading
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.database import get_async_db
+from app.models.payment import ExamPayment, Payment, PaymentStatus
+from app.routers.payment import router as payment_router
+from app.services.event_broker import publish_payment_status
+
+
+@pytest.fixture
+def client(async_test_db):
+    app = FastAPI()
+    app.include_router(payment_router, prefix="/payments")
+    app.dependency_overrides[get_async_db] = async_test_db
+    return TestClient(app)
+
+
+@pytest.fixture
+def pending_payment(test_db, mock_parent):
+    payment = Payment(
+        student_ids=[], student_fee_ids=[], amount=1000.0, payment_method="paystack",
+        payment_reference="ref_pending", status=PaymentStatus.PENDING, payer_id=mock_parent.id,
+    )
+    test_db.add(payment)
+    test_db.commit()
+    return payment
+
+
+class TestPaymentStatuses:
+    """Test suite for GET /payments/status"""
+
+    def test_several_references_at_once(self, client, test_db, mock_parent, pending_payment):
+        """School fees and exam checkouts are answered together"""
+        test_db.add_all([
+            Payment(
+                student_ids=[], student_fee_ids=[], amount=500.0, payment_method="paystack",
+                payment_reference="ref_done", status=PaymentStatus.COMPLETED, payer_id=mock_parent.id,
+            ),
+            ExamPayment(student_exam_fee_id="sef-1", amount_paid=10.0, status=PaymentStatus.COMPLETED, payment_reference="ref_exam"),
+            ExamPayment(student_exam_fee_id="sef-2", amount_paid=10.0, status=PaymentStatus.PENDING, payment_reference="ref_exam"),
+        ])
+        test_db.commit()
+
+        response = client.get("/payments/status", params={
+            "references": ["ref_done", "ref_exam", "ref_pending", "ref_unknown"], "timeout": 0,
+        })
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "ref_done": "completed", "ref_exam": "pending", "ref_pending": "pending", "ref_unknown": "not_found",
+        }
+
+    def test_confirmation_wakes_waiter(self, client, test_db, pending_payment):
+        """A held request answers as soon as the confirmation path publishes"""
+        def confirm():
+            pending_payment.status = PaymentStatus.COMPLETED
+            test_db.commit()
+            publish_payment_status("ref_pending", "completed")
+
+        timer = threading.Timer(0.3, confirm)
+        started = time.monotonic()
+        timer.start()
+        try:
+            response = client.get("/payments/status", params={"references": ["ref_pending"], "timeout": 10})
+        finally:
+            timer.join()
+
+        assert response.json() == {"ref_pending": "completed"}
+        assert time.monotonic() - started < 5
+
+    def test_times_out_while_pending(self, client, pending_payment):
+        """Without a confirmation the request is answered at the timeout"""
+        started = time.monotonic()
+
+        response = client.get("/payments/status", params={"references": ["ref_pending"], "timeout": 0.2})
+
+        assert response.json() == {"ref_pending": "pending"}
+        assert time.monotonic() - started >= 0.2
+
+    def test_too_many_references(self, client):
+        """Requests are capped at a fixed number of references"""
+        response = client.get("/payments/status", params={"references": [f"ref_{i}" for i in range(21)]})
+
+        assert response.status_code == 400
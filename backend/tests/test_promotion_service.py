@@ -0,0 +1,130 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from app.database import get_db
+from app.models.classes import ClassName, YearGroup
+from app.models.club import Club, ClubMembership, ClubWaitlistEntry
+from app.models.fees import ExamFees
+from app.models.payment import Payment, PaymentStatus
+from app.models.promotion import YearEndPromotion
+from app.models.student import Student
+from app.models.student_exam_fee import StudentExamFee
+from app.routers import student as student_router
+from app.services.analytics_service import build_school_fees_overview
+from app.services.exam_enrollment_service import sync_exam_enrollment
+from app.services.promotion_service import promote_students
+
+
+IGCSE, SAT = "exam-igcse-123", "exam-sat-456"
+
+
+@pytest.fixture
+def school(test_db, mock_student, mock_student_2, mock_exam_fees):
+    """Year 10, 11 and 12 students, each entered for the exams of their year group"""
+    test_db.add(Student(
+        id="student-789", reg_number="789", first_name="Kemi", last_name="Bello",
+        email="kemi.bello@example.com", year_group=YearGroup.YEAR_12, class_name=ClassName.IVORY,
+    ))
+    test_db.commit()
+    for exam in test_db.query(ExamFees).all():
+        sync_exam_enrollment(test_db, exam)
+    test_db.commit()
+
+
+def _entries(test_db):
+    return set(test_db.query(StudentExamFee.student_id, StudentExamFee.exam_fee_id).all())
+
+
+class TestPromoteStudents:
+    """Test suite for the year-end promotion job"""
+
+    def test_dry_run_reports_without_writing(self, test_db, school):
+        """A dry run returns the diff and leaves students and exam entries alone"""
+        before = _entries(test_db)
+
+        result = promote_students(test_db, "2025/2026")
+
+        assert (result.dry_run, result.promoted, result.leavers) == (True, 2, 1)
+        assert [(m.from_year_group, m.to_year_group, m.students) for m in result.moves] == [
+            ("YEAR_10", "YEAR_11", 1), ("YEAR_11", "YEAR_12", 1), ("YEAR_12", None, 1),
+        ]
+        assert [(c.exam_id, c.enrolled, c.withdrawn) for c in result.exam_changes] == [(IGCSE, 0, 1), (SAT, 1, 1)]
+        assert test_db.get(Student, "student-123").year_group == YearGroup.YEAR_10
+        assert _entries(test_db) == before
+        assert test_db.query(YearEndPromotion).count() == 0
+
+    def test_apply_promotes_and_follows_eligibility(self, test_db, school):
+        """Students move up, Year 12 leaves, and exam entries follow the new year groups"""
+        plan = promote_students(test_db, "2025/2026")
+
+        result = promote_students(test_db, "2025/2026", dry_run=False)
+
+        assert result.exam_changes == plan.exam_changes
+        assert result.applied_at is not None
+        assert test_db.get(Student, "student-123").year_group == YearGroup.YEAR_11
+        assert test_db.get(Student, "student-456").year_group == YearGroup.YEAR_12
+        leaver = test_db.get(Student, "student-789")
+        assert (leaver.year_group, leaver.left_at is not None) == (YearGroup.YEAR_12, True)
+        assert _entries(test_db) == {("student-123", IGCSE), ("student-456", SAT)}
+        assert test_db.query(YearEndPromotion).one().promoted == 2
+
+    def test_year_applies_once(self, test_db, school):
+        """A second run for the same academic year is refused and changes nothing"""
+        promote_students(test_db, "2025/2026", dry_run=False)
+
+        with pytest.raises(HTTPException) as exc:
+            promote_students(test_db, "2025/2026", dry_run=False)
+
+        assert exc.value.status_code == 409
+        assert test_db.get(Student, "student-123").year_group == YearGroup.YEAR_11
+
+    def test_leavers_give_up_club_seats(self, test_db, school, mock_student):
+        """A leaver's confirmed seat and held seat go back to their clubs, and their queue places close"""
+        chess = Club(id="club-chess", name="Chess", price=50.0, capacity=2, seats_taken=2, confirmed_members=1)
+        drama = Club(id="club-drama", name="Drama", price=50.0, capacity=1, seats_taken=1)
+        test_db.add_all([chess, drama])
+        test_db.add_all([
+            ClubMembership(student_id="student-789", club_id="club-chess", payment_confirmed=True, status="active"),
+            ClubMembership(student_id=mock_student.id, club_id="club-chess", payment_confirmed=False, status="active"),
+            ClubMembership(student_id="student-789", club_id="club-drama", payment_confirmed=False, status="active"),
+            ClubWaitlistEntry(student_id="student-789", club_id="club-chess", status="waiting"),
+        ])
+        test_db.commit()
+
+        promote_students(test_db, "2025/2026", dry_run=False)
+
+        assert (test_db.get(Club, "club-chess").seats_taken, test_db.get(Club, "club-chess").confirmed_members) == (1, 0)
+        assert test_db.get(Club, "club-drama").seats_taken == 0
+        assert {m.status for m in test_db.query(ClubMembership).filter_by(student_id="student-789")} == {"inactive"}
+        assert test_db.query(ClubMembership).filter_by(student_id=mock_student.id).one().status == "active"
+        assert test_db.query(ClubWaitlistEntry).one().status == "cancelled"
+
+    def test_paid_leavers_leave_the_fees_overview(self, test_db, school, mock_parent):
+        """A leaver's old payment no longer counts towards the current students' paid figures"""
+        test_db.add(Payment(
+            student_ids=["student-123", "student-789"], amount=1000.0, status=PaymentStatus.COMPLETED,
+            payment_reference="ref_before_promotion", payer_id=mock_parent.id, student_fee_ids=[],
+        ))
+        test_db.commit()
+
+        promote_students(test_db, "2025/2026", dry_run=False)
+        overview = build_school_fees_overview(test_db)
+
+        assert (overview.total_students, overview.total_paid, overview.total_unpaid) == (2, 1, 1)
+        assert overview.overall_payment_rate == 50.0
+
+
+class TestPromoteEndpoint:
+    """Test suite for POST /api/students/promote"""
+
+    def test_defaults_to_dry_run(self, test_db, school):
+        """Without dry_run the endpoint only returns the plan"""
+        app = FastAPI()
+        app.include_router(student_router.router, prefix="/api/students")
+        app.dependency_overrides[get_db] = lambda: test_db
+
+        response = TestClient(app).post("/api/students/promote", json={"academic_year": "2025/2026"})
+
+        assert response.status_code == 200
+        assert (response.json()["dry_run"], response.json()["leavers"]) == (True, 1)
+        assert test_db.get(Student, "student-789").left_at is None
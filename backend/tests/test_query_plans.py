@@ -0,0 +1,185 @@
+"""
+Query plan checks for the hot paths.
+
+Each test drives one router or service path against a seeded database,
+captures every statement it runs and asks SQLite for the plan with EXPLAIN
+QUERY PLAN. A full scan (`SCAN <table>`) of any large table fails the test;
+lookups must be `SEARCH ... USING INDEX`.
+"""
+import logging
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, text
+from sqlalchemy.engine import Engine
+from app.database import get_async_db, get_db
+from app.models.classes import ClassName, YearGroup
+from app.models.club import ClubMembership
+from app.models.fees import ExamFees
+from app.models.parent import Parent, parent_student_association
+from app.models.payment import ExamPayment, Payment, PaymentStatus, payment_students
+from app.models.student import Student
+from app.models.student_fee import StudentFee
+from app.routers import admin_analytics as admin_router
+from app.routers import parent as parent_router
+from app.routers import student as student_router
+from app.schemas.payment import ExamFeesPaymentData, ExamPaymentDetails, SchoolFeesPaymentData
+from app.services.club_waitlist_service import get_waitlist_entries, join_waitlist, promote_waitlists
+from app.services.exam_enrollment_service import sync_exam_enrollment
+from app.services.payment_service import _create_exam_fees_records, _create_school_fees_records
+from app.services.payment_status_service import get_payment_statuses
+from app.utils.exams import update_payment_records
+
+# Tables that grow with the school and its payment history
+LARGE_TABLES = {
+    "students", "parent_student", "student_fee", "student_exam_fee",
+    "payments", "payment_students", "payment_items", "exam_payments",
+    "club_memberships", "club_waitlist", "ledger_entries", "student_balance_snapshots",
+}
+FAMILIES = 150
+IGCSE, SAT = "exam-igcse-123", "exam-sat-456"
+
+_scan = re.compile(r"^SCAN (\w+)")
+
+
+@pytest.fixture
+def school(test_db, mock_fees, mock_club, mock_exam_fees):
+    """FAMILIES parents with two children each, billed, entered for exams and partly paid up"""
+    years = list(YearGroup)
+    students, links, parents, fees, payments, paid_links = [], [], [], [], [], []
+    for family in range(FAMILIES):
+        parent_id = f"parent-{family}"
+        parents.append({"id": parent_id, "auth_id": f"auth-{family}", "first_name": "P", "last_name": f"F{family}",
+                        "email": f"p{family}@mail.test", "phone": f"0800{family:07d}"})
+        children = []
+        for child in range(2):
+            student_id = f"s-{family}-{child}"
+            children.append(student_id)
+            students.append({"id": student_id, "reg_number": f"R{family}-{child}", "first_name": "C",
+                             "last_name": f"F{family}", "year_group": years[(family + child) % len(years)],
+                             "class_name": ClassName.AMBER})
+            links.append({"parent_id": parent_id, "student_id": student_id})
+            fees.extend({"id": f"sf-{student_id}-{fee.id}", "student_id": student_id, "fee_id": fee.id,
+                         "amount": fee.amount, "paid": family % 2 == 0, "term": "2026-T1"} for fee in mock_fees)
+        payment_id = f"pay-{family}"
+        payments.append({"id": payment_id, "student_ids": children, "amount": 1000.0, "payer_id": parent_id,
+                         "student_fee_ids": [], "payment_reference": f"ref-{family}",
+                         "status": PaymentStatus.COMPLETED if family % 2 == 0 else PaymentStatus.PENDING})
+        paid_links.extend({"payment_id": payment_id, "student_id": student_id} for student_id in children)
+    test_db.execute(insert(Parent), parents)
+    test_db.execute(insert(Student), students)
+    test_db.execute(parent_student_association.insert(), links)
+    test_db.execute(insert(StudentFee), fees)
+    test_db.execute(insert(Payment), payments)
+    test_db.execute(payment_students.insert(), paid_links)
+    test_db.execute(insert(ClubMembership), [
+        {"id": f"cm-{s['id']}", "student_id": s["id"], "club_id": mock_club.id, "status": "active",
+         "payment_confirmed": True}
+        for s in students[::3]
+    ])
+    mock_club.capacity = len(students[::3])
+    test_db.commit()
+    for exam_id, grades in ((IGCSE, ["YEAR_10", "YEAR_11"]), (SAT, ["YEAR_12"])):
+        exam = test_db.get(ExamFees, exam_id)
+        exam.applicable_grades = grades
+        sync_exam_enrollment(test_db, exam)
+    test_db.commit()
+    test_db.execute(text("ANALYZE"))
+    return students
+
+
+@pytest.fixture
+def plans(test_db):
+    """Collects the statements run while the test drives a path, then checks their plans"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    def full_scans():
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+        scans = []
+        for statement, parameters in statements:
+            rows = test_db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+            for *_, detail in rows:
+                match = _scan.match(detail)
+                if match and re.sub(r"_\d+$", "", match.group(1)) in LARGE_TABLES:
+                    scans.append(f"{detail}\n    in: {' '.join(statement.split())[:300]}")
+        return scans
+
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    yield full_scans
+    if event.contains(Engine, "before_cursor_execute", before_cursor_execute):
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _app(*routers):
+    app = FastAPI()
+    for router, prefix in routers:
+        app.include_router(router.router, prefix=prefix)
+    return app
+
+
+class TestQueryPlans:
+    """Test suite for index use on the hot query paths"""
+
+    def test_parent_portal(self, test_db, async_test_db, school, plans):
+        """Parent bootstrap, student ledger and balance"""
+        app = _app((parent_router, "/api/parents"), (student_router, "/api/students"))
+        app.dependency_overrides[get_db] = lambda: test_db
+        app.dependency_overrides[get_async_db] = async_test_db
+        client = TestClient(app)
+
+        assert client.get("/api/parents/parent-7/bootstrap").status_code == 200
+        assert client.get("/api/students/s-7-0/ledger").status_code == 200
+        assert client.get("/api/students/s-7-0/balance").status_code == 200
+
+        assert plans() == []
+
+    def test_school_fees_checkout_and_confirmation(self, test_db, school, mock_club, plans):
+        """Checkout with clubs, payment status and confirmation"""
+        _create_school_fees_records(SchoolFeesPaymentData(
+            student_ids=["s-9-0", "s-9-1"], amount=500.0, club_amount=50.0, payment_method="paystack",
+            parent_id="parent-9", student_club_ids={"s-9-1": [mock_club.id]}, description="School fees",
+        ), "ref-new", test_db)
+        get_payment_statuses(test_db, ["ref-new", "ref-3", "ref-missing"])
+        payment = test_db.query(Payment).filter(Payment.payment_reference == "ref-new").one()
+        update_payment_records(test_db, payment, payment.student_ids, logging.getLogger(__name__))
+
+        assert plans() == []
+
+    def test_exam_checkout(self, test_db, school, plans):
+        """Exam checkout for one student and the exam payment lookups"""
+        _create_exam_fees_records(ExamFeesPaymentData(
+            exam_payments=[ExamPaymentDetails(exam_id=SAT, amount_paid=100.0)],
+            student_id="s-11-0", amount=100.0, payment_method="paystack", parent_id="parent-11",
+        ), "exam-ref", test_db)
+        test_db.query(ExamPayment).filter(ExamPayment.payment_reference == "exam-ref").all()
+
+        assert plans() == []
+
+    def test_club_waitlist(self, test_db, school, mock_club, plans):
+        """Joining, queue positions, hold expiry and offers"""
+        mock_club.capacity = mock_club.seats_taken
+        test_db.commit()
+        join_waitlist(test_db, mock_club.id, "s-1-0")
+        get_waitlist_entries(test_db, ["s-1-0"])
+        test_db.query(ClubMembership).filter(ClubMembership.id == "cm-s-0-0").update({"payment_confirmed": False})
+        test_db.commit()
+        promote_waitlists(test_db, now=datetime.now() + timedelta(days=1))
+
+        assert plans() == []
+
+    def test_admin_exam_students(self, test_db, school, plans):
+        """The per-exam student list filtered by payment status"""
+        app = _app((admin_router, "/api/admin"))
+        app.dependency_overrides[get_db] = lambda: test_db
+
+        response = TestClient(app).get(f"/api/admin/exam-fees/students/{IGCSE}", params={"payment_status": "unpaid"})
+
+        assert response.status_code == 200
+        assert plans() == []
@@ -0,0 +1,106 @@
+import time
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.database import get_async_db
+from app.routers.payment import router as payment_router
+from app.schemas.payment import PaymentInitializationResult
+from app.services.fees_service import calculate_fees
+from app.services.quote_token import issue_quote_token, verify_quote_token
+from app.services.reference_cache import FEES, bump_reference_version
+
+CLUBS = {"student-123": ["club-b", "club-a"]}
+
+
+class TestQuoteToken:
+    """Test suite for signed quote tokens"""
+
+    def test_round_trip_ignores_order(self, mock_env_vars):
+        """A token verifies for the same cart, whatever the order of ids"""
+        token = issue_quote_token(["student-123", "student-456"], CLUBS, 830.0, "1.0")
+
+        assert verify_quote_token(token, ["student-456", "student-123"], {"student-123": ["club-a", "club-b"]}, 830.0, "1.0")
+
+    @pytest.mark.parametrize("student_ids, clubs, amount, version", [
+        (["student-123", "student-456"], CLUBS, 830.0, "1.0"),  # Extra student
+        (["student-123"], {"student-123": ["club-a"]}, 830.0, "1.0"),  # Different clubs
+        (["student-123"], CLUBS, 1.0, "1.0"),  # Different amount
+        (["student-123"], CLUBS, 830.0, "2.0"),  # Catalog changed since
+    ])
+    def test_rejects_other_carts_and_versions(self, mock_env_vars, student_ids, clubs, amount, version):
+        """A token only vouches for the exact cart and catalog it was issued for"""
+        token = issue_quote_token(["student-123"], CLUBS, 830.0, "1.0")
+
+        assert not verify_quote_token(token, student_ids, clubs, amount, version)
+
+    def test_rejects_tampered_and_expired(self, mock_env_vars, monkeypatch):
+        """Edited or expired tokens are refused"""
+        token = issue_quote_token(["student-123"], CLUBS, 830.0, "1.0")
+        body, signature = token.split(".")
+
+        assert not verify_quote_token(body[:-2] + "AA." + signature, ["student-123"], CLUBS, 830.0, "1.0")
+        assert not verify_quote_token("not-a-token", ["student-123"], CLUBS, 830.0, "1.0")
+
+        monkeypatch.setattr(time, "time", lambda: 10**12)
+        assert not verify_quote_token(token, ["student-123"], CLUBS, 830.0, "1.0")
+
+    def test_no_secret_no_token(self, monkeypatch):
+        """Without a signing secret no tokens are issued"""
+        monkeypatch.delenv("QUOTE_SIGNING_SECRET", raising=False)
+        monkeypatch.delenv("PAYSTACK_SECRET_KEY", raising=False)
+
+        assert issue_quote_token(["student-123"], CLUBS, 830.0, "1.0") is None
+
+
+class TestInitializeWithQuoteToken:
+    """Test suite for /payments/initialize with a quote token"""
+
+    @pytest.fixture
+    def client(self, async_test_db):
+        app = FastAPI()
+        app.include_router(payment_router, prefix="/payments")
+        app.dependency_overrides[get_async_db] = async_test_db
+        return TestClient(app)
+
+    @pytest.fixture
+    def payment_data(self, test_db, mock_parent, mock_student, mock_fees, mock_club, mock_env_vars):
+        clubs = {mock_student.id: [mock_club.id]}
+        quote = calculate_fees(student_ids=[mock_student.id], student_club_ids=clubs, db=test_db)
+        return {
+            "student_ids": [mock_student.id],
+            "amount": quote.total_amount,
+            "club_amount": 50.0,
+            "payment_method": "paystack",
+            "parent_id": mock_parent.id,
+            "student_club_ids": clubs,
+            "quote_token": quote.quote_token,
+        }
+
+    @pytest.fixture
+    def mock_init_payment(self):
+        with patch("app.routers.payment.initialize_payment") as mock_init_payment:
+            mock_init_payment.return_value = PaymentInitializationResult(
+                status=True, message="ok", data={"reference": "ref_quote"}
+            )
+            yield mock_init_payment
+
+    def test_valid_token_skips_recalculation(self, client, payment_data, mock_init_payment):
+        """The signed amount is accepted without calling calculate_fees"""
+        with patch("app.routers.payment.calculate_fees") as mock_calc_fees:
+            response = client.post("/payments/initialize", json=payment_data)
+
+        assert response.status_code == 200
+        mock_calc_fees.assert_not_called()
+        mock_init_payment.assert_called_once()
+
+    def test_catalog_change_recalculates(self, client, test_db, payment_data, mock_init_payment):
+        """A token issued before a catalog change falls back to recomputing the quote"""
+        bump_reference_version(test_db, FEES)
+        test_db.commit()
+
+        with patch("app.routers.payment.calculate_fees", wraps=calculate_fees) as mock_calc_fees:
+            response = client.post("/payments/initialize", json=payment_data)
+
+        assert response.status_code == 200
+        mock_calc_fees.assert_called_once()
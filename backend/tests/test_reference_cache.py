@@ -0,0 +1,105 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.database import get_db, get_async_db
+from app.models.club import Club
+from app.models.reference_data import ReferenceDataVersion
+from app.routers import club as club_router, fees as fees_router
+from app.services.reference_cache import CLUBS, FEES, bump_reference_version, reference_cache
+
+
+@pytest.fixture
+def client(test_db, async_test_db):
+    app = FastAPI()
+    app.include_router(club_router.router, prefix="/api/clubs")
+    app.include_router(fees_router.router, prefix="/api/fees")
+    app.dependency_overrides[get_db] = lambda: test_db
+    app.dependency_overrides[get_async_db] = async_test_db
+    return TestClient(app)
+
+
+@pytest.fixture
+def count_queries(test_db):
+    """Count SELECT statements issued on the test database (sync and async sessions)"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+
+class TestReferenceCache:
+    """Test suite for the reference data cache"""
+
+    def test_snapshot_lookups(self, test_db, mock_fees, mock_club):
+        """Snapshots expose rows by id and fees by code"""
+        fees = reference_cache.fees(test_db)
+        clubs = reference_cache.clubs(test_db)
+
+        assert fees.by_code["TUITION"].amount == 500000.0
+        assert clubs.by_id[mock_club.id].name == "Chess Club"
+        with pytest.raises(TypeError):
+            fees.by_code["TUITION"] = None
+
+    def test_repeat_reads_hit_memory(self, test_db, mock_fees, count_queries):
+        """Only the first read within the check interval queries the database"""
+        reference_cache.fees(test_db)
+        loaded = len(count_queries)
+        reference_cache.fees(test_db)
+
+        assert loaded > 0
+        assert len(count_queries) == loaded
+
+    def test_bump_invalidates_after_commit(self, test_db, mock_club):
+        """A version bump drops the local copy once the change commits"""
+        assert len(reference_cache.clubs(test_db).items) == 1
+
+        test_db.add(Club(id="club-456", name="Drama Club", price=80.0))
+        bump_reference_version(test_db, CLUBS)
+        test_db.commit()
+
+        snapshot = reference_cache.clubs(test_db)
+        assert len(snapshot.items) == 2
+        assert snapshot.version == 1
+
+    def test_other_worker_change_seen_after_check_interval(self, test_db, mock_club, monkeypatch):
+        """A bump committed elsewhere is noticed at the next version check"""
+        monkeypatch.setenv("reference_cache_check_seconds", "0")
+        reference_cache.clubs(test_db)
+
+        # Simulate another worker: change the row and the version without local invalidation
+        test_db.query(Club).filter(Club.id == mock_club.id).update({"price": 75.0})
+        test_db.add(ReferenceDataVersion(name=CLUBS, version=1))
+        test_db.commit()
+        assert CLUBS in reference_cache._snapshots  # still cached locally
+
+        assert reference_cache.clubs(test_db).by_id[mock_club.id].price == 75.0
+
+
+class TestReferenceCacheEndpoints:
+    """Test suite for endpoints that write through the cache version"""
+
+    def test_fee_update_visible_immediately(self, client, test_db, mock_fees):
+        """GET /api/fees reflects a fee update straight away"""
+        assert client.get("/api/fees/").json()["fees"]["TUITION"] == 500000.0
+
+        client.put("/api/fees/update", json={"TUITION": 550000.0})
+
+        assert client.get("/api/fees/").json()["fees"]["TUITION"] == 550000.0
+        assert test_db.query(ReferenceDataVersion).filter_by(name=FEES).one().version == 1
+
+    def test_club_crud_refreshes_list(self, client, test_db, mock_club):
+        """Creating and deleting clubs updates the cached club list"""
+        assert len(client.get("/api/clubs/").json()) == 1
+
+        created = client.post("/api/clubs/", json={"name": "Art Club", "price": 30.0}).json()
+        assert {c["name"] for c in client.get("/api/clubs/").json()} == {"Art Club", "Chess Club"}
+
+        client.delete(f"/api/clubs/{created['id']}")
+        assert [c["name"] for c in client.get("/api/clubs/").json()] == ["Chess Club"]
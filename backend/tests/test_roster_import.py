@@ -0,0 +1,105 @@
+import io
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.database import get_db
+from app.models.classes import YearGroup
+from app.models.parent import Parent, parent_student_association
+from app.models.student import Student
+from app.routers import student as student_router
+from app.services.roster_import_service import IMPORTED_AUTH_PREFIX, RosterFormatError, import_roster
+
+HEADER = "reg_number,first_name,last_name,year_group,class_name,email,parent_first_name,parent_last_name,parent_email,parent_phone,parent2_first_name,parent2_last_name,parent2_phone\n"
+
+
+def _csv(*rows: str) -> io.BytesIO:
+    return io.BytesIO((HEADER + "".join(row + "\n" for row in rows)).encode())
+
+
+def _links(test_db):
+    return set(test_db.execute(parent_student_association.select()).all())
+
+
+class TestImportRoster:
+    """Test suite for the bulk roster import"""
+
+    def test_students_parents_and_links(self, test_db):
+        """Siblings share one parent; bad and duplicate rows are reported, not imported"""
+        roster = _csv(
+            "2026-001,Ada,Obi,YEAR_10,AMBER,ada@school.test,Ngozi,Obi,NGOZI@mail.test,0801 000 0001,Emeka,Obi,0802",
+            "2026-002,Ben,Obi,Year 7,Emerald,,Ngozi,Obi,ngozi@mail.test,,,,",
+            "2026-003,Cy,Eze,YEAR_13,AMBER,,,,,,,,",
+            "2026-001,Ada,Again,YEAR_10,AMBER,,,,,,,,",
+            ",,,,,,,,,,,,",
+        )
+
+        result = import_roster(test_db, roster, "intake.csv")
+
+        assert (result.rows, result.students_created, result.parents_created, result.links_created) == (4, 2, 2, 3)
+        assert [(e.row, e.reg_number) for e in result.errors] == [(4, "2026-003"), (5, "2026-001")]
+        assert "year_group" in result.errors[0].message
+        ngozi = test_db.query(Parent).filter_by(email="ngozi@mail.test").one()
+        assert ngozi.phone == "08010000001"
+        assert ngozi.auth_id == IMPORTED_AUTH_PREFIX + ngozi.id
+        assert {s.reg_number for s in ngozi.students} == {"2026-001", "2026-002"}
+        assert test_db.query(Student).filter_by(reg_number="2026-002").one().year_group == YearGroup.YEAR_7
+
+    def test_reimport_updates_in_place(self, test_db, mock_student, mock_parent):
+        """Existing students match on reg_number and parents on phone; links are not duplicated"""
+        roster = _csv(f"123,Janet,Doe,YEAR_11,AMBER,,John,Doe,,{mock_parent.phone},,,")
+
+        first = import_roster(test_db, roster, "update.csv")
+        roster.seek(0)
+        second = import_roster(test_db, roster, "update.csv")
+
+        assert (first.students_updated, first.parents_updated, first.links_created) == (1, 1, 1)
+        assert (second.students_created, second.parents_created, second.links_created) == (0, 0, 0)
+        test_db.expire_all()
+        student = test_db.get(Student, mock_student.id)
+        assert (student.first_name, student.year_group, student.email) == ("Janet", YearGroup.YEAR_11, "jane.doe@example.com")
+        assert _links(test_db) == {(mock_parent.id, mock_student.id)}
+
+    def test_rejected_chunk_does_not_stop_the_rest(self, test_db, mock_student):
+        """A chunk the database refuses is reported row by row; other chunks still load"""
+        roster = _csv(
+            "2026-010,Dee,Ade,YEAR_8,IVORY,jane.doe@example.com,,,,,,,",  # Email belongs to mock_student
+            "2026-011,Eve,Ade,YEAR_8,IVORY,,,,,,,,",
+        )
+
+        result = import_roster(test_db, roster, "intake.csv", chunk_size=1)
+
+        assert result.students_created == 1
+        assert [(e.row, e.reg_number) for e in result.errors] == [(2, "2026-010")]
+        assert test_db.query(Student).filter_by(reg_number="2026-011").count() == 1
+
+    def test_unreadable_files(self, test_db):
+        """Unknown file types and missing columns are refused up front"""
+        with pytest.raises(RosterFormatError):
+            import_roster(test_db, io.BytesIO(b""), "roster.pdf")
+        with pytest.raises(RosterFormatError, match="class_name"):
+            import_roster(test_db, io.BytesIO(b"reg_number,first_name,last_name,year_group\n"), "roster.csv")
+
+
+class TestImportEndpoint:
+    """Test suite for POST /api/students/import"""
+
+    def test_xlsx_upload(self, test_db):
+        """An XLSX roster uploads through the endpoint"""
+        openpyxl = pytest.importorskip("openpyxl")
+        workbook = openpyxl.Workbook()
+        workbook.active.append(["Reg Number", "First Name", "Last Name", "Year Group", "Class Name", "Parent Email", "Parent First Name", "Parent Last Name"])
+        workbook.active.append([2026100, "Fola", "Ade", "Year 12", "Diamond", "ade@mail.test", "Tunde", "Ade"])
+        upload = io.BytesIO()
+        workbook.save(upload)
+
+        app = FastAPI()
+        app.include_router(student_router.router, prefix="/api/students")
+        app.dependency_overrides[get_db] = lambda: test_db
+        response = TestClient(app).post(
+            "/api/students/import", files={"file": ("intake.xlsx", upload.getvalue())}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["errors"] == []
+        student = test_db.query(Student).filter_by(reg_number="2026100").one()
+        assert [parent.email for parent in student.parents] == ["ade@mail.test"]
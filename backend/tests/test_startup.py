@@ -0,0 +1,104 @@
+import sys
+
+import pytest
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.database import ALEMBIC_DIR, check_schema_version
+from app.models.base import Base
+from app.utils.startup import StartupTimer
+from scripts.migrate import CREATE_ALL_REVISION, unversioned_revision
+
+
+@pytest.fixture
+def migrated_engine():
+    """An empty SQLite database stamped with an Alembic revision (set per test)"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)"))
+
+    def stamp(revision):
+        with engine.begin() as connection:
+            connection.execute(text("DELETE FROM alembic_version"))
+            if revision:
+                connection.execute(text("INSERT INTO alembic_version VALUES (:revision)"), {"revision": revision})
+        return engine
+    return stamp
+
+
+def _head():
+    config = Config(str(ALEMBIC_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(ALEMBIC_DIR / "alembic"))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+class TestSchemaCheck:
+    """Test suite for the startup schema version check"""
+
+    def test_current_schema_passes(self, migrated_engine):
+        """A database at the migration head starts normally"""
+        assert check_schema_version(migrated_engine(_head()), mode="error") is True
+
+    def test_outdated_schema_fails_startup(self, migrated_engine):
+        """A database behind the code refuses to start in error mode"""
+        with pytest.raises(RuntimeError, match="alembic upgrade head"):
+            check_schema_version(migrated_engine("0a1b2c3d4e5f"), mode="error")
+
+    def test_unmigrated_schema_only_warns_in_warn_mode(self, migrated_engine):
+        """Warn mode logs the mismatch and carries on"""
+        assert check_schema_version(migrated_engine(None), mode="warn") is False
+
+    def test_check_never_creates_tables(self, migrated_engine):
+        """The check reads the revision only; model tables are left to migrations"""
+        engine = migrated_engine(_head())
+        check_schema_version(engine, mode="error")
+
+        with engine.connect() as connection:
+            tables = connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars().all()
+        assert tables == ["alembic_version"]
+
+
+class TestMigrateScript:
+    """Test suite for the container's migration step"""
+
+    def test_create_all_database_is_stamped_at_its_revision(self):
+        """Tables without a revision are the create_all schema and get stamped before upgrading"""
+        assert unversioned_revision({"students", "payments", "club_memberships"}) == CREATE_ALL_REVISION == "b5a757fc31a9"
+
+    def test_versioned_and_empty_databases_just_upgrade(self):
+        """Nothing is stamped when Alembic already tracks the database or it has no tables"""
+        assert unversioned_revision({"alembic_version", "students"}) is None
+        assert unversioned_revision(set()) is None
+
+    def test_unknown_unversioned_schema_is_refused(self):
+        """Later tables without a revision match no single revision, so nothing is guessed"""
+        with pytest.raises(RuntimeError, match="ledger_entries"):
+            unversioned_revision({"students", "ledger_entries"})
+
+
+class TestStartupPipeline:
+    """Test suite for startup imports and timing"""
+
+    def test_models_are_registered_without_scanning(self):
+        """Importing app.models registers every table from its fixed module list"""
+        assert {"payments", "student_fee", "club_waitlist", "year_end_promotions", "ledger_entries"} <= set(Base.metadata.tables)
+
+    def test_app_does_not_import_tkinter(self):
+        """The API has no GUI toolkit on its import path"""
+        import app.main  # noqa: F401
+
+        assert "tkinter" not in sys.modules
+
+    def test_timer_reports_each_phase(self):
+        """Phases are reported in order, in milliseconds"""
+        timer = StartupTimer()
+        timer.record("imports", 0.25)
+        with timer.phase("schema_check"):
+            pass
+
+        report = timer.report()
+        assert list(report["phases"]) == ["imports", "schema_check"]
+        assert report["phases"]["imports"] == 250.0
+        assert report["total_ms"] >= 0
@@ -1,7 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate, useSearchParams } from 'react-router-dom';
-import axios from 'axios';
-import { config } from '../config';
+import { waitForPaymentStatuses } from '../services/paymentStatus';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Button } from './ui/button';
 import { Separator } from './ui/separator';
@@ -68,15 +67,16 @@ const ExamPaymentSuccess: React.FC = () => {
       loadPaymentDetails(reference);
 
       try {
-        const response = await axios.post(
-          `${config.apiUrl}/api/exams/verify/${reference}`
-        );
+        // Exam checkouts are confirmed by the webhook; keep long-polling while it is pending
+        const status = (await waitForPaymentStatuses([reference]))[reference];
 
-        if (response.data.status === 'completed') {
+        if (status === 'completed') {
           setIsVerifying(false);
           setIsVerified(true);
-        } else if (response.data.status === 'pending') {
-          setTimeout(verifyPayment, 2000);
+        } else if (status === 'pending') {
+          // Still unconfirmed after the full wait; the confirmation may yet arrive
+          setVerificationError('Payment is still being confirmed. Please refresh this page in a few minutes.');
+          setIsVerifying(false);
         } else {
           setVerificationError('Payment verification failed. Please contact support.');
           setIsVerifying(false);
@@ -2,6 +2,7 @@ import React, { useEffect, useState, useCallback } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { config } from '../../config';
+import { useAdminEvents } from '../../services/adminEvents';
 import {
   ClubAnalyticsResponse,
   ClubMembershipSummary,
@@ -237,6 +238,18 @@ const ClubMembershipAnalytics: React.FC = () => {
     fetchOverview();
   }, []);
 
+  // Refresh in place when payments land instead of polling
+  useAdminEvents(['school_fees.payment_completed'], async () => {
+    try {
+      const response = await axios.get(`${config.apiUrl}/api/admin/clubs/overview`, {
+        headers: { 'Cache-Control': 'no-cache' },
+      });
+      setOverview(response.data);
+    } catch (err) {
+      console.error('Error refreshing clubs overview:', err);
+    }
+  });
+
   // Fetch club members when filters or pagination changes
   useEffect(() => {
     if (selectedClub) {
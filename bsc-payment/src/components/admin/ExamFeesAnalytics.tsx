@@ -2,6 +2,7 @@ import React, { useEffect, useState, useCallback } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { config } from '../../config';
+import { useAdminEvents } from '../../services/adminEvents';
 import {
   ExamAnalyticsResponse,
   ExamPaymentSummary,
@@ -244,6 +245,18 @@ const ExamFeesAnalytics: React.FC = () => {
     fetchOverview();
   }, []);
 
+  // Refresh in place when payments land instead of polling
+  useAdminEvents(['exam_fees.payment_completed'], async () => {
+    try {
+      const response = await axios.get(`${config.apiUrl}/api/admin/exam-fees/overview`, {
+        headers: { 'Cache-Control': 'no-cache' },
+      });
+      setOverview(response.data);
+    } catch (err) {
+      console.error('Error refreshing exam fees overview:', err);
+    }
+  });
+
   // Fetch exam students when filters or pagination changes
   useEffect(() => {
     if (selectedExam) {
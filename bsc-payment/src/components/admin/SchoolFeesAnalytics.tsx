@@ -2,6 +2,7 @@ import React, { useEffect, useState, useCallback } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { config } from '../../config';
+import { useAdminEvents } from '../../services/adminEvents';
 import {
   SchoolFeesOverview,
   StudentPaymentInfo,
@@ -240,6 +241,18 @@ const SchoolFeesAnalytics: React.FC = () => {
     fetchOverview();
   }, []);
 
+  // Refresh in place when payments land instead of polling
+  useAdminEvents(['school_fees.payment_completed'], async () => {
+    try {
+      const response = await axios.get(`${config.apiUrl}/api/admin/school-fees/overview`, {
+        headers: { 'Cache-Control': 'no-cache' },
+      });
+      setOverview(response.data);
+    } catch (err) {
+      console.error('Error refreshing school fees overview:', err);
+    }
+  });
+
   const formatCurrency = (amount: number) => {
     return new Intl.NumberFormat('en-NG', {
       style: 'currency',
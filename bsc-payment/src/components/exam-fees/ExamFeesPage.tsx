@@ -35,7 +35,7 @@ const TEXTBOOK_PRICE = 15000;
 const ExamFeesPage: React.FC = () => {
   const navigate = useNavigate();
   const { studentId } = useParams<{ studentId: string }>();
-  const { students, loading: parentLoading } = useParent();
+  const { students, examLists, loading: parentLoading } = useParent();
 
   const [exams, setExams] = useState<Exam[]>([]);
   const [selectedExams, setSelectedExams] = useState<Map<string, SelectedExamInfo>>(new Map());
@@ -52,7 +52,15 @@ const ExamFeesPage: React.FC = () => {
   // Fetch exams for the student
   useEffect(() => {
     const fetchExams = async () => {
-      if (!studentId) return;
+      if (!studentId || parentLoading) return;
+
+      // Use the exam list from the parent bootstrap when it has one
+      const bootstrapList = examLists[studentId];
+      if (bootstrapList) {
+        setExams(bootstrapList.exam_list || []);
+        setIsLoading(false);
+        return;
+      }
 
       setIsLoading(true);
       try {
@@ -69,7 +77,7 @@ const ExamFeesPage: React.FC = () => {
     };
 
     fetchExams();
-  }, [studentId]);
+  }, [studentId, parentLoading, examLists]);
 
   const handleToggleExam = (examId: string, exam: Exam) => {
     setSelectedExams(prev => {
@@ -1,8 +1,8 @@
 import React from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from '../ui/card';
 import { Badge } from '../ui/badge';
-import { Club } from '../../types/types';
-import { Check, AlertCircle } from 'lucide-react';
+import { Club, ClubWaitlistEntry } from '../../types/types';
+import { Check, AlertCircle, Clock } from 'lucide-react';
 
 interface ClubSelectorProps {
   studentId: string;
@@ -11,6 +11,9 @@ interface ClubSelectorProps {
   selectedClubIds: string[];
   onClubChange: (studentId: string, clubIds: string[]) => void;
   maxClubs?: number;
+  // This student's open waitlist entries
+  waitlist?: ClubWaitlistEntry[];
+  onJoinWaitlist?: (studentId: string, clubId: string) => void;
 }
 
 const ClubSelector: React.FC<ClubSelectorProps> = ({
@@ -19,7 +22,9 @@ const ClubSelector: React.FC<ClubSelectorProps> = ({
   clubs,
   selectedClubIds,
   onClubChange,
-  maxClubs = 2
+  maxClubs = 2,
+  waitlist = [],
+  onJoinWaitlist
 }) => {
   const handleClubToggle = (clubId: string) => {
     if (selectedClubIds.includes(clubId)) {
@@ -52,7 +57,11 @@ const ClubSelector: React.FC<ClubSelectorProps> = ({
         <div className="grid grid-cols-1 sm:grid-cols-2 gap-2">
           {clubs.map((club) => {
             const isSelected = selectedClubIds.includes((club.id));
-            const isDisabled = !isSelected && isMaxSelected;
+            const entry = waitlist.find(e => e.club_id === club.id);
+            const isOffered = entry?.status === 'offered';
+            // A full club stays selectable for a student holding an offered seat
+            const isFull = club.seats_left === 0 && !isSelected && !isOffered;
+            const isDisabled = (!isSelected && isMaxSelected) || isFull;
 
             return (
               <div
@@ -76,6 +85,35 @@ const ClubSelector: React.FC<ClubSelectorProps> = ({
                         {club.description}
                       </p>
                     )}
+                    {club.seats_left != null && club.seats_left > 0 && !isSelected && (
+                      <p className="text-xs text-muted-foreground mt-1">
+                        {club.seats_left} {club.seats_left === 1 ? 'seat' : 'seats'} left
+                      </p>
+                    )}
+                    {isOffered && entry?.offer_expires_at && (
+                      <p className="text-xs text-primary mt-1">
+                        Seat offered until {new Date(entry.offer_expires_at).toLocaleString()}
+                      </p>
+                    )}
+                    {isFull && (
+                      entry ? (
+                        <p className="flex items-center gap-1 text-xs text-muted-foreground mt-1">
+                          <Clock className="h-3 w-3" />
+                          Full · waitlist #{entry.position}
+                        </p>
+                      ) : onJoinWaitlist && (
+                        <button
+                          type="button"
+                          onClick={(e) => {
+                            e.stopPropagation();
+                            onJoinWaitlist(studentId, club.id);
+                          }}
+                          className="text-xs font-medium text-primary underline mt-1 cursor-pointer"
+                        >
+                          Full · join waitlist
+                        </button>
+                      )
+                    )}
                   </div>
                   <div className="flex flex-col items-end gap-1">
                     <span className="text-sm font-semibold text-primary whitespace-nowrap">
@@ -11,7 +11,7 @@ import ClubSelector from './ClubSelector';
 import FeeBreakdown from './FeeBreakdown';
 import LoadingSpinner from '../shared/LoadingSpinner';
 import EmptyState from '../shared/EmptyState';
-import { Club, StudentFeeDetail, StudentFee, StudentExamFee } from '../../types/types';
+import { Club, ClubWaitlistEntry, StudentFeeDetail, StudentFee, StudentExamFee } from '../../types/types';
 import FeeService from '../../services/feeService';
 import { ArrowLeft, CreditCard, Loader2, Users } from 'lucide-react';
 
@@ -22,14 +22,16 @@ interface StudentClubSelection {
 const SchoolFeesPage: React.FC = () => {
   const navigate = useNavigate();
   const location = useLocation();
-  const { parent, students, loading: parentLoading } = useParent();
+  const { parent, students, clubs: bootstrapClubs, loading: parentLoading } = useParent();
 
   const [clubs, setClubs] = useState<Club[]>([]);
+  const [clubWaitlist, setClubWaitlist] = useState<ClubWaitlistEntry[]>([]);
   const [selectedStudentIds, setSelectedStudentIds] = useState<string[]>([]);
   const [studentClubSelections, setStudentClubSelections] = useState<StudentClubSelection>({});
   const [studentFees, setStudentFees] = useState<StudentFeeDetail[]>([]);
   const [selectedStudentFeeIds, setSelectedStudentFeeIds] = useState<string[]>([]);
   const [totalAmount, setTotalAmount] = useState(0);
+  const [quoteToken, setQuoteToken] = useState<string | null>(null);
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [isCalculating, setIsCalculating] = useState(false);
 
@@ -50,19 +52,44 @@ const SchoolFeesPage: React.FC = () => {
     }
   }, [students, location.state]);
 
-  // Fetch clubs
-  useEffect(() => {
-    const fetchClubs = async () => {
-      try {
-        const response = await axios.get(`${config.apiUrl}/api/clubs/`);
-        setClubs(response.data);
-      } catch (error) {
-        console.error('Error fetching clubs:', error);
-        toast.error('Failed to load clubs');
+  // Seats left and waitlist places change between visits, so they are always fetched live
+  const fetchClubAvailability = async () => {
+    try {
+      const response = await axios.get(`${config.apiUrl}/api/clubs/`);
+      setClubs(response.data);
+      if (students.length > 0) {
+        const params = new URLSearchParams();
+        students.forEach((student) => params.append('student_ids', String(student.id)));
+        const waitlist = await axios.get<ClubWaitlistEntry[]>(
+          `${config.apiUrl}/api/clubs/waitlist?${params.toString()}`
+        );
+        setClubWaitlist(waitlist.data);
       }
-    };
-    fetchClubs();
-  }, []);
+    } catch (error) {
+      console.error('Error fetching clubs:', error);
+      toast.error('Failed to load clubs');
+    }
+  };
+
+  // Clubs from the parent bootstrap paint first, then availability is refreshed
+  useEffect(() => {
+    if (parentLoading) return;
+    if (bootstrapClubs.length > 0) {
+      setClubs(bootstrapClubs);
+    }
+    fetchClubAvailability();
+  }, [parentLoading, bootstrapClubs, students]);
+
+  const handleJoinWaitlist = async (studentId: string, clubId: string) => {
+    try {
+      await axios.post(`${config.apiUrl}/api/clubs/${clubId}/waitlist`, { student_id: studentId });
+      toast.success('Added to the waitlist. We will hold a seat when one frees up.');
+      await fetchClubAvailability();
+    } catch (error) {
+      console.error('Error joining waitlist:', error);
+      toast.error('Failed to join the waitlist');
+    }
+  };
 
   // Calculate fees when selection changes
   useEffect(() => {
@@ -104,6 +131,7 @@ const SchoolFeesPage: React.FC = () => {
 
         setStudentFees(response.data.student_fees);
         setTotalAmount(response.data.total_amount);
+        setQuoteToken(response.data.quote_token ?? null);
       } catch (error) {
         console.error('Error calculating fees:', error);
         toast.error('Failed to calculate fees');
@@ -185,7 +213,8 @@ const SchoolFeesPage: React.FC = () => {
         payment_method: 'bank_transfer',
         description: `Payment for ${selectedStudentIds.length} student(s)`,
         student_club_ids: studentClubIds,
-        student_fee_ids: selectedStudentFeeIds
+        student_fee_ids: selectedStudentFeeIds,
+        quote_token: quoteToken
       });
 
       if (response.data.data?.authorization_url) {
@@ -198,7 +227,13 @@ const SchoolFeesPage: React.FC = () => {
       }
     } catch (error) {
       console.error('Payment error:', error);
-      toast.error('Failed to initialize payment. Please try again.');
+      if (axios.isAxiosError(error) && error.response?.status === 409) {
+        // A club filled up since the page loaded
+        toast.error(`${error.response.data?.detail ?? 'A club is full'}. Pick another club or join its waitlist.`);
+        fetchClubAvailability();
+      } else {
+        toast.error('Failed to initialize payment. Please try again.');
+      }
       setIsSubmitting(false);
     }
   };
@@ -276,6 +311,8 @@ const SchoolFeesPage: React.FC = () => {
                     clubs={clubs}
                     selectedClubIds={studentClubSelections[studentId] || []}
                     onClubChange={handleClubChange}
+                    waitlist={clubWaitlist.filter(e => e.student_id === studentId)}
+                    onJoinWaitlist={handleJoinWaitlist}
                   />
                 );
               })}
@@ -1,11 +1,13 @@
 import React, { createContext, useContext, useState, useEffect, ReactNode } from 'react';
 import axios from 'axios';
 import { config } from '../config';
-import { Parent, StudentWithStatus, ParentDashboardData } from '../types/types';
+import { Parent, StudentWithStatus, ParentBootstrapData, Club, StudentExamList } from '../types/types';
 
 interface ParentContextType {
   parent: Parent | null;
   students: StudentWithStatus[];
+  clubs: Club[];
+  examLists: Record<string, StudentExamList>;
   loading: boolean;
   error: string | null;
   refreshData: () => Promise<void>;
@@ -23,6 +25,8 @@ interface ParentProviderProps {
 export const ParentProvider: React.FC<ParentProviderProps> = ({ children }) => {
   const [parent, setParent] = useState<Parent | null>(null);
   const [students, setStudents] = useState<StudentWithStatus[]>([]);
+  const [clubs, setClubs] = useState<Club[]>([]);
+  const [examLists, setExamLists] = useState<Record<string, StudentExamList>>({});
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -31,12 +35,15 @@ export const ParentProvider: React.FC<ParentProviderProps> = ({ children }) => {
     setError(null);
 
     try {
-      const response = await axios.get<ParentDashboardData>(
-        `${config.apiUrl}/api/parents/${MOCK_PARENT_ID}/students`
+      // One round trip for the parent, children, clubs and exam lists
+      const response = await axios.get<ParentBootstrapData>(
+        `${config.apiUrl}/api/parents/${MOCK_PARENT_ID}/bootstrap`
       );
 
       setParent(response.data.parent);
       setStudents(response.data.students);
+      setClubs(response.data.clubs);
+      setExamLists(response.data.exam_lists);
     } catch (err) {
       console.error('Error fetching parent data:', err);
       // For development, use mock data if API fails
@@ -49,6 +56,8 @@ export const ParentProvider: React.FC<ParentProviderProps> = ({ children }) => {
         phone: '08032162491'
       });
       setStudents([]);
+      setClubs([]);
+      setExamLists({});
       setError('Using mock data - API not available');
     } finally {
       setLoading(false);
@@ -68,6 +77,8 @@ export const ParentProvider: React.FC<ParentProviderProps> = ({ children }) => {
       value={{
         parent,
         students,
+        clubs,
+        examLists,
         loading,
         error,
         refreshData
@@ -0,0 +1,41 @@
+import { useEffect, useRef } from 'react';
+import { config } from '../config';
+
+export interface AdminEvent<T = Record<string, unknown>> {
+  type: string;
+  at: string;
+  data: T;
+}
+
+// Bursts of payments (e.g. a webhook retry storm) collapse into one refresh
+const REFRESH_DEBOUNCE_MS = 1500;
+
+/**
+ * Subscribe to the admin Server-Sent Events stream and call `onEvent` (debounced)
+ * whenever one of `eventTypes` arrives. EventSource reconnects on its own.
+ */
+export function useAdminEvents(eventTypes: string[], onEvent: (event: AdminEvent) => void) {
+  const handlerRef = useRef(onEvent);
+  handlerRef.current = onEvent;
+  const typesKey = eventTypes.join(',');
+
+  useEffect(() => {
+    const source = new EventSource(`${config.apiUrl}/api/admin/events`);
+    let timer: ReturnType<typeof setTimeout> | undefined;
+
+    const listener = (message: MessageEvent) => {
+      const event: AdminEvent = JSON.parse(message.data);
+      clearTimeout(timer);
+      timer = setTimeout(() => handlerRef.current(event), REFRESH_DEBOUNCE_MS);
+    };
+
+    const types = typesKey.split(',');
+    types.forEach((type) => source.addEventListener(type, listener as EventListener));
+
+    return () => {
+      clearTimeout(timer);
+      types.forEach((type) => source.removeEventListener(type, listener as EventListener));
+      source.close();
+    };
+  }, [typesKey]);
+}
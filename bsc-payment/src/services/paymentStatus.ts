@@ -0,0 +1,65 @@
+import axios from 'axios';
+import { config } from '../config';
+
+export type PaymentStatusMap = Record<string, string>;
+
+// The server holds each request up to this long while a reference is pending
+const LONG_POLL_SECONDS = 25;
+// How long to keep waiting for a confirmation; slow webhooks can take minutes
+const WAIT_DEADLINE_MS = 15 * 60 * 1000;
+// Back-off after a failed round (proxy timeout, server restart), doubling up to the cap
+const RETRY_DELAY_MS = 1000;
+const MAX_RETRY_DELAY_MS = 30 * 1000;
+
+const sleep = (ms: number) => new Promise<void>((resolve) => setTimeout(resolve, ms));
+
+async function pollPaymentStatuses(references: string[]): Promise<PaymentStatusMap> {
+  const params = new URLSearchParams();
+  references.forEach((reference) => params.append('references', reference));
+  params.append('timeout', String(LONG_POLL_SECONDS));
+
+  const response = await axios.get<PaymentStatusMap>(
+    `${config.apiUrl}/api/payments/status?${params.toString()}`,
+    { timeout: (LONG_POLL_SECONDS + 10) * 1000 }
+  );
+  return response.data;
+}
+
+/**
+ * Long-poll /api/payments/status until none of `references` is pending or
+ * the deadline passes. Each round is one held request that the server answers
+ * as soon as a confirmation lands, and the next round starts straight away
+ * while anything is pending. A failed round is retried with back-off; the
+ * error is only thrown if no round succeeded before the deadline.
+ */
+export async function waitForPaymentStatuses(
+  references: string[],
+  deadline: number = Date.now() + WAIT_DEADLINE_MS
+): Promise<PaymentStatusMap> {
+  let statuses: PaymentStatusMap = references.reduce(
+    (pending, reference) => ({ ...pending, [reference]: 'pending' }),
+    {} as PaymentStatusMap
+  );
+  let answered = false;
+  let lastError: unknown = null;
+  let retryDelay = RETRY_DELAY_MS;
+
+  while (Date.now() < deadline) {
+    try {
+      statuses = await pollPaymentStatuses(references);
+      answered = true;
+      retryDelay = RETRY_DELAY_MS;
+      if (!Object.values(statuses).includes('pending')) {
+        return statuses;
+      }
+    } catch (error) {
+      lastError = error;
+      await sleep(Math.min(retryDelay, Math.max(deadline - Date.now(), 0)));
+      retryDelay = Math.min(retryDelay * 2, MAX_RETRY_DELAY_MS);
+    }
+  }
+  if (!answered && lastError) {
+    throw lastError;
+  }
+  return statuses;
+}
@@ -4,6 +4,18 @@ export interface Club {
   price: number;
   description?: string;
   capacity?: number;
+  // Live availability; null or missing when the club has no capacity limit
+  seats_left?: number | null;
+}
+
+export interface ClubWaitlistEntry {
+  id: string;
+  club_id: string;
+  student_id: string;
+  status: 'waiting' | 'offered';
+  position: number | null;
+  queued_at: string;
+  offer_expires_at: string | null;
 }
 
 export interface Exam {
@@ -68,6 +80,32 @@ export interface ParentDashboardData {
   students: StudentWithStatus[];
 }
 
+export interface StudentExamStatus {
+  exam_id: string;
+  exam_name: string;
+  exam_price: number;
+  extra_fees: number | null;
+  amount_paid: number;
+  amount_due: number;
+  is_fully_paid: boolean;
+}
+
+export interface StudentExamList {
+  id: string | null;
+  year_group: string | null;
+  class_name: string | null;
+  student_id: string;
+  exam_list: StudentExamStatus[] | null;
+}
+
+// Everything the parent portal needs for first paint, from /api/parents/{id}/bootstrap
+export interface ParentBootstrapData extends ParentDashboardData {
+  fees: { fees: Record<string, number>; total: number };
+  clubs: Club[];
+  fee_quote: CalculatedFees | null;
+  exam_lists: Record<string, StudentExamList>;
+}
+
 export interface FeeCategory {
   name: string;
   amount: number;
@@ -105,6 +143,7 @@ export interface StudentFeeDetail{
 export interface CalculatedFees{
   total_amount: number
   student_fees: StudentFeeDetail[]
+  quote_token?: string | null
 }
 
 // ============ Normalized Fee Types ============